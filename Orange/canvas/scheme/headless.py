@@ -0,0 +1,561 @@
+"""
+Headless Workflow Runner
+========================
+
+Run a workflow (.ows) without the canvas, with independent nodes processed
+concurrently.
+
+Widgets are instantiated offscreen in a pool of worker processes; each node
+lives in one worker for the whole run. The coordinating process loads the
+same scheme and propagates the signals with a :class:`HeadlessSignalManager`,
+which dispatches all nodes on the update front (see
+:func:`SignalManager.node_update_front`) to their workers at once. Signal
+values are pickled between the processes.
+
+Qt4 cannot create widgets without a display. On X11, if ``DISPLAY`` is not
+set, the runner starts a virtual display with ``Xvfb`` for the workers.
+
+Usage::
+
+    python -m Orange.canvas.scheme.headless -j 8 \\
+        -o "Test & Score:Evaluation Results=results.pkl" workflow.ows
+
+"""
+import os
+import sys
+import time
+import shutil
+import pickle
+import logging
+import optparse
+import traceback
+import subprocess
+import multiprocessing
+from multiprocessing.connection import wait
+from collections import namedtuple, defaultdict
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from PyQt4.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from .scheme import Scheme
+from .readwrite import scheme_load
+from .signalmanager import SignalManager, compress_signals, \
+    can_enable_dynamic
+from ..utils import name_lookup
+
+log = logging.getLogger(__name__)
+
+
+NodeReport = namedtuple(
+    "NodeReport",
+    ["node",        # index of the node in the scheme
+     "outputs",     # list of (channel name, value, signal id)
+     "wall_time",   # wall time of the update in seconds
+     "max_rss",     # peak resident memory of the worker in MB
+     "rss_growth",  # increase of the peak memory during the update in MB
+     "error"]       # error message or None
+)
+
+
+def _max_rss():
+    """Return the peak resident memory of this process in MB."""
+    if resource is None:
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+
+
+def start_virtual_display():
+    """
+    Start a virtual X display if widgets need a display and none is set.
+    Set `DISPLAY` and return the ``Xvfb`` process, or `None` if a display is
+    not needed.
+    """
+    if sys.platform in ("win32", "darwin") or os.environ.get("DISPLAY"):
+        return None
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("Widgets need a display: set DISPLAY or "
+                           "install Xvfb")
+    read_fd, write_fd = os.pipe()
+    try:
+        # Xvfb writes the number of the display it chose to write_fd
+        process = subprocess.Popen(
+            ["Xvfb", "-displayfd", str(write_fd), "-nolisten", "tcp"],
+            pass_fds=(write_fd,),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        display = f.readline().strip()
+    if not display:
+        process.wait()
+        raise RuntimeError("Xvfb exited with code {}"
+                           .format(process.returncode))
+    os.environ["DISPLAY"] = ":" + display
+    return process
+
+
+def load_scheme(filename):
+    """Load the scheme from a .ows file."""
+    scheme = Scheme()
+    with open(filename, "rb") as f:
+        scheme_load(scheme, f)
+    return scheme
+
+
+def assign_workers(scheme, n_workers):
+    """
+    Assign nodes of the scheme to workers.
+
+    Nodes are ordered by their depth in the workflow graph and distributed
+    among workers in a round-robin manner, so that nodes at the same depth,
+    which are typically independent, are hosted by different workers.
+
+    Returns:
+        dict: worker index for each node
+    """
+    depth = {}
+
+    def node_depth(node):
+        if node not in depth:
+            sources = [link.source_node
+                       for link in scheme.find_links(sink_node=node)
+                       if link.enabled]
+            depth[node] = 1 + max(map(node_depth, sources), default=-1)
+        return depth[node]
+
+    order = sorted(range(len(scheme.nodes)),
+                   key=lambda i: (node_depth(scheme.nodes[i]), i))
+    return {scheme.nodes[i]: k % n_workers for k, i in enumerate(order)}
+
+
+class WidgetHost:
+    """
+    Host for widgets of the scheme's nodes in a worker process.
+
+    It serves as the widgets' signal manager and collects the signals they
+    send while they are updated.
+
+    Args:
+        scheme (Scheme): the scheme
+        timeout (float): the time limit for an update of a widget in
+            seconds, or `None` for no limit
+    """
+    def __init__(self, scheme, timeout=None):
+        self.scheme = scheme
+        self.timeout = timeout
+        self.widgets = {}
+        self._outputs = []
+        self._loop = QEventLoop()
+        self._timer = QTimer(interval=100)
+
+    def send(self, widget, channelname, value, signal_id):
+        """Signal manager's `send`, called by widgets."""
+        node = self.scheme.nodes.index(self.widgets_node(widget))
+        self._outputs.append((channelname, value, (node, channelname,
+                                                   signal_id)))
+
+    def widgets_node(self, widget):
+        for node, node_widget in self.widgets.items():
+            if node_widget is widget:
+                return node
+        raise KeyError(widget)
+
+    def _run(self, node_index, func, *args):
+        node = self.scheme.nodes[node_index]
+        self._outputs = []
+        max_rss = _max_rss()
+        start = time.perf_counter()
+        try:
+            func(node, *args)
+            error = None
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Error in %r", node.title)
+            error = traceback.format_exc()
+        wall_time = time.perf_counter() - start
+        return NodeReport(node_index, self._outputs, wall_time, _max_rss(),
+                          _max_rss() - max_rss, error)
+
+    def create(self, node_index):
+        """Create the widget for the node; return a :class:`NodeReport`."""
+        return self._run(node_index, self._create)
+
+    def process(self, node_index, signals):
+        """
+        Deliver signals to the node's widget and wait until it finishes
+        processing them; return a :class:`NodeReport`.
+
+        Args:
+            node_index (int): index of the node
+            signals (list of (int, object, object)): link indices, values
+                and ids of signals
+        """
+        return self._run(node_index, self._process, signals)
+
+    def _create(self, node):
+        klass = name_lookup(node.description.qualified_name)
+        widget = klass.__new__(
+            klass, None, signal_manager=self,
+            stored_settings=node.properties, env={})
+        self.widgets[node] = widget
+        try:
+            widget.__init__()
+        except Exception:
+            del self.widgets[node]
+            raise
+        self._wait(widget)
+
+    def _process(self, node, signals):
+        widget = self.widgets.get(node)
+        if widget is None:
+            raise RuntimeError("the widget was not created")
+        errors = []
+        for link_index, value, signal_id in signals:
+            link = self.scheme.links[link_index]
+            if link.is_dynamic():
+                link.dynamic_enabled = can_enable_dynamic(link, value)
+                if not link.dynamic_enabled:
+                    value = None
+            handler = link.sink_channel.handler
+            if handler.startswith("self."):
+                handler = handler.split(".", 1)[1]
+            handler = getattr(widget, handler)
+            args = (value,) if link.sink_channel.single \
+                else (value, signal_id)
+            try:
+                handler(*args)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Error calling '%s' of '%s'",
+                              handler.__name__, node.title)
+                errors.append(traceback.format_exc())
+        widget.handleNewSignals()
+        self._wait(widget)
+        if errors:
+            raise RuntimeError("\n".join(errors))
+
+    def _wait(self, widget):
+        # Let the widget finish the work it does in the event loop or in
+        # other threads; the timer wakes the loop to check the time limit
+        if self.timeout is not None:
+            deadline = time.perf_counter() + self.timeout
+        QCoreApplication.processEvents()
+        self._timer.start()
+        try:
+            while widget.processingState or widget.isBlocking():
+                if self.timeout is not None and \
+                        time.perf_counter() > deadline:
+                    raise RuntimeError("the widget did not finish in {} s"
+                                       .format(self.timeout))
+                self._loop.processEvents(QEventLoop.WaitForMoreEvents)
+        finally:
+            self._timer.stop()
+        QCoreApplication.processEvents()
+
+    def clear(self):
+        for widget in self.widgets.values():
+            widget.onDeleteWidget()
+        self.widgets.clear()
+
+
+def _worker_main(filename, connection, timeout):
+    from PyQt4.QtGui import QApplication
+    app = QApplication([])  # pylint: disable=unused-variable
+    host = WidgetHost(load_scheme(filename), timeout)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        command, args = message
+        report = getattr(host, command)(*args)
+        try:
+            connection.send(report)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            connection.send(report._replace(
+                outputs=[],
+                error="Outputs cannot be sent between processes:\n" +
+                traceback.format_exc()))
+    host.clear()
+    connection.close()
+
+
+class HeadlessSignalManager(SignalManager):
+    """
+    A signal manager that updates the nodes in worker processes.
+
+    Nodes that are being updated are treated as blocking, so neither they
+    nor their descendants are on the update front until they finish.
+
+    Args:
+        scheme (Scheme): the scheme, loaded from `filename`
+        filename (str): the name of the .ows file
+        n_jobs (int): the number of worker processes
+        timeout (float): the time limit for an update of a widget in
+            seconds, or `None` for no limit
+    """
+    def __init__(self, scheme, filename, n_jobs, timeout=None):
+        super().__init__(scheme)
+        for node in scheme.nodes:
+            self.on_node_added(node)
+        n_jobs = max(1, min(n_jobs, len(scheme.nodes)))
+        self._worker_of = assign_workers(scheme, n_jobs)
+        self._running = {}  # worker index -> node
+        #: Reports for nodes, in the order in which they finished
+        self.reports = defaultdict(list)
+
+        self._display = start_virtual_display()
+        context = multiprocessing.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        for _ in range(n_jobs):
+            connection, child = context.Pipe()
+            process = context.Process(target=_worker_main,
+                                      args=(filename, child, timeout),
+                                      daemon=True)
+            process.start()
+            # only the worker keeps its end open, so that its death
+            # closes the connection
+            child.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def _update(self):
+        # Processing is driven by `run`, not by the event loop
+        pass
+
+    def is_blocking(self, node):
+        """Reimplemented from `SignalManager`"""
+        return node in self._running.values()
+
+    def compress_signals(self, signals):
+        """Reimplemented from `SignalManager`"""
+        return compress_signals(signals)
+
+    def send_to_node(self, node, signals):
+        """Reimplemented from `SignalManager`: start the update of the node
+        in its worker."""
+        links = self.scheme().links
+        self._start(node, "process",
+                    ([(links.index(signal.link), signal.value, signal.id)
+                      for signal in signals],))
+
+    def _start(self, node, command, args):
+        worker = self._worker_of[node]
+        node_index = self.scheme().nodes.index(node)
+        self._running[worker] = node
+        try:
+            self._connections[worker].send((command, (node_index,) + args))
+        except OSError as ex:
+            raise self._worker_error(worker, ex) from ex
+
+    def _worker_error(self, worker, exc):
+        # Return an exception that tells which worker died and why
+        process = self._processes[worker]
+        process.join(1)
+        node = self._running.get(worker)
+        return RuntimeError(
+            "Worker {} (pid {}) updating '{}' has died with exit code {} "
+            "({}: {})".format(worker, process.pid,
+                              node.title if node else None,
+                              process.exitcode, type(exc).__name__, exc))
+
+    def _collect(self):
+        # Wait for at least one running node to finish and deliver its
+        # outputs; outputs of other workers are delivered before raising an
+        # error for a worker that died
+        busy = [self._connections[worker] for worker in self._running]
+        errors = []
+        for connection in wait(busy):
+            worker = self._connections.index(connection)
+            try:
+                report = connection.recv()
+            except (EOFError, OSError) as ex:
+                errors.append(self._worker_error(worker, ex))
+                continue
+            node = self._running.pop(worker)
+            self.reports[node].append(report)
+            log.info("%s finished in %.2f s", node.title, report.wall_time)
+            if report.error:
+                log.error("%s failed:\n%s", node.title, report.error)
+            for channelname, value, signal_id in report.outputs:
+                channel = node.output_channel(channelname)
+                self.send(node, channel, value, signal_id)
+        if errors:
+            for error in errors[1:]:
+                log.error("%s", error)
+            raise errors[0]
+
+    def run(self):
+        """
+        Create the widgets and process the signals until there are none.
+        """
+        pending = list(self.scheme().nodes)
+        while pending or self._running:
+            for node in list(pending):
+                if self._worker_of[node] not in self._running:
+                    self._start(node, "create", ())
+                    pending.remove(node)
+            self._collect()
+
+        while True:
+            for node in self.node_update_front():
+                if self._worker_of[node] not in self._running:
+                    signals = self.pending_input_signals(node)
+                    self.remove_pending_signals(node)
+                    self.send_to_node(node, self.compress_signals(signals))
+            if not self._running:
+                break
+            self._collect()
+
+    def output(self, node, channelname):
+        """Return the last value sent by the node on the channel (if the
+        output has several ids, the one with the last id)."""
+        values = self._node_outputs[node][node.output_channel(channelname)]
+        values = [value for value in values.values() if value is not None]
+        return values[-1] if values else None
+
+    def shutdown(self, timeout=10):
+        """Stop the workers; terminate those that do not stop in `timeout`
+        seconds."""
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass  # the worker has already died
+        for worker, process in enumerate(self._processes):
+            process.join(timeout)
+            if process.is_alive():
+                log.warning("Terminating worker %i (pid %i)",
+                            worker, process.pid)
+                process.terminate()
+                process.join(timeout)
+        for connection in self._connections:
+            connection.close()
+        if self._display is not None:
+            self._display.terminate()
+            self._display.wait()
+            del os.environ["DISPLAY"]
+            self._display = None
+
+
+def save_output(value, filename):
+    """Save a table with its writer (by extension) and other objects with
+    pickle."""
+    from Orange.data import Table
+    if isinstance(value, Table):
+        value.save(filename)
+    else:
+        with open(filename, "wb") as f:
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+
+
+def parse_output_spec(spec):
+    """
+    Parse the specification of an output, "node title:channel=filename".
+
+    Returns:
+        (str, str, str): the node's title, the channel name and the filename
+    """
+    target, sep, filename = spec.rpartition("=")
+    title, sep2, channel = target.rpartition(":")
+    if not (sep and sep2 and title and channel and filename):
+        raise ValueError("invalid output specification '{}'".format(spec))
+    return title, channel, filename
+
+
+def report_table(manager):
+    """Return the text of a table with a line for each node."""
+    lines = ["{:<30} {:>7} {:>10} {:>10} {:>10}  {}".format(
+        "Node", "Updates", "Time [s]", "Peak [MB]", "Growth [MB]", "Status")]
+    for node in manager.scheme().nodes:
+        reports = manager.reports[node]
+        lines.append("{:<30} {:>7} {:>10.2f} {:>10.1f} {:>10.1f}  {}".format(
+            node.title[:30], len(reports),
+            sum(r.wall_time for r in reports),
+            max((r.max_rss for r in reports), default=float("nan")),
+            sum(r.rss_growth for r in reports),
+            "error" if any(r.error for r in reports) else "ok"))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    usage = "usage: %prog [options] workflow_file"
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("-j", "--jobs",
+                      help="The number of worker processes "
+                           "(default: the number of processors)",
+                      type="int", default=os.cpu_count())
+    parser.add_option("-o", "--output",
+                      action="append", default=[],
+                      help='Save an output: "node title:channel=filename"; '
+                           'tables are saved by extension, other objects '
+                           'are pickled')
+    parser.add_option("-t", "--timeout",
+                      help="The time limit for an update of a widget "
+                           "in seconds (default: no limit)",
+                      type="float", default=None)
+    parser.add_option("-l", "--log-level",
+                      help="Logging level (0, 1, 2, 3, 4)",
+                      type="int", default=2)
+    (options, args) = parser.parse_args(argv[1:])
+    if len(args) != 1:
+        parser.error("a single workflow file is required")
+
+    levels = [logging.CRITICAL,
+              logging.ERROR,
+              logging.WARN,
+              logging.INFO,
+              logging.DEBUG]
+    logging.basicConfig(level=levels[min(options.log_level, 4)])
+
+    try:
+        outputs = [parse_output_spec(spec) for spec in options.output]
+    except ValueError as ex:
+        parser.error(str(ex))
+
+    filename = args[0]
+    app = QCoreApplication([])  # pylint: disable=unused-variable
+    scheme = load_scheme(filename)
+    nodes = {node.title: node for node in scheme.nodes}
+    for title, channel, _ in outputs:
+        if title not in nodes:
+            parser.error("no node '{}' in the workflow".format(title))
+        try:
+            nodes[title].output_channel(channel)
+        except ValueError:
+            parser.error("node '{}' has no output '{}'".format(title, channel))
+
+    manager = HeadlessSignalManager(scheme, filename, options.jobs,
+                                    options.timeout)
+    start = time.perf_counter()
+    try:
+        manager.run()
+    finally:
+        manager.shutdown()
+    print(report_table(manager))
+    print("Total wall time: {:.2f} s".format(time.perf_counter() - start))
+
+    for title, channel, output_filename in outputs:
+        value = manager.output(nodes[title], channel)
+        if value is None:
+            log.warning("No value on '%s' of '%s'", channel, title)
+        else:
+            save_output(value, output_filename)
+
+    failed = any(report.error for reports in manager.reports.values()
+                 for report in reports)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Tests for the headless workflow runner
+"""
+import os
+import tempfile
+
+from ...gui import test
+from ...registry.tests import small_testing_registry
+
+from .. import Scheme, SchemeLink
+from ..readwrite import scheme_to_ows_stream
+from ..headless import assign_workers, parse_output_spec, load_scheme, \
+    HeadlessSignalManager
+
+
+class TestHeadless(test.QCoreAppTestCase):
+    def setUp(self):
+        super().setUp()
+        reg = small_testing_registry()
+        base = "Orange.widgets"
+        scheme = Scheme()
+        file_node = scheme.new_node(reg.widget(base + ".data.owfile.OWFile"))
+        discretize = scheme.new_node(
+            reg.widget(base + ".data.owdiscretize.OWDiscretize"))
+        bayes = scheme.new_node(
+            reg.widget(base + ".classify.ownaivebayes.OWNaiveBayes"))
+        scheme.add_link(SchemeLink(file_node, "Data", discretize, "Data"))
+        scheme.add_link(SchemeLink(discretize, "Data", bayes, "Data"))
+        fd, self.filename = tempfile.mkstemp(suffix=".ows")
+        with os.fdopen(fd, "wb") as f:
+            scheme_to_ows_stream(scheme, f)
+
+    def tearDown(self):
+        os.remove(self.filename)
+        super().tearDown()
+
+    def test_run(self):
+        scheme = load_scheme(self.filename)
+        file_node, discretize, bayes = scheme.nodes
+        manager = HeadlessSignalManager(scheme, self.filename, 2)
+        try:
+            manager.run()
+        finally:
+            manager.shutdown()
+        for node in scheme.nodes:
+            self.assertTrue(manager.reports[node])
+            self.assertFalse(any(r.error for r in manager.reports[node]))
+        data = manager.output(discretize, "Data")
+        self.assertEqual(len(data), 150)
+        self.assertTrue(all(var.is_discrete
+                            for var in data.domain.attributes))
+        self.assertIsNotNone(manager.output(bayes, "Classifier"))
+
+    def test_worker_died(self):
+        scheme = load_scheme(self.filename)
+        manager = HeadlessSignalManager(scheme, self.filename, 2)
+        try:
+            manager._processes[0].terminate()
+            manager._processes[0].join()
+            with self.assertRaisesRegex(RuntimeError, "Worker 0 .* died"):
+                manager.run()
+        finally:
+            manager.shutdown(timeout=1)
+
+    def test_assign_workers(self):
+        reg = small_testing_registry()
+        base = "Orange.widgets"
+        file_desc = reg.widget(base + ".data.owfile.OWFile")
+        discretize_desc = reg.widget(base + ".data.owdiscretize.OWDiscretize")
+        bayes_desc = reg.widget(base + ".classify.ownaivebayes.OWNaiveBayes")
+
+        scheme = Scheme()
+        file_node = scheme.new_node(file_desc)
+        bayes1 = scheme.new_node(bayes_desc)
+        discretize = scheme.new_node(discretize_desc)
+        bayes2 = scheme.new_node(bayes_desc)
+        scheme.add_link(SchemeLink(file_node, "Data", discretize, "Data"))
+        scheme.add_link(SchemeLink(file_node, "Data", bayes1, "Data"))
+        scheme.add_link(SchemeLink(discretize, "Data", bayes2, "Data"))
+
+        workers = assign_workers(scheme, 2)
+        self.assertEqual(set(workers), set(scheme.nodes))
+        # independent nodes at the same depth are on different workers
+        self.assertNotEqual(workers[bayes1], workers[discretize])
+        self.assertEqual(set(assign_workers(scheme, 1).values()), {0})
+        self.assertEqual(len(set(assign_workers(scheme, 8).values())), 4)
+
+    def test_parse_output_spec(self):
+        self.assertEqual(
+            parse_output_spec("Test & Score:Evaluation Results=res.pkl"),
+            ("Test & Score", "Evaluation Results", "res.pkl"))
+        self.assertEqual(parse_output_spec("a:b:Data=out.tab"),
+                         ("a:b", "Data", "out.tab"))
+        for spec in ("File=x.tab", "File:Data", ":Data=x.tab", "File:=x"):
+            self.assertRaises(ValueError, parse_output_spec, spec)
@@ -28,6 +28,7 @@ struct Args {
 	float max_majority, skip_prob;
 
 	int type, *attr_split_so_far, num_attrs, cls_vals, *attr_vals, *domain;
+	unsigned long long rand_state;
 };
 
 struct SimpleTreeNode {
@@ -41,24 +42,34 @@ struct SimpleTreeNode {
 
 struct Example {
 	double *x, y, weight;
+	double key;  /* value of the attribute by which the examples are sorted */
 };
 
 enum { DiscreteNode, ContinuousNode, PredictorNode };
 enum { Classification, Regression };
 enum { IntVar, FloatVar };
 
-int compar_attr;
+#define RANDOM_MAX 0x7fffffff
 
-/* This function uses the global variable compar_attr.
- * Examples with unknowns are larger so that, when sorted, they appear at the bottom.
+/* A linear congruential generator with the state kept in args, so that trees
+ * can be built in parallel threads. Returns a number from [0, RANDOM_MAX].
+ */
+int
+random_int(struct Args *args)
+{
+	args->rand_state = args->rand_state * 6364136223846793005ULL + 1442695040888963407ULL;
+	return (int)(args->rand_state >> 33);
+}
+
+/* Examples with unknowns are larger so that, when sorted, they appear at the bottom.
  */
 int
 compar_examples(const void *ptr1, const void *ptr2)
 {
 	double x1, x2;
 
-	x1 = ((struct Example *)ptr1)->x[compar_attr];
-	x2 = ((struct Example *)ptr2)->x[compar_attr];
+	x1 = ((struct Example *)ptr1)->key;
+	x2 = ((struct Example *)ptr2)->key;
 	if (isnan(x1))
 		return 1;
 	if (isnan(x2))
@@ -70,6 +81,19 @@ compar_examples(const void *ptr1, const void *ptr2)
 	return 0;
 }
 
+/* Sort examples by the values of attribute attr; this is reentrant, unlike
+ * sorting with a comparison function that reads the attribute from a global.
+ */
+void
+sort_examples(struct Example *examples, int size, int attr)
+{
+	struct Example *ex, *ex_end;
+
+	for (ex = examples, ex_end = examples + size; ex < ex_end; ex++)
+		ex->key = ex->x[attr];
+	qsort(examples, size, sizeof(struct Example), compar_examples);
+}
+
 float
 entropy(float *xs, int size)
 {
@@ -114,8 +138,7 @@ gain_ratio_c(struct Example *examples, int size, int attr, float cls_entropy, st
 	ASSERT(attr_dist = (float *)calloc(2, sizeof *attr_dist));
 
 	/* sort */
-	compar_attr = attr;
-	qsort(examples, size, sizeof(struct Example), compar_examples);
+	sort_examples(examples, size, attr);
 
 	/* compute gain ratio for every split */
 	size_known = size;
@@ -245,8 +268,7 @@ mse_c(struct Example *examples, int size, int attr, float cls_mse, struct Args *
 	min_instances = args->min_instances < 1 ? 1 : args->min_instances;
 
 	/* sort */
-	compar_attr = attr;
-	qsort(examples, size, sizeof(struct Example), compar_examples);
+	sort_examples(examples, size, attr);
 
 	/* compute mse for every split */
 	size_known = size;
@@ -450,7 +472,7 @@ build_tree_(struct Example *examples, int size, int depth, struct SimpleTreeNode
 	for (i = 0; i < args->num_attrs; i++) {
 		if (!args->attr_split_so_far[i]) {
 			/* select random subset of attributes */
-			if ((double)rand() / (double)RAND_MAX < args->skip_prob)
+			if ((double)random_int(args) / (double)RANDOM_MAX < args->skip_prob)
 				continue;
 
 			if (args->domain[i] == IntVar) {
@@ -592,13 +614,13 @@ build_tree(double *x, double *y, double *w, int size, int size_w, int min_instan
 	struct Args args;
 	int i, ind;
 
-	srand(seed);
+	args.rand_state = (unsigned int)seed;
 
 	/* create a tabel with pointers to examples */
 	ASSERT(examples = (struct Example *)calloc(size, sizeof *examples));
 	for (i = 0; i < size; i++) {
 		if (bootstrap) {
-			ind = rand() % size;
+			ind = random_int(&args) % size;
 		} else {
 			ind = i;
 		}
@@ -721,6 +743,55 @@ predict_regression(double *x, int size, struct SimpleTreeNode *node, int num_att
 	}
 }
 
+/* Average the class probabilities predicted by n_trees trees; as in
+ * predict_classification, the predictions of each tree are normalized.
+ */
+SIMPLE_TREE_EXPORT
+void
+predict_classification_forest(double *x, int size, struct SimpleTreeNode **trees, int n_trees, int num_attrs, int cls_vals, double *p)
+{
+	int i, j, t;
+	double *xx, *pp, *tree_p;
+	double sum;
+
+	ASSERT(tree_p = (double *)malloc(cls_vals * sizeof *tree_p));
+	for (i = 0; i < size; i++) {
+		xx = x + i * num_attrs;
+		pp = p + i * cls_vals;
+		for (t = 0; t < n_trees; t++) {
+			for (j = 0; j < cls_vals; j++)
+				tree_p[j] = 0.0;
+			predict_classification_(xx, trees[t], cls_vals, tree_p);
+			sum = 0;
+			for (j = 0; j < cls_vals; j++)
+				sum += tree_p[j];
+			for (j = 0; j < cls_vals; j++)
+				pp[j] += tree_p[j] / sum;
+		}
+		for (j = 0; j < cls_vals; j++)
+			pp[j] /= n_trees;
+	}
+	free(tree_p);
+}
+
+SIMPLE_TREE_EXPORT
+void
+predict_regression_forest(double *x, int size, struct SimpleTreeNode **trees, int n_trees, int num_attrs, double *p)
+{
+	int i, t;
+	double sum, n;
+
+	for (i = 0; i < size; i++) {
+		p[i] = 0.0;
+		for (t = 0; t < n_trees; t++) {
+			sum = n = 0;
+			predict_regression_(x + i * num_attrs, trees[t], &sum, &n);
+			p[i] += sum / n;
+		}
+		p[i] /= n_trees;
+	}
+}
+
 SIMPLE_TREE_EXPORT
 struct SimpleTreeNode *
 new_node(int children_size, int type, int cls_vals)
@@ -1,10 +1,44 @@
+import numpy as np
 import sklearn.neighbors as skl_neighbors
+
 from Orange.classification import SklLearner
+from Orange.distance import Distance
+from Orange.distance.neighbors import NeighborIndex, neighbor_weights
 
 __all__ = ["KNNLearner"]
 
 
+class IndexKNeighborsClassifier:
+    """
+    Classifier with the interface of scikit-learn's estimators that finds
+    neighbours with :obj:`Orange.distance.NeighborIndex`.
+    """
+    def __init__(self, index, y, n_neighbors=5, weights="uniform"):
+        self.index = index
+        self.classes_, self._y = np.unique(y, return_inverse=True)
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+
+    def predict_proba(self, X):
+        indices, distances = self.index.query(self.n_neighbors, X)
+        weights = neighbor_weights(distances, self.weights)
+        probs = np.zeros((len(indices), len(self.classes_)))
+        rows = np.repeat(np.arange(len(indices)), indices.shape[1])
+        np.add.at(probs, (rows, self._y[indices].ravel()), weights.ravel())
+        probs /= probs.sum(axis=1)[:, None]
+        return probs
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
 class KNNLearner(SklLearner):
+    """
+    ${skldoc}
+
+    If `metric` is an instance of :obj:`Orange.distance.Distance`, the
+    neighbours are found with :obj:`Orange.distance.NeighborIndex`.
+    """
     __wraps__ = skl_neighbors.KNeighborsClassifier
     name = 'knn'
 
@@ -13,3 +47,11 @@ class KNNLearner(SklLearner):
                  preprocessors=None):
         super().__init__(preprocessors=preprocessors)
         self.params = vars()
+
+    def fit(self, X, Y, W=None):
+        metric = self.params["metric"]
+        if not isinstance(metric, Distance):
+            return super().fit(X, Y, W)
+        return self.__returns__(IndexKNeighborsClassifier(
+            NeighborIndex(X, metric), Y.reshape(-1),
+            self.params["n_neighbors"], self.params["weights"]))
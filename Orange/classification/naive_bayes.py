@@ -1,4 +1,5 @@
 import numpy as np
+import scipy.sparse as sp
 
 from Orange.classification import Learner, Model
 from Orange.data import Instance, Storage
@@ -41,20 +42,59 @@ class NaiveBayesModel(Model):
         super().__init__(domain)
         self.cont = cont
         self.class_freq = class_freq
+        n_cls = len(class_freq)
+        self.class_prob = (class_freq + 1) / (np.sum(class_freq) + n_cls)
+        self._compute_log_cont_prob()
+
+    def _compute_log_cont_prob(self):
+        # Log-probabilities of attribute values given the class, as an array
+        # of shape (attributes, values + 1, classes), padded with zeros.
+        # The last row (with zeros) is used for unknown values.
+        cont, class_freq = self.cont, self.class_freq
+        n_cls = len(class_freq)
+        n_vals = max((c.shape[1] for c in cont), default=0)
+        self.log_cont_prob = np.zeros((len(cont), n_vals + 1, n_cls))
+        for attr_prob, c in zip(self.log_cont_prob, cont):
+            attr_prob[:c.shape[1]] = np.log(np.divide(
+                np.array(c) + 1,
+                class_freq.reshape((n_cls, 1)) + c.shape[1])).T
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # models pickled by older versions do not have log_cont_prob
+        if "log_cont_prob" not in state:
+            self._compute_log_cont_prob()
 
     def predict_storage(self, data):
         if isinstance(data, Instance):
-            data = [data]
-        n_cls = len(self.class_freq)
-        class_prob = (self.class_freq + 1) / (np.sum(self.class_freq) + n_cls)
-        log_cont_prob = [np.log(np.divide(np.array(c) + 1,
-                                          self.class_freq.reshape((n_cls, 1)) +
-                                          c.shape[1])) for c in self.cont]
-        probs = np.exp(np.array([np.sum(attr_prob[:, int(attr_val)]
-                                        for attr_val, attr_prob
-                                        in zip(ins, log_cont_prob)
-                                        if not np.isnan(attr_val))
-                                 for ins in data]) + np.log(class_prob))
+            X = np.atleast_2d(data.x)
+        else:
+            X = data.X
+        n_attrs, n_vals, n_cls = self.log_cont_prob.shape
+        log_prob = self.log_cont_prob.reshape(n_attrs * n_vals, n_cls)
+
+        # Sum the log-probabilities of values by multiplying a sparse matrix,
+        # which has a 1 for each (row, attribute value), with log_prob
+        if sp.issparse(X):
+            X = sp.csr_matrix(X)
+            # Values not in the matrix are 0: start with their probabilities
+            # and add the differences for the values that are in it
+            log_prob = (log_prob.reshape(self.log_cont_prob.shape) -
+                        self.log_cont_prob[:, :1]).reshape(log_prob.shape)
+            base = self.log_cont_prob[:, 0].sum(axis=0)
+            values, attrs, indptr = X.data, X.indices, X.indptr
+        else:
+            base = 0
+            values = X.ravel()
+            attrs = np.tile(np.arange(n_attrs), X.shape[0])
+            indptr = np.arange(X.shape[0] + 1) * n_attrs
+        values = np.where(np.isnan(values), n_vals - 1, values).astype(int)
+        indicators = sp.csr_matrix(
+            (np.ones(len(values)), attrs * n_vals + values, indptr),
+            shape=(X.shape[0], log_prob.shape[0]))
+
+        probs = np.exp(indicators.dot(log_prob) + base +
+                       np.log(self.class_prob))
         probs /= probs.sum(axis=1)[:, None]
         values = probs.argmax(axis=1)
         return values, probs
@@ -1,7 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+
+import ctypes as ct
 import numpy as np
 
 from Orange.classification import Learner, Model
-from Orange.classification.simple_tree import SimpleTreeLearner
+from Orange.classification.simple_tree import (
+    SimpleTreeLearner, SimpleTreeModel, _TreeBuilder, _tree, c_double_p,
+    SIMPLE_TREE_NODE)
 
 __all__ = ['SimpleRandomForestLearner']
 
@@ -39,18 +45,23 @@ class SimpleRandomForestLearner(Learner):
 
     seed : int, optional (default = 42)
         Random seed.
+
+    n_jobs : int, optional (default = 1)
+        The number of threads for building the trees. If -1, the number of
+        threads is set to the number of cores.
     """
 
     name = 'simple rf class'
 
     def __init__(self, n_estimators=10, min_instances=2, max_depth=1024,
-                 max_majority=1.0, skip_prob='sqrt', seed=42):
+                 max_majority=1.0, skip_prob='sqrt', seed=42, n_jobs=1):
         self.n_estimators = n_estimators
         self.skip_prob = skip_prob
         self.max_depth = max_depth
         self.min_instances = min_instances
         self.max_majority = max_majority
         self.seed = seed
+        self.n_jobs = n_jobs
 
     def fit_storage(self, data):
         return SimpleRandomForestModel(self, data)
@@ -66,13 +77,37 @@ class SimpleRandomForestModel(Model):
         tree = SimpleTreeLearner(
             learner.min_instances, learner.max_depth,
             learner.max_majority, learner.skip_prob, True)
-        for i in range(learner.n_estimators):
-            tree.seed = learner.seed + i
-            self.estimators_.append(tree(data))
+        # Data is converted once and shared (read-only) by all trees
+        builder = _TreeBuilder(tree, data)
+        seeds = [learner.seed + i for i in range(learner.n_estimators)]
+        n_jobs = learner.n_jobs
+        if n_jobs < 0:
+            n_jobs = cpu_count() + 1 + n_jobs
+        if n_jobs > 1:
+            with ThreadPoolExecutor(n_jobs) as executor:
+                nodes = list(executor.map(builder.build, seeds))
+        else:
+            nodes = [builder.build(seed) for seed in seeds]
+        for node in nodes:
+            model = SimpleTreeModel(tree, data, builder, node)
+            model.domain = model.original_domain = data.domain
+            model.supports_multiclass = tree.supports_multiclass
+            model.name = tree.name
+            self.estimators_.append(model)
+
+    def _tree_nodes(self):
+        return (ct.POINTER(SIMPLE_TREE_NODE) * len(self.estimators_))(
+            *(tree.node for tree in self.estimators_))
 
     def predict_storage(self, data):
-        p = np.zeros((data.X.shape[0], self.cls_vals))
-        for tree in self.estimators_:
-            p += tree(data, tree.Probs)
-        p /= len(self.estimators_)
+        X = np.ascontiguousarray(data.X)
+        p = np.zeros((X.shape[0], self.cls_vals))
+        _tree.predict_classification_forest(
+            X.ctypes.data_as(c_double_p),
+            X.shape[0],
+            self._tree_nodes(),
+            len(self.estimators_),
+            X.shape[1],
+            self.cls_vals,
+            p.ctypes.data_as(c_double_p))
         return p.argmax(axis=1), p
@@ -6,7 +6,8 @@ from Orange.base import Learner, Model
 __all__ = ['SimpleTreeLearner']
 
 from . import _simple_tree
-_tree = ct.pydll.LoadLibrary(_simple_tree.__file__)
+# Load as CDLL, so the calls release the GIL and trees can be built in threads
+_tree = ct.cdll.LoadLibrary(_simple_tree.__file__)
 
 DiscreteNode = 0
 ContinuousNode = 1
@@ -91,12 +92,15 @@ class SimpleTreeLearner(Learner):
         return SimpleTreeModel(self, data)
 
 
-class SimpleTreeModel(Model):
+class _TreeBuilder:
+    """Arguments for `build_tree` that are shared by all trees that are built
+    on the same data with the same learner, as in a random forest."""
     def __init__(self, learner, data):
-        X = np.ascontiguousarray(data.X)
-        Y = np.ascontiguousarray(data.Y)
-        W = np.ascontiguousarray(data.W)
-        self.num_attrs = X.shape[1]
+        self.X = np.ascontiguousarray(data.X)
+        self.Y = np.ascontiguousarray(data.Y)
+        self.W = np.ascontiguousarray(data.W)
+        self.learner = learner
+        self.num_attrs = self.X.shape[1]
         self.dom_attr = data.domain.attributes
         self.cls_vars = list(data.domain.class_vars)
         if len(data.domain.class_vars) != 1:
@@ -113,12 +117,13 @@ class SimpleTreeModel(Model):
             raise ValueError("Only Continuous and Discrete "
                              "variables are supported")
 
+        X = self.X
         if isinstance(learner.skip_prob, (float, int)):
-            skip_prob = learner.skip_prob
+            self.skip_prob = learner.skip_prob
         elif learner.skip_prob == 'sqrt':
-            skip_prob = 1.0 - np.sqrt(X.shape[1]) / X.shape[1]
+            self.skip_prob = 1.0 - np.sqrt(X.shape[1]) / X.shape[1]
         elif learner.skip_prob == 'log2':
-            skip_prob = 1.0 - np.log2(X.shape[1]) / X.shape[1]
+            self.skip_prob = 1.0 - np.log2(X.shape[1]) / X.shape[1]
         else:
             raise ValueError(
                 "skip_prob not valid: {}".format(learner.skip_prob))
@@ -135,26 +140,44 @@ class SimpleTreeModel(Model):
             else:
                 raise ValueError("Only Continuous and Discrete "
                                  "variables are supported")
-        attr_vals = np.array(attr_vals, dtype=np.int32)
-        domain = np.array(domain, dtype=np.int32)
-
-        self.node = _tree.build_tree(
-            X.ctypes.data_as(c_double_p),
-            Y.ctypes.data_as(c_double_p),
-            W.ctypes.data_as(c_double_p),
-            X.shape[0],
-            W.size,
+        self.attr_vals = np.array(attr_vals, dtype=np.int32)
+        self.domain = np.array(domain, dtype=np.int32)
+
+    def init_model(self, model):
+        model.num_attrs = self.num_attrs
+        model.dom_attr = self.dom_attr
+        model.cls_vars = self.cls_vars
+        model.type = self.type
+        model.cls_vals = self.cls_vals
+
+    def build(self, seed):
+        """Build a tree; the GIL is released, so this can run in threads."""
+        learner = self.learner
+        return _tree.build_tree(
+            self.X.ctypes.data_as(c_double_p),
+            self.Y.ctypes.data_as(c_double_p),
+            self.W.ctypes.data_as(c_double_p),
+            self.X.shape[0],
+            self.W.size,
             learner.min_instances,
             learner.max_depth,
             ct.c_float(learner.max_majority),
-            ct.c_float(skip_prob),
+            ct.c_float(self.skip_prob),
             self.type,
             self.num_attrs,
             self.cls_vals,
-            attr_vals.ctypes.data_as(c_int_p),
-            domain.ctypes.data_as(c_int_p),
+            self.attr_vals.ctypes.data_as(c_int_p),
+            self.domain.ctypes.data_as(c_int_p),
             learner.bootstrap,
-            learner.seed)
+            seed)
+
+
+class SimpleTreeModel(Model):
+    def __init__(self, learner, data, builder=None, node=None):
+        if builder is None:
+            builder = _TreeBuilder(learner, data)
+        builder.init_model(self)
+        self.node = node if node is not None else builder.build(learner.seed)
 
     def predict_storage(self, data):
         X = np.ascontiguousarray(data.X)
@@ -0,0 +1,61 @@
+#cython: embedsignature=True
+
+import numpy
+cimport numpy as np
+import cython
+
+from libc.math cimport INFINITY
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def condensed_block(double[:] flat, Py_ssize_t n, np.intp_t[:] rows,
+                    np.intp_t[:] cols):
+    """
+    Return the block of distances between items `rows` and `cols` from a
+    condensed matrix of `n` items, as returned by
+    `scipy.spatial.distance.pdist`.
+    """
+    cdef np.ndarray[np.float64_t, ndim=2] block = \
+        numpy.empty((rows.shape[0], cols.shape[0]))
+    cdef double[:, :] D = block
+    cdef Py_ssize_t a, b, i, j
+    with nogil:
+        for a in range(rows.shape[0]):
+            for b in range(cols.shape[0]):
+                i, j = rows[a], cols[b]
+                if i == j:
+                    D[a, b] = 0
+                    continue
+                if i > j:
+                    i, j = j, i
+                D[a, b] = flat[i * n - i * (i + 1) // 2 + j - i - 1]
+    return block
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def min_plus(double[:, :] A, double[:, :] B):
+    """
+    Return the (min, +) product of matrices `A` and `B`, that is,
+    `C[i, j] = min_k A[i, k] + B[k, j]`.
+    """
+    if A.shape[1] != B.shape[0]:
+        raise ValueError("mismatching shapes")
+    cdef np.ndarray[np.float64_t, ndim=2] result = \
+        numpy.empty((A.shape[0], B.shape[1]))
+    cdef double[:, :] C = result
+    cdef Py_ssize_t i, j, k
+    cdef double a, s
+    with nogil:
+        for i in range(A.shape[0]):
+            for j in range(B.shape[1]):
+                C[i, j] = INFINITY
+            for k in range(A.shape[1]):
+                a = A[i, k]
+                for j in range(B.shape[1]):
+                    s = a + B[k, j]
+                    if s < C[i, j]:
+                        C[i, j] = s
+    return result
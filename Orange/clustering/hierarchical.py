@@ -1,11 +1,13 @@
 from collections import namedtuple, deque
 from operator import attrgetter
-from itertools import chain, count
+from itertools import count
 import heapq
 import numpy
 
 import scipy.cluster.hierarchy
 from Orange.distance import Euclidean, PearsonR
+from Orange.misc.distmatrix import CondensedDistMatrix
+from Orange.clustering import _hierarchical
 
 __all__ = ['HierarchicalClustering']
 
@@ -16,20 +18,37 @@ WEIGHTED = "weighted"
 WARD = "ward"
 
 
+# The triangles are copied row by row; index arrays of all elements
+# (`numpy.triu_indices`) would take several times the memory of the matrix
+
+def _triangle_rows(N, mode):
+    # yield row indices, columns of the row's part of the triangle and
+    # the start of the row in the condensed form
+    if mode == "upper":
+        for i in range(N - 1):
+            yield i, slice(i + 1, N), i * N - i * (i + 1) // 2
+    elif mode == "lower":
+        for i in range(1, N):
+            yield i, slice(0, i), i * (i - 1) // 2
+    else:
+        raise ValueError("invalid mode")
+
+
 def condensedform(X, mode="upper"):
+    if isinstance(X, CondensedDistMatrix):
+        if mode == "upper":
+            return X.flat
+        X = X.full()
     X = numpy.asarray(X)
     assert len(X.shape) == 2
     assert X.shape[0] == X.shape[1]
 
     N = X.shape[0]
-
-    if mode == "upper":
-        i, j = numpy.triu_indices(N, k=1)
-    elif mode == "lower":
-        i, j = numpy.tril_indices(N, k=-1)
-    else:
-        raise ValueError("invalid mode")
-    return X[i, j]
+    condensed = numpy.empty(N * (N - 1) // 2, dtype=X.dtype)
+    for i, cols, start in _triangle_rows(N, mode):
+        row = X[i, cols]
+        condensed[start:start + len(row)] = row
+    return condensed
 
 
 def squareform(X, mode="upper"):
@@ -38,16 +57,10 @@ def squareform(X, mode="upper"):
     N = int(numpy.ceil(numpy.sqrt(k * 2)))
     assert N * (N - 1) // 2 == k
     matrix = numpy.zeros((N, N), dtype=X.dtype)
-    if mode == "upper":
-        i, j = numpy.triu_indices(N, k=1)
-        matrix[i, j] = X
-        m, n = numpy.tril_indices(N, k=-1)
-        matrix[m, n] = matrix.T[m, n]
-    elif mode == "lower":
-        i, j = numpy.tril_indices(N, k=-1)
-        matrix[i, j] = X
-        m, n = numpy.triu_indices(N, k=1)
-        matrix[m, n] = matrix.T[m, n]
+    for i, cols, start in _triangle_rows(N, mode):
+        row = X[start:start + cols.stop - cols.start]
+        matrix[i, cols] = row
+        matrix[cols, i] = row
     return matrix
 
 
@@ -81,7 +94,8 @@ def dist_matrix_linkage(matrix, linkage=AVERAGE):
     """
     Return linkage using a precomputed distance matrix.
 
-    :param Orange.misc.DistMatrix matrix:
+    :param matrix: a square or a condensed distance matrix
+    :type matrix: Orange.misc.DistMatrix or Orange.misc.CondensedDistMatrix
     :param str linkage:
     """
     # Extract compressed upper triangular distance matrix.
@@ -93,7 +107,8 @@ def dist_matrix_clustering(matrix, linkage=AVERAGE):
     """
     Return the hierarchical clustering using a precomputed distance matrix.
 
-    :param Orange.misc.DistMatrix matrix:
+    :param matrix: a square or a condensed distance matrix
+    :type matrix: Orange.misc.DistMatrix or Orange.misc.CondensedDistMatrix
     :param str linkage:
     """
     # Extract compressed upper triangular distance matrix.
@@ -376,6 +391,13 @@ def top_clusters(tree, k):
     return [n for _, n in heap]
 
 
+def _distance_block(distances, rows, cols):
+    if isinstance(distances, CondensedDistMatrix):
+        return _hierarchical.condensed_block(
+            distances.flat, distances.n, rows, cols)
+    return distances[numpy.ix_(rows, cols)]
+
+
 def optimal_leaf_ordering(tree, distances, progress_callback=None):
     """
     Order the leaves in the clustering tree.
@@ -383,184 +405,117 @@ def optimal_leaf_ordering(tree, distances, progress_callback=None):
     (based on Ziv Bar-Joseph et al. Fast optimal leaf ordering for
     hierarchical clustering)
 
+    For each pair of sibling subtrees, the costs of optimal orderings for
+    all pairs of their outermost leaves are computed as (min, +) matrix
+    products, in compiled loops that release the GIL. Each subtree keeps
+    a block with the costs for pairs of leaves from its left and right
+    branch, so the blocks together take the space of a condensed matrix.
+    Only the blocks of distances between the subtrees are taken from
+    `distances`, so a condensed matrix is never expanded.
+
     :param Tree tree:
         Binary hierarchical clustering tree.
-    :param numpy.ndarray distances:
-        A (N, N) numpy.ndarray of distances that were used to compute
-        the clustering.
+    :param distances:
+        A (N, N) numpy.ndarray or a condensed distance matrix of distances
+        that were used to compute the clustering.
+    :type distances: numpy.ndarray or Orange.misc.CondensedDistMatrix
     :param function progress_callback:
-        Function used to report on progress.
+        Function used to report on progress. It can interrupt the
+        computation by raising an exception, e.g.
+        `concurrent.futures.CancelledError`.
 
     """
-    distances = numpy.asarray(distances)
-    M = numpy.zeros_like(distances)
-
-    # rearrange distances by order defined by tree's leaves
-    indices = numpy.array([leaf.value.index for leaf in leaves(tree)])
-    distances = distances[indices[numpy.newaxis, :],
-                          indices[:, numpy.newaxis]]
-    distances = numpy.ascontiguousarray(distances)
-
-    # This is the 'fast' early termination search described in the paper
-    # (it is slower in the pure python implementation)
-    def argmin_ordered_xpypZ(x, y, Z, sorter_x=None, sorter_y=None):
-        C = numpy.min(Z)
-        if sorter_x is None:
-            sorter_x = range(len(x))
-            ordered_x = x
-        else:
-            ordered_x = x[sorter_x]
-        if sorter_y is None:
-            sorter_y = range(len(y))
-            ordered_y = y
-        else:
-            ordered_y = y[sorter_y]
-
-        y0 = ordered_y[0]
-
-        best_val = numpy.inf
-        best_i, best_j = 0, 0
-
-        y0pC = y0 + C
-        for i, x in zip(sorter_x, ordered_x):
-            if x + y0pC >= best_val:
-                break
-            xpC = x + C
-            for j, y in zip(sorter_y, ordered_y):
-                if xpC + y >= best_val:
-                    break
-                val = x + y + Z[i, j]
-                if val < best_val:
-                    best_val, best_i, best_j = val, i, j
-        return best_i, best_j
-
-    def argmin_xpypZ(x, y, Z):
-        _, h = Z.shape
-        A = Z + numpy.reshape(x, (-1, 1))
-        A += numpy.reshape(y, (1, -1))
-        i = numpy.argmin(A)
-        return i // h, i % h
-
-    def optimal_ordering(tree, M, ordering):
+    # indices of items in the order defined by tree's leaves
+    indices = numpy.array([leaf.value.index for leaf in leaves(tree)],
+                          dtype=numpy.intp)
+    if not isinstance(distances, CondensedDistMatrix):
+        distances = numpy.asarray(distances)
+
+    def distance_block(rows, cols):
+        return _distance_block(distances, indices[rows.start:rows.stop],
+                               indices[cols.start:cols.stop])
+
+    # costs[t][u, w] is the cost of the optimal ordering of subtree `t`
+    # that starts with the u-th leaf of its left and ends with the w-th
+    # leaf of its right branch
+    costs = {}
+
+    def outer_inner(tree):
+        # triples of ranges of leaves that can be at the outer end of the
+        # subtree's ordering, of leaves that are then at its inner end, and
+        # the costs of these orderings
         if tree.is_leaf:
-            M[tree.value.first, tree.value.first] = 0.0
-        else:
-            left, right = tree.left, tree.right
-            if not left.is_leaf:
-                V_ll = range(*left.left.value.range)
-                V_lr = range(*left.right.value.range)
-                u_iter = chain(((u, V_lr) for u in V_ll),
-                               ((u, V_ll) for u in V_lr))
-            else:
-                V_lr = range(*left.value.range)
-                u_iter = ((u, V_lr) for u in V_lr)
-
-            u_iter = list(u_iter)
-            assert [u for u, _ in u_iter] == list(range(*left.value.range))
-
-            if not right.is_leaf:
-                V_rl = range(*right.left.value.range)
-                V_rr = range(*right.right.value.range)
-                w_iter = chain(((w, V_rr) for w in V_rl),
-                               ((w, V_rl) for w in V_rr))
-            else:
-                V_rr = range(*right.value.range)
-                w_iter = ((w, V_rr) for w in V_rr)
-
-            w_iter = list(w_iter)
-            assert [w for w, _ in w_iter] == list(range(*right.value.range))
-
-            for u, left_inner in u_iter:
-                left_inner_slice = slice(left_inner.start, left_inner.stop)
-                M_left_inner = M[u, left_inner_slice]
-#                 left_inner_sort = numpy.argsort(M_left_inner)
-                for w, right_inner in w_iter:
-                    right_inner_slice = slice(right_inner.start,
-                                              right_inner.stop)
-                    M_right_inner = M[w, right_inner_slice]
-#                     right_inner_sort = numpy.argsort(M_right_inner)
-#                     i, j = argmin_ordered_xpypZ(
-#                         M_left_inner, M_right_inner,
-#                         distances[left_inner_slice, right_inner_slice],
-#                         sorter_x=left_inner_sort, sorter_y=right_inner_sort,
-#                     )
-                    i, j = argmin_xpypZ(
-                        M_left_inner, M_right_inner,
-                        distances[left_inner_slice, right_inner_slice]
-                    )
-                    m, k = left_inner.start + i, right_inner.start + j
-                    score = M[u, m] + M[k, w] + distances[m, k]
-                    M[u, w] = M[w, u] = score
-                    ordering[u, w] = (m, k)
-
-        return M, ordering
+            leaf = range(*tree.value.range)
+            return [(leaf, leaf, numpy.zeros((1, 1)))]
+        left = range(*tree.left.value.range)
+        right = range(*tree.right.value.range)
+        return [(left, right, costs[tree]), (right, left, costs[tree].T)]
+
+    def to_inner(tree, u):
+        # the range of leaves at the inner end of the subtree's ordering
+        # that starts with leaf `u`, and the costs of these orderings
+        if tree.is_leaf:
+            return range(*tree.value.range), numpy.zeros(1)
+        left, right = tree.left.value, tree.right.value
+        if u < left.last:
+            return range(*right.range), costs[tree][u - left.first]
+        return range(*left.range), costs[tree][:, u - right.first]
 
     subtrees = list(postorder(tree))
-    ordering_dtype = numpy.dtype(
-        [("m", numpy.uint32),
-         ("k", numpy.uint32)])
-
-    ordering = numpy.empty(distances.shape, dtype=ordering_dtype)
-
     for i, subtree in enumerate(subtrees):
-        M, ordering = optimal_ordering(subtree, M, ordering)
+        if not subtree.is_leaf:
+            left, right = subtree.left.value, subtree.right.value
+            score = numpy.empty((left.last - left.first,
+                                 right.last - right.first))
+            for U, U_inner, A in outer_inner(subtree.left):
+                for W, W_inner, B in outer_inner(subtree.right):
+                    D = distance_block(U_inner, W_inner)
+                    # min_{m, k} A[u, m] + D[m, k] + B[w, k]
+                    score[U.start - left.first:U.stop - left.first,
+                          W.start - right.first:W.stop - right.first] = \
+                        _hierarchical.min_plus(
+                            _hierarchical.min_plus(A, D), B.T)
+            costs[subtree] = score
 
         if progress_callback:
             progress_callback(100.0 * i / len(subtrees))
 
-    def min_uw(tree, u=None, w=None):
-        if tree.is_leaf:
-            return 0.0
-        else:
-            if u is None:
-                U = slice(*tree.left.value.range)
-            else:
-                U = slice(u, u + 1)
-            if w is None:
-                W = slice(*tree.right.value.range)
-            else:
-                W = slice(w, w + 1)
-
-            M_ = M[U, W]
-            _, w = M_.shape
-            i = numpy.argmin(M_.ravel())
-            i, j = i // w, i % w
-            return U.start + i, W.start + j
-
-    def optimal_swap(root, M):
-        opt_uw = {root: min_uw(root)}
-        # run down the tree applying u, w constraints from parents.
+    def inner_ends(tree, u, w):
+        # the inner ends of the branches in the optimal ordering of the
+        # subtree from leaf `u` (in the left branch) to `w` (in the right)
+        M, a = to_inner(tree.left, u)
+        K, b = to_inner(tree.right, w)
+        cost = a[:, numpy.newaxis] + distance_block(M, K) + b
+        m, k = numpy.unravel_index(numpy.argmin(cost), cost.shape)
+        return M.start + m, K.start + k
+
+    def optimal_swap(root):
+        # the first and the last leaf of the optimal ordering of subtrees
+        ends = {}
+        if not root.is_leaf:
+            u, w = numpy.unravel_index(numpy.argmin(costs[root]),
+                                       costs[root].shape)
+            ends[root] = (root.left.value.first + u,
+                          root.right.value.first + w)
+        swapped = set()
+        # run down the tree applying the ends from parents
         for tree in preorder(root):
             if tree.is_leaf:
-                pass
-            else:
-                u, w = opt_uw[tree]
-                assert u in range(*tree.value.range)
-                assert w in range(*tree.value.range)
-                if u < w:
-                    m, k = ordering[u, w]
-
-                    opt_uw[tree.left] = (u, m)
-                    opt_uw[tree.right] = (k, w)
-                else:
-                    k, m = ordering[w, u]
-                    opt_uw[tree.right] = (u, m)
-
-                    opt_uw[tree.left] = (k, w)
-
-        def is_swapped(tree):
-            "Is `tree` swapped based on computed optimal ordering"
-            if tree.is_leaf:
-                return False
+                continue
+            first, last = ends[tree]
+            if first < tree.left.value.last:
+                m, k = inner_ends(tree, first, last)
+                ends[tree.left], ends[tree.right] = (first, m), (k, last)
             else:
-                u, w = opt_uw[tree]
-                return u > w
+                m, k = inner_ends(tree, last, first)
+                ends[tree.left], ends[tree.right] = (m, last), (first, k)
+                swapped.add(tree)
 
         def swaped_branches(tree):
             "Return branches from `tree` in optimal order"
             if tree.is_leaf:
                 return ()
-            elif is_swapped(tree):
+            elif tree in swapped:
                 return tree.branches
             else:
                 return tuple(reversed(tree.branches))
@@ -587,7 +542,7 @@ def optimal_leaf_ordering(tree, distances, progress_callback=None):
                                (left, right))
         return T[root]
 
-    return optimal_swap(tree, M)
+    return optimal_swap(tree)
 
 
 class HierarchicalClustering:
@@ -5,7 +5,7 @@ cimport numpy as np
 import cython
 
 cdef extern from "numpy/npy_math.h":
-    bint npy_isnan(double x)
+    bint npy_isnan(double x) nogil
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
@@ -52,3 +52,230 @@ def contingency_floatarray(np.ndarray[np.float64_t, ndim=1] col_data, np.ndarray
     assert j == N-1
 
     return V,C,unknown
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def discrete_contingency(double[:] col, np.intp_t[:] y, Py_ssize_t n_values,
+                         Py_ssize_t n_y, double[:] weights=None,
+                         np.intp_t[:] rows=None):
+    """
+    Return the contingency matrix (n_y × n_values) of a discrete column and
+    `y`, and an array with counts of nans for each value of `y`.
+
+    If `rows` are given, `col` contains only the values in these rows
+    (e.g. stored elements of a sparse column). Values of the column must
+    be nans or in range(n_values), and values of `y` in range(n_y);
+    otherwise ValueError is raised.
+    """
+    cdef np.ndarray[np.float64_t, ndim=2] C = numpy.zeros((n_y, n_values))
+    cdef np.ndarray[np.float64_t, ndim=1] unknown = numpy.zeros(n_y)
+    cdef double[:, :] counts = C
+    cdef double[:] nans = unknown
+    cdef bint weighted = weights is not None
+    cdef bint indexed = rows is not None
+    cdef Py_ssize_t i, row, yi, bad = -1
+    cdef double v, w = 1.
+    with nogil:
+        for i in range(col.shape[0]):
+            row = rows[i] if indexed else i
+            yi = y[row]
+            v = col[i]
+            if yi < 0 or yi >= n_y or not (v < n_values and v >= 0
+                                           or npy_isnan(v)):
+                bad = i
+                break
+            if weighted:
+                w = weights[row]
+            if npy_isnan(v):
+                nans[yi] += w
+            else:
+                counts[yi, <Py_ssize_t>v] += w
+    if bad != -1:
+        row = rows[bad] if indexed else bad
+        raise ValueError("value {} with row value {} in row {} is out of "
+                         "range".format(col[bad], y[row], row))
+    return C, unknown
+
+
+cdef inline np.uint64_t _sort_key(double v) nogil:
+    # unsigned integers that are ordered like the (non-nan) doubles
+    cdef np.uint64_t bits = (<np.uint64_t *>&v)[0]
+    if bits >> 63:
+        return ~bits
+    return bits | (<np.uint64_t>1 << 63)
+
+
+cdef inline double _sort_value(np.uint64_t key) nogil:
+    cdef np.uint64_t bits
+    if key >> 63:
+        bits = key & ~(<np.uint64_t>1 << 63)
+    else:
+        bits = ~key
+    return (<double *>&bits)[0]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _radix_sort(np.uint64_t[:] keys, double[:] weights,
+                      np.uint64_t[:] tmp_keys, double[:] tmp_weights,
+                      Py_ssize_t start, Py_ssize_t end, bint weighted) nogil:
+    # sort keys[start:end] (and weights with them) by bytes, from the least
+    # significant; bytes that are equal for all keys are skipped
+    cdef Py_ssize_t counts[8][256]
+    cdef Py_ssize_t i, d, b, total, n = end - start
+    cdef np.uint64_t key
+    cdef np.uint64_t[:] src_keys = keys, dst_keys = tmp_keys, swap_keys
+    cdef double[:] src_weights = weights, dst_weights = tmp_weights
+    cdef double[:] swap_weights
+    cdef bint swapped = False
+    if n < 2:
+        return
+    for d in range(8):
+        for b in range(256):
+            counts[d][b] = 0
+    for i in range(start, end):
+        key = keys[i]
+        for d in range(8):
+            counts[d][(key >> (8 * d)) & 255] += 1
+    for d in range(8):
+        if counts[d][(keys[start] >> (8 * d)) & 255] == n:
+            continue
+        total = start
+        for b in range(256):
+            total += counts[d][b]
+            counts[d][b] = total - counts[d][b]
+        for i in range(start, end):
+            key = src_keys[i]
+            b = (key >> (8 * d)) & 255
+            dst_keys[counts[d][b]] = key
+            if weighted:
+                dst_weights[counts[d][b]] = src_weights[i]
+            counts[d][b] += 1
+        swap_keys = src_keys
+        src_keys = dst_keys
+        dst_keys = swap_keys
+        swap_weights = src_weights
+        src_weights = dst_weights
+        dst_weights = swap_weights
+        swapped = not swapped
+    if swapped:
+        for i in range(start, end):
+            keys[i] = tmp_keys[i]
+            if weighted:
+                weights[i] = tmp_weights[i]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def continuous_contingency(double[:] col, np.intp_t[:] y, Py_ssize_t n_y,
+                           double[:] weights=None, np.intp_t[:] rows=None):
+    """
+    Return sorted distinct values of a continuous column, the counts of the
+    values (n_y × number of values) for each value of `y`, and an array
+    with counts of nans for each value of `y`.
+
+    `rows` have the same meaning as in :obj:`discrete_contingency`. Values
+    of `y` must be in range(n_y); otherwise ValueError is raised.
+
+    Defined values are distributed into contiguous buckets by values of `y`.
+    Each bucket is radix sorted and its distinct values are counted, and
+    the distinct values of buckets are then merged.
+    """
+    cdef Py_ssize_t n = col.shape[0]
+    cdef bint weighted = weights is not None
+    cdef bint indexed = rows is not None
+    cdef Py_ssize_t i, k, c, u, row, yi, n_defined, N = 0, bad = -1
+    cdef double v, vmin = 0, w = 1.
+    cdef bint found
+
+    cdef np.ndarray[np.float64_t, ndim=1] unknown = numpy.zeros(n_y)
+    cdef double[:] nans = unknown
+    # starts[c]:starts[c + 1] is the bucket with values for y == c
+    cdef np.intp_t[:] starts = numpy.zeros(n_y + 1, dtype=numpy.intp)
+    with nogil:
+        for i in range(n):
+            row = rows[i] if indexed else i
+            yi = y[row]
+            if yi < 0 or yi >= n_y:
+                bad = i
+                break
+            if npy_isnan(col[i]):
+                nans[yi] += weights[row] if weighted else 1.
+            else:
+                starts[yi + 1] += 1
+        for c in range(n_y):
+            starts[c + 1] += starts[c]
+    if bad != -1:
+        row = rows[bad] if indexed else bad
+        raise ValueError("row value {} in row {} is out of range"
+                         .format(y[row], row))
+
+    n_defined = starts[n_y]
+    cdef np.uint64_t[:] keys = numpy.empty(n_defined, dtype=numpy.uint64)
+    cdef np.uint64_t[:] tmp_keys = numpy.empty(n_defined, dtype=numpy.uint64)
+    # weights of values, and then sums of weights of distinct values
+    cdef double[:] sums = numpy.empty(n_defined)
+    cdef double[:] tmp_sums = numpy.empty(n_defined if weighted else 0)
+    cdef double[:] values = numpy.empty(n_defined)
+    cdef np.intp_t[:] ends = numpy.array(starts[:n_y])
+    cdef np.intp_t[:] heads = numpy.array(starts[:n_y])
+    # columns[k] is the index of values[k] in the merged values
+    cdef np.intp_t[:] columns = numpy.empty(n_defined, dtype=numpy.intp)
+    merged = numpy.empty(n_defined)
+    cdef double[:] merged_values = merged
+    with nogil:
+        for i in range(n):
+            v = col[i]
+            if npy_isnan(v):
+                continue
+            row = rows[i] if indexed else i
+            yi = y[row]
+            k = ends[yi]
+            keys[k] = _sort_key(v)
+            if weighted:
+                sums[k] = weights[row]
+            ends[yi] = k + 1
+
+        # sort each bucket and replace its values with distinct values and
+        # their counts (or sums of weights)
+        for c in range(n_y):
+            _radix_sort(keys, sums, tmp_keys, tmp_sums,
+                        starts[c], starts[c + 1], weighted)
+            u = starts[c] - 1
+            for k in range(starts[c], starts[c + 1]):
+                if weighted:
+                    w = sums[k]
+                v = _sort_value(keys[k])
+                if u >= starts[c] and v == values[u]:
+                    sums[u] += w
+                else:
+                    u += 1
+                    values[u] = v
+                    sums[u] = w
+            ends[c] = u + 1
+
+        # merge distinct values of buckets
+        while True:
+            found = False
+            for c in range(n_y):
+                if heads[c] < ends[c] and (
+                        not found or values[heads[c]] < vmin):
+                    vmin = values[heads[c]]
+                    found = True
+            if not found:
+                break
+            merged_values[N] = vmin
+            for c in range(n_y):
+                if heads[c] < ends[c] and values[heads[c]] == vmin:
+                    columns[heads[c]] = N
+                    heads[c] += 1
+            N += 1
+
+    cdef np.ndarray[np.float64_t, ndim=2] C = numpy.zeros((n_y, N))
+    cdef double[:, :] counts = C
+    with nogil:
+        for c in range(n_y):
+            for k in range(starts[c], ends[c]):
+                counts[c, columns[k]] = sums[k]
+    return merged[:N].copy(), C, unknown
@@ -5,7 +5,9 @@ import cython
 
 from libc.stdio cimport *
 from libc.string cimport *
-from libc.stdlib cimport malloc, free
+from libc.stdlib cimport malloc, realloc, free, strtod
+from libc.math cimport NAN
+from libc.locale cimport localeconv
 
 cdef extern from "stdio.h" nogil:
     int fgetc(FILE *STREAM)
@@ -419,3 +421,525 @@ def sparse_read_float(fname):
 
 # TODO: this function needs to be bottlenecked (not literally;
 # adding 'char' and 'float32' should suffice)
+
+
+# Columnar tokenizer for delimited (csv, tab) files.
+#
+# The file contents are tokenized into (column, row) matrices of byte offsets
+# into the buffer; the fields are only materialized as Python objects when a
+# column cannot be converted to floats. The state machine mirrors the one of
+# the `csv` module (non-strict, without an escape character), so that the
+# fields are the same as those read by `csv.reader`.
+
+
+cdef enum CsvState:
+    CSV_START_RECORD, CSV_START_FIELD, CSV_IN_FIELD, CSV_IN_QUOTED,
+    CSV_QUOTE_IN_QUOTED
+
+ctypedef np.int64_t offset_t
+
+cdef inline bint _field_nonempty(const char *buf, offset_t start, offset_t end,
+                                 bint quoted, int quotechar) nogil:
+    if not quoted:
+        return end > start
+    return not (end - start == 1 or
+                end - start == 2 and buf[start + 1] == quotechar)
+
+
+cdef offset_t _csv_records(const char *buf, offset_t begin, offset_t limit,
+                           offset_t end, int delimiter, int quotechar,
+                           bint doublequote, bint skipinitialspace,
+                           offset_t *starts, offset_t *ends,
+                           np.uint8_t *quoted, Py_ssize_t *n_fields,
+                           Py_ssize_t max_fields, np.int32_t *nfields,
+                           np.uint8_t *nonempty, Py_ssize_t *n_records,
+                           Py_ssize_t max_records) nogil:
+    """
+    Tokenize records that start in buf[begin:limit]; the last record may
+    continue up to `end`. Append the offsets of fields to `starts`, `ends`
+    and `quoted`, and the number of fields in each record and whether the
+    record has any nonempty fields to `nfields` and `nonempty`; `n_fields`
+    and `n_records` are the lengths of arrays before and after the call.
+
+    Return the offset at which tokenizing stopped: the start of the first
+    record at or after `limit`, or of the first record that did not fit
+    into arrays with `max_fields` fields and `max_records` records.
+    """
+    cdef:
+        CsvState state = CSV_START_RECORD
+        offset_t i = begin, field_start = 0, record_start = begin
+        Py_ssize_t first_field = n_fields[0]
+        int field = 0
+        bint field_quoted = 0, row_nonempty = 0, save, end_record
+        char c
+
+    while i < end or state != CSV_START_RECORD:
+        save = end_record = 0
+        if i == end:
+            # end of data within a record
+            if state == CSV_START_FIELD:
+                field_start = i
+            save = end_record = 1
+        else:
+            c = buf[i]
+            if state == CSV_START_RECORD:
+                if i >= limit or n_records[0] == max_records:
+                    return i
+                record_start = i
+                first_field = n_fields[0]
+                field = 0
+                row_nonempty = 0
+                if c == b'\n' or c == b'\r':
+                    end_record = 1
+                else:
+                    state = CSV_START_FIELD
+            if state == CSV_START_FIELD:
+                field_quoted = 0
+                if c == b'\n' or c == b'\r':
+                    field_start = i
+                    save = end_record = 1
+                elif c == quotechar:
+                    field_start = i
+                    field_quoted = 1
+                    state = CSV_IN_QUOTED
+                elif c == b' ' and skipinitialspace:
+                    pass
+                elif c == delimiter:
+                    field_start = i
+                    save = 1
+                else:
+                    field_start = i
+                    state = CSV_IN_FIELD
+            elif state == CSV_IN_FIELD:
+                if c == b'\n' or c == b'\r':
+                    save = end_record = 1
+                elif c == delimiter:
+                    save = 1
+            elif state == CSV_IN_QUOTED:
+                if c == quotechar:
+                    state = CSV_QUOTE_IN_QUOTED if doublequote else CSV_IN_FIELD
+            elif state == CSV_QUOTE_IN_QUOTED:
+                if c == quotechar:
+                    state = CSV_IN_QUOTED
+                elif c == b'\n' or c == b'\r':
+                    save = end_record = 1
+                elif c == delimiter:
+                    save = 1
+                else:
+                    state = CSV_IN_FIELD
+
+        if save:
+            if n_fields[0] == max_fields:
+                n_fields[0] = first_field
+                return record_start
+            starts[n_fields[0]] = field_start
+            ends[n_fields[0]] = i
+            quoted[n_fields[0]] = field_quoted
+            n_fields[0] += 1
+            if _field_nonempty(buf, field_start, i, field_quoted, quotechar):
+                row_nonempty = 1
+            field += 1
+            state = CSV_START_FIELD
+        if end_record:
+            nfields[n_records[0]] = field
+            nonempty[n_records[0]] = row_nonempty
+            n_records[0] += 1
+            state = CSV_START_RECORD
+            if i < end and buf[i] == b'\r' and i + 1 < end and buf[i + 1] == b'\n':
+                i += 1
+        if i < end:
+            i += 1
+    return i
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def csv_chunks(bytes data, offset_t chunk_size):
+    """
+    Return offsets at which chunks of approximately `chunk_size` bytes
+    start, with the end of data as the last element.
+
+    Chunks (except the first) start after the first line break beyond
+    every multiple of `chunk_size`. The line break may be within a quoted
+    field, so these are only the likely starts of records.
+    """
+    cdef:
+        const char *buf = data
+        offset_t n = len(data), i, k
+        np.ndarray[offset_t, ndim=1] bounds
+    chunk_size = max(chunk_size, 1)
+    bounds = np.empty(n // chunk_size + 2, dtype=np.int64)
+    bounds[0] = i = 0
+    k = 1
+    with nogil:
+        while True:
+            i = max(i, k * chunk_size)
+            while i < n and buf[i] != b'\n' and buf[i] != b'\r':
+                i += 1
+            if i < n and buf[i] == b'\r' and i + 1 < n and buf[i + 1] == b'\n':
+                i += 1
+            i += 1
+            if i >= n:
+                break
+            bounds[k] = i
+            k += 1
+    bounds[k] = n
+    return bounds[:k + 1]
+
+
+def csv_tokenize(bytes data, offset_t begin, offset_t limit,
+                 int delimiter, int quotechar, bint doublequote,
+                 bint skipinitialspace):
+    """
+    Tokenize records that start in data[begin:limit].
+
+    Return a tuple with the offset of the first record at or after `limit`
+    (or the end of data), arrays with start and end offsets of fields and
+    whether they are quoted, and arrays with the number of fields in each
+    record and whether the record has any nonempty fields. Store them into
+    (column, row) matrices with :obj:`csv_store`.
+
+    The GIL is released, so chunks can be tokenized in parallel threads.
+    """
+    cdef:
+        const char *buf = data
+        offset_t n = len(data), stop = begin
+        Py_ssize_t n_fields = 0, n_records = 0
+        Py_ssize_t max_fields = max(limit - begin, 0) // 4 + 64
+        Py_ssize_t max_records = max(limit - begin, 0) // 16 + 16
+        np.ndarray starts, ends, quoted, nfields, nonempty
+    if not 0 <= begin <= n:
+        raise ValueError("invalid chunk")
+    starts = np.empty(max_fields, dtype=np.int64)
+    ends = np.empty(max_fields, dtype=np.int64)
+    quoted = np.empty(max_fields, dtype=np.uint8)
+    nfields = np.empty(max_records, dtype=np.int32)
+    nonempty = np.empty(max_records, dtype=np.uint8)
+    while True:
+        with nogil:
+            stop = _csv_records(
+                buf, stop, limit, n, delimiter, quotechar, doublequote,
+                skipinitialspace, <offset_t *>starts.data,
+                <offset_t *>ends.data, <np.uint8_t *>quoted.data, &n_fields,
+                max_fields, <np.int32_t *>nfields.data,
+                <np.uint8_t *>nonempty.data, &n_records, max_records)
+        if stop >= limit or stop == n:
+            break
+        if n_records == max_records:
+            max_records *= 2
+            nfields.resize(max_records, refcheck=False)
+            nonempty.resize(max_records, refcheck=False)
+        else:
+            max_fields *= 2
+            starts.resize(max_fields, refcheck=False)
+            ends.resize(max_fields, refcheck=False)
+            quoted.resize(max_fields, refcheck=False)
+    return (stop, starts[:n_fields], ends[:n_fields], quoted[:n_fields],
+            nfields[:n_records], nonempty[:n_records])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def csv_store(offset_t[:] chunk_starts, offset_t[:] chunk_ends,
+              np.uint8_t[:] chunk_quoted, np.int32_t[:] chunk_nfields,
+              np.uint8_t[:] chunk_nonempty, Py_ssize_t row,
+              offset_t[:, :] starts, offset_t[:, :] ends,
+              np.uint8_t[:, :] quoted, np.int32_t[:] nfields,
+              np.uint8_t[:] nonempty):
+    """
+    Store the tokens of a chunk, as returned by :obj:`csv_tokenize`, into
+    (column, row) matrices `starts`, `ends` and `quoted`, and arrays
+    `nfields` and `nonempty`, at rows from `row` on.
+
+    The GIL is released, so chunks can be stored in parallel threads.
+    """
+    cdef Py_ssize_t r, col, k = 0
+    if row + chunk_nfields.shape[0] > nfields.shape[0]:
+        raise ValueError("invalid chunk")
+    with nogil:
+        for r in range(chunk_nfields.shape[0]):
+            nfields[row + r] = chunk_nfields[r]
+            nonempty[row + r] = chunk_nonempty[r]
+            for col in range(chunk_nfields[r]):
+                starts[col, row + r] = chunk_starts[k]
+                ends[col, row + r] = chunk_ends[k]
+                quoted[col, row + r] = chunk_quoted[k]
+                k += 1
+    return k
+
+
+def csv_field(bytes data, offset_t start, offset_t end, bint quoted,
+              int quotechar, bint doublequote):
+    """Return bytes of the field at data[start:end], with quotes removed"""
+    cdef:
+        const char *buf = data
+        offset_t i
+        bint in_quotes = 1
+        bytearray res
+    if not quoted:
+        return data[start:end]
+    res = bytearray()
+    i = start + 1
+    while i < end:
+        if in_quotes and buf[i] == quotechar:
+            if doublequote and i + 1 < end and buf[i + 1] == quotechar:
+                i += 1
+            else:
+                in_quotes = 0
+                i += 1
+                continue
+        res.append(<unsigned char>buf[i])
+        i += 1
+    return bytes(res)
+
+
+cdef inline bint _is_space(char c) nogil:
+    return c == b' ' or b'\t' <= c <= b'\r' or b'\x1c' <= c <= b'\x1f'
+
+
+cdef inline bint _is_missing(const char *s, Py_ssize_t n) nogil:
+    # Must match the string elements of Orange.data.variable.MISSING_VALUES
+    if n == 0:
+        return 1
+    if n == 1:
+        return s[0] == b'?' or s[0] == b'.' or s[0] == b'~'
+    if n == 2:
+        return s[0] == b'N' and s[1] == b'A'
+    if n == 3:
+        return s[0] == b'n' and s[1] == b'a' and s[2] == b'n'
+    return 0
+
+
+DEF MAX_FLOAT_LEN = 128
+DEF MAX_DISTINCT = 4
+
+cdef Py_ssize_t _parse_floats(const char *buf, const offset_t *starts,
+                              const offset_t *ends, const np.uint8_t *quoted,
+                              const np.intp_t *rows, Py_ssize_t n,
+                              char point, double *values,
+                              int *n_distinct) nogil:
+    # strtod expects the decimal point of the current locale, `point`, while
+    # files use '.' like Python's float(); '.' is replaced by `point`, and
+    # tokens with `point` (if it is not '.') are left to float(). If the
+    # locale's decimal point is not a single character, `point` is 0 and
+    # all tokens with '.' are left to float().
+    cdef:
+        Py_ssize_t i, j, n_failed = 0
+        offset_t s, e, k
+        char c
+        char token[MAX_FLOAT_LEN + 1]
+        char *endp
+        double v
+        double distinct[MAX_DISTINCT]
+        bint is_new
+    n_distinct[0] = 0
+    for i in range(n):
+        j = rows[i]
+        s, e = starts[j], ends[j]
+        values[i] = NAN
+        if quoted[j]:
+            n_failed += 1
+            continue
+        while s < e and _is_space(buf[s]):
+            s += 1
+        while e > s and _is_space(buf[e - 1]):
+            e -= 1
+        if _is_missing(buf + s, e - s):
+            v = NAN
+        else:
+            if e - s > MAX_FLOAT_LEN:
+                n_failed += 1
+                continue
+            for k in range(e - s):
+                c = buf[s + k]
+                # Python's float() does not accept hexadecimal notation
+                # and nan payloads, which strtod does
+                if c == b'x' or c == b'X' or c == b'(' \
+                        or c == point and c != b'.':
+                    break
+                token[k] = point if c == b'.' else c
+            else:
+                k = e - s
+            if k != e - s:
+                n_failed += 1
+                continue
+            token[k] = 0
+            v = strtod(token, &endp)
+            if endp != token + k:
+                n_failed += 1
+                continue
+            values[i] = v
+        if n_distinct[0] < MAX_DISTINCT:
+            is_new = 1
+            for k in range(n_distinct[0]):
+                if distinct[k] == v or distinct[k] != distinct[k] and v != v:
+                    is_new = 0
+                    break
+            if is_new:
+                distinct[n_distinct[0]] = v
+                n_distinct[0] += 1
+    return n_failed
+
+
+def csv_parse_floats(bytes data,
+                     np.ndarray[offset_t, ndim=1, mode="c"] starts,
+                     np.ndarray[offset_t, ndim=1, mode="c"] ends,
+                     np.ndarray[np.uint8_t, ndim=1, mode="c"] quoted,
+                     np.ndarray[np.intp_t, ndim=1, mode="c"] rows):
+    """
+    Convert fields in given `rows` of a tokenized column to floats.
+
+    Returns a tuple with an array of values, the number of fields that could
+    not be converted (their values are set to nan) and the number of distinct
+    values (including nan), which is capped at 4.
+    """
+    cdef:
+        const char *buf = data
+        const char *decimal_point = localeconv().decimal_point
+        char point = decimal_point[0] if strlen(decimal_point) == 1 else 0
+        Py_ssize_t n = rows.shape[0], n_failed
+        int n_distinct = 0
+        np.ndarray[np.float64_t, ndim=1] values = np.empty(n, dtype=float)
+    if n == 0:
+        return values, 0, 0
+    with nogil:
+        n_failed = _parse_floats(buf, <offset_t *>starts.data,
+                                 <offset_t *>ends.data,
+                                 <np.uint8_t *>quoted.data,
+                                 <np.intp_t *>rows.data, n, point,
+                                 <double *>values.data, &n_distinct)
+    return values, n_failed, n_distinct
+
+
+cdef inline np.uint64_t _hash_bytes(const char *s, offset_t n) nogil:
+    # FNV-1a
+    cdef:
+        np.uint64_t h = 14695981039346656037ULL
+        offset_t i
+    for i in range(n):
+        h = (h ^ <unsigned char>s[i]) * 1099511628211ULL
+    return h
+
+
+cdef Py_ssize_t _intern(const char *buf, const offset_t *starts,
+                        const offset_t *ends, const np.intp_t *rows,
+                        Py_ssize_t n, np.int32_t *codes,
+                        offset_t *first_rows) nogil:
+    cdef:
+        Py_ssize_t cap = 1024, mask, n_uniques = 0, i, slot, j, fj
+        np.int32_t *table
+        np.int32_t *new_table
+        np.uint64_t *hashes = <np.uint64_t *>malloc(n * sizeof(np.uint64_t))
+        np.uint64_t h
+        offset_t s, e
+    table = <np.int32_t *>malloc(cap * sizeof(np.int32_t))
+    if table == NULL or hashes == NULL:
+        free(table)
+        free(hashes)
+        return -1
+    memset(table, -1, cap * sizeof(np.int32_t))
+    mask = cap - 1
+    for i in range(n):
+        j = rows[i]
+        s, e = starts[j], ends[j]
+        h = _hash_bytes(buf + s, e - s)
+        slot = h & mask
+        while table[slot] != -1:
+            fj = first_rows[table[slot]]
+            if hashes[table[slot]] == h and ends[fj] - starts[fj] == e - s \
+                    and memcmp(buf + starts[fj], buf + s, e - s) == 0:
+                break
+            slot = (slot + 1) & mask
+        if table[slot] == -1:
+            table[slot] = n_uniques
+            hashes[n_uniques] = h
+            first_rows[n_uniques] = j
+            n_uniques += 1
+            if 2 * n_uniques > cap:
+                cap *= 2
+                mask = cap - 1
+                new_table = <np.int32_t *>realloc(table, cap * sizeof(np.int32_t))
+                if new_table == NULL:
+                    free(table)
+                    free(hashes)
+                    return -1
+                table = new_table
+                memset(table, -1, cap * sizeof(np.int32_t))
+                for fj in range(n_uniques):
+                    slot = hashes[fj] & mask
+                    while table[slot] != -1:
+                        slot = (slot + 1) & mask
+                    table[slot] = fj
+            codes[i] = n_uniques - 1
+        else:
+            codes[i] = table[slot]
+    free(table)
+    free(hashes)
+    return n_uniques
+
+
+def csv_intern(bytes data,
+               np.ndarray[offset_t, ndim=1, mode="c"] starts,
+               np.ndarray[offset_t, ndim=1, mode="c"] ends,
+               np.ndarray[np.intp_t, ndim=1, mode="c"] rows):
+    """
+    Intern the raw fields in given `rows` of a tokenized column.
+
+    Return a tuple with an array of codes, one for each of the `rows`, and
+    an array with the row of the first occurrence of each distinct field.
+    """
+    cdef:
+        const char *buf = data
+        Py_ssize_t n = rows.shape[0], n_uniques = 0
+        np.ndarray[np.int32_t, ndim=1] codes = np.empty(n, dtype=np.int32)
+        np.ndarray[offset_t, ndim=1] first_rows = np.empty(n, dtype=np.int64)
+    if n:
+        with nogil:
+            n_uniques = _intern(buf, <offset_t *>starts.data,
+                                <offset_t *>ends.data, <np.intp_t *>rows.data,
+                                n, <np.int32_t *>codes.data,
+                                <offset_t *>first_rows.data)
+        if n_uniques < 0:
+            raise MemoryError
+    return codes, first_rows[:n_uniques].copy()
+
+
+from cpython.unicode cimport PyUnicode_Decode
+
+def csv_strings(bytes data,
+                np.ndarray[offset_t, ndim=1, mode="c"] starts,
+                np.ndarray[offset_t, ndim=1, mode="c"] ends,
+                np.ndarray[np.uint8_t, ndim=1, mode="c"] quoted,
+                np.ndarray[offset_t, ndim=1, mode="c"] rows,
+                int quotechar, bint doublequote, str encoding):
+    """
+    Return a list of stripped strings in given `rows` of a tokenized column.
+    """
+    cdef:
+        const char *buf = data
+        bytes enc = encoding.encode("ascii")
+        const char *c_enc = enc
+        Py_ssize_t i, j
+        list res = []
+    for i in range(rows.shape[0]):
+        j = rows[i]
+        if quoted[j]:
+            field = csv_field(data, starts[j], ends[j], 1,
+                              quotechar, doublequote).decode(encoding)
+        else:
+            field = PyUnicode_Decode(buf + starts[j], ends[j] - starts[j],
+                                     c_enc, "strict")
+        res.append(field.strip())
+    return res
+
+
+def is_ascii(bytes data):
+    """Return True if `data` contains only ASCII characters"""
+    cdef:
+        const unsigned char *buf = data
+        Py_ssize_t i, n = len(data)
+        unsigned char acc = 0
+    with nogil:
+        for i in range(n):
+            acc |= buf[i]
+    return acc < 128
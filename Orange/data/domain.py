@@ -7,6 +7,8 @@ import weakref
 from .variable import *
 import numpy as np
 
+from Orange.data.util import call_compute_value
+
 
 class DomainConversion:
     """
@@ -37,6 +39,10 @@ class DomainConversion:
     .. attribute:: metas
 
         Indices for meta attributes
+
+    Functions that derive from :obj:`~Orange.data.util.SharedComputeValue`
+    and belong to the same group compute their shared part only once per
+    converted table or instance.
     """
 
     def __init__(self, source, destination):
@@ -320,7 +326,8 @@ class Domain:
         c = self._known_domains.get(source, None)
         if not c:
             c = DomainConversion(source, self)
-            self._known_domains[source] = self._last_conversion = c
+            self._known_domains[source] = c
+        self._last_conversion = c
         return c
 
     # noinspection PyProtectedMember
@@ -338,17 +345,20 @@ class Domain:
                 return inst._x, inst._y, inst._metas
             c = self.get_conversion(inst.domain)
             l = len(inst.domain.attributes)
+            shared_cache = {}
             values = [(inst._x[i] if 0 <= i < l
                        else inst._y[i - l] if i >= l
                        else inst._metas[-i - 1])
                       if isinstance(i, int)
-                      else (Unknown if not i else i(inst))
+                      else (Unknown if not i
+                            else call_compute_value(i, inst, shared_cache))
                       for i in c.variables]
             metas = [(inst._x[i] if 0 <= i < l
                       else inst._y[i - l] if i >= l
                       else inst._metas[-i - 1])
                      if isinstance(i, int)
-                     else (Unknown if not i else i(inst))
+                     else (Unknown if not i
+                           else call_compute_value(i, inst, shared_cache))
                      for i in c.metas]
         else:
             nvars = len(self._variables)
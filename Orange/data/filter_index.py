@@ -0,0 +1,342 @@
+"""
+Evaluation of :obj:`Orange.data.filter.Values` on tables.
+
+Conditions of a conjunction are evaluated in the order of their estimated
+selectivity, each one only on the rows that passed the previous conditions;
+conditions of a disjunction are evaluated only on the rows that have not
+been selected yet. Selectivity is estimated on a regular sample of rows.
+
+Conditions on discrete values and on lists of strings can use an index that
+maps values to rows, and ranges of continuous values can use a sorted index
+of the column. Indices are built lazily for large tables and cached for each
+table and column, together with a checksum of the column's contents. The
+checksum is verified once per evaluation of a filter, so a cached index is
+not used after the column has changed, even if it was changed in place.
+"""
+import zlib
+from numbers import Real
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from Orange.data import filter as data_filter
+
+__all__ = ["filter_indicators", "SortedIndex", "ValueIndex"]
+
+#: Indices are built only for tables with at least this many rows
+INDEX_MIN_ROWS = 10000
+
+#: Indices are used only if the condition is evaluated on at least this
+#: proportion of the table's rows; for fewer rows, direct comparisons of
+#: the remaining values are faster
+INDEX_MIN_FRACTION = 1 / 16
+
+#: The size of the sample on which selectivity of conditions is estimated
+SAMPLE_SIZE = 1000
+
+_indices = WeakKeyDictionary()
+_indices_lock = Lock()
+
+
+class SortedIndex:
+    """
+    Index of rows of a numeric column, sorted by values.
+
+    Undefined values are excluded from ranges.
+
+    Args:
+        col (np.ndarray): values of the column
+    """
+    def __init__(self, col):
+        col = col.astype(float)
+        self.order = np.argsort(col, kind="mergesort")
+        self.values = col[self.order]
+        # nans are sorted to the end
+        self.n_defined = len(col) - np.isnan(col).sum()
+
+    def range(self, low=None, high=None, low_inclusive=True,
+              high_inclusive=True):
+        """
+        Return indices of rows with values between `low` and `high`; `None`
+        stands for an unbounded side.
+
+        Returns:
+            np.ndarray: sorted indices of rows
+        """
+        values = self.values[:self.n_defined]
+        start = 0 if low is None else np.searchsorted(
+            values, low, side="left" if low_inclusive else "right")
+        end = len(values) if high is None else np.searchsorted(
+            values, high, side="right" if high_inclusive else "left")
+        return np.sort(self.order[start:max(start, end)])
+
+
+class ValueIndex:
+    """
+    Index that maps values of a column to rows with that value.
+
+    Args:
+        col (np.ndarray): values of the column
+        lower (bool): if `True`, values (strings) are indexed in lower case
+    """
+    def __init__(self, col, lower=False):
+        if col.dtype == object:
+            col = np.array(col, dtype=str)
+            if lower:
+                col = np.char.lower(col)
+        values, inverse = np.unique(col, return_inverse=True)
+        order = np.argsort(inverse, kind="mergesort")
+        bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+        self.rows = {value: order[start:end]
+                     for value, start, end in zip(values.tolist(),
+                                                  bounds[:-1], bounds[1:])}
+
+    def lookup(self, values):
+        """
+        Return indices of rows with any of the given values.
+
+        Returns:
+            np.ndarray: sorted indices of rows
+        """
+        found = [self.rows[value] for value in values if value in self.rows]
+        if not found:
+            return np.empty(0, dtype=int)
+        return np.unique(np.hstack(found))
+
+
+def _checksum(col):
+    if col.dtype == object:
+        return len(col), hash(tuple(col))
+    return len(col), col.dtype.str, \
+        zlib.crc32(np.ascontiguousarray(col).view(np.uint8))
+
+
+def _get_index(table, column, kind, build, checked):
+    """
+    Return the index of the column, or `None` if its values cannot be
+    indexed. Dictionary `checked` maps columns to their checksums computed
+    during the current evaluation of a filter.
+    """
+    col_index = table.domain.index(column)
+    # Indices are built within the lock, so concurrent filtering does not
+    # build the same index twice
+    with _indices_lock:
+        try:
+            col = table.get_column_view(column)[0]
+            if col_index not in checked:
+                checked[col_index] = _checksum(col)
+        except (TypeError, ValueError):  # values that cannot be indexed
+            return None
+        checksum = checked[col_index]
+        table_indices = _indices.setdefault(table, {})
+        cached = table_indices.get((col_index, kind))
+        if cached is not None and cached[0] == checksum:
+            return cached[1]
+        try:
+            index = build(col)
+        except (TypeError, ValueError):
+            index = None
+        table_indices[col_index, kind] = checksum, index
+        return index
+
+
+def _discrete_values(table, f):
+    values = []
+    for val in f.values:
+        if not isinstance(val, Real):
+            val = table.domain[f.column].to_val(val)
+        values.append(val)
+    return values
+
+
+def _index_rows(table, f, checked):
+    """
+    Return indices of all rows of the table that match the condition `f`,
+    or `None` if the condition cannot be evaluated with an index.
+    """
+    if isinstance(f, data_filter.FilterDiscrete):
+        if f.values is None:
+            return None
+        index = _get_index(table, f.column, "values", ValueIndex,
+                           checked)
+        if index is None:
+            return None
+        return index.lookup(float(v) for v in _discrete_values(table, f))
+    if isinstance(f, data_filter.FilterStringList):
+        lower = not f.case_sensitive
+        index = _get_index(table, f.column, ("values", lower),
+                           lambda col: ValueIndex(col, lower), checked)
+        if index is None:
+            return None
+        return index.lookup(str(v).lower() if lower else str(v)
+                            for v in f.values)
+    if isinstance(f, data_filter.FilterContinuous):
+        bounds = {
+            f.Equal: (f.min, f.min, True, True),
+            f.Less: (None, f.min, True, False),
+            f.LessEqual: (None, f.min, True, True),
+            f.Greater: (f.min, None, False, True),
+            f.GreaterEqual: (f.min, None, True, True),
+            f.Between: (f.min, f.max, True, True)}.get(f.oper)
+        if bounds is None or \
+                any(b is not None and np.isnan(b) for b in bounds[:2]):
+            return None
+        index = _get_index(table, f.column, "sorted", SortedIndex,
+                           checked)
+        if index is None:
+            return None
+        return index.range(*bounds)
+    return None
+
+
+def _condition_indicators(table, f, col):
+    """
+    Return indicators of values in `col` that match the condition `f`.
+    """
+    if isinstance(f, data_filter.FilterDiscrete) and f.values is None \
+            or isinstance(f, data_filter.FilterContinuous) and \
+            f.oper == f.IsDefined:
+        return ~np.isnan(col.astype(float))
+    elif isinstance(f, data_filter.FilterString) and f.oper == f.IsDefined:
+        return col.astype(bool)
+    elif isinstance(f, data_filter.FilterDiscrete):
+        sel = np.zeros(len(col), dtype=bool)
+        for val in _discrete_values(table, f):
+            sel |= col == val
+        return sel
+    elif isinstance(f, data_filter.FilterStringList):
+        if not f.case_sensitive:
+            # noinspection PyTypeChecker
+            col = np.char.lower(np.array(col, dtype=str))
+            vals = [val.lower() for val in f.values]
+        else:
+            vals = f.values
+        sel = np.zeros(len(col), dtype=bool)
+        for val in vals:
+            sel |= col == val
+        return sel
+    elif isinstance(f, data_filter.FilterRegex):
+        return np.fromiter(map(f, col), dtype=bool, count=len(col))
+    elif isinstance(f, (data_filter.FilterContinuous,
+                        data_filter.FilterString)):
+        if (isinstance(f, data_filter.FilterString) and
+                not f.case_sensitive):
+            # noinspection PyTypeChecker
+            col = np.char.lower(np.array(col, dtype=str))
+            fmin = f.min.lower()
+            if f.oper in [f.Between, f.Outside]:
+                fmax = f.max.lower()
+        else:
+            fmin, fmax = f.min, f.max
+        if f.oper == f.Equal:
+            return col == fmin
+        elif f.oper == f.NotEqual:
+            return col != fmin
+        elif f.oper == f.Less:
+            return col < fmin
+        elif f.oper == f.LessEqual:
+            return col <= fmin
+        elif f.oper == f.Greater:
+            return col > fmin
+        elif f.oper == f.GreaterEqual:
+            return col >= fmin
+        elif f.oper == f.Between:
+            return (col >= fmin) & (col <= fmax)
+        elif f.oper == f.Outside:
+            return (col < fmin) | (col > fmax)
+        elif not isinstance(f, data_filter.FilterString):
+            raise TypeError("Invalid operator")
+        elif f.oper == f.Contains:
+            return np.fromiter((fmin in e for e in col), dtype=bool,
+                               count=len(col))
+        elif f.oper == f.StartsWith:
+            return np.fromiter((e.startswith(fmin) for e in col), dtype=bool,
+                               count=len(col))
+        elif f.oper == f.EndsWith:
+            return np.fromiter((e.endswith(fmin) for e in col), dtype=bool,
+                               count=len(col))
+        else:
+            raise TypeError("Invalid operator")
+    else:
+        raise TypeError("Invalid filter")
+
+
+def _select_condition(table, f, rows, checked, use_index=True):
+    if use_index and len(table) >= INDEX_MIN_ROWS and \
+            len(rows) >= INDEX_MIN_FRACTION * len(table):
+        matches = _index_rows(table, f, checked)
+        if matches is not None:
+            if len(rows) == len(table):
+                return matches
+            mask = np.zeros(len(table), dtype=bool)
+            mask[matches] = True
+            return rows[mask[rows]]
+    col = table.get_column_view(f.column)[0]
+    return rows[_condition_indicators(table, f, col[rows])]
+
+
+def _select(table, f, rows, checked, use_index=True):
+    """
+    Return the (sorted) subset of indices `rows` that match the filter `f`.
+    """
+    if not isinstance(f, data_filter.Values):
+        return _select_condition(table, f, rows, checked, use_index)
+
+    conditions = list(f.conditions)
+    if len(conditions) > 1 and len(rows) > 4 * SAMPLE_SIZE:
+        sample = rows[::len(rows) // SAMPLE_SIZE]
+        passed = [len(_select(table, cond, sample, checked, False))
+                  for cond in conditions]
+        # most selective conditions first for conjunctions, so that the
+        # others are evaluated on fewer rows; least selective for
+        # disjunctions, so that more rows are selected early
+        order = np.argsort(passed if f.conjunction else np.negative(passed),
+                           kind="mergesort")
+        conditions = [conditions[i] for i in order]
+
+    if f.conjunction:
+        selected = rows
+        for cond in conditions:
+            if not len(selected):
+                break
+            selected = _select(table, cond, selected, checked, use_index)
+    else:
+        remaining = rows
+        found = []
+        for cond in conditions:
+            if not len(remaining):
+                break
+            matches = _select(table, cond, remaining, checked, use_index)
+            found.append(matches)
+            remaining = np.setdiff1d(remaining, matches, assume_unique=True)
+        selected = np.sort(np.hstack(found)) if found \
+            else np.empty(0, dtype=int)
+    if f.negate:
+        selected = np.setdiff1d(rows, selected, assume_unique=True)
+    return selected
+
+
+def filter_indicators(table, filter):
+    """
+    Return indicators of rows of the table that match the filter.
+
+    Args:
+        table (Orange.data.Table): data
+        filter (Orange.data.filter.Values or Orange.data.filter.ValueFilter):
+            a filter or a single condition
+
+    Returns:
+        np.ndarray: boolean array with an element for each row
+    """
+    rows = np.arange(len(table))
+    checked = {}
+    if isinstance(filter, data_filter.Values):
+        selected = _select(table, filter, rows, checked)
+    else:
+        selected = _select_condition(table, filter, rows, checked)
+        if filter.negate:
+            selected = np.setdiff1d(rows, selected, assume_unique=True)
+    sel = np.zeros(len(table), dtype=bool)
+    sel[selected] = True
+    return sel
@@ -1,18 +1,23 @@
+import codecs
 import contextlib
 import csv
+import json
 import locale
 import pickle
 import re
+import struct
 import subprocess
 import sys
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import NamedTemporaryFile
 
-from os import path, unlink
+from io import BytesIO, StringIO
+from os import cpu_count, path, replace, unlink
 from ast import literal_eval
 from math import isnan
 from numbers import Number
-from itertools import chain, repeat
+from itertools import chain, islice, repeat
 from functools import lru_cache
 from collections import OrderedDict
 from urllib.parse import urlparse, unquote as urlunquote
@@ -20,12 +25,14 @@ from urllib.request import urlopen
 
 import bottleneck as bn
 import numpy as np
+import scipy.sparse as sp
 from chardet.universaldetector import UniversalDetector
 
 from Orange.data import (
     _io, is_discrete_values, MISSING_VALUES, Table, Domain, Variable,
     DiscreteVariable, StringVariable, ContinuousVariable, TimeVariable,
 )
+from Orange.data.variable import DISCRETE_MAX_VALUES
 from Orange.util import Registry, flatten, namegen
 
 
@@ -149,6 +156,147 @@ _RE_TYPES = re.compile(r'^\s*({}|{}|)\s*$'.format(_RE_DISCRETE_LIST.pattern,
 _RE_FLAGS = re.compile(r'^\s*( |{}|)*\s*$'.format('|'.join(flatten(filter(None, i) for i in Flags.ALL.items()))))
 
 
+def _column_stack(cols, nrows, dtype):
+    """Return a (`nrows`, len(`cols`)) array with the given columns"""
+    # Columns are put into a preallocated array to avoid temporaries
+    arr = np.empty((nrows, len(cols)), dtype=dtype)
+    for i, values in enumerate(cols):
+        arr[:, i] = values
+    return arr
+
+
+class _ValuesColumn:
+    """
+    A column of string values as read from a file, with missing values
+    replaced by nan. Methods return the values converted as needed to
+    construct the column of a table.
+    """
+    def __init__(self, values):
+        self._values = [np.nan if i in MISSING_VALUES else i
+                        for i in (i.strip() for i in values)]
+
+    def __len__(self):
+        return len(self._values)
+
+    def values(self):
+        return self._values
+
+    def uniques(self):
+        """Return a set of distinct non-missing values"""
+        return set(self._values) - {np.nan}
+
+    def is_discrete(self):
+        """See :obj:`Orange.data.variable.is_discrete_values`"""
+        return is_discrete_values(self._values)
+
+    def floats(self):
+        """Return values converted to floats; raise ValueError on failure"""
+        return [float(i) for i in self._values]
+
+    def invalid_float(self):
+        """Return the index of the first value that is not a number"""
+        for row, num in enumerate(self._values):
+            try: float(num)
+            except ValueError: return row
+
+    def indices(self, valuemap):
+        """Return an array of indices of values in `valuemap` (or nan)"""
+        def valuemap_index(val):
+            try: return valuemap.index(val)
+            except ValueError: return np.nan
+
+        return np.vectorize(valuemap_index, otypes=[float])(self._values)
+
+    def map(self, func):
+        """Return values converted to floats by `func`"""
+        return [func(i) for i in self._values]
+
+    def strings(self):
+        return ['' if i is np.nan else i for i in self._values]
+
+
+class _TokenColumn:
+    """
+    A column of a file tokenized by the native reader (see `_CsvTokens`).
+
+    The column is converted to floats when tokenized. The fields that are
+    not numbers, or the columns that may be discrete, are also interned,
+    so the remaining conversions are done on distinct values only.
+    """
+    def __init__(self, tokens, col):
+        self.tokens = tokens
+        self.col = col
+        self._floats, self._n_failed, self._n_distinct = tokens.floats(col)
+        self._codes = self._code_values = None
+        if self._n_failed or self._n_distinct <= DISCRETE_MAX_VALUES:
+            self._interned()
+
+    def __len__(self):
+        return len(self.tokens.rows)
+
+    def _interned(self):
+        if self._codes is None:
+            self._codes, self._code_values = self.tokens.intern(self.col)
+        return self._codes, self._code_values
+
+    def _map_values(self, func, dtype=float):
+        codes, code_values = self._interned()
+        return np.array([func(i) for i in code_values], dtype=dtype)[codes]
+
+    def values(self):
+        return self._map_values(_IDENTITY, object)
+
+    def uniques(self):
+        return set(self._interned()[1]) - {np.nan}
+
+    def is_discrete(self):
+        if not self._n_failed and self._n_distinct > DISCRETE_MAX_VALUES:
+            # All values are numbers, and there are too many distinct ones
+            return False
+        return is_discrete_values(_ColumnCodes(*self._interned()))
+
+    def floats(self):
+        if not self._n_failed:
+            return self._floats
+        return self._map_values(float)
+
+    def invalid_float(self):
+        def is_invalid(val):
+            try: float(val)
+            except ValueError: return True
+            return False
+
+        return np.flatnonzero(self._map_values(is_invalid, bool))[0]
+
+    def indices(self, valuemap):
+        index = {val: i for i, val in enumerate(valuemap)}
+        return self._map_values(lambda val: index.get(val, np.nan))
+
+    def map(self, func):
+        return self._map_values(func)
+
+    def strings(self):
+        return self._map_values(lambda i: '' if i is np.nan else i, object)
+
+
+class _ColumnCodes:
+    """
+    A column given by codes of its values. Iteration yields the first three
+    values, followed by all distinct values, which suffices for
+    :obj:`Orange.data.variable.is_discrete_values`.
+    """
+    def __init__(self, codes, code_values):
+        self.codes = codes
+        self.code_values = code_values
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        yield from (self.code_values[i] for i in self.codes[:3])
+        yield from self.code_values
+
+
 class FileFormatMeta(Registry):
 
     def __new__(cls, name, bases, attrs):
@@ -398,7 +546,68 @@ class FileFormat(metaclass=FileFormatMeta):
         """
         if not headers:
             headers, data = self.parse_headers(data)
+        return self._rows_table(data, headers)
+
+    @classmethod
+    def _rows_table(cls, data, headers, plan=None):
+        """
+        Return Orange.data.Table from rows of `data` with the given header
+        rows. See `_columns_table` for the description of `plan`.
+        """
+        names, types, flags = cls._header_columns(headers)
 
+        # Determine maximum row length
+        rowlen = max(map(len, (names, types, flags)))
+
+        def _equal_length(lst):
+            lst.extend(['']*(rowlen - len(lst)))
+            return lst
+
+        # Ensure all data is of equal width in a column-contiguous array
+        data = np.array([_equal_length(list(row)) for row in data if any(row)],
+                        copy=False, dtype=object, order='F')
+
+        # Data may actually be longer than headers were
+        try: rowlen = data.shape[1]
+        except IndexError:
+            if data.size:
+                raise ValueError('Rows have different numbers of values')
+        else:
+            for lst in (names, types, flags):
+                _equal_length(lst)
+
+        return cls._columns_table(headers, names, types, flags,
+                                  lambda col: _ValuesColumn(data[:, col]),
+                                  len(data), plan)
+
+    @classmethod
+    def _tokens_table(cls, tokens):
+        """
+        Return Orange.data.Table given `_CsvTokens` of a file, as produced by
+        the native tokenizer. The result is the same as that of
+        `data_table` for the rows of the tokenized file.
+        """
+        headers, _ = cls.parse_headers(tokens.record(i)
+                                       for i in range(min(3, tokens.n_records)))
+        names, types, flags = cls._header_columns(headers)
+        rowlen = max(map(len, (names, types, flags)))
+
+        nrows = tokens.select_rows(len(headers))
+        if nrows:
+            nfields = tokens.nfields[tokens.rows]
+            if nfields.max() > rowlen:
+                if nfields.min() != nfields.max():
+                    raise ValueError('Rows have different numbers of values')
+                rowlen = nfields.max()
+            for lst in (names, types, flags):
+                lst.extend([''] * (rowlen - len(lst)))
+        tokens.convert(rowlen)
+        return cls._columns_table(headers, names, types, flags,
+                                  tokens.column, nrows)
+
+    @staticmethod
+    def _header_columns(headers):
+        """Return lists of names, types and flags of columns from `headers`"""
         # Consider various header types (single-row, two-row, three-row, none)
         if 3 == len(headers):
             names, types, flags = map(list, headers)
@@ -419,25 +628,21 @@ class FileFormat(metaclass=FileFormatMeta):
                 names, _flags = [], []
             types = [''.join(filter(str.isupper, flag)).lower() for flag in _flags]
             flags = [Flags.join(filter(str.islower, flag)) for flag in _flags]
+        return names, types, flags
 
-        # Determine maximum row length
-        rowlen = max(map(len, (names, types, flags)))
-
-        def _equal_length(lst):
-            lst.extend(['']*(rowlen - len(lst)))
-            return lst
-
-        # Ensure all data is of equal width in a column-contiguous array
-        data = np.array([_equal_length(list(row)) for row in data if any(row)],
-                        copy=False, dtype=object, order='F')
-
-        # Data may actually be longer than headers were
-        try: rowlen = data.shape[1]
-        except IndexError: pass
-        else:
-            for lst in (names, types, flags):
-                _equal_length(lst)
+    @classmethod
+    def _columns_table(cls, headers, names, types, flags, get_column, nrows,
+                       plan=None):
+        """
+        Return Orange.data.Table with columns described by `names`, `types`
+        and `flags`. Callable `get_column` returns a column (`_ValuesColumn`)
+        with the given index; it raises IndexError if there is no data.
 
+        If list `plan` is given, tuples (column index, part of the table,
+        variable) are appended to it for columns that are used, where the part
+        is one of 'X', 'Y', 'metas' or 'W', and the variable is None for W.
+        """
+        rowlen = len(names)
         NAMEGEN = namegen('Feature ', 1)
         Xcols, attrs = [], []
         Mcols, metas = [], []
@@ -451,29 +656,26 @@ class FileFormat(metaclass=FileFormatMeta):
 
             type_flag = types and types[col].strip()
             try:
-                orig_values = [np.nan if i in MISSING_VALUES else i
-                               for i in (i.strip() for i in data[:, col])]
+                column = get_column(col)
             except IndexError:
                 # No data instances leads here
-                orig_values = []
+                column = _ValuesColumn([])
                 # In this case, coltype could be anything. It's set as-is
                 # only to satisfy test_table.TableTestCase.test_append
                 coltype = DiscreteVariable
 
             coltype_kwargs = {}
             valuemap = []
-            values = orig_values
+            values = None
 
             if type_flag in StringVariable.TYPE_HEADERS:
                 coltype = StringVariable
             elif type_flag in ContinuousVariable.TYPE_HEADERS:
                 coltype = ContinuousVariable
                 try:
-                    values = [float(i) for i in orig_values]
+                    values = column.floats()
                 except ValueError:
-                    for row, num in enumerate(orig_values):
-                        try: float(num)
-                        except ValueError: break
+                    row = column.invalid_float()
                     raise ValueError('Non-continuous value in (1-based) '
                                      'line {}, column {}'.format(row + len(headers) + 1,
                                                                  col + 1))
@@ -487,18 +689,18 @@ class FileFormat(metaclass=FileFormatMeta):
                     valuemap = Flags.split(type_flag)
                     coltype_kwargs.update(ordered=True)
                 else:
-                    valuemap = sorted(set(orig_values) - {np.nan})
+                    valuemap = sorted(column.uniques())
 
             else:
                 # No known type specified, use heuristics
-                is_discrete = is_discrete_values(orig_values)
+                is_discrete = column.is_discrete()
                 if is_discrete:
                     valuemap = sorted(is_discrete)
                 else:
-                    try: values = [float(i) for i in orig_values]
+                    try: values = column.floats()
                     except ValueError:
                         tvar = TimeVariable('_')
-                        try: values = [tvar.parse(i) for i in orig_values]
+                        try: column.map(tvar.parse)
                         except ValueError:
                             coltype = StringVariable
                         else:
@@ -508,29 +710,23 @@ class FileFormat(metaclass=FileFormatMeta):
 
             if valuemap:
                 # Map discrete data to ints
-                def valuemap_index(val):
-                    try: return valuemap.index(val)
-                    except ValueError: return np.nan
-
-                values = np.vectorize(valuemap_index, otypes=[float])(orig_values)
+                values = column.indices(valuemap)
                 coltype = DiscreteVariable
                 coltype_kwargs.update(values=valuemap)
 
             if coltype is StringVariable:
-                values = ['' if i is np.nan else i
-                          for i in orig_values]
+                values = column.strings()
 
             if flag.m or coltype is StringVariable:
-                append_to = (Mcols, metas)
+                append_to = (Mcols, metas, 'metas')
             elif flag.w:
-                append_to = (Wcols, None)
+                append_to = (Wcols, None, 'W')
             elif flag.c:
-                append_to = (Ycols, clses)
+                append_to = (Ycols, clses, 'Y')
             else:
-                append_to = (Xcols, attrs)
+                append_to = (Xcols, attrs, 'X')
 
-            cols, domain_vars = append_to
-            cols.append(col)
+            cols, domain_vars, part = append_to
             if domain_vars is not None:
                 if names and names[col]:
                     # Use existing variable if available
@@ -546,35 +742,96 @@ class FileFormat(metaclass=FileFormatMeta):
                     new_order, old_order = var.values, coltype_kwargs.get('values', var.values)
                     if new_order != old_order:
                         offset = len(new_order)
-                        column = values if data.ndim > 1 else data
-                        column += offset
+                        values += offset
                         for i, val in enumerate(var.values):
                             try: oldval = old_order.index(val)
                             except ValueError: continue
-                            bn.replace(column, offset + oldval, new_order.index(val))
+                            bn.replace(values, offset + oldval, new_order.index(val))
 
             if coltype is TimeVariable:
                 # Re-parse the values because only now after coltype.make call
                 # above, variable var is the correct one
-                values = [var.parse(i) for i in orig_values]
+                values = column.map(var.parse)
 
-            # Write back the changed data. This is needeed to pass the
-            # correct, converted values into Table.from_numpy below
-            try: data[:, col] = values
-            except IndexError: pass
+            if values is None:
+                values = column.values()
+            cols.append(values)
+            if plan is not None:
+                plan.append((col, part, var if domain_vars is not None else None))
 
         domain = Domain(attrs, clses, metas)
 
-        if not data.size:
+        if not nrows:
             return Table.from_domain(domain, 0)
 
         table = Table.from_numpy(domain,
-                                 data[:, Xcols].astype(float, order='C'),
-                                 data[:, Ycols].astype(float, order='C'),
-                                 data[:, Mcols].astype(object, order='C'),
-                                 data[:, Wcols].astype(float, order='C'))
+                                 _column_stack(Xcols, nrows, float),
+                                 _column_stack(Ycols, nrows, float),
+                                 _column_stack(Mcols, nrows, object),
+                                 _column_stack(Wcols, nrows, float))
         return table
 
+    @classmethod
+    def _plan_table(cls, domain, plan, rows, rowlen, first_line):
+        """
+        Return Orange.data.Table with `domain` from `rows` (lists of strings)
+        whose columns are converted as described by `plan` (see
+        `_columns_table`). Values of unordered discrete variables that are
+        not among variable's values yet are appended to them.
+
+        `first_line` is the (1-based) line of the first row, used in errors.
+        """
+        data = np.array([row + [''] * (rowlen - len(row)) for row in rows],
+                        dtype=object, order='F')
+        if data.ndim != 2 or data.shape[1] != rowlen:
+            raise ValueError('Rows have different numbers of values')
+
+        parts = OrderedDict((part, []) for part in ('X', 'Y', 'metas', 'W'))
+        for col, part, var in plan:
+            column = _ValuesColumn(data[:, col])
+            if isinstance(var, TimeVariable):
+                values = column.map(var.parse)
+            elif var is None or var.is_continuous:
+                try:
+                    values = column.floats()
+                except ValueError:
+                    raise ValueError('Non-continuous value in (1-based) '
+                                     'line {}, column {}'.format(
+                                         first_line + column.invalid_float(),
+                                         col + 1))
+            elif var.is_discrete:
+                if not var.ordered:
+                    for value in sorted(column.uniques() - set(var.values)):
+                        var.add_value(value)
+                values = column.indices(var.values)
+            else:
+                values = column.strings()
+            parts[part].append(values)
+
+        return Table.from_numpy(domain, *(
+            _column_stack(cols, len(data), object if part == 'metas' else float)
+            for part, cols in parts.items()))
+
+    def read_chunks(self, chunksize, sample_size=None):
+        """
+        Return an iterator over tables with at most `chunksize` rows, which
+        share the same domain.
+
+        Formats that cannot be read incrementally read the entire file and
+        split the table.
+
+        Parameters
+        ----------
+        chunksize : int
+            maximal number of rows in a chunk
+        sample_size : int, optional
+            number of rows from which the domain is inferred, if the format
+            supports incremental reading; `chunksize` by default
+        """
+        table = self.read()
+        for start in range(0, len(table), chunksize):
+            yield table[start:start + chunksize]
+
     @staticmethod
     def header_names(data):
         return ['weights'] * data.has_weights() + \
@@ -629,6 +886,146 @@ class FileFormat(metaclass=FileFormatMeta):
                    for var, val in zip(vars, flatten(row))])
 
 
+class _CsvTokens:
+    """
+    A delimited file tokenized by the native reader in `Orange.data._io`.
+
+    The file's bytes are split into chunks at line breaks, which are
+    tokenized in parallel threads and then stored into (column, row)
+    matrices of field offsets. A chunk whose first line break turns out to
+    be within a quoted field is tokenized again from the end of the record.
+    Columns are then converted to floats and interned in parallel.
+    Fields are decoded into strings only for header rows and for distinct
+    values of columns that are not numeric.
+    """
+    CHUNK_SIZE = 1 << 22
+    # Encodings in which bytes of ASCII characters always represent them
+    ASCII_COMPATIBLE = re.compile(r'^(ascii|utf-8|latin-1|iso8859-\d+|cp125\d)$')
+
+    def __init__(self, data, encoding, dialect, n_jobs=None):
+        self.data = data
+        self.encoding = encoding
+        self.delimiter = ord(dialect.delimiter)
+        self.quotechar = ord(dialect.quotechar) if dialect.quotechar else -1
+        self.doublequote = dialect.doublequote
+        self.n_jobs = n_jobs or cpu_count() or 1
+
+        args = (self.delimiter, self.quotechar, self.doublequote,
+                dialect.skipinitialspace)
+        tokenize = lambda begin, limit: _io.csv_tokenize(data, begin, limit,
+                                                         *args)
+        bounds = _io.csv_chunks(data, self.CHUNK_SIZE)
+        with ThreadPoolExecutor(self.n_jobs) as executor:
+            chunks = list(executor.map(tokenize, bounds[:-1], bounds[1:]))
+            # A chunk that does not start where the previous one stopped
+            # started within a quoted field; tokenize it again
+            for i in range(1, len(chunks)):
+                stop = chunks[i - 1][0]
+                if stop != bounds[i]:
+                    chunks[i] = tokenize(stop, max(stop, bounds[i + 1]))
+
+            counts = [len(chunk[4]) for chunk in chunks]
+            self.n_records = n = sum(counts)
+            max_fields = max(chunk[4].max(initial=0) for chunk in chunks)
+            self.starts = np.zeros((max_fields, n), dtype=np.int64)
+            self.ends = np.zeros((max_fields, n), dtype=np.int64)
+            self.quoted = np.zeros((max_fields, n), dtype=np.uint8)
+            self.nfields = np.zeros(n, dtype=np.int32)
+            self.nonempty = np.zeros(n, dtype=np.uint8)
+            first_rows = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            list(executor.map(
+                lambda chunk, row: _io.csv_store(
+                    *chunk[1:], row, self.starts, self.ends, self.quoted,
+                    self.nfields, self.nonempty),
+                chunks, first_rows))
+        self.rows = np.zeros(0, dtype=np.intp)
+        self.columns = []
+
+    @classmethod
+    def from_file(cls, file, dialect_delimiters):
+        """
+        Return tokens of `file` (name or file-like object) and the data
+        (for `csv.reader`) or None if the file cannot be tokenized natively.
+        """
+        if isinstance(file, str):
+            with open_compressed(file, 'rb') as f:
+                data = f.read()
+        else:
+            data = file.read()
+        if isinstance(data, str):
+            text, data, encoding = data, data.encode('utf-8'), 'utf-8'
+        else:
+            text = None
+            if _io.is_ascii(data):
+                encoding = 'us-ascii'
+            elif isinstance(file, str):
+                encoding = detect_encoding(file)
+            else:
+                return None, data
+        try:
+            encoding = codecs.lookup(encoding).name
+            if not cls.ASCII_COMPATIBLE.match(encoding) or b'\x00' in data:
+                return None, text or data
+            sample = codecs.getincrementaldecoder(encoding)().decode(data[:4096])
+        except (LookupError, TypeError, UnicodeDecodeError):
+            return None, text or data
+
+        try:
+            dialect = csv.Sniffer().sniff(sample[:1024], dialect_delimiters)
+        except csv.Error:
+            dialect = csv.excel()
+            dialect.delimiter = dialect_delimiters[0]
+        dialect.skipinitialspace = True
+        if (dialect.escapechar or dialect.quoting == csv.QUOTE_NONE or
+                max(map(ord, dialect.delimiter + (dialect.quotechar or ''))) > 127):
+            return None, text or data
+        return cls(data, encoding, dialect), text or data
+
+    def field(self, col, row):
+        """Return the string in the given field"""
+        return _io.csv_field(self.data, self.starts[col, row], self.ends[col, row],
+                             self.quoted[col, row], self.quotechar,
+                             self.doublequote).decode(self.encoding)
+
+    def record(self, row):
+        """Return a list of strings in the given record"""
+        return [self.field(col, row) for col in range(self.nfields[row])]
+
+    def select_rows(self, skip):
+        """
+        Select the records with data: skip the first `skip` records (headers)
+        and the records without non-empty fields. Return the number of rows.
+        """
+        self.rows = np.flatnonzero(self.nonempty[skip:]).astype(np.intp) + skip
+        return len(self.rows)
+
+    def convert(self, ncolumns):
+        """Convert the first `ncolumns` columns of selected rows in parallel"""
+        if len(self.rows):
+            with ThreadPoolExecutor(self.n_jobs) as executor:
+                self.columns = list(executor.map(
+                    lambda col: _TokenColumn(self, col), range(ncolumns)))
+
+    def column(self, col):
+        return self.columns[col]
+
+    def floats(self, col):
+        return _io.csv_parse_floats(self.data, self.starts[col], self.ends[col],
+                                    self.quoted[col], self.rows)
+
+    def intern(self, col):
+        """
+        Return codes of fields in the column and the values that correspond
+        to codes (with missing values replaced by nan)
+        """
+        codes, first_rows = _io.csv_intern(self.data, self.starts[col],
+                                           self.ends[col], self.rows)
+        values = _io.csv_strings(self.data, self.starts[col], self.ends[col],
+                                 self.quoted[col], first_rows, self.quotechar,
+                                 self.doublequote, self.encoding)
+        return codes, [np.nan if i in MISSING_VALUES else i for i in values]
+
+
 class CSVReader(FileFormat):
     """Reader for comma separated files"""
 
@@ -639,18 +1036,39 @@ class CSVReader(FileFormat):
     PRIORITY = 20
 
     def read(self):
-        for encoding in (lambda: ('us-ascii', None),                 # fast
-                         lambda: (detect_encoding(self.filename), None),  # precise
-                         lambda: (locale.getpreferredencoding(False), None),
-                         lambda: (sys.getdefaultencoding(), None),   # desperate
-                         lambda: ('utf-8', None),                    # ...
-                         lambda: ('utf-8', 'ignore')):               # fallback
-            encoding, errors = encoding()
+        tokens, data = _CsvTokens.from_file(self.filename, self.DELIMITERS)
+        if tokens is not None:
+            try:
+                table = self._tokens_table(tokens)
+            except UnicodeDecodeError:
+                # The detected encoding is wrong; the csv module tries others
+                pass
+            else:
+                self.set_table_metadata(self.filename, table)
+                return table
+        if not isinstance(self.filename, str):
+            file = StringIO(data) if isinstance(data, str) else BytesIO(data)
+        else:
+            file = self.filename
+        return self._read_csv(file)
+
+    @staticmethod
+    def _encodings(filename):
+        """Yield pairs (encoding, errors) with which to try reading the file"""
+        yield 'us-ascii', None                            # fast
+        yield detect_encoding(filename), None             # precise
+        yield locale.getpreferredencoding(False), None
+        yield sys.getdefaultencoding(), None              # desperate
+        yield 'utf-8', None                               # ...
+        yield 'utf-8', 'ignore'                           # fallback
+
+    def _read_csv(self, filename):
+        for encoding, errors in self._encodings(filename):
             # Clear the error flag for all except the last check, because
             # the error of second-to-last check is stored and shown as warning in owfile
             if errors != 'ignore':
                 error = ''
-            with self.open(self.filename, mode='rt', newline='',
+            with self.open(filename, mode='rt', newline='',
                            encoding=encoding, errors=errors) as file:
                 # Sniff the CSV dialect (delimiter, quotes, ...)
                 try:
@@ -681,6 +1099,59 @@ class CSVReader(FileFormat):
                     continue
         raise ValueError('Cannot parse dataset {}: {}'.format(self.filename, error))
 
+    def read_chunks(self, chunksize, sample_size=None):
+        """
+        Return an iterator over tables with at most `chunksize` rows, which
+        are read from the file incrementally and share the same domain.
+
+        The domain is inferred from the first `sample_size` rows (by default,
+        `chunksize`). Values of discrete variables that do not appear in the
+        sample are appended to variables' values when encountered, so the
+        values in all chunks are consistent. Columns that are numeric in the
+        sample must also be numeric in the rest of the file.
+        """
+        sample_size = max(sample_size or chunksize, 1)
+        error = ''
+        for encoding, errors in self._encodings(self.filename):
+            with self.open(self.filename, mode='rt', newline='',
+                           encoding=encoding, errors=errors) as file:
+                try:
+                    dialect = csv.Sniffer().sniff(file.read(1024), self.DELIMITERS)
+                except UnicodeDecodeError as e:
+                    error = e
+                    continue
+                except csv.Error:
+                    dialect = csv.excel()
+                    dialect.delimiter = self.DELIMITERS[0]
+
+                file.seek(0)
+                dialect.skipinitialspace = True
+                try:
+                    headers, rows = self.parse_headers(
+                        csv.reader(file, dialect=dialect))
+                    rows = (row for row in rows if any(row))
+                    sample = list(islice(rows, sample_size))
+                    plan = []
+                    table = self._rows_table(sample, headers, plan)
+                except Exception as e:  # pylint: disable=broad-except
+                    error = e
+                    continue
+
+                rowlen = max(map(len, self._header_columns(headers)))
+                if len(table):
+                    rowlen = max(rowlen, len(max(sample, key=len)))
+                del sample
+                for start in range(0, len(table), chunksize):
+                    yield table[start:start + chunksize]
+                line = len(headers) + len(table) + 1
+                while True:
+                    chunk = list(islice(rows, chunksize))
+                    if not chunk:
+                        return
+                    yield self._plan_table(table.domain, plan, chunk, rowlen, line)
+                    line += len(chunk)
+        raise ValueError('Cannot parse dataset {}: {}'.format(self.filename, error))
+
     @classmethod
     def write_file(cls, filename, data):
         with cls.open(filename, mode='wt', newline='', encoding='utf-8') as file:
@@ -713,6 +1184,268 @@ class PickleReader(FileFormat):
             pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
 
 
+class BinaryReader(FileFormat):
+    """Reader for memory-mapped binary tables
+
+    The file starts with a fixed-size preamble (magic string, format version,
+    and the position and length of the header), followed by raw data blocks,
+    each aligned to `ALIGNMENT` bytes, and a JSON header that describes the
+    domain and the layout of the blocks.
+
+    Dense X, Y, W and ids, and the data and indices of sparse (CSR) parts are
+    mapped into memory in copy-on-write mode: opening a file is instant, the
+    data is read from disk only when accessed, and processes that open the
+    same file share the pages. String metas are stored as a heap of utf-8
+    encoded values with an array of offsets; since Orange keeps metas in an
+    object array, they are read into memory.
+    """
+    EXTENSIONS = ('.otb',)
+    DESCRIPTION = 'Orange binary table'
+    PRIORITY = 30
+
+    MAGIC = b'ORANGETB'
+    VERSION = 1
+    ALIGNMENT = 64
+    _PREAMBLE = struct.Struct('<8sIQQ')
+
+    def read(self):
+        with open(self.filename, 'rb') as file:
+            preamble = file.read(self._PREAMBLE.size)
+            if (len(preamble) != self._PREAMBLE.size or
+                    not preamble.startswith(self.MAGIC)):
+                raise ValueError('{} is not an Orange binary table'
+                                 .format(self.filename))
+            _, version, header_pos, header_len = self._PREAMBLE.unpack(preamble)
+            if version > self.VERSION:
+                raise ValueError('{} has unsupported format version {}'
+                                 .format(self.filename, version))
+            file.seek(header_pos)
+            header = json.loads(file.read(header_len).decode('utf-8'))
+
+            n_rows = header['n_rows']
+            parts = header['parts']
+            domain, recode = self._read_domain(header['domain'])
+            table = Table()
+            table.domain = domain
+            table.X = self._read_part(parts['X'])
+            table.Y = self._read_part(parts['Y'])
+            if 'columns' in parts['metas']:
+                table.metas = self._read_metas(file, parts['metas'], n_rows)
+            else:
+                table.metas = self._read_part(parts['metas'])
+            table.W = (self._map(parts['W']) if 'W' in parts else
+                       np.empty((n_rows, 0)))
+            table.ids = self._map(parts['ids'])
+            table.n_rows = n_rows
+            table.attributes = {}
+
+        for part, col, mapping in recode:
+            setattr(table, part,
+                    self._recode(getattr(table, part), col, mapping))
+        self.set_table_metadata(self.filename, table)
+        return table
+
+    def _map(self, block):
+        shape = tuple(block['shape'])
+        if not np.prod(shape):
+            return np.empty(shape, dtype=block['dtype'])
+        return np.memmap(self.filename, dtype=block['dtype'], mode='c',
+                         offset=block['offset'], shape=shape)
+
+    def _read_part(self, desc):
+        if 'sparse' in desc:
+            csr = desc['sparse']
+            return sp.csr_matrix(
+                (self._map(csr['data']), self._map(csr['indices']),
+                 self._map(csr['indptr'])),
+                shape=tuple(csr['shape']), copy=False)
+        return self._map(desc['dense'])
+
+    @staticmethod
+    def _read_metas(file, desc, n_rows):
+        def read(block):
+            file.seek(block['offset'])
+            return np.frombuffer(file.read(int(np.prod(block['shape'])) *
+                                           np.dtype(block['dtype']).itemsize),
+                                 dtype=block['dtype'])
+
+        metas = np.empty((n_rows, len(desc['columns'])), dtype=object)
+        for col, column in enumerate(desc['columns']):
+            if 'strings' in column:
+                heap = read(column['strings']['heap']).tobytes()
+                offsets = read(column['strings']['offsets']).tolist()
+                metas[:, col] = [heap[start:end].decode('utf-8')
+                                 for start, end in zip(offsets, offsets[1:])]
+            else:
+                metas[:, col] = read(column['dense'])
+        return metas
+
+    @staticmethod
+    def _recode(array, col, mapping):
+        """Recode values in column `col` of the array (in place, if
+        possible) and return the array."""
+        if sp.issparse(array) and mapping[0] != 0:
+            # implicit zeros stand for a value that is recoded to another
+            # code, so the column is recoded as a dense one
+            column = array[:, col].toarray()
+            defined = ~np.isnan(column)
+            column[defined] = mapping[column[defined].astype(int)]
+            return sp.hstack((array[:, :col], sp.csr_matrix(column),
+                              array[:, col + 1:]), format="csr")
+        if sp.issparse(array):
+            mask = array.indices == col
+            values = array.data[mask]
+        else:
+            values = array[:, col]
+        # metas are objects; discrete values in them are floats or nan
+        codes = values.astype(float)
+        defined = ~np.isnan(codes)
+        values[defined] = mapping[codes[defined].astype(int)]
+        if sp.issparse(array):
+            array.data[mask] = values
+        return array
+
+    @classmethod
+    def _read_domain(cls, desc):
+        recode = []
+        parts = []
+        for part, part_desc in (('X', desc['attributes']),
+                                ('_Y', desc['class_vars']),
+                                ('metas', desc['metas'])):
+            variables = []
+            for col, var_desc in enumerate(part_desc):
+                var = cls._read_variable(var_desc)
+                if var.is_discrete and var.values != var_desc['values']:
+                    # Reused variable has a different order of values
+                    mapping = np.array([var.values.index(value)
+                                        for value in var_desc['values']],
+                                       dtype=float)
+                    recode.append((part, col, mapping))
+                variables.append(var)
+            parts.append(variables)
+        return Domain(*parts), recode
+
+    @staticmethod
+    def _read_variable(desc):
+        var_type = Variable.registry.get(desc['type'])
+        if var_type is None:
+            raise ValueError('Unknown variable type {}'.format(desc['type']))
+        if issubclass(var_type, DiscreteVariable):
+            var = var_type.make(desc['name'], desc['values'], desc['ordered'],
+                                desc['base_value'])
+        else:
+            var = var_type.make(desc['name'])
+        if 'number_of_decimals' in desc:
+            var.number_of_decimals = desc['number_of_decimals']
+        if issubclass(var_type, TimeVariable):
+            var.have_date = desc['have_date']
+            var.have_time = desc['have_time']
+        for key, value in desc['attributes'].items():
+            try:
+                var.attributes[key] = literal_eval(value)
+            except (ValueError, SyntaxError):
+                var.attributes[key] = value
+        return var
+
+    @staticmethod
+    def _variable_header(var):
+        desc = {'type': type(var).__name__, 'name': var.name,
+                'attributes': {key: repr(value)
+                               for key, value in var.attributes.items()}}
+        if var.is_discrete:
+            desc.update(values=list(var.values), ordered=var.ordered,
+                        base_value=var.base_value)
+        elif var.is_continuous:
+            if not var.adjust_decimals:
+                desc['number_of_decimals'] = var.number_of_decimals
+            if isinstance(var, TimeVariable):
+                desc.update(have_date=var.have_date, have_time=var.have_time)
+        return desc
+
+    @classmethod
+    def write_file(cls, filename, data):
+        domain = data.domain
+        header = {
+            'n_rows': len(data),
+            'domain': {
+                'attributes': [cls._variable_header(var)
+                               for var in domain.attributes],
+                'class_vars': [cls._variable_header(var)
+                               for var in domain.class_vars],
+                'metas': [cls._variable_header(var) for var in domain.metas]},
+        }
+        # Write to a temporary file, which replaces the target when complete:
+        # `data` can be mapped from the file that is being overwritten
+        file = NamedTemporaryFile('wb', dir=path.dirname(path.abspath(filename)),
+                                  prefix='.' + path.basename(filename),
+                                  delete=False)
+        try:
+            with file:
+                file.write(bytes(cls._PREAMBLE.size))
+                write = lambda array: cls._write_block(file, array)
+                parts = header['parts'] = {
+                    'X': cls._write_part(write, data.X),
+                    'Y': cls._write_part(write, data._Y),
+                    'ids': write(np.asarray(data.ids, dtype=np.int64))}
+                if data.has_weights():
+                    parts['W'] = write(data.W)
+                if sp.issparse(data.metas):
+                    parts['metas'] = cls._write_part(write, data.metas)
+                else:
+                    parts['metas'] = {'columns': [
+                        cls._write_meta(write, var, data.metas[:, col])
+                        for col, var in enumerate(domain.metas)]}
+                encoded = json.dumps(header).encode('utf-8')
+                header_pos = file.tell()
+                file.write(encoded)
+                file.seek(0)
+                file.write(cls._PREAMBLE.pack(
+                    cls.MAGIC, cls.VERSION, header_pos, len(encoded)))
+            replace(file.name, filename)
+        except BaseException:
+            unlink(file.name)
+            raise
+        cls.write_table_metadata(filename, data)
+
+    @classmethod
+    def _write_block(cls, file, array):
+        file.write(bytes(-file.tell() % cls.ALIGNMENT))
+        array = np.ascontiguousarray(array)
+        block = {'offset': file.tell(), 'dtype': array.dtype.str,
+                 'shape': array.shape}
+        file.write(array.data)
+        return block
+
+    @staticmethod
+    def _write_part(write, array):
+        if not sp.issparse(array):
+            return {'dense': write(np.asarray(array, dtype=np.float64))}
+        array = sp.csr_matrix(array)
+        array.sum_duplicates()
+        # Keep indices in 32 bits whenever scipy would, so they can be mapped
+        index_dtype = (np.int32 if max(array.nnz, max(array.shape)) <
+                       np.iinfo(np.int32).max else np.int64)
+        return {'sparse': {
+            'data': write(np.asarray(array.data, dtype=np.float64)),
+            'indices': write(np.asarray(array.indices, dtype=index_dtype)),
+            'indptr': write(np.asarray(array.indptr, dtype=index_dtype)),
+            'shape': array.shape}}
+
+    @staticmethod
+    def _write_meta(write, var, column):
+        if not var.is_string:
+            return {'dense': write(np.asarray(column, dtype=np.float64))}
+        encoded = [var.to_val(None if value is None or
+                              isinstance(value, float) and isnan(value) else
+                              value).encode('utf-8')
+                   for value in column]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return {'strings': {
+            'offsets': write(offsets),
+            'heap': write(np.frombuffer(b''.join(encoded), dtype=np.uint8))}}
+
+
 class BasketReader(FileFormat):
     """Reader for basket (sparse) files"""
     EXTENSIONS = ('.basket', '.bsk')
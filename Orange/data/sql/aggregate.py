@@ -0,0 +1,131 @@
+"""
+Planning of aggregation queries that compute distributions and contingencies
+for many columns at once.
+
+Queries for single columns are folded with UNION ALL into queries for
+batches of columns. Each row of the result starts with the index of the
+column within the batch; continuous and discrete values are returned in
+separate fields, so the types of the combined queries agree. The SQL is
+standard and runs on PostgreSQL as well as on SQLite.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = ["distribution_queries", "contingency_queries",
+           "split_by_column", "run_queries"]
+
+#: The number of columns aggregated in a single query
+BATCH_SIZE = 32
+
+CONTINUOUS_VALUE = "CAST({} AS double precision)"
+DISCRETE_VALUE = "CAST({} AS text)"
+
+
+def _value_fields(field, continuous):
+    if continuous:
+        return [CONTINUOUS_VALUE.format(field), DISCRETE_VALUE.format("NULL")]
+    else:
+        return [CONTINUOUS_VALUE.format("NULL"), DISCRETE_VALUE.format(field)]
+
+
+def _batches(columns, batch_size):
+    for start in range(0, len(columns), batch_size):
+        yield start, columns[start:start + batch_size]
+
+
+def distribution_queries(sql_query, columns, batch_size=BATCH_SIZE):
+    """
+    Return queries that count the values in columns.
+
+    The rows of the results are `(column index, continuous value, discrete
+    value, count)`, ordered by columns and values.
+
+    Args:
+        sql_query (callable): a function with the signature of
+            `SqlTable._sql_query` that composes a query on the table
+        columns (list of (str, bool)): sql expressions for columns and
+            flags telling whether they are continuous
+        batch_size (int): the number of columns in a single query
+
+    Returns:
+        list of str: queries
+    """
+    queries = []
+    for start, batch in _batches(columns, batch_size):
+        parts = [
+            sql_query(
+                [str(start + i)] + _value_fields(field, continuous) +
+                ["COUNT({})".format(field)],
+                filters=["{} IS NOT NULL".format(field)],
+                group_by=[field])
+            for i, (field, continuous) in enumerate(batch)]
+        queries.append(" UNION ALL ".join(parts) + " ORDER BY 1, 2, 3")
+    return queries
+
+
+def contingency_queries(sql_query, row_field, columns,
+                        batch_size=BATCH_SIZE):
+    """
+    Return queries that count the co-occurrences of values of `row_field`
+    and of columns.
+
+    The rows of the results are `(column index, row value, continuous
+    value, discrete value, count)`, ordered by columns and column values.
+
+    Args:
+        sql_query (callable): a function with the signature of
+            `SqlTable._sql_query` that composes a query on the table
+        row_field (str): sql expression for the row (discrete) variable
+        columns (list of (str, bool)): sql expressions for columns and
+            flags telling whether they are continuous
+        batch_size (int): the number of columns in a single query
+
+    Returns:
+        list of str: queries
+    """
+    queries = []
+    for start, batch in _batches(columns, batch_size):
+        parts = [
+            sql_query(
+                [str(start + i), DISCRETE_VALUE.format(row_field)] +
+                _value_fields(field, continuous) +
+                ["COUNT({})".format(field)],
+                filters=["{} IS NOT NULL".format(f)
+                         for f in (row_field, field)],
+                group_by=[row_field, field])
+            for i, (field, continuous) in enumerate(batch)]
+        queries.append(" UNION ALL ".join(parts) + " ORDER BY 1, 3, 4, 2")
+    return queries
+
+
+def split_by_column(rows, n_columns):
+    """
+    Distribute the rows of results by the column index in their first
+    field.
+
+    Returns:
+        list of list of tuple: rows without the column index for each column
+    """
+    per_column = [[] for _ in range(n_columns)]
+    for row in rows:
+        per_column[int(row[0])].append(tuple(row[1:]))
+    return per_column
+
+
+def run_queries(execute, queries, n_jobs=1):
+    """
+    Run queries, `n_jobs` of them at the same time, and return all rows.
+
+    Args:
+        execute (callable): a function that runs a query and returns rows
+        queries (list of str): queries
+        n_jobs (int): the number of queries that run concurrently
+
+    Returns:
+        list of tuple: rows of results of all queries
+    """
+    if n_jobs <= 1 or len(queries) < 2:
+        results = [execute(query) for query in queries]
+    else:
+        with ThreadPoolExecutor(min(n_jobs, len(queries))) as executor:
+            results = list(executor.map(execute, queries))
+    return [row for rows in results for row in rows]
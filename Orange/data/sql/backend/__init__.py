@@ -0,0 +1,20 @@
+from .base import Backend
+from .postgres import PostgresBackend
+from .sqlite import SQLiteBackend
+
+__all__ = ["Backend", "PostgresBackend", "SQLiteBackend", "get_backend"]
+
+BACKENDS = {"postgres": PostgresBackend, "sqlite": SQLiteBackend}
+
+
+def get_backend(backend):
+    """Return an instance of a backend given by its name (see
+    :obj:`BACKENDS`), its class or the instance itself."""
+    if isinstance(backend, Backend):
+        return backend
+    if isinstance(backend, str):
+        try:
+            backend = BACKENDS[backend]
+        except KeyError:
+            raise ValueError("Unknown backend '{}'".format(backend))
+    return backend()
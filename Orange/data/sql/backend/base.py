@@ -0,0 +1,141 @@
+class Backend:
+    """
+    Base class for database backends of :obj:`Orange.data.sql.table.SqlTable`.
+
+    Backends handle connections and the parts of SQL that differ between
+    database engines: quoting, type casts, statistics and sampling. The
+    defaults follow the SQL standard.
+    """
+    #: name of the backend as shown to users
+    display_name = ""
+
+    #: whether all tables share the connection pool of the class SqlTable
+    shared_pool = False
+
+    DISCRETE_STATS = "SUM(CASE WHEN %(field_name)s IS NULL THEN 1 " \
+                     "ELSE 0 END), " \
+                     "SUM(CASE WHEN %(field_name)s IS NULL THEN 0 " \
+                     "ELSE 1 END)"
+    CONTINUOUS_STATS = "CAST(MIN(%(field_name)s) AS double precision), " \
+                       "CAST(MAX(%(field_name)s) AS double precision), " \
+                       "CAST(AVG(%(field_name)s) AS double precision), " \
+                       "CAST(STDDEV(%(field_name)s) AS double precision), " \
+                       + DISCRETE_STATS
+
+    @property
+    def Error(self):
+        """The base class of errors raised by the database driver."""
+        raise NotImplementedError
+
+    def create_connection_pool(self, connection_params):
+        """
+        Return a pool of connections with methods `getconn`, `putconn` and
+        `closeall`, and attribute `maxconn`.
+        """
+        raise NotImplementedError
+
+    def cursor(self, connection, server_side=False):
+        """
+        Return a new cursor. Server-side cursors (if the backend supports
+        them) keep the results in the database until they are fetched.
+        """
+        return connection.cursor()
+
+    def query_for_log(self, cursor, query, param=None):
+        """Return the query with parameters as it is written to the log."""
+        if param is None:
+            return query
+        return "{} -- {}".format(query, param)
+
+    def quote_identifier(self, value):
+        return '"%s"' % value
+
+    def unquote_identifier(self, value):
+        if value.startswith('"'):
+            return value[1:len(value) - 1]
+        else:
+            return value
+
+    def quote_string(self, value):
+        return "'%s'" % value
+
+    def to_continuous(self, field):
+        """Return an expression that casts `field` to a number."""
+        return "CAST({} AS double precision)".format(field)
+
+    def to_discrete(self, field):
+        """Return an expression that casts `field` to text."""
+        return "CAST({} AS text)".format(field)
+
+    def field_kind(self, execute, table_name, field_name, type_code):
+        """
+        Return the kind of values in the field: "float", "int", "bool",
+        "text" or `None` for other types.
+
+        Args:
+            execute (callable): a context manager that runs a query and
+                returns the cursor (`SqlTable._execute_sql_query`)
+            table_name (str): the table or query as used in FROM
+            field_name (str): unquoted name of the field
+            type_code: the type code from the cursor's description
+        """
+        raise NotImplementedError
+
+    def limit_offset(self, limit=None, offset=None):
+        """Return the list of LIMIT and OFFSET clauses."""
+        sql = []
+        if limit is not None:
+            sql.extend(["LIMIT", str(limit)])
+        if offset is not None:
+            sql.extend(["OFFSET", str(offset)])
+        return sql
+
+    def approx_len(self, execute, query):
+        """Return the (approximate) number of rows returned by `query`."""
+        with execute("SELECT COUNT(*) FROM ({}) AS approx_len"
+                     .format(query)) as cur:
+            return cur.fetchone()[0]
+
+    def sample_query(self, execute, source, method, parameter):
+        """
+        Return a query that selects a random sample of rows from `source`.
+
+        Args:
+            execute (callable): a context manager that runs a query
+            source (str): the table
+            method (str): "system" (`parameter` is a percentage of rows)
+                or "system_time" (`parameter` is the time in milliseconds)
+            parameter (float): the percentage or the time
+        """
+        raise NotImplementedError
+
+    def sample_source(self, execute, source, method, parameter):
+        """
+        Return an expression for the FROM clause that selects a random sample
+        of rows from `source`; arguments are as in :obj:`sample_query`.
+        """
+        return "({}) AS sample".format(
+            self.sample_query(execute, source, method, parameter))
+
+    def sample_table(self, name):
+        """Return the quoted name of the table that stores sample `name`."""
+        return self.quote_identifier(name)
+
+    def quantiles(self, execute, source, field, quantiles):
+        """
+        Return the values of expression `field` at the given quantiles
+        (numbers between 0 and 1) of the rows returned by query `source`.
+        Undefined values are ignored.
+        """
+        query = "SELECT {field} AS value FROM ({source}) AS quantiles " \
+                "WHERE {field} IS NOT NULL".format(field=field, source=source)
+        with execute("SELECT COUNT(*) FROM ({}) AS n".format(query)) as cur:
+            n = cur.fetchone()[0]
+        values = []
+        for q in quantiles if n else ():
+            sql = " ".join(["SELECT value FROM ({}) AS v ORDER BY value"
+                            .format(query)] +
+                           self.limit_offset(1, int(q * (n - 1))))
+            with execute(sql) as cur:
+                values.append(cur.fetchone()[0])
+        return values
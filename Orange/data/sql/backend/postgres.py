@@ -0,0 +1,93 @@
+import re
+from uuid import uuid4
+
+import Orange.misc
+from .base import Backend
+
+psycopg2 = Orange.misc.import_late_warning("psycopg2")
+psycopg2.pool = Orange.misc.import_late_warning("psycopg2.pool")
+
+MAX_CONNECTIONS = 16
+
+
+class PostgresBackend(Backend):
+    """Backend for PostgreSQL through psycopg2."""
+    display_name = "PostgreSQL"
+    shared_pool = True
+
+    FLOATISH_TYPES = (700, 701, 1700)  # real, float8, numeric
+    INT_TYPES = (20, 21, 23)  # bigint, int, smallint
+    CHAR_TYPES = (25, 1042, 1043,)  # text, char, varchar
+    BOOLEAN_TYPES = (16,)  # bool
+
+    DISCRETE_STATS = "SUM(CASE TRUE WHEN %(field_name)s IS NULL THEN 1 " \
+                     "ELSE 0 END), " \
+                     "SUM(CASE TRUE WHEN %(field_name)s IS NULL THEN 0 " \
+                     "ELSE 1 END)"
+    CONTINUOUS_STATS = "MIN(%(field_name)s)::double precision, " \
+                       "MAX(%(field_name)s)::double precision, " \
+                       "AVG(%(field_name)s)::double precision, " \
+                       "STDDEV(%(field_name)s)::double precision, " \
+                       + DISCRETE_STATS
+
+    @property
+    def Error(self):
+        return psycopg2.Error
+
+    def create_connection_pool(self, connection_params):
+        return psycopg2.pool.ThreadedConnectionPool(
+            1, MAX_CONNECTIONS, **connection_params)
+
+    def cursor(self, connection, server_side=False):
+        if server_side:
+            return connection.cursor(name="orange_" + uuid4().hex)
+        return connection.cursor()
+
+    def query_for_log(self, cursor, query, param=None):
+        return cursor.mogrify(query, param).decode('utf-8')
+
+    def to_continuous(self, field):
+        return "({})::double precision".format(field)
+
+    def to_discrete(self, field):
+        return "({})::text".format(field)
+
+    def field_kind(self, execute, table_name, field_name, type_code):
+        if type_code in self.FLOATISH_TYPES:
+            return "float"
+        if type_code in self.INT_TYPES:
+            return "int"
+        if type_code in self.BOOLEAN_TYPES:
+            return "bool"
+        if type_code in self.CHAR_TYPES:
+            return "text"
+        return None
+
+    def limit_offset(self, limit=None, offset=None):
+        sql = []
+        if offset is not None:
+            sql.extend(["OFFSET", str(offset)])
+        if limit is not None:
+            sql.extend(["LIMIT", str(limit)])
+        return sql
+
+    def approx_len(self, execute, query):
+        with execute("EXPLAIN " + query) as cur:
+            s = ''.join(row[0] for row in cur.fetchall())
+        return int(re.findall(r'rows=(\d*)', s)[0])
+
+    def sample_query(self, execute, source, method, parameter):
+        return "SELECT * FROM " + self.sample_source(
+            execute, source, method, parameter)
+
+    def sample_source(self, execute, source, method, parameter):
+        return "{source} TABLESAMPLE {method}({param})".format(
+            source=source, method=method, param=parameter)
+
+    def quantiles(self, execute, source, field, quantiles):
+        # quantile is provided by the extension of the same name
+        query = "SELECT quantile({field}, ARRAY{quantiles}) " \
+                "FROM ({source}) AS quantiles".format(
+                    field=field, quantiles=list(quantiles), source=source)
+        with execute(query) as cur:
+            return list(cur.fetchone()[0] or ())
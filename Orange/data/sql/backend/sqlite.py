@@ -0,0 +1,140 @@
+from queue import Queue, Empty
+from uuid import uuid4
+import math
+import sqlite3
+import threading
+
+from .base import Backend
+
+MAX_CONNECTIONS = 16
+
+#: The number of rows assumed to be processed in a second when sampling
+#: for a given time, which SQLite does not support
+SAMPLE_ROWS_PER_SECOND = 100000
+
+#: The name of the in-memory database, attached to all connections of a
+#: pool, in which samples are stored
+SAMPLES_DATABASE = "samples"
+
+
+class StdDev:
+    """Aggregate function for the sample standard deviation, which SQLite
+    lacks."""
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.
+        self.m2 = 0.
+
+    def step(self, value):
+        if value is None:
+            return
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        if self.n < 2:
+            return None
+        return math.sqrt(self.m2 / (self.n - 1))
+
+
+class SQLiteConnectionPool:
+    """
+    Pool of connections to a SQLite database with the interface of
+    psycopg2's pools. Connections are created as needed, up to `maxconn`.
+
+    Temporary tables of SQLite are visible only to the connection that
+    created them, so the pool's connections instead share an attached
+    in-memory database (:obj:`SAMPLES_DATABASE`) for temporary data; it is
+    discarded when the pool's connections are closed.
+    """
+    def __init__(self, maxconn, database, **kwargs):
+        self.maxconn = maxconn
+        self.database = database
+        self.kwargs = dict(kwargs, uri=True)
+        self.samples_uri = "file:orange-{}?mode=memory&cache=shared".format(
+            uuid4().hex)
+        self._free = Queue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False,
+                               **self.kwargs)
+        conn.create_aggregate("STDDEV", 1, StdDev)
+        conn.execute("ATTACH DATABASE ? AS {}".format(SAMPLES_DATABASE),
+                     (self.samples_uri, ))
+        # make LIKE behave as in PostgreSQL
+        conn.execute("PRAGMA case_sensitive_like = ON")
+        return conn
+
+    def getconn(self):
+        try:
+            return self._free.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.maxconn:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        return self._free.get()
+
+    def putconn(self, conn):
+        self._free.put(conn)
+
+    def closeall(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all = []
+            self._free = Queue()
+
+
+class SQLiteBackend(Backend):
+    """Backend for SQLite databases through the standard module sqlite3."""
+    display_name = "SQLite"
+
+    TYPES = {"real": "float", "integer": "int", "text": "text"}
+
+    @property
+    def Error(self):
+        return sqlite3.Error
+
+    def create_connection_pool(self, connection_params):
+        return SQLiteConnectionPool(MAX_CONNECTIONS, **connection_params)
+
+    def field_kind(self, execute, table_name, field_name, type_code):
+        # Columns in SQLite have no types, so we check the stored values
+        field = self.quote_identifier(field_name)
+        query = "SELECT DISTINCT typeof({field}) FROM (SELECT {field} " \
+                "FROM {table} WHERE {field} IS NOT NULL LIMIT 1000) " \
+                "AS field_kind".format(field=field, table=table_name)
+        with execute(query) as cur:
+            kinds = {self.TYPES.get(kind) for kind, in cur.fetchall()}
+        if kinds == {"int", "float"}:
+            return "float"
+        if len(kinds) == 1:
+            return kinds.pop()
+        return None
+
+    def limit_offset(self, limit=None, offset=None):
+        if limit is None and offset is not None:
+            limit = -1
+        return super().limit_offset(limit, offset)
+
+    def sample_table(self, name):
+        return "{}.{}".format(SAMPLES_DATABASE, self.quote_identifier(name))
+
+    def sample_query(self, execute, source, method, parameter):
+        if method == "system_time":
+            n_rows = self.approx_len(execute, "SELECT * FROM " + source)
+            rows = SAMPLE_ROWS_PER_SECOND * parameter / 1000
+            parameter = 100 * rows / max(n_rows, 1)
+        elif method != "system":
+            raise ValueError("Unsupported sampling method '{}'".format(method))
+        threshold = int(min(parameter, 100) * 10000)
+        return "SELECT * FROM {source} " \
+               "WHERE abs(random() % 1000000) < {threshold}".format(
+                   source=source, threshold=threshold)
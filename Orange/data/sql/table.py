@@ -1,34 +1,36 @@
 """
-Support for example tables wrapping data stored on a PostgreSQL server.
+Support for example tables wrapping data stored in a database: on a
+PostgreSQL server or in a SQLite file.
 """
 from contextlib import contextmanager
 import functools
-from itertools import islice
 import logging
-import re
 import threading
 from time import time, strftime
 
 import numpy as np
 
-import Orange.misc
-psycopg2 = Orange.misc.import_late_warning("psycopg2")
-psycopg2.pool = Orange.misc.import_late_warning("psycopg2.pool")
-
 from .. import domain, variable, table, instance, filter,\
     DiscreteVariable, ContinuousVariable, StringVariable
 from Orange.data.sql import filter as sql_filter
+from Orange.data.sql import aggregate
+from Orange.data.sql.backend import get_backend
 
 
 LARGE_TABLE = 100000
 AUTO_DL_LIMIT = 10000
+#: The number of rows fetched at once when downloading data
+DOWNLOAD_BATCH = 10000
 DEFAULT_SAMPLE_TIME = 1
+#: The largest number of aggregation queries that run at the same time
+PARALLEL_QUERIES = 4
 sql_log = logging.getLogger('sql_log')
 sql_log.debug("Logging started: {}".format(strftime("%Y-%m-%d %H:%M:%S")))
 
 
 class SqlTable(table.Table):
     connection_pool = None
+    backend = get_backend("postgres")
     table_name = None
     domain = None
     row_filters = ()
@@ -40,7 +42,7 @@ class SqlTable(table.Table):
 
     def __init__(
             self, connection_params, table_or_sql,
-            type_hints=None, inspect_values=False):
+            type_hints=None, inspect_values=False, backend=None):
         """
         Create a new proxy for sql table.
 
@@ -71,12 +73,21 @@ class SqlTable(table.Table):
         type_hints parameter. Variables from the domain are used for
         the columns with the matching names; for columns without the matching
         name in the domain, types are inferred as described above.
+
+        The database is on a PostgreSQL server by default. Other backends
+        are chosen by passing their name (e.g. "sqlite", in which case
+        the database is the name of the file), class or instance (see
+        :obj:`Orange.data.sql.backend`) as `backend`.
+
+            table = SqlTable('data.sqlite', 'table_name', backend='sqlite')
         """
         if isinstance(connection_params, str):
             connection_params = dict(database=connection_params)
         self.connection_params = connection_params
+        if backend is not None:
+            self.backend = get_backend(backend)
 
-        if self.connection_pool is None:
+        if self.connection_pool is None or not self.backend.shared_pool:
             self.create_connection_pool()
 
         if table_or_sql is not None:
@@ -89,8 +100,8 @@ class SqlTable(table.Table):
             self.name = table
 
     def create_connection_pool(self):
-        self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
-            1, 16, **self.connection_params)
+        self.connection_pool = self.backend.create_connection_pool(
+            self.connection_params)
 
     def get_domain(self, type_hints=None, guess_values=False):
         if type_hints is None:
@@ -104,10 +115,10 @@ class SqlTable(table.Table):
 
         def add_to_sql(var, field_name):
             if var.is_continuous:
-                var.to_sql = ToSql("({})::double precision".format(
+                var.to_sql = ToSql(self.backend.to_continuous(
                     self.quote_identifier(field_name)))
             elif var.is_discrete:
-                var.to_sql = ToSql("({})::text".format(
+                var.to_sql = ToSql(self.backend.to_discrete(
                     self.quote_identifier(field_name)))
             else:
                 var.to_sql = ToSql(self.quote_identifier(field_name))
@@ -133,25 +144,23 @@ class SqlTable(table.Table):
         return domain.Domain(attrs, class_vars, metas)
 
     def get_variable(self, field_name, type_code, inspect_values=False):
-        FLOATISH_TYPES = (700, 701, 1700)  # real, float8, numeric
-        INT_TYPES = (20, 21, 23)  # bigint, int, smallint
-        CHAR_TYPES = (25, 1042, 1043,)  # text, char, varchar
-        BOOLEAN_TYPES = (16,)  # bool
+        kind = self.backend.field_kind(self._execute_sql_query,
+                                       self.table_name, field_name, type_code)
 
-        if type_code in FLOATISH_TYPES:
+        if kind == "float":
             return ContinuousVariable(field_name)
 
-        if type_code in INT_TYPES:  # bigint, int, smallint
+        if kind == "int":
             if inspect_values:
                 values = self.get_distinct_values(field_name)
                 if values:
                     return DiscreteVariable(field_name, values)
             return ContinuousVariable(field_name)
 
-        if type_code in BOOLEAN_TYPES:
+        if kind == "bool":
             return DiscreteVariable(field_name, ['false', 'true'])
 
-        if type_code in CHAR_TYPES:
+        if kind == "text":
             if inspect_values:
                 values = self.get_distinct_values(field_name)
                 if values:
@@ -160,8 +169,9 @@ class SqlTable(table.Table):
         return StringVariable(field_name)
 
     def get_distinct_values(self, field_name):
-        sql = " ".join(["SELECT DISTINCT (%s)::text" %
-                            self.quote_identifier(field_name),
+        sql = " ".join(["SELECT DISTINCT %s" %
+                            self.backend.to_discrete(
+                                self.quote_identifier(field_name)),
                         "FROM", self.table_name,
                         "WHERE {} IS NOT NULL".format(
                             self.quote_identifier(field_name)),
@@ -241,16 +251,21 @@ class SqlTable(table.Table):
         for row in self._query(attributes):
             yield SqlRowInstance(self.domain, row)
 
+    @staticmethod
+    def _sql_fields(attributes):
+        fields = []
+        for attr in attributes:
+            assert hasattr(attr, 'to_sql'), \
+                "Cannot use ordinary attributes with sql backend"
+            field_str = '(%s) AS "%s"' % (attr.to_sql(), attr.name)
+            fields.append(field_str)
+        if not fields:
+            raise ValueError("No fields selected.")
+        return fields
+
     def _query(self, attributes=None, filters=(), rows=None):
         if attributes is not None:
-            fields = []
-            for attr in attributes:
-                assert hasattr(attr, 'to_sql'), \
-                    "Cannot use ordinary attributes with sql backend"
-                field_str = '(%s) AS "%s"' % (attr.to_sql(), attr.name)
-                fields.append(field_str)
-            if not fields:
-                raise ValueError("No fields selected.")
+            fields = self._sql_fields(attributes)
         else:
             fields = ["*"]
 
@@ -280,6 +295,7 @@ class SqlTable(table.Table):
         """Return a copy of the SqlTable"""
         table = SqlTable.__new__(SqlTable)
         table.connection_pool = self.connection_pool
+        table.backend = self.backend
         table.domain = self.domain
         table.row_filters = self.row_filters
         table.table_name = self.table_name
@@ -313,10 +329,8 @@ class SqlTable(table.Table):
     def approx_len(self, get_exact=False):
         if self._cached__len__ is not None:
             return self._cached__len__
-        sql = "EXPLAIN " + self._sql_query(["*"])
-        with self._execute_sql_query(sql) as cur:
-            s = ''.join(row[0] for row in cur.fetchall())
-        alen = int(re.findall('rows=(\d*)', s)[0])
+        alen = self.backend.approx_len(self._execute_sql_query,
+                                       self._sql_query(["*"]))
         if get_exact:
             threading.Thread(target=len, args=(self,)).start()
         return alen
@@ -327,20 +341,63 @@ class SqlTable(table.Table):
     _W = None
     _ids = None
 
-    def download_data(self, limit=None, partial=False):
-        """Download SQL data and store it in memory as numpy matrices."""
-        if limit and not partial and self.approx_len() > limit:
+    def download_data(self, limit=None, partial=False, callback=None):
+        """
+        Download SQL data and store it in memory as numpy matrices.
+
+        Rows are fetched in batches of :obj:`DOWNLOAD_BATCH` (through a
+        server-side cursor, if the backend supports it) and decoded by
+        columns into arrays whose capacity grows geometrically.
+
+        Args:
+            limit (int): the largest number of rows
+            partial (bool): if `False`, raise an error if the table has more
+                than `limit` rows
+            callback (callable): a function that is called with the
+                progress (between 0 and 1) after each batch; an exception
+                raised in the callback cancels the download and leaves the
+                table unchanged
+        """
+        approx_len = self.approx_len()
+        if limit and not partial and approx_len > limit:
             raise ValueError("Too many rows to download the data into memory.")
-        X = [np.empty((0, len(self.domain.attributes)))]
-        Y = [np.empty((0, len(self.domain.class_vars)))]
-        metas = [np.empty((0, len(self.domain.metas)))]
-        for row in islice(self, limit):
-            X.append(row._x)
-            Y.append(row._y)
-            metas.append(row._metas)
-        self._X = np.vstack(X).astype(np.float64)
-        self._Y = np.vstack(Y).astype(np.float64)
-        self._metas = np.vstack(metas).astype(object)
+        n_rows = approx_len if limit is None else min(approx_len, limit)
+        variables = self.domain.variables
+        n_attrs = len(self.domain.attributes)
+        # The number of rows is only an estimate, which may be far too large,
+        # so the arrays initially hold at most one batch
+        size = min(n_rows, DOWNLOAD_BATCH)
+        X = np.empty((size, n_attrs))
+        Y = np.empty((size, len(self.domain.class_vars)))
+        metas = np.empty((size, len(self.domain.metas)), dtype=object)
+        to_vals = [_column_converter(var) for var in variables]
+
+        query = self._sql_query(
+            self._sql_fields(variables + self.domain.metas), limit=limit)
+        n_read = 0
+        with self._execute_sql_query(query, server_side=True) as cur:
+            while True:
+                rows = cur.fetchmany(DOWNLOAD_BATCH)
+                if not rows:
+                    break
+                end = n_read + len(rows)
+                if end > len(X):
+                    size = max(end, 2 * len(X))
+                    X, Y, metas = (_grow(a, size, n_read)
+                                   for a in (X, Y, metas))
+                columns = list(zip(*rows))
+                for i, to_val in enumerate(to_vals[:n_attrs]):
+                    X[n_read:end, i] = to_val(columns[i])
+                for i, to_val in enumerate(to_vals[n_attrs:]):
+                    Y[n_read:end, i] = to_val(columns[n_attrs + i])
+                for i, column in enumerate(columns[len(variables):]):
+                    metas[n_read:end, i] = column
+                n_read = end
+                if callback is not None:
+                    callback(min(1, n_read / max(n_rows, 1)))
+        self._X = X[:n_read]
+        self._Y = Y[:n_read]
+        self._metas = metas[:n_read]
         self._W = np.empty((self._X.shape[0], 0))
         self._init_ids(self)
         if not partial or limit and self._X.shape[0] < limit:
@@ -409,7 +466,8 @@ class SqlTable(table.Table):
         columns = [(c.to_sql(), c.is_continuous) for c in columns]
         sql_fields = []
         for field_name, continuous in columns:
-            stats = self.CONTINUOUS_STATS if continuous else self.DISCRETE_STATS
+            stats = self.backend.CONTINUOUS_STATS if continuous \
+                else self.backend.DISCRETE_STATS
             sql_fields.append(stats % dict(field_name=field_name))
         query = self._sql_query(sql_fields)
         with self._execute_sql_query(query) as cur:
@@ -436,20 +494,23 @@ class SqlTable(table.Table):
         return self._get_distributions(columns)
 
     def _get_distributions(self, columns):
+        fields = [(col.to_sql(), col.is_continuous) for col in columns]
+        queries = aggregate.distribution_queries(self._sql_query, fields)
+        rows = aggregate.split_by_column(self._fetch_all(queries),
+                                         len(columns))
         dists = []
-        for col in columns:
-            field_name = col.to_sql()
-            fields = field_name, "COUNT(%s)" % field_name
-            query = self._sql_query(fields,
-                                    filters=['%s IS NOT NULL' % field_name],
-                                    group_by=[field_name],
-                                    order_by=[field_name])
-            with self._execute_sql_query(query) as cur:
-                dist = np.array(cur.fetchall())
+        for col, data in zip(columns, rows):
             if col.is_continuous:
-                dists.append((dist.T, []))
+                dist = np.array([(value, count)
+                                 for value, _, count in data]).T
             else:
-                dists.append((dist[:, 1].T, []))
+                dist = np.zeros(len(col.values))
+                index = _value_index(col)
+                for _, value, count in data:
+                    i = index(value)
+                    if i is not None:
+                        dist[i] = count
+            dists.append((dist, []))
         return dists
 
     def _compute_contingency(self, col_vars=None, row_var=None):
@@ -458,11 +519,10 @@ class SqlTable(table.Table):
 
         if col_vars is None:
             col_vars = range(len(self.domain.variables))
-        if len(col_vars) != 1:
-            raise NotImplementedError("Contingency for multiple columns "
-                                      "has not yet been implemented.")
         if row_var is None:
-            raise NotImplementedError("Defaults have not been implemented yet")
+            row_var = self.domain.class_var
+            if row_var is None:
+                raise ValueError("No row variable")
 
         row = self.domain[row_var]
         if not row.is_discrete:
@@ -475,49 +535,59 @@ class SqlTable(table.Table):
             raise ValueError("contingency can be computed only for discrete "
                              "and continuous values")
 
-        row_field = row.to_sql()
-
-        all_contingencies = [None] * len(columns)
-        for i, column in enumerate(columns):
-            column_field = column.to_sql()
-            fields = [row_field, column_field, "COUNT(%s)" % column_field]
-            group_by = [row_field, column_field]
-            order_by = [column_field]
-            filters = ['%s IS NOT NULL' % f
-                       for f in (row_field, column_field)]
-            query = self._sql_query(fields, filters=filters,
-                                    group_by=group_by, order_by=order_by)
-            with self._execute_sql_query(query) as cur:
-                data = list(cur.fetchall())
-                if column.is_continuous:
-                    all_contingencies[i] = \
-                        (self._continuous_contingencies(data, row), [])
-                else:
-                    all_contingencies[i] =\
-                        (self._discrete_contingencies(data, row, column), [])
+        fields = [(col.to_sql(), col.is_continuous) for col in columns]
+        queries = aggregate.contingency_queries(
+            self._sql_query, row.to_sql(), fields)
+        rows = aggregate.split_by_column(self._fetch_all(queries),
+                                         len(columns))
+        all_contingencies = []
+        for column, data in zip(columns, rows):
+            if column.is_continuous:
+                data = [(row_value, value, count)
+                        for row_value, value, _, count in data]
+                all_contingencies.append(
+                    (self._continuous_contingencies(data, row), []))
+            else:
+                data = [(row_value, value, count)
+                        for row_value, _, value, count in data]
+                all_contingencies.append(
+                    (self._discrete_contingencies(data, row, column), []))
         return all_contingencies, None
 
+    def _fetch_all(self, queries):
+        """Run queries on concurrent connections from the pool and return
+        all rows of results."""
+        def execute(query):
+            with self._execute_sql_query(query) as cur:
+                return cur.fetchall()
+
+        n_jobs = min(PARALLEL_QUERIES,
+                     getattr(self.connection_pool, "maxconn", 1))
+        return aggregate.run_queries(execute, queries, n_jobs)
+
     def _continuous_contingencies(self, data, row):
         values = np.zeros(len(data))
         counts = np.zeros((len(row.values), len(data)))
+        row_index = _value_index(row)
         last = None
         i = -1
         for row_value, column_value, count in data:
-            if column_value == last:
-                counts[row.to_val(row_value), i] += count
-            else:
+            if column_value != last:
                 i += 1
                 last = column_value
                 values[i] = column_value
-                counts[row.to_val(row_value), i] += count
-        return (values, counts)
+            r = row_index(row_value)
+            if r is not None:
+                counts[r, i] += count
+        return (values[:i + 1], counts[:, :i + 1])
 
     def _discrete_contingencies(self, data, row, column):
         conts = np.zeros((len(row.values), len(column.values)))
+        row_index, col_index = _value_index(row), _value_index(column)
         for row_value, col_value, count in data:
-            row_index = row.to_val(row_value)
-            col_index = column.to_val(col_value)
-            conts[row_index, col_index] = count
+            r, c = row_index(row_value), col_index(col_value)
+            if r is not None and c is not None:
+                conts[r, c] = count
         return conts
 
     def X_density(self):
@@ -612,10 +682,12 @@ class SqlTable(table.Table):
     def _sql_query(self, fields, filters=(),
                    group_by=None, order_by=None, offset=None, limit=None,
                    use_time_sample=None):
-        sql = ["SELECT", ', '.join(fields),
-               "FROM", self.table_name]
+        source = self.table_name
         if use_time_sample is not None:
-            sql.append("TABLESAMPLE system_time(%i)" % use_time_sample)
+            source = self.backend.sample_source(
+                self._execute_sql_query, source, "system_time",
+                int(use_time_sample))
+        sql = ["SELECT", ', '.join(fields), "FROM", source]
         row_filters = [f.to_sql() for f in self.row_filters]
         row_filters.extend(filters)
         if row_filters:
@@ -624,33 +696,17 @@ class SqlTable(table.Table):
             sql.extend(["GROUP BY", ", ".join(group_by)])
         if order_by is not None:
             sql.extend(["ORDER BY", ",".join(order_by)])
-        if offset is not None:
-            sql.extend(["OFFSET", str(offset)])
-        if limit is not None:
-            sql.extend(["LIMIT", str(limit)])
+        sql.extend(self.backend.limit_offset(limit, offset))
         return " ".join(sql)
 
-    DISCRETE_STATS = "SUM(CASE TRUE WHEN %(field_name)s IS NULL THEN 1 " \
-                     "ELSE 0 END), " \
-                     "SUM(CASE TRUE WHEN %(field_name)s IS NULL THEN 0 " \
-                     "ELSE 1 END)"
-    CONTINUOUS_STATS = "MIN(%(field_name)s)::double precision, " \
-                       "MAX(%(field_name)s)::double precision, " \
-                       "AVG(%(field_name)s)::double precision, " \
-                       "STDDEV(%(field_name)s)::double precision, " \
-                       + DISCRETE_STATS
-
     def quote_identifier(self, value):
-        return '"%s"' % value
+        return self.backend.quote_identifier(value)
 
     def unquote_identifier(self, value):
-        if value.startswith('"'):
-            return value[1:len(value)-1]
-        else:
-            return value
+        return self.backend.unquote_identifier(value)
 
     def quote_string(self, value):
-        return "'%s'" % value
+        return self.backend.quote_string(value)
 
     def sample_percentage(self, percentage, no_cache=False):
         if percentage >= 100:
@@ -672,43 +728,43 @@ class SqlTable(table.Table):
             str(parameter).replace('.', '_').replace('-', '_'))
         create = False
         try:
-            with self._execute_sql_query("SELECT * FROM %s LIMIT 0;" % self.quote_identifier(sample_table)) as cur:
+            with self._execute_sql_query("SELECT * FROM %s LIMIT 0;" % self.backend.sample_table(sample_table)) as cur:
                 cur.fetchall()
 
             if no_cache:
-                with self._execute_sql_query("DROP TABLE %s;" % self.quote_identifier(sample_table)) as cur:
+                with self._execute_sql_query("DROP TABLE %s;" % self.backend.sample_table(sample_table)) as cur:
                     cur.fetchall()
                 create = True
 
-        except psycopg2.ProgrammingError:
+        except self.backend.Error:
             create = True
 
         if create:
-            with self._execute_sql_query((
-                    "CREATE TABLE {target} AS "
-                    "SELECT * FROM {source} TABLESAMPLE {method}({param});"
-                    ).format(target=self.quote_identifier(sample_table),
-                         source=self.table_name,
-                         method=method,
-                         param=parameter)):
+            sample = self.backend.sample_query(
+                self._execute_sql_query, self.table_name, method, parameter)
+            with self._execute_sql_query("CREATE TABLE {} AS {}".format(
+                    self.backend.sample_table(sample_table), sample)):
                 pass
 
         sampled_table = self.copy()
-        sampled_table.table_name = self.quote_identifier(sample_table)
+        sampled_table.table_name = self.backend.sample_table(sample_table)
         with sampled_table._execute_sql_query(
                 'ANALYZE {}'.format(sampled_table.table_name)):
             pass
         return sampled_table
 
     @contextmanager
-    def _execute_sql_query(self, query, param=None):
+    def _execute_sql_query(self, query, param=None, server_side=False):
         connection = self.connection_pool.getconn()
-        cur = connection.cursor()
+        cur = self.backend.cursor(connection, server_side)
         try:
-            utfquery = cur.mogrify(query, param).decode('utf-8')
+            utfquery = self.backend.query_for_log(cur, query, param)
             sql_log.debug("Executing: {}".format(utfquery))
             t = time()
-            cur.execute(query, param)
+            if param is None:
+                cur.execute(query)
+            else:
+                cur.execute(query, param)
             yield cur
             sql_log.info("{:.2f} ms: {}".format(1000 * (time() - t), utfquery))
         finally:
@@ -728,6 +784,42 @@ class SqlTable(table.Table):
         self.create_connection_pool()
 
 
+def _grow(a, size, n_rows):
+    """Return an array with `size` rows and the first `n_rows` of `a`."""
+    new = np.empty((size, a.shape[1]), dtype=a.dtype)
+    new[:n_rows] = a[:n_rows]
+    return new
+
+
+def _value_index(var):
+    """Return a function that maps values of a discrete variable from the
+    database to their indices; missing values and values that are not
+    among the variable's values (e.g. added to the database after the
+    domain was created) are mapped to `None`."""
+    return {value: i for i, value in enumerate(var.values)}.get
+
+
+def _column_converter(var):
+    """Return a function that converts a sequence of values from the
+    database to an array of values of the variable."""
+    if var.is_continuous:
+        def to_val(values):
+            # None is converted to nan
+            return np.array(values, dtype=float)
+    else:
+        cache = {}
+
+        def to_val(values):
+            out = np.empty(len(values))
+            for i, value in enumerate(values):
+                try:
+                    out[i] = cache[value]
+                except KeyError:
+                    out[i] = cache[value] = var.to_val(value)
+            return out
+    return to_val
+
+
 class SqlRowInstance(instance.Instance):
     """
     Extends :obj:`Orange.data.Instance` to correctly handle values of meta
@@ -4,10 +4,9 @@ import zlib
 from collections import MutableSequence, Iterable, Sequence, Sized
 from itertools import chain
 from numbers import Real, Integral
-import operator
 from functools import reduce
 from warnings import warn
-from threading import Lock
+from threading import Lock, local
 from tempfile import NamedTemporaryFile
 from urllib.parse import urlparse, unquote as urlunquote
 from urllib.request import urlopen
@@ -16,11 +15,13 @@ from urllib.error import URLError
 import bottleneck as bn
 from scipy import sparse as sp
 
-from Orange.statistics.util import bincount, countnans, contingency, stats as fast_stats
+from Orange.statistics.util import bincount, countnans, contingency, \
+    discrete_contingencies, continuous_contingencies, stats as fast_stats
 from .instance import *
 from Orange.util import flatten
 from Orange.data import Domain, Variable, StringVariable
 from Orange.data.storage import Storage
+from Orange.data.util import call_compute_value
 from . import _contingency
 from . import _valuecount
 
@@ -33,6 +34,9 @@ def get_sample_datasets_dir():
 
 dataset_dirs = ['', get_sample_datasets_dir()]
 
+#: The smallest number of rows allocated when a table grows
+MIN_CAPACITY = 16
+
 
 class RowInstance(Instance):
     sparse_x = None
@@ -161,6 +165,10 @@ class Table(MutableSequence, Storage):
     _next_instance_id = 0
     _next_instance_lock = Lock()
 
+    # Buffers for X, _Y, metas, W and ids with spare rows for appending;
+    # see _resize_all
+    _buffers = None
+
     @property
     def Y(self):
         if self._Y.shape[1] == 1:
@@ -237,7 +245,9 @@ class Table(MutableSequence, Storage):
         self.attributes = {}
         return self
 
-    conversion_cache = None
+    # Per-thread cache of tables converted within the outermost call of
+    # from_table, which may recursively convert the same source many times
+    _conversion_cache = local()
 
     @classmethod
     def from_table(cls, domain, source, row_indices=...):
@@ -264,6 +274,10 @@ class Table(MutableSequence, Storage):
                 x = np.ravel(x.toarray())
             return x
 
+        # Shared parts of compute_values (see SharedComputeValue) are
+        # computed once per group for all parts of the table
+        shared_cache = {}
+
         def get_columns(row_indices, src_cols, n_rows, dtype=np.float64):
 
             if not len(src_cols):
@@ -289,10 +303,11 @@ class Table(MutableSequence, Storage):
                 if col is None:
                     a[:, i] = Unknown
                 elif not isinstance(col, Integral):
+                    column = call_compute_value(col, source, shared_cache)
                     if row_indices is not ...:
-                        a[:, i] = col(source)[row_indices]
+                        a[:, i] = column[row_indices]
                     else:
-                        a[:, i] = col(source)
+                        a[:, i] = column
                 elif col < 0:
                     a[:, i] = source.metas[row_indices, -1 - col]
                 elif col < n_src_attrs:
@@ -301,12 +316,16 @@ class Table(MutableSequence, Storage):
                     a[:, i] = source._Y[row_indices, col - n_src_attrs]
             return a
 
-        new_cache = cls.conversion_cache is None
+        from Orange.misc.cache import LRUCache, identity_key
+
+        cache = getattr(cls._conversion_cache, "cache", None)
+        new_cache = cache is None
+        cache_key = identity_key(domain, source)
         try:
             if new_cache:
-                cls.conversion_cache = {}
+                cache = cls._conversion_cache.cache = LRUCache(maxsize=None)
             else:
-                cached = cls.conversion_cache.get((id(domain), id(source)))
+                cached = cache.get(cache_key)
                 if cached:
                     return cached
             if domain == source.domain:
@@ -347,11 +366,11 @@ class Table(MutableSequence, Storage):
             else:
                 cls._init_ids(self)
             self.attributes = getattr(source, 'attributes', {})
-            cls.conversion_cache[(id(domain), id(source))] = self
+            cache[cache_key] = self
             return self
         finally:
             if new_cache:
-                cls.conversion_cache = None
+                cls._conversion_cache.cache = None
 
     @classmethod
     def from_table_rows(cls, source, row_indices):
@@ -505,21 +524,36 @@ class Table(MutableSequence, Storage):
         writer.write_file(filename, self)
 
     @classmethod
-    def from_file(cls, filename):
+    def from_file(cls, filename, chunksize=None, sample_size=None):
         """
         Read a data table from a file. The path can be absolute or relative.
 
+        If `chunksize` is given, the file is read incrementally (if the format
+        supports it) and the method returns an iterator over tables with at
+        most `chunksize` rows, which share the same domain. The domain is
+        inferred from the first `sample_size` rows (by default `chunksize`).
+
         :param filename: File name
         :type filename: str
-        :return: a new data table
+        :param chunksize: the number of rows in a chunk
+        :type chunksize: int
+        :param sample_size: the number of rows for inferring the domain
+        :type sample_size: int
+        :return: a new data table or an iterator over tables
         :rtype: Orange.data.Table
         """
         from Orange.data.io import FileFormat
 
         absolute_filename = FileFormat.locate(filename, dataset_dirs)
         reader = FileFormat.get_reader(absolute_filename)
+        if chunksize is not None:
+            return (cls._from_file_data(chunk, filename, absolute_filename)
+                    for chunk in reader.read_chunks(chunksize, sample_size))
         data = reader.read()
+        return cls._from_file_data(data, filename, absolute_filename)
 
+    @classmethod
+    def _from_file_data(cls, data, filename, absolute_filename):
         # Readers return plain table. Make sure to cast it to appropriate
         # (subclass) type
         if cls != data.__class__:
@@ -582,38 +616,71 @@ class Table(MutableSequence, Storage):
                    for x in (self.X_density(), self.Y_density(),
                              self.metas_density()))
 
+    def _row_arrays(self):
+        return self.X, self._Y, self.metas, self.W, self.ids
+
+    def _owns_buffers(self):
+        """
+        Return `True` if X, Y, metas, W and ids are views of the first rows
+        of the table's growable buffers (see :obj:`_resize_all`).
+        """
+        if self._buffers is None:
+            return False
+        return all(
+            arr.base is buf and arr.shape[1:] == buf.shape[1:] and
+            arr.__array_interface__["data"][0] ==
+            buf.__array_interface__["data"][0]
+            for arr, buf in zip(self._row_arrays(), self._buffers))
+
     # A helper function for extend and insert
-    # Resize X, Y, metas and W.
-    def _resize_all(self, new_length):
+    # Resize X, Y, metas, W and ids.
+    def _resize_all(self, new_length, insert_at=None):
+        """
+        Resize the arrays to `new_length` rows; new rows are zero (`None`
+        in metas).
+
+        The arrays are views of the first rows of larger buffers. When the
+        buffers are too small, their capacity is (at least) doubled, so
+        appending rows one by one takes amortized constant time.
+
+        If `insert_at` is given, the table grows by a single row, which is
+        inserted at that index. The rows are then copied into new buffers,
+        so that other tables that share the arrays (e.g. slices of this
+        table) do not see the shifted rows.
+        """
         old_length = self.X.shape[0]
         if old_length == new_length:
             return
         if not self._check_all_dense():
             raise ValueError("Tables with sparse data cannot be resized")
-        try:
-            self.X.resize(new_length, self.X.shape[1])
-            self._Y.resize(new_length, self._Y.shape[1])
-            self.metas.resize(new_length, self.metas.shape[1])
-            if self.W.ndim == 2:
-                self.W.resize((new_length, 0))
-            else:
-                self.W.resize(new_length)
-            self.ids.resize(new_length)
-        except Exception:
-            if self.X.shape[0] == new_length:
-                self.X.resize(old_length, self.X.shape[1])
-            if self._Y.shape[0] == new_length:
-                self._Y.resize(old_length, self._Y.shape[1])
-            if self.metas.shape[0] == new_length:
-                self.metas.resize(old_length, self.metas.shape[1])
-            if self.W.shape[0] == new_length:
-                if self.W.ndim == 2:
-                    self.W.resize((old_length, 0))
+        if insert_at is not None or not self._owns_buffers() or \
+                new_length > len(self._buffers[0]):
+            capacity = new_length
+            if new_length > old_length:
+                capacity = max(capacity, 2 * old_length, MIN_CAPACITY)
+            n_copy = min(old_length, new_length)
+            buffers = []
+            for arr in self._row_arrays():
+                buf = np.empty((capacity,) + arr.shape[1:], dtype=arr.dtype)
+                if insert_at is None:
+                    buf[:n_copy] = arr[:n_copy]
                 else:
-                    self.W.resize(old_length)
-            if self.ids.shape[0] == new_length:
-                self.ids.resize(old_length)
-            raise
+                    buf[:insert_at] = arr[:insert_at]
+                    buf[insert_at + 1:new_length] = arr[insert_at:]
+                buffers.append(buf)
+            self._buffers = tuple(buffers)
+        new_rows = slice(old_length, new_length) if insert_at is None \
+            else slice(insert_at, insert_at + 1)
+        for buf in self._buffers:
+            buf[new_rows] = None if buf.dtype == object else 0
+        self.X, self._Y, self.metas, self.W, self.ids = \
+            (buf[:new_length] for buf in self._buffers)
+
+    def __getstate__(self):
+        # Do not pickle the unused capacity
+        state = self.__dict__.copy()
+        state.pop("_buffers", None)
+        return state
 
     def __getitem__(self, key):
         if isinstance(key, Integral):
@@ -798,25 +865,19 @@ class Table(MutableSequence, Storage):
             row += len(self)
         if row < 0 or row > len(self):
             raise IndexError("Index out of range")
-        self.ensure_copy()  # ensure that numpy arrays are single-segment for resize
-        self._resize_all(len(self) + 1)
-        if row < len(self):
-            self.X[row + 1:] = self.X[row:-1]
-            self._Y[row + 1:] = self._Y[row:-1]
-            self.metas[row + 1:] = self.metas[row:-1]
-            self.W[row + 1:] = self.W[row:-1]
-            self.ids[row + 1:] = self.ids[row:-1]
+        if isinstance(instance, RowInstance) and instance.table is self:
+            # the instance's values are views of rows that may be shifted
+            instance = Instance(instance, id=instance.id)
+        arrays, buffers = self._row_arrays(), self._buffers
+        self._resize_all(len(self) + 1,
+                         row if row < len(self) else None)
         try:
             self._set_row(instance, row)
             if self.W.shape[-1]:
                 self.W[row] = 1
         except Exception:
-            self.X[row:-1] = self.X[row + 1:]
-            self._Y[row:-1] = self._Y[row + 1:]
-            self.metas[row:-1] = self.metas[row + 1:]
-            self.W[row:-1] = self.W[row + 1:]
-            self.ids[row:-1] = self.ids[row + 1:]
-            self._resize_all(len(self) - 1)
+            self.X, self._Y, self.metas, self.W, self.ids = arrays
+            self._buffers = buffers
             raise
 
     def extend(self, instances):
@@ -827,17 +888,28 @@ class Table(MutableSequence, Storage):
         :obj:`~Orange.data.Instance` or a sequence of values (e.g. list,
         tuple, numpy.array).
 
+        Tables of other domains are converted by columns, and the storage
+        grows geometrically, so extending by a row at a time is not slower
+        than extending by larger chunks.
+
         :param instances: additional instances
         :type instances: Orange.data.Table or a sequence of instances
         """
         old_length = len(self)
+        if instances is self:
+            instances = self.copy()
+        elif isinstance(instances, Table) and instances.domain != self.domain:
+            instances = self.from_table(self.domain, instances)
         self._resize_all(old_length + len(instances))
         try:
             # shortcut
-            if isinstance(instances, Table) and instances.domain == self.domain:
-                self.X[old_length:] = instances.X
-                self._Y[old_length:] = instances._Y
-                self.metas[old_length:] = instances.metas
+            if isinstance(instances, Table):
+                def dense(x):
+                    return x.toarray() if sp.issparse(x) else x
+
+                self.X[old_length:] = dense(instances.X)
+                self._Y[old_length:] = dense(instances._Y)
+                self.metas[old_length:] = dense(instances.metas)
                 if self.W.shape[-1]:
                     if instances.W.shape[-1]:
                         self.W[old_length:] = instances.W
@@ -846,7 +918,7 @@ class Table(MutableSequence, Storage):
                 self.ids[old_length:] = instances.ids
             else:
                 for i, example in enumerate(instances):
-                    self[old_length + i] = example
+                    self._set_row(example, old_length + i)
                     try:
                         self.ids[old_length + i] = example.id
                     except AttributeError:
@@ -896,6 +968,8 @@ class Table(MutableSequence, Storage):
         """
         Return `True` if all arrays represent a view referring to another table
         """
+        if self._owns_buffers():
+            return False
         return ((not self.X.shape[-1] or self.X.base is not None) and
                 (not self._Y.shape[-1] or self._Y.base is not None) and
                 (not self.metas.shape[-1] or self.metas.base is not None) and
@@ -905,6 +979,8 @@ class Table(MutableSequence, Storage):
         """
         Return `True` if the table owns its data
         """
+        if self._owns_buffers():
+            return True
         return ((not self.X.shape[-1] or self.X.base is None) and
                 (self._Y.base is None) and
                 (self.metas.base is None) and
@@ -914,6 +990,8 @@ class Table(MutableSequence, Storage):
         """
         Ensure that the table owns its data; copy arrays when necessary
         """
+        if self._owns_buffers():
+            return
         if self.X.base is not None:
             self.X = self.X.copy()
         if self._Y.base is not None:
@@ -990,11 +1068,19 @@ class Table(MutableSequence, Storage):
         # (after pickling and unpickling such arrays, checksum changes)
         # Why, and should we fix it or remove it?
         """Return a checksum over X, Y, metas and W."""
-        cs = zlib.adler32(np.ascontiguousarray(self.X))
-        cs = zlib.adler32(np.ascontiguousarray(self._Y), cs)
+        arrays = [self.X, self._Y]
         if include_metas:
-            cs = zlib.adler32(np.ascontiguousarray(self.metas), cs)
-        cs = zlib.adler32(np.ascontiguousarray(self.W), cs)
+            arrays.append(self.metas)
+        arrays.append(self.W)
+        cs = 1
+        for array in arrays:
+            if sp.issparse(array):
+                array = array.tocsr()
+                parts = (array.data, array.indices, array.indptr)
+            else:
+                parts = (array, )
+            for part in parts:
+                cs = zlib.adler32(np.ascontiguousarray(part), cs)
         return cs
 
     def shuffle(self):
@@ -1081,118 +1167,8 @@ class Table(MutableSequence, Storage):
         return self.from_table_rows(self, sel)
 
     def _filter_values_indicators(self, filter):
-        from Orange.data import filter as data_filter
-
-        if isinstance(filter, data_filter.Values):
-            conditions = filter.conditions
-            conjunction = filter.conjunction
-        else:
-            conditions = [filter]
-            conjunction = True
-        if conjunction:
-            sel = np.ones(len(self), dtype=bool)
-        else:
-            sel = np.zeros(len(self), dtype=bool)
-
-        for f in conditions:
-            if isinstance(f, data_filter.Values):
-                if conjunction:
-                    sel *= self._filter_values_indicators(f)
-                else:
-                    sel += self._filter_values_indicators(f)
-                continue
-            col = self.get_column_view(f.column)[0]
-            if isinstance(f, data_filter.FilterDiscrete) and f.values is None \
-                    or isinstance(f, data_filter.FilterContinuous) and \
-                                    f.oper == f.IsDefined:
-                if conjunction:
-                    sel *= ~np.isnan(col)
-                else:
-                    sel += ~np.isnan(col)
-            elif isinstance(f, data_filter.FilterString) and \
-                            f.oper == f.IsDefined:
-                if conjunction:
-                    sel *= col.astype(bool)
-                else:
-                    sel += col.astype(bool)
-            elif isinstance(f, data_filter.FilterDiscrete):
-                if conjunction:
-                    s2 = np.zeros(len(self), dtype=bool)
-                    for val in f.values:
-                        if not isinstance(val, Real):
-                            val = self.domain[f.column].to_val(val)
-                        s2 += (col == val)
-                    sel *= s2
-                else:
-                    for val in f.values:
-                        if not isinstance(val, Real):
-                            val = self.domain[f.column].to_val(val)
-                        sel += (col == val)
-            elif isinstance(f, data_filter.FilterStringList):
-                if not f.case_sensitive:
-                    # noinspection PyTypeChecker
-                    col = np.char.lower(np.array(col, dtype=str))
-                    vals = [val.lower() for val in f.values]
-                else:
-                    vals = f.values
-                if conjunction:
-                    sel *= reduce(operator.add,
-                                  (col == val for val in vals))
-                else:
-                    sel = reduce(operator.add,
-                                 (col == val for val in vals), sel)
-            elif isinstance(f, data_filter.FilterRegex):
-                sel = np.vectorize(f)(col)
-            elif isinstance(f, (data_filter.FilterContinuous,
-                                data_filter.FilterString)):
-                if (isinstance(f, data_filter.FilterString) and
-                        not f.case_sensitive):
-                    # noinspection PyTypeChecker
-                    col = np.char.lower(np.array(col, dtype=str))
-                    fmin = f.min.lower()
-                    if f.oper in [f.Between, f.Outside]:
-                        fmax = f.max.lower()
-                else:
-                    fmin, fmax = f.min, f.max
-                if f.oper == f.Equal:
-                    col = (col == fmin)
-                elif f.oper == f.NotEqual:
-                    col = (col != fmin)
-                elif f.oper == f.Less:
-                    col = (col < fmin)
-                elif f.oper == f.LessEqual:
-                    col = (col <= fmin)
-                elif f.oper == f.Greater:
-                    col = (col > fmin)
-                elif f.oper == f.GreaterEqual:
-                    col = (col >= fmin)
-                elif f.oper == f.Between:
-                    col = (col >= fmin) * (col <= fmax)
-                elif f.oper == f.Outside:
-                    col = (col < fmin) + (col > fmax)
-                elif not isinstance(f, data_filter.FilterString):
-                    raise TypeError("Invalid operator")
-                elif f.oper == f.Contains:
-                    col = np.fromiter((fmin in e for e in col),
-                                      dtype=bool)
-                elif f.oper == f.StartsWith:
-                    col = np.fromiter((e.startswith(fmin) for e in col),
-                                      dtype=bool)
-                elif f.oper == f.EndsWith:
-                    col = np.fromiter((e.endswith(fmin) for e in col),
-                                      dtype=bool)
-                else:
-                    raise TypeError("Invalid operator")
-                if conjunction:
-                    sel *= col
-                else:
-                    sel += col
-            else:
-                raise TypeError("Invalid filter")
-
-        if filter.negate:
-            sel = ~sel
-        return sel
+        from Orange.data.filter_index import filter_indicators
+        return filter_indicators(self, filter)
 
     def _filter_values(self, filter):
         sel = self._filter_values_indicators(filter)
@@ -1285,15 +1261,13 @@ class Table(MutableSequence, Storage):
 
         return distributions
 
-    def _compute_contingency(self, col_vars=None, row_var=None):
+    def _compute_contingency(self, col_vars=None, row_var=None, n_jobs=1):
         n_atts = self.X.shape[1]
 
         if col_vars is None:
             col_vars = range(len(self.domain.variables))
-            single_column = False
         else:
             col_vars = [self.domain.index(var) for var in col_vars]
-            single_column = len(col_vars) == 1 and len(self.domain) > 1
         if row_var is None:
             row_var = self.domain.class_var
             if row_var is None:
@@ -1329,9 +1303,11 @@ class Table(MutableSequence, Storage):
         if unknown_rows:
             nan_inds = np.isnan(row_data)
             row_data = row_data[~nan_inds]
-            if W:
-                W = W[~nan_inds]
+            if W is not None:
                 unknown_rows = np.sum(W[nan_inds])
+                W = W[~nan_inds]
+        if W is not None:
+            W = W.astype(np.float64)
 
         contingencies = [None] * len(col_desc)
         for arr, f_cond, f_ind in (
@@ -1339,54 +1315,98 @@ class Table(MutableSequence, Storage):
                 (self._Y, lambda i: i >= n_atts, lambda i: i - n_atts),
                 (self.metas, lambda i: i < 0, lambda i: -1 - i)):
 
+            arr_indi = [e for e, ind in enumerate(col_indi) if f_cond(ind)]
+            if not arr_indi:
+                continue
+            if arr.ndim == 1:
+                arr = arr.reshape(-1, 1)
             if nan_inds is not None:
                 arr = arr[~nan_inds]
 
-            arr_indi = [e for e, ind in enumerate(col_indi) if f_cond(ind)]
-
             vars = [(e, f_ind(col_indi[e]), col_desc[e]) for e in arr_indi]
-            disc_vars = [v for v in vars if v[2].is_discrete]
-            if disc_vars:
+            for is_discrete in (True, False):
+                sel = [v for v in vars if v[2].is_discrete == is_discrete]
+                if not sel:
+                    continue
+                cols = [arr_i for _, arr_i, _ in sel]
                 if sp.issparse(arr):
-                    max_vals = max(len(v[2].values) for v in disc_vars)
-                    disc_indi = {i for _, i, _ in disc_vars}
-                    mask = [i in disc_indi for i in range(arr.shape[1])]
-                    conts, nans = contingency(arr, row_data, max_vals - 1,
-                                              n_rows - 1, W, mask)
-                    for col_i, arr_i, _ in disc_vars:
-                        contingencies[col_i] = (conts[arr_i], nans[arr_i])
+                    block = sp.csc_matrix(arr)[:, cols]
                 else:
-                    for col_i, arr_i, var in disc_vars:
-                        contingencies[col_i] = contingency(
-                            arr[:, arr_i].astype(float),
-                            row_data, len(var.values) - 1, n_rows - 1, W)
+                    block = arr[:, cols]
+                    if block.dtype.kind != "f":
+                        block = block.astype(float)
+                if is_discrete:
+                    conts = discrete_contingencies(
+                        block, row_data,
+                        [len(var.values) for _, _, var in sel], n_rows, W,
+                        n_jobs)
+                else:
+                    conts = [([U, C], unknown) for U, C, unknown in
+                             continuous_contingencies(
+                                 block, row_data, n_rows, W, n_jobs)]
+                for (col_i, _, _), cont in zip(sel, conts):
+                    contingencies[col_i] = cont
 
-            cont_vars = [v for v in vars if v[2].is_continuous]
-            if cont_vars:
+        return contingencies, unknown_rows
 
-                classes = row_data.astype(dtype=np.int8)
-                if W is not None:
-                    W = W.astype(dtype=np.float64)
-                if sp.issparse(arr):
-                    arr = sp.csc_matrix(arr)
-
-                for col_i, arr_i, _ in cont_vars:
-                    if sp.issparse(arr):
-                        col_data = arr.data[arr.indptr[arr_i]:
-                        arr.indptr[arr_i + 1]]
-                        rows = arr.indices[arr.indptr[arr_i]:
-                        arr.indptr[arr_i + 1]]
-                        W_ = None if W is None else W[rows]
-                        classes_ = classes[rows]
-                    else:
-                        col_data, W_, classes_ = arr[:, arr_i], W, classes
+class TableBuilder:
+    """
+    Collect rows for a new table.
 
-                    col_data = col_data.astype(dtype=np.float64)
-                    U, C, unknown = _contingency.contingency_floatarray(
-                        col_data, classes_, n_rows, W_)
-                    contingencies[col_i] = ([U, C], unknown)
+    Rows are stored in arrays whose capacity grows geometrically, so adding
+    a row takes amortized constant time. :obj:`build` returns a table with
+    compact arrays.
 
-        return contingencies, unknown_rows
+    :param domain: domain of the table
+    :type domain: Orange.data.Domain
+    :param weights: indicates whether the table has weights
+    :type weights: bool
+    """
+    def __init__(self, domain, weights=False):
+        self.domain = domain
+        self.weights = weights
+        self._table = Table.from_domain(domain, weights=weights)
+
+    def __len__(self):
+        return len(self._table)
+
+    def append(self, row, weight=None):
+        """
+        Add a row.
+
+        :param row: a data instance or a sequence of values
+        :type row: Orange.data.Instance or a sequence of values
+        :param weight: the weight of the row (default: 1)
+        :type weight: float
+        """
+        if weight is not None and not self.weights:
+            raise ValueError("the table has no weights")
+        table = self._table
+        table.append(row)
+        row_id = getattr(row, "id", None)
+        table.ids[-1] = Table.new_id() if row_id is None else row_id
+        if weight is not None:
+            table.W[-1] = weight
+
+    def extend(self, rows):
+        """
+        Add rows given as a table (of any domain) or a sequence of instances
+        or of sequences of values.
+        """
+        self._table.extend(rows)
+
+    def build(self):
+        """
+        Return a table with the collected rows, and clear the builder.
+
+        :rtype: Orange.data.Table
+        """
+        table = self._table
+        table.X, table._Y, table.metas, table.W, table.ids = \
+            (arr.copy() for arr in table._row_arrays())
+        table._buffers = None
+        self._table = Table.from_domain(self.domain, weights=self.weights)
+        return table
 
 
 def _check_arrays(*arrays, dtype=None):
@@ -28,3 +28,46 @@ def scale(values, min=0, max=1):
     if ptp == 0:
         return np.clip(values, min, max)
     return (-minval + values) / ptp * (max - min) + min
+
+
+class SharedComputeValue:
+    """
+    A base class for `compute_value` functions of variables which share a
+    costly part of the computation, for instance transformations of the same
+    source variable or components of the same projection.
+
+    Subclasses define `compute_shared(data)`, which computes the shared part,
+    and `compute(data, shared_data)`, which computes the variable's values
+    from it. Instances whose `shared_group` keys are equal must compute the
+    same shared part, so when a table is converted into a new domain,
+    `compute_shared` is called once per group instead of once per variable.
+    """
+    @property
+    def shared_group(self):
+        """A hashable key of the group of functions that share the data."""
+        return self
+
+    def compute_shared(self, data):
+        raise NotImplementedError
+
+    def compute(self, data, shared_data):
+        raise NotImplementedError
+
+    def __call__(self, data, shared_data=None):
+        if shared_data is None:
+            shared_data = self.compute_shared(data)
+        return self.compute(data, shared_data)
+
+
+def call_compute_value(compute_value, data, shared_cache):
+    """Return `compute_value(data)`; for a :obj:`SharedComputeValue`, the
+    shared part is taken from `shared_cache` or computed and stored in it.
+
+    `shared_cache` must be a dictionary specific to `data`.
+    """
+    if isinstance(compute_value, SharedComputeValue):
+        group = compute_value.shared_group
+        if group not in shared_cache:
+            shared_cache[group] = compute_value.compute_shared(data)
+        return compute_value(data, shared_cache[group])
+    return compute_value(data)
@@ -5,9 +5,11 @@ import sklearn.metrics as skl_metrics
 from Orange import data
 from Orange.misc import DistMatrix
 from Orange.preprocess import SklImpute
+from Orange.distance.blocked import pairwise_blocks, MAX_MEMORY
 
 __all__ = ['Euclidean', 'Manhattan', 'Cosine', 'Jaccard', 'SpearmanR', 'SpearmanRAbsolute',
-           'PearsonR', 'PearsonRAbsolute', 'Mahalanobis', 'MahalanobisDistance']
+           'PearsonR', 'PearsonRAbsolute', 'Mahalanobis', 'MahalanobisDistance',
+           'NeighborIndex']
 
 def _preprocess(table):
     """Remove categorical attributes and impute missing values."""
@@ -33,8 +35,33 @@ def _orange_to_numpy(x):
         return x    # e.g. None
 
 
+def _standardized_rows(x):
+    """Center the rows of `x` and scale them to unit norm, so that the dot
+    product of two rows equals their Pearson correlation."""
+    x = np.asarray(x, dtype=float)
+    x = x - x.mean(axis=1)[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return x / np.sqrt(np.sum(x ** 2, axis=1))[:, None]
+
+
+def _ranked_rows(x):
+    """Replace the values in rows of `x` by their ranks within the row;
+    rows with missing values are set to `nan`."""
+    x = np.asarray(x, dtype=float)
+    ranks = np.apply_along_axis(stats.rankdata, 1, x) if x.size \
+        else x.copy()
+    ranks[np.isnan(x).any(axis=1)] = np.nan
+    return ranks
+
+
 class Distance:
-    def __call__(self, e1, e2=None, axis=1, impute=False):
+    #: approximate memory (in bytes) for blocks of distances computed at once
+    max_memory = MAX_MEMORY
+    #: the number of threads that compute blocks; -1 uses all processors
+    n_jobs = 1
+
+    def __call__(self, e1, e2=None, axis=1, impute=False,
+                 out=None, condensed=False):
         """
         :param e1: input data instances, we calculate distances between all pairs
         :type e1: :class:`Orange.data.Table` or :class:`Orange.data.RowInstance` or :class:`numpy.ndarray`
@@ -46,11 +73,30 @@ class Distance:
         :type axis: int
         :param impute: if impute=True all NaN values in matrix are replaced with 0
         :type impute: bool
+        :param out: optional array for the result, e.g. a `numpy.memmap`
+           for matrices that do not fit into memory
+        :type out: :class:`numpy.ndarray`
+        :param condensed: if True (and e2 is None), return only the upper
+           triangle without the diagonal as a 1-d array, like
+           :obj:`scipy.spatial.distance.pdist`
+        :type condensed: bool
         :return: the matrix with distances between given examples
         :rtype: :class:`Orange.misc.distmatrix.DistMatrix`
         """
         raise NotImplementedError('Distance is an abstract class and should not be used directly.')
 
+    def _compute(self, metric, e1, e2, x1, x2, axis, out, condensed):
+        """Compute distances between rows of `x1` and `x2` in blocks with
+        the given `metric(a, b=None)` and wrap them into `DistMatrix`."""
+        dist = pairwise_blocks(metric, x1, x2, out=out, condensed=condensed,
+                               max_memory=self.max_memory, n_jobs=self.n_jobs)
+        if condensed:
+            return dist
+        if isinstance(e1, data.Table) or isinstance(e1, data.RowInstance):
+            return DistMatrix(dist, e1, e2, axis)
+        else:
+            return DistMatrix(dist)
+
 
 class SklDistance(Distance):
     """Generic scikit-learn distance."""
@@ -65,19 +111,20 @@ class SklDistance(Distance):
         self.name = name
         self.supports_sparse = supports_sparse
 
-    def __call__(self, e1, e2=None, axis=1, impute=False):
+    def __call__(self, e1, e2=None, axis=1, impute=False,
+                 out=None, condensed=False):
         x1 = _orange_to_numpy(e1)
         x2 = _orange_to_numpy(e2)
         if axis == 0:
             x1 = x1.T
             if x2 is not None:
                 x2 = x2.T
-        dist = skl_metrics.pairwise.pairwise_distances(x1, x2, metric=self.metric)
-        if isinstance(e1, data.Table) or isinstance(e1, data.RowInstance):
-            dist = DistMatrix(dist, e1, e2, axis)
-        else:
-            dist = DistMatrix(dist)
-        return dist
+
+        def metric(a, b=None):
+            return skl_metrics.pairwise.pairwise_distances(
+                a, b, metric=self.metric)
+
+        return self._compute(metric, e1, e2, x1, x2, axis, out, condensed)
 
 Euclidean = SklDistance('euclidean', 'Euclidean', True)
 Manhattan = SklDistance('manhattan', 'Manhattan', True)
@@ -85,6 +132,22 @@ Cosine = SklDistance('cosine', 'Cosine', True)
 Jaccard = SklDistance('jaccard', 'Jaccard', False)
 
 
+def _correlation_metric(absolute, impute):
+    """Return a function that computes correlation distances between
+    rows standardized by :obj:`_standardized_rows`."""
+    def metric(a, b=None):
+        rho = a.dot((a if b is None else b).T)
+        if impute:
+            rho = np.nan_to_num(rho)
+        # rounding errors may put correlations slightly outside [-1, 1]
+        np.clip(rho, -1, 1, out=rho)
+        if absolute:
+            return (1. - np.abs(rho)) / 2.
+        else:
+            return (1. - rho) / 2.
+    return metric
+
+
 class SpearmanDistance(Distance):
     """ Generic Spearman's rank correlation coefficient. """
     def __init__(self, absolute, name):
@@ -102,28 +165,20 @@ class SpearmanDistance(Distance):
         self.name = name
         self.supports_sparse = False
 
-    def __call__(self, e1, e2=None, axis=1, impute=False):
+    def __call__(self, e1, e2=None, axis=1, impute=False,
+                 out=None, condensed=False):
         x1 = _orange_to_numpy(e1)
         x2 = _orange_to_numpy(e2)
-        if x2 is None:
-            x2 = x1
-        slc = len(x1) if axis == 1 else x1.shape[1]
-        rho, _ = stats.spearmanr(x1, x2, axis=axis)
-        if np.isnan(rho).any() and impute:
-            rho = np.nan_to_num(rho)
-        if self.absolute:
-            dist = (1. - np.abs(rho)) / 2.
-        else:
-            dist = (1. - rho) / 2.
-        if isinstance(dist, np.float):
-            dist = np.array([[dist]])
-        elif isinstance(dist, np.ndarray):
-            dist = dist[:slc, slc:]
-        if isinstance(e1, data.Table) or isinstance(e1, data.RowInstance):
-            dist = DistMatrix(dist, e1, e2, axis)
-        else:
-            dist = DistMatrix(dist)
-        return dist
+        if axis == 0:
+            x1 = x1.T
+            if x2 is not None:
+                x2 = x2.T
+        # Spearman's rho is Pearson's correlation of ranks
+        x1 = _standardized_rows(_ranked_rows(x1))
+        if x2 is not None:
+            x2 = _standardized_rows(_ranked_rows(x2))
+        metric = _correlation_metric(self.absolute, impute)
+        return self._compute(metric, e1, e2, x1, x2, axis, out, condensed)
 
 SpearmanR = SpearmanDistance(absolute=False, name='Spearman')
 SpearmanRAbsolute = SpearmanDistance(absolute=True, name='Spearman absolute')
@@ -146,26 +201,19 @@ class PearsonDistance(Distance):
         self.name = name
         self.supports_sparse = False
 
-    def __call__(self, e1, e2=None, axis=1, impute=False):
+    def __call__(self, e1, e2=None, axis=1, impute=False,
+                 out=None, condensed=False):
         x1 = _orange_to_numpy(e1)
         x2 = _orange_to_numpy(e2)
-        if x2 is None:
-            x2 = x1
         if axis == 0:
             x1 = x1.T
-            x2 = x2.T
-        rho = np.array([[stats.pearsonr(i, j)[0] for j in x2] for i in x1])
-        if np.isnan(rho).any() and impute:
-            rho = np.nan_to_num(rho)
-        if self.absolute:
-            dist = (1. - np.abs(rho)) / 2.
-        else:
-            dist = (1. - rho) / 2.
-        if isinstance(e1, data.Table) or isinstance(e1, data.RowInstance):
-            dist = DistMatrix(dist, e1, e2, axis)
-        else:
-            dist = DistMatrix(dist)
-        return dist
+            if x2 is not None:
+                x2 = x2.T
+        x1 = _standardized_rows(x1)
+        if x2 is not None:
+            x2 = _standardized_rows(x2)
+        metric = _correlation_metric(self.absolute, impute)
+        return self._compute(metric, e1, e2, x1, x2, axis, out, condensed)
 
 PearsonR = PearsonDistance(absolute=False, name='Pearson')
 PearsonRAbsolute = PearsonDistance(absolute=True, name='Pearson absolute')
@@ -198,7 +246,8 @@ class MahalanobisDistance(Distance):
         self.axis = axis
         self.VI = np.linalg.inv(np.cov(x.T))
 
-    def __call__(self, e1, e2=None, axis=None, impute=False):
+    def __call__(self, e1, e2=None, axis=None, impute=False,
+                 out=None, condensed=False):
         assert self.VI is not None, "Mahalanobis distance must be initialized with the fit() method."
 
         x1 = _orange_to_numpy(e1)
@@ -213,13 +262,18 @@ class MahalanobisDistance(Distance):
         if x1.shape[1] != self.VI.shape[0] or x2 is not None and x2.shape[1] != self.VI.shape[0]:
             raise ValueError('Incorrect number of features.')
 
-        dist = skl_metrics.pairwise.pairwise_distances(x1, x2, metric='mahalanobis', VI=self.VI)
-        if np.isnan(dist).any() and impute:
-            dist = np.nan_to_num(dist)
-        if isinstance(e1, data.Table) or isinstance(e1, data.RowInstance):
-            dist = DistMatrix(dist, e1, e2, self.axis)
-        else:
-            dist = DistMatrix(dist)
-        return dist
+        def metric(a, b=None):
+            dist = skl_metrics.pairwise.pairwise_distances(
+                a, b, metric='mahalanobis', VI=self.VI)
+            if impute:
+                dist = np.nan_to_num(dist)
+            return dist
+
+        return self._compute(metric, e1, e2, x1, x2, self.axis,
+                             out, condensed)
 
 Mahalanobis = MahalanobisDistance()
+
+
+# imported last since it checks the type of distances defined above
+from Orange.distance.neighbors import NeighborIndex
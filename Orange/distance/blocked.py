@@ -0,0 +1,99 @@
+"""
+Computation of pairwise distances in blocks of rows, which limits the memory
+for intermediate results and lets several threads compute different blocks.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+
+import numpy as np
+import scipy.sparse as sp
+
+__all__ = ["pairwise_blocks", "condensed_index"]
+
+#: Default memory (in bytes) for blocks of distances computed at once
+MAX_MEMORY = 2 ** 27
+
+
+def condensed_index(n, i):
+    """Return the index of distance between `i` and `i + 1` in a condensed
+    matrix of `n` items, which holds the upper triangle (without the
+    diagonal) in rows, like :obj:`scipy.spatial.distance.pdist`."""
+    return i * n - i * (i + 1) // 2
+
+
+def pairwise_blocks(metric, x1, x2=None, out=None, condensed=False,
+                    max_memory=MAX_MEMORY, n_jobs=1):
+    """
+    Compute distances between rows of `x1` and `x2`, or between all pairs of
+    rows of `x1` if `x2` is `None`.
+
+    Function `metric(a, b=None)` computes a dense block of distances between
+    rows of `a` and `b`, or between pairs of rows in `a` if `b` is omitted.
+    Blocks are computed for strips of rows of `x1`, whose size is chosen so
+    that the strips computed at the same time take approximately
+    `max_memory` bytes. If `x2` is `None`, only the blocks on and above the
+    diagonal are computed and the matrix is symmetric.
+
+    Args:
+        metric (callable): a function that computes a block of distances
+        x1 (np.ndarray or scipy.sparse.spmatrix): data
+        x2 (np.ndarray or scipy.sparse.spmatrix): optional second data
+        out (np.ndarray): optional output array, e.g. `np.memmap`
+        condensed (bool): if `True`, return the upper triangle without the
+            diagonal as a 1-d array; see :obj:`condensed_index`
+        max_memory (int): approximate memory for blocks in bytes
+        n_jobs (int): the number of threads; -1 uses all processors
+
+    Returns:
+        np.ndarray: distances
+    """
+    if sp.issparse(x1):
+        x1 = x1.tocsr()
+    if sp.issparse(x2):
+        x2 = x2.tocsr()
+    symmetric = x2 is None
+    n1 = x1.shape[0]
+    n2 = n1 if symmetric else x2.shape[0]
+    if condensed:
+        if not symmetric:
+            raise ValueError("condensed distances require a single data set")
+        shape = (n1 * (n1 - 1) // 2, )
+    else:
+        shape = (n1, n2)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError("'out' must have shape {}".format(shape))
+    if n_jobs < 1:
+        n_jobs = max(1, cpu_count() + 1 + n_jobs)
+    step = max(1, int(max_memory // (8 * n_jobs * max(n2, 1))))
+
+    def compute_strip(start):
+        stop = min(start + step, n1)
+        strip = x1[start:stop]
+        if not symmetric:
+            out[start:stop] = metric(strip, x2)
+            return
+        diagonal = metric(strip)
+        rest = metric(strip, x1[stop:]) if stop < n1 else \
+            np.empty((stop - start, 0))
+        if condensed:
+            for i in range(start, stop):
+                first = condensed_index(n1, i)
+                mid = first + stop - i - 1
+                out[first:mid] = diagonal[i - start, i - start + 1:]
+                out[mid:mid + n1 - stop] = rest[i - start]
+        else:
+            out[start:stop, start:stop] = diagonal
+            out[start:stop, stop:] = rest
+            out[stop:, start:stop] = rest.T
+
+    starts = range(0, n1, step)
+    if n_jobs == 1 or len(starts) < 2:
+        for start in starts:
+            compute_strip(start)
+    else:
+        with ThreadPoolExecutor(n_jobs) as executor:
+            # list(...) propagates exceptions from threads
+            list(executor.map(compute_strip, starts))
+    return out
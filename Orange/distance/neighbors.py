@@ -0,0 +1,256 @@
+"""
+Index for queries of nearest neighbours that can be reused across calls and
+extended with new rows.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from os import cpu_count
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.neighbors import KDTree, BallTree
+
+from Orange.data import Table, Instance
+from Orange.distance.blocked import MAX_MEMORY
+
+__all__ = ["NeighborIndex", "neighbor_weights"]
+
+#: Metrics of :obj:`Orange.distance.SklDistance` supported by spatial trees
+TREE_METRICS = ("euclidean", "manhattan")
+
+#: The largest number of dimensions for which a KD-tree is used; data with
+#: more dimensions is indexed by a ball tree
+MAX_KD_DIMENSIONS = 15
+
+
+def _to_numpy(data):
+    if isinstance(data, Table):
+        return data.X
+    elif isinstance(data, Instance):
+        return np.atleast_2d(data.x)
+    elif sp.issparse(data):
+        return data.tocsr()
+    else:
+        return np.atleast_2d(data)
+
+
+def _stack(a, b):
+    if sp.issparse(a) or sp.issparse(b):
+        return sp.vstack((a, b), format="csr")
+    return np.vstack((a, b))
+
+
+def _sorted_smallest(indices, distances, k):
+    """Return `k` columns of `indices` and `distances` with the smallest
+    distances in each row, sorted by distances."""
+    rows = np.arange(len(distances))[:, None]
+    if k < distances.shape[1]:
+        cols = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        indices, distances = indices[rows, cols], distances[rows, cols]
+    order = np.argsort(distances, axis=1, kind="mergesort")
+    return indices[rows, order], distances[rows, order]
+
+
+def neighbor_weights(distances, weights="uniform"):
+    """
+    Return weights of neighbours at the given distances.
+
+    Args:
+        distances (np.ndarray): distances to neighbours, one row per query
+        weights (str or callable): "uniform", "distance" (inverse of the
+            distance; neighbours at distance 0 get all the weight) or a
+            function that computes weights from distances
+
+    Returns:
+        np.ndarray: weights with the same shape as `distances`
+    """
+    if weights == "uniform":
+        return np.ones(distances.shape)
+    elif weights == "distance":
+        with np.errstate(divide="ignore"):
+            w = 1 / distances
+        exact = np.isinf(w)
+        exact_rows = exact.any(axis=1)
+        w[exact_rows] = exact[exact_rows]
+        return w
+    elif callable(weights):
+        return weights(distances)
+    raise ValueError("unknown weights '{}'".format(weights))
+
+
+class NeighborIndex:
+    """
+    Index of data instances for finding the nearest neighbours.
+
+    Distances that :obj:`TREE_METRICS` covers (Euclidean, Manhattan) on
+    dense data are indexed with a KD-tree or a ball tree; other distances
+    are computed by brute force in blocks of queries. Rows added by
+    :obj:`append` are searched by brute force until there are enough of
+    them to rebuild the tree.
+
+    Queries are split into blocks, which are processed by `n_jobs` threads.
+
+    Args:
+        data (Orange.data.Table or np.ndarray): indexed data
+        distance (Orange.distance.Distance): distance measure
+        n_jobs (int): the number of threads; -1 uses all processors and
+            `None` uses distance's `n_jobs`
+        leaf_size (int): leaf size of the tree
+    """
+    def __init__(self, data, distance, n_jobs=None, leaf_size=40):
+        self.distance = distance
+        if n_jobs is None:
+            n_jobs = getattr(distance, "n_jobs", 1)
+        if n_jobs < 1:
+            n_jobs = max(1, cpu_count() + 1 + n_jobs)
+        self.n_jobs = n_jobs
+        self.leaf_size = leaf_size
+        x = _to_numpy(data)
+        self.use_tree = getattr(distance, "metric", None) in TREE_METRICS \
+            and not sp.issparse(x)
+        self._tree = None
+        self._indexed = x[:0]
+        self._appended = x
+        self._build()
+
+    def __len__(self):
+        return self._indexed.shape[0] + self._appended.shape[0]
+
+    @property
+    def X(self):
+        """All indexed rows, including the appended."""
+        return _stack(self._indexed, self._appended)
+
+    def _build(self):
+        if not self.use_tree or not self._appended.shape[0]:
+            return
+        self._indexed = self.X
+        self._appended = self._indexed[:0]
+        tree_type = KDTree if self._indexed.shape[1] <= MAX_KD_DIMENSIONS \
+            else BallTree
+        self._tree = tree_type(self._indexed, leaf_size=self.leaf_size,
+                               metric=self.distance.metric)
+
+    def append(self, data):
+        """
+        Add rows to the index. Their indices follow the existing rows.
+
+        Args:
+            data (Orange.data.Table or np.ndarray): new rows
+        """
+        self._appended = _stack(self._appended, _to_numpy(data))
+        if self._appended.shape[0] > \
+                max(self.leaf_size, self._indexed.shape[0] // 4):
+            self._build()
+
+    def _map(self, func, x):
+        n, n_appended = x.shape[0], self._appended.shape[0]
+        step = int(MAX_MEMORY // (8 * self.n_jobs * max(n_appended, 1)))
+        step = max(1, min(step, ceil(n / self.n_jobs)))
+        strips = [x[start:start + step] for start in range(0, n, step)]
+        if self.n_jobs == 1 or len(strips) < 2:
+            return [func(strip) for strip in strips]
+        with ThreadPoolExecutor(self.n_jobs) as executor:
+            return list(executor.map(func, strips))
+
+    def _appended_distances(self, x):
+        return np.asarray(self.distance(x, self._appended))
+
+    def query(self, k, data=None):
+        """
+        Find `k` nearest neighbours of each row of `data`.
+
+        If `data` is omitted, the neighbours of the indexed rows are found;
+        a row is not its own neighbour.
+
+        Args:
+            k (int): the number of neighbours
+            data (Orange.data.Table or np.ndarray): query rows
+
+        Returns:
+            (np.ndarray, np.ndarray): indices of neighbours and distances to
+            them, with one row per query, sorted by distances
+        """
+        exclude_self = data is None
+        x = self.X if exclude_self else _to_numpy(data)
+        k = min(k + exclude_self, len(self))
+        n_indexed = self._indexed.shape[0]
+
+        def query_strip(strip):
+            indices = np.empty((strip.shape[0], 0), dtype=int)
+            distances = np.empty((strip.shape[0], 0))
+            if n_indexed:
+                distances, indices = self._tree.query(
+                    strip, k=min(k, n_indexed))
+            if self._appended.shape[0]:
+                dist = self._appended_distances(strip)
+                cols = np.arange(n_indexed, len(self))
+                indices = np.hstack(
+                    (indices, np.broadcast_to(cols, dist.shape)))
+                distances = np.hstack((distances, dist))
+            return _sorted_smallest(indices, distances, k)
+
+        results = self._map(query_strip, x)
+        if not results:
+            return np.empty((0, k), dtype=int), np.empty((0, k))
+        indices = np.vstack([ind for ind, _ in results])
+        distances = np.vstack([dist for _, dist in results])
+        if exclude_self and k:
+            is_self = indices == np.arange(len(indices))[:, None]
+            # with duplicated rows, a row itself may not be among the found
+            is_self[~is_self.any(axis=1), -1] = True
+            shape = (len(indices), k - 1)
+            indices = indices[~is_self].reshape(shape)
+            distances = distances[~is_self].reshape(shape)
+        return indices, distances
+
+    def query_radius(self, r, data=None):
+        """
+        Find neighbours within distance `r` from each row of `data`.
+
+        If `data` is omitted, the neighbours of the indexed rows are found;
+        a row is not its own neighbour.
+
+        Args:
+            r (float): the largest distance
+            data (Orange.data.Table or np.ndarray): query rows
+
+        Returns:
+            (np.ndarray, np.ndarray): arrays of objects, which contain
+            arrays of indices of neighbours and of distances to them for
+            each query, sorted by distances
+        """
+        exclude_self = data is None
+        x = self.X if exclude_self else _to_numpy(data)
+        n_indexed = self._indexed.shape[0]
+
+        def query_strip(strip):
+            n = strip.shape[0]
+            indices = [np.empty(0, dtype=int)] * n
+            distances = [np.empty(0)] * n
+            if n_indexed:
+                indices, distances = self._tree.query_radius(
+                    strip, r, return_distance=True)
+            if self._appended.shape[0]:
+                dist = self._appended_distances(strip)
+                for i, row in enumerate(dist):
+                    cols = np.flatnonzero(row <= r)
+                    indices[i] = np.hstack((indices[i], cols + n_indexed))
+                    distances[i] = np.hstack((distances[i], row[cols]))
+            return indices, distances
+
+        indices, distances = [], []
+        for ind, dist in self._map(query_strip, x):
+            indices.extend(ind)
+            distances.extend(dist)
+        for i, (ind, dist) in enumerate(zip(indices, distances)):
+            if exclude_self:
+                keep = ind != i
+                ind, dist = ind[keep], dist[keep]
+            order = np.argsort(dist, kind="mergesort")
+            indices[i], distances[i] = ind[order], dist[order]
+        ret_indices = np.empty(len(indices), dtype=object)
+        ret_distances = np.empty(len(indices), dtype=object)
+        for i, (ind, dist) in enumerate(zip(indices, distances)):
+            ret_indices[i], ret_distances[i] = ind, dist
+        return ret_indices, ret_distances
@@ -4,9 +4,10 @@ from sklearn.metrics import silhouette_score, adjusted_mutual_info_score, silhou
 from Orange.data import Table
 from Orange.evaluation.testing import Results
 from Orange.evaluation.scoring import Score
+from Orange.misc.distmatrix import BLOCK_ELEMENTS, CondensedDistMatrix
 
 
-__all__ = ['ClusteringEvaluation']
+__all__ = ['ClusteringEvaluation', 'distance_silhouette']
 
 
 class ClusteringResults(Results):
@@ -107,6 +108,52 @@ class ClusteringEvaluation(ClusteringResults):
 
 
 
+def distance_silhouette(matrix, labels, max_elements=BLOCK_ELEMENTS):
+    """
+    Compute silhouette scores of items from a precomputed distance matrix.
+
+    The result is the same as that of `sklearn.metrics.silhouette_samples`
+    with `metric="precomputed"`, but the matrix is processed in blocks of
+    rows, so it can also be a :obj:`~Orange.misc.CondensedDistMatrix`,
+    which is never expanded to the square form.
+
+    Args:
+        matrix (np.ndarray or Orange.misc.CondensedDistMatrix): distances
+        labels (np.ndarray): cluster labels of items
+        max_elements (int): the approximate number of distances in a block
+
+    Returns:
+        np.ndarray: silhouette scores
+    """
+    _, inverse, counts = np.unique(labels, return_inverse=True,
+                                   return_counts=True)
+    n = len(inverse)
+    membership = np.zeros((n, len(counts)))
+    membership[np.arange(n), inverse] = 1
+
+    if isinstance(matrix, CondensedDistMatrix):
+        blocks = matrix.row_blocks(max_elements)
+    else:
+        step = max(1, max_elements // max(n, 1))
+        blocks = ((start, np.asarray(matrix[start:start + step]))
+                  for start in range(0, n, step))
+
+    scores = np.empty(n)
+    for start, block in blocks:
+        rows = np.arange(len(block))
+        own = inverse[start:start + len(block)]
+        sums = block.dot(membership)
+        a = sums[rows, own] / np.maximum(counts[own] - 1, 1)
+        means = sums / counts
+        means[rows, own] = np.inf
+        b = means.min(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sil = (b - a) / np.maximum(a, b)
+        sil[counts[own] == 1] = 0
+        scores[start:start + len(block)] = np.nan_to_num(sil)
+    return scores
+
+
 def graph_silhouette(X, y, xlim=None, colors=None, figsize=None, filename=None):
     """
     Silhouette plot.
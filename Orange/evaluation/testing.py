@@ -1,3 +1,5 @@
+from multiprocessing import Pool, cpu_count
+
 import numpy as np
 
 import sklearn.cross_validation as skl_cross_validation
@@ -50,7 +52,7 @@ class Results:
                  store_data=False, store_models=False,
                  domain=None, actual=None, row_indices=None,
                  predicted=None, probabilities=None,
-                 preprocessor=None, callback=None):
+                 preprocessor=None, callback=None, n_jobs=1):
         """
         Construct an instance with default values: `None` for :obj:`data` and
         :obj:`models`.
@@ -85,6 +87,10 @@ class Results:
         :param callback: Function for reporting back the progress as a value
             between 0 and 1
         :type callback: callable
+        :param n_jobs: The number of processes for fitting the models on
+            folds; negative values are counted from the number of CPUs, so
+            -1 uses all of them
+        :type n_jobs: int
         """
         self.store_data = store_data
         self.store_models = store_models
@@ -97,6 +103,7 @@ class Results:
         self.row_indices = row_indices
         self.preprocessor = preprocessor
         self.callback = callback
+        self.n_jobs = n_jobs
 
         self.learners = learners
         if learners:
@@ -295,6 +302,11 @@ class Results:
         if self.store_models:
             self.models = np.tile(None, (len(self.indices), len(self.learners)))
 
+        n_jobs = self.n_jobs if self.n_jobs > 0 else cpu_count() + 1 + self.n_jobs
+        if n_jobs > 1 and n_callbacks > 1:
+            self._fit_parallel(train_data, test_data, n_jobs)
+            return
+
         for idx, (train_indices, test_indices) in enumerate(self.indices):
             train_fold = train_data[train_indices]
             test_fold = test_data[test_indices]
@@ -310,20 +322,46 @@ class Results:
 
                 if self.store_models:
                     self.models[idx][k] = model
+                self._set_predictions(
+                    idx, k, *_predict(model, test_fold, train_data.domain))
 
-                result_slice = self.folds[idx]
-                if train_data.domain.has_discrete_class:
-                    values, probs = model(test_fold, model.ValueProbs)
-                    self.predicted[k][result_slice] = values
-                    self.probabilities[k][result_slice, :] = probs
-                elif train_data.domain.has_continuous_class:
-                    values = model(test_fold, model.Value)
-                    self.predicted[k][result_slice] = values
-                else:
-                    raise ValueError("Unknown table's target type")
+        self.call_callback(1)
 
+    def _fit_parallel(self, train_data, test_data, n_jobs):
+        """Fit the (fold, learner) pairs in a pool of `n_jobs` processes.
+
+        The data, folds and learners are passed to the workers when the pool
+        is started (on platforms with `fork`, workers inherit them without
+        copying), so the tasks consist of indices only. The results are
+        collected in the same order as in the serial loop, hence the failed
+        learners, models and predictions do not depend on the scheduling.
+        """
+        indices = list(self.indices)
+        nlearners = len(self.learners)
+        tasks = [(idx, k) for idx in range(len(indices))
+                 for k in range(nlearners)]
+        with Pool(n_jobs, _init_worker,
+                  (train_data, test_data, indices, self.learners,
+                   self.preprocessor, self.store_models)) as pool:
+            results = pool.imap(_fit_in_worker, tasks)
+            for (idx, k), (model, values, probs) in zip(tasks, results):
+                self.call_callback((nlearners * idx + k) / len(tasks))
+                if self.failed[k]:
+                    continue
+                if isinstance(model, Exception):
+                    self.failed[k] = model
+                    continue
+                if self.store_models:
+                    self.models[idx][k] = model
+                self._set_predictions(idx, k, values, probs)
         self.call_callback(1)
 
+    def _set_predictions(self, fold, learner_index, values, probs):
+        result_slice = self.folds[fold]
+        self.predicted[learner_index][result_slice] = values
+        if probs is not None:
+            self.probabilities[learner_index][result_slice, :] = probs
+
     def prepare_arrays(self, test_data):
         """Initialize arrays that will be used by `fit` method.
         """
@@ -391,7 +429,8 @@ class CrossValidation(Results):
 
     """
     def __init__(self, data, learners, k=10, stratified=True, random_state=0, store_data=False,
-                 store_models=False, preprocessor=None, callback=None, warnings=None):
+                 store_models=False, preprocessor=None, callback=None, warnings=None,
+                 n_jobs=1):
         self.k = k
         self.stratified = stratified
         self.random_state = random_state
@@ -402,7 +441,7 @@ class CrossValidation(Results):
 
         super().__init__(data, learners=learners, store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback)
+                         callback=callback, n_jobs=n_jobs)
 
     def setup_indices(self, train_data, test_data):
         self.indices = None
@@ -424,10 +463,10 @@ class LeaveOneOut(Results):
     score_by_folds = False
 
     def __init__(self, data, learners, store_data=False, store_models=False,
-                 preprocessor=None, callback=None):
+                 preprocessor=None, callback=None, n_jobs=1):
         super().__init__(data, learners=learners, store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback)
+                         callback=callback, n_jobs=n_jobs)
 
     def setup_indices(self, train_data, test_data):
         self.indices = skl_cross_validation.LeaveOneOut(len(test_data))
@@ -442,7 +481,7 @@ class LeaveOneOut(Results):
 class ShuffleSplit(Results):
     def __init__(self, data, learners, n_resamples=10, train_size=None,
                  test_size=0.1, stratified=True, random_state=0, store_data=False,
-                 store_models=False, preprocessor=None, callback=None):
+                 store_models=False, preprocessor=None, callback=None, n_jobs=1):
         self.n_resamples = n_resamples
         self.train_size = train_size
         self.test_size = test_size
@@ -451,7 +490,7 @@ class ShuffleSplit(Results):
 
         super().__init__(data, learners=learners, store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback)
+                         callback=callback, n_jobs=n_jobs)
 
     def setup_indices(self, train_data, test_data):
         if self.stratified and test_data.domain.has_discrete_class:
@@ -471,11 +510,11 @@ class TestOnTestData(Results):
     Test on a separate test data set.
     """
     def __init__(self, train_data, test_data, learners, store_data=False,
-                 store_models=False, preprocessor=None, callback=None):
+                 store_models=False, preprocessor=None, callback=None, n_jobs=1):
         super().__init__(test_data, train_data=train_data, learners=learners,
                          store_data=store_data,
                          store_models=store_models, preprocessor=preprocessor,
-                         callback=callback)
+                         callback=callback, n_jobs=n_jobs)
 
     def setup_indices(self, train_data, test_data):
         self.indices = ((Ellipsis, Ellipsis),)
@@ -492,17 +531,64 @@ class TestOnTrainingData(TestOnTestData):
     """
 
     def __init__(self, data, learners, store_data=False, store_models=False,
-                 preprocessor=None, callback=None):
+                 preprocessor=None, callback=None, n_jobs=1):
 
         if preprocessor is not None:
             data = preprocessor(data)
 
         super().__init__(train_data=data, test_data=data, learners=learners,
                          store_data=store_data, store_models=store_models,
-                         preprocessor=None, callback=callback)
+                         preprocessor=None, callback=callback, n_jobs=n_jobs)
         self.preprocessor = preprocessor
 
 
+def _predict(model, data, domain):
+    """Return the predicted values and probabilities (or `None` for
+    regression) of `model` on `data` with class variables from `domain`."""
+    if domain.has_discrete_class:
+        return model(data, model.ValueProbs)
+    elif domain.has_continuous_class:
+        return model(data, model.Value), None
+    else:
+        raise ValueError("Unknown table's target type")
+
+
+# State of a worker process in Results._fit_parallel
+_worker = {}
+
+
+def _init_worker(train_data, test_data, indices, learners, preprocessor,
+                 store_models):
+    _worker.clear()
+    _worker.update(train_data=train_data, test_data=test_data,
+                   indices=indices, learners=learners,
+                   preprocessor=preprocessor, store_models=store_models,
+                   fold=None)
+
+
+def _fit_in_worker(task):
+    """Fit a learner on a fold and return a tuple with the model (or `None`
+    if models are not stored, or the exception if fitting failed) and the
+    predicted values and probabilities for the test rows of the fold."""
+    idx, k = task
+    if _worker["fold"] != idx:
+        # Tasks come in order, so the fold is reused for consecutive learners
+        train_indices, test_indices = _worker["indices"][idx]
+        train_fold = _worker["train_data"][train_indices]
+        if _worker["preprocessor"] is not None:
+            train_fold = _worker["preprocessor"](train_fold)
+        _worker.update(fold=idx, train_fold=train_fold,
+                       test_fold=_worker["test_data"][test_indices])
+    train_fold = _worker["train_fold"]
+    try:
+        model = _worker["learners"][k](train_fold)
+    except Exception as ex:
+        return ex, None, None
+    values, probs = _predict(model, _worker["test_fold"],
+                             _worker["train_data"].domain)
+    return model if _worker["store_models"] else None, values, probs
+
+
 def sample(table, n=0.7, stratified=False, replace=False,
                     random_state=None):
     """
@@ -1,3 +1,13 @@
+import hashlib
+import sys
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from threading import RLock
+
+import numpy as np
+import scipy.sparse as sp
+
+
 def single_cache(f):
     last_args = ()
     last_kwargs = set()
@@ -14,3 +24,193 @@ def single_cache(f):
         return last_result
 
     return cached
+
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize", "maxbytes",
+                  "currbytes"])
+
+
+def nbytes(obj):
+    """Return the approximate size of `obj` in bytes; for arrays, sparse
+    matrices and tables this is the size of the data, not of the object."""
+    if sp.issparse(obj):
+        return sum(nbytes(getattr(obj, name))
+                   for name in ("data", "indices", "indptr", "row", "col")
+                   if hasattr(obj, name))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sum(nbytes(x) for x in obj)
+    if all(hasattr(obj, name) for name in ("X", "_Y", "metas", "W")):
+        return sum(nbytes(getattr(obj, name))
+                   for name in ("X", "_Y", "metas", "W"))
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """
+    A thread-safe mapping that discards the least recently used items when
+    it holds more than `maxsize` items or when the total size of the values
+    (as computed by :obj:`nbytes`) exceeds `maxbytes`. Either limit can be
+    `None`. Values larger than `maxbytes` are not stored.
+
+    The cache counts hits and misses of :obj:`get`; see :obj:`info`.
+    """
+    def __init__(self, maxsize=128, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = self.misses = 0
+        self.currbytes = 0
+        self._data = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the value for `key` and mark it as recently used, or
+        return `default` if the key is not in the cache."""
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = self.get(key, self)
+            if value is self:
+                raise KeyError(key)
+            return value
+
+    def __setitem__(self, key, value):
+        size = nbytes(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self.pop(key, None)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = value, size
+            self.currbytes += size
+            while (self.maxsize is not None and len(self._data) > self.maxsize
+                   or self.maxbytes is not None
+                   and self.currbytes > self.maxbytes):
+                _, (_, size) = self._data.popitem(last=False)
+                self.currbytes -= size
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, size = self._data.pop(key)
+            self.currbytes -= size
+            return value
+
+    def discard(self, predicate):
+        """Remove all items whose keys satisfy `predicate`."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                self.pop(key)
+
+    def clear(self):
+        """Remove all items and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self.currbytes = 0
+            self.hits = self.misses = 0
+
+    def info(self):
+        """Return the statistics as a named tuple."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize,
+                             len(self._data), self.maxbytes, self.currbytes)
+
+
+class _Identity:
+    """A key that compares by identity of `obj`; it also holds a reference
+    to `obj`, so its id cannot be reused while the key is in a cache."""
+    __slots__ = ("obj", )
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __hash__(self):
+        return id(self.obj)
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and other.obj is self.obj
+
+
+def _identity(arg):
+    try:
+        hash(arg)
+    except TypeError:
+        return _Identity(arg)
+    return arg
+
+
+def identity_key(*args, **kwargs):
+    """Return a cache key in which hashable arguments are compared by
+    equality and the others (e.g. arrays) by identity."""
+    return (tuple(_identity(arg) for arg in args),
+            tuple(sorted((k, _identity(v)) for k, v in kwargs.items())))
+
+
+def _content(arg):
+    if sp.issparse(arg):
+        arg = sp.csr_matrix(arg)
+        return ("sparse", arg.shape) + tuple(
+            _content(a) for a in (arg.data, arg.indices, arg.indptr))
+    if isinstance(arg, np.ndarray) and arg.dtype != object:
+        digest = hashlib.sha1(np.ascontiguousarray(arg).view(np.uint8))
+        return "array", arg.shape, arg.dtype.str, digest.hexdigest()
+    if all(hasattr(arg, name) for name in ("domain", "X", "checksum")):
+        return ("table", arg.domain, len(arg),
+                arg.checksum(include_metas=False))
+    return _identity(arg)
+
+
+def content_key(*args, **kwargs):
+    """Return a cache key in which arrays and sparse matrices are compared
+    by a hash of their contents, and tables by their domain and
+    :obj:`~Orange.data.Table.checksum`; other arguments are compared as in
+    :obj:`identity_key`. Hashing is linear in the size of the data."""
+    return (tuple(_content(arg) for arg in args),
+            tuple(sorted((k, _content(v)) for k, v in kwargs.items())))
+
+
+def lru_cache(maxsize=128, maxbytes=None, key=identity_key):
+    """
+    Decorator that caches the results of the function in a
+    :obj:`LRUCache`. Function `key` computes the cache key from the
+    arguments; use :obj:`content_key` for arguments that are equal but
+    distinct arrays or tables.
+
+    The decorated function has attributes `cache`, `cache_info()` and
+    `cache_clear()`.
+    """
+    def decorator(f):
+        cache = LRUCache(maxsize, maxbytes)
+
+        @wraps(f)
+        def cached(*args, **kwargs):
+            k = key(*args, **kwargs)
+            result = cache.get(k, cache)
+            if result is cache:
+                result = f(*args, **kwargs)
+                cache[k] = result
+            return result
+
+        cached.cache = cache
+        cached.cache_info = cache.info
+        cached.cache_clear = cache.clear
+        return cached
+
+    return decorator
@@ -1,9 +1,209 @@
+import json
+import operator
+import warnings
+
 import numpy as np
 
 from Orange.data import Table, StringVariable, Domain
 from Orange.data.io import detect_encoding
 from Orange.util import deprecated
 
+#: The approximate number of elements of blocks of rows that are expanded
+#: from condensed matrices at once
+BLOCK_ELEMENTS = 2 ** 22
+
+
+def _row_start(n, i):
+    # index of the distance between i and i + 1 in the condensed matrix
+    return i * n - i * (i + 1) // 2
+
+
+def _upper_triangle(matrix):
+    """Return the upper triangle of a square matrix (without the diagonal)
+    as a condensed vector, copied row by row to avoid index arrays."""
+    n = len(matrix)
+    flat = np.empty(n * (n - 1) // 2, dtype=matrix.dtype)
+    for i in range(n - 1):
+        start = _row_start(n, i)
+        flat[start:start + n - i - 1] = matrix[i, i + 1:n]
+    return flat
+
+
+#: The first bytes of binary distance files
+BINARY_MAGIC = b"\x93ORANGE-DST\x01"
+
+#: The data in binary distance files is aligned to this number of bytes
+BINARY_ALIGNMENT = 64
+
+
+def _labels_table(labels):
+    return Table.from_list(Domain([], metas=[StringVariable("label")]),
+                           [[item] for item in labels])
+
+
+def _label_list(items):
+    return None if items is None else [str(e.metas[0]) for e in items]
+
+
+def _is_binary(filename):
+    with open(filename, "rb") as fle:
+        return fle.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def _read_text(filename):
+    """Read a distance matrix in the text format; return the matrix, row
+    labels, column labels and axis."""
+    with open(filename, encoding=detect_encoding(filename)) as fle:
+        line = fle.readline()
+        if not line:
+            raise ValueError("empty file")
+        data = line.strip().split()
+        if not data[0].strip().isdigit():
+            raise ValueError("distance file must begin with dimension")
+        n = int(data.pop(0))
+        symmetric = True
+        axis = 1
+        col_labels = row_labels = None
+        for flag in data:
+            if flag in ("labelled", "labeled", "row_labels"):
+                row_labels = []
+            elif flag == "col_labels":
+                col_labels = []
+            elif flag == "symmetric":
+                symmetric = True
+            elif flag == "asymmetric":
+                symmetric = False
+            else:
+                flag_data = flag.split("=")
+                if len(flag_data) == 2:
+                    name, value = map(str.strip, flag_data)
+                else:
+                    name, value = "", None
+                if name == "axis" and value.isdigit():
+                    axis = int(value)
+                else:
+                    raise ValueError("invalid flag '{}'".format(flag))
+        if col_labels is not None:
+            col_labels = [x.strip()
+                          for x in fle.readline().strip().split("\t")]
+            if len(col_labels) != n:
+                raise ValueError("mismatching number of column labels")
+
+        def row_name(i):
+            return "'{}'".format(row_labels[i]) if row_labels else i + 1
+
+        # rows are parsed with a single call to numpy each; symmetric
+        # matrices are mirrored at the end
+        matrix = np.zeros((n, n))
+        for i, line in enumerate(fle):
+            if i >= n:
+                raise ValueError("too many rows")
+            line = line.strip()
+            if row_labels is not None:
+                label, _, line = line.partition("\t")
+                row_labels.append(label.strip())
+            n_values = line.count("\t") + 1
+            if n_values > n:
+                raise ValueError("too many columns in matrix row {}".
+                                 format(row_name(i)))
+            try:
+                with warnings.catch_warnings():
+                    # numpy warns (or, in later versions, raises an error)
+                    # when it cannot parse the entire string
+                    warnings.simplefilter("ignore", DeprecationWarning)
+                    values = np.fromstring(line, sep="\t")
+            except ValueError:
+                values = ()
+            if len(values) != n_values:
+                # parsing stopped at an invalid element; find it
+                for j, e in enumerate(line.split("\t")):
+                    try:
+                        float(e)
+                    except ValueError as exc:
+                        raise ValueError(
+                            "invalid element at row {}, column {}".format(
+                                row_name(i),
+                                "'{}'".format(col_labels[j])
+                                if col_labels else j + 1)) from exc
+                raise ValueError("invalid matrix row {}".format(row_name(i)))
+            # only the lower triangle of symmetric matrices is used
+            values = values[:i + 1 if symmetric else n]
+            matrix[i, :len(values)] = values
+    if symmetric:
+        # mirror row by row to avoid a temporary of the size of the matrix
+        for i in range(1, n):
+            matrix[:i, i] = matrix[i, :i]
+    if col_labels:
+        col_labels = _labels_table(col_labels)
+    if row_labels:
+        row_labels = _labels_table(row_labels)
+    return matrix, row_labels, col_labels, axis
+
+
+def _write_text(filename, rows, n, symmetric, row_labels, col_labels, axis):
+    header = "{}\taxis={}".format(n, axis)
+    if col_labels is not None:
+        header += "\tcol_labels"
+    if row_labels is not None:
+        header += "\trow_labels"
+    if not symmetric:
+        header += "\tasymmetric"
+    row_labels = _label_list(row_labels)
+    with open(filename, "wt") as fle:
+        fle.write(header + "\n")
+        if col_labels is not None:
+            fle.write("\t".join(_label_list(col_labels)) + "\n")
+        for i, row in enumerate(rows):
+            if row_labels is not None:
+                fle.write(row_labels[i] + "\t")
+            # str of Python floats is faster than of numpy scalars
+            fle.write("\t".join(map(str, row.tolist())) + "\n")
+
+
+def _read_binary(filename, mmap=False):
+    """Read a distance matrix in the binary format; return the data (a
+    condensed vector or a 2-d array), a flag telling whether it is
+    condensed, row labels, column labels and axis."""
+    with open(filename, "rb") as fle:
+        fle.seek(len(BINARY_MAGIC))
+        header_size = int(np.frombuffer(fle.read(8), dtype="<u8")[0])
+        header = json.loads(fle.read(header_size).decode("utf-8"))
+        offset = fle.tell()
+        shape = tuple(header["shape"])
+        condensed = header["condensed"]
+        if condensed:
+            n = shape[0]
+            shape = (n * (n - 1) // 2, )
+        count = int(np.prod(shape))
+        if not count:
+            data = np.zeros(shape)
+        elif mmap:
+            data = np.memmap(fle, dtype="<f8", mode="c", offset=offset,
+                             shape=shape)
+        else:
+            data = np.fromfile(fle, dtype="<f8", count=count).reshape(shape)
+    row_labels, col_labels = (
+        None if header.get(name) is None else _labels_table(header[name])
+        for name in ("row_labels", "col_labels"))
+    return data, condensed, row_labels, col_labels, header["axis"]
+
+
+def _write_binary(filename, rows, shape, condensed, row_labels, col_labels,
+                  axis):
+    header = json.dumps({
+        "shape": list(shape), "condensed": bool(condensed), "axis": axis,
+        "row_labels": _label_list(row_labels),
+        "col_labels": _label_list(col_labels)}).encode("utf-8")
+    start = len(BINARY_MAGIC) + 8
+    # pad the header with spaces, so that the data is aligned
+    header += b" " * (-(start + len(header)) % BINARY_ALIGNMENT)
+    with open(filename, "wb") as fle:
+        fle.write(BINARY_MAGIC)
+        fle.write(np.array(len(header), dtype="<u8").tobytes())
+        fle.write(header)
+        for row in rows:
+            fle.write(np.asarray(row, dtype="<f8").tobytes())
+
 
 class DistMatrix(np.ndarray):
     """
@@ -83,7 +283,20 @@ class DistMatrix(np.ndarray):
 
     @property
     def flat(self):
-        return self[np.triu_indices(self.shape[0], 1)]
+        return _upper_triangle(np.asarray(self))
+
+    def condensed(self):
+        """
+        Return the matrix in the condensed form. The matrix must be
+        symmetric, with zeros on the diagonal; only the upper triangle is
+        used.
+
+        Returns:
+            CondensedDistMatrix: condensed matrix
+        """
+        if self.ndim != 2 or self.shape[0] != self.shape[1]:
+            raise ValueError("only square matrices can be condensed")
+        return CondensedDistMatrix(self.flat, self.row_items, self.axis)
 
     def submatrix(self, row_items, col_items=None):
         """
@@ -106,7 +319,7 @@ class DistMatrix(np.ndarray):
         return obj
 
     @classmethod
-    def from_file(cls, filename):
+    def from_file(cls, filename, mmap=False):
         """
         Load distance matrix from a file
 
@@ -137,77 +350,26 @@ class DistMatrix(np.ndarray):
         symmetric, the file contains the lower triangle; any data above the
         diagonal is ignored.
 
+        Matrices can also be stored in a binary format, which is written by
+        :obj:`save` with `binary=True` and detected by this function. Binary
+        files can be memory mapped; the data is then read when needed, and
+        changes of the matrix are not written back to the file. Since
+        expanding a condensed matrix would read all of its data, memory
+        mapped binary files with condensed matrices are returned as
+        :obj:`CondensedDistMatrix`.
+
         Args:
             filename: file name
+            mmap (bool): memory map the data of binary files
         """
-        with open(filename, encoding=detect_encoding(filename)) as fle:
-            line = fle.readline()
-            if not line:
-                raise ValueError("empty file")
-            data = line.strip().split()
-            if not data[0].strip().isdigit():
-                raise ValueError("distance file must begin with dimension")
-            n = int(data.pop(0))
-            symmetric = True
-            axis = 1
-            col_labels = row_labels = None
-            for flag in data:
-                if flag in ("labelled", "labeled", "row_labels"):
-                    row_labels = []
-                elif flag == "col_labels":
-                    col_labels = []
-                elif flag == "symmetric":
-                    symmetric = True
-                elif flag == "asymmetric":
-                    symmetric = False
-                else:
-                    flag_data = flag.split("=")
-                    if len(flag_data) == 2:
-                        name, value = map(str.strip, flag_data)
-                    else:
-                        name, value = "", None
-                    if name == "axis" and value.isdigit():
-                        axis = int(value)
-                    else:
-                        raise ValueError("invalid flag '{}'".format(
-                            flag, filename))
-            if col_labels is not None:
-                col_labels = [x.strip()
-                              for x in fle.readline().strip().split("\t")]
-                if len(col_labels) != n:
-                    raise ValueError("mismatching number of column labels")
-
-            matrix = np.zeros((n, n))
-            for i, line in enumerate(fle):
-                if i >= n:
-                    raise ValueError("too many rows".format(filename))
-                line = line.strip().split("\t")
-                if row_labels is not None:
-                    row_labels.append(line.pop(0).strip())
-                if len(line) > n:
-                    raise ValueError("too many columns in matrix row {}".
-                                     format("'{}'".format(row_labels[i])
-                                            if row_labels else i + 1))
-                for j, e in enumerate(line[:i + 1 if symmetric else n]):
-                    try:
-                        matrix[i, j] = float(e)
-                    except ValueError as exc:
-                        raise ValueError(
-                            "invalid element at row {}, column {}".format(
-                                "'{}'".format(row_labels[i])
-                                if row_labels else i + 1,
-                                "'{}'".format(col_labels[j])
-                                if col_labels else j + 1)) from exc
-                    if symmetric:
-                        matrix[j, i] = matrix[i, j]
-        if col_labels:
-            col_labels = Table.from_list(
-                Domain([], metas=[StringVariable("label")]),
-                [[item] for item in col_labels])
-        if row_labels:
-            row_labels = Table.from_list(
-                Domain([], metas=[StringVariable("label")]),
-                [[item] for item in row_labels])
+        if _is_binary(filename):
+            data, condensed, row_labels, col_labels, axis = \
+                _read_binary(filename, mmap)
+            if condensed:
+                matrix = CondensedDistMatrix(data, row_labels, axis)
+                return matrix if mmap else matrix.full()
+            return cls(data, row_labels, col_labels, axis)
+        matrix, row_labels, col_labels, axis = _read_text(filename)
         return cls(matrix, row_labels, col_labels, axis)
 
     @staticmethod
@@ -238,34 +400,287 @@ class DistMatrix(np.ndarray):
         """
         return self._trivial_labels(self.col_items)
 
-    def save(self, filename):
+    def save(self, filename, binary=False):
         """
         Save the distance matrix to a file in the file format described at
         :obj:`~Orange.misc.distmatrix.DistMatrix.from_file`.
 
+        Symmetric matrices are stored as the lower triangle in text files;
+        symmetric matrices with zeros on the diagonal are stored in the
+        condensed form in binary files.
+
         Args:
             filename: file name
+            binary (bool): write the binary format
         """
-        n = len(self)
-        data = "{}\taxis={}".format(n, self.axis)
-        row_labels = col_labels = None
-        if self.has_col_labels():
-            data += "\tcol_labels"
-            col_labels = self.col_items
-        if self.has_row_labels():
-            data += "\trow_labels"
-            row_labels = self.row_items
-        symmetric = np.allclose(self, self.T)
-        if not symmetric:
-            data += "\tasymmetric"
-        with open(filename, "wt") as fle:
-            fle.write(data + "\n")
-            if col_labels is not None:
-                fle.write("\t".join(str(e.metas[0]) for e in col_labels) + "\n")
-            for i, row in enumerate(self):
-                if row_labels is not None:
-                    fle.write(str(row_labels[i].metas[0]) + "\t")
-                if symmetric:
-                    fle.write("\t".join(map(str, row[:i + 1])) + "\n")
-                else:
-                    fle.write("\t".join(map(str, row)) + "\n")
+        matrix = np.asarray(self)
+        symmetric = matrix.shape[0] == matrix.shape[1] and \
+            np.allclose(matrix, matrix.T)
+        row_labels = self.row_items if self.has_row_labels() else None
+        col_labels = self.col_items if self.has_col_labels() else None
+        if binary:
+            condensed = symmetric and len(matrix) > 0 and \
+                not np.any(np.diagonal(matrix))
+            if condensed:
+                rows = (matrix[i, i + 1:] for i in range(len(matrix) - 1))
+            else:
+                rows = iter(matrix)
+            _write_binary(filename, rows, matrix.shape, condensed,
+                          row_labels, col_labels, self.axis)
+        else:
+            if symmetric:
+                rows = (matrix[i, :i + 1] for i in range(len(matrix)))
+            else:
+                rows = iter(matrix)
+            _write_text(filename, rows, len(matrix), symmetric,
+                        row_labels, col_labels, self.axis)
+
+
+class CondensedDistMatrix:
+    """
+    Symmetric distance matrix with zeros on the diagonal, which stores only
+    the upper triangle as a vector, like
+    :obj:`scipy.spatial.distance.pdist`; it takes half of the memory of
+    :obj:`DistMatrix`.
+
+    Elements are accessed with `matrix[i, j]`, rows with `matrix[i]` and
+    blocks of rows with `matrix[start:stop]`; rows are assembled from the
+    vector and are not views. The matrix is converted to a square array by
+    :obj:`full` or `numpy.asarray`.
+
+    .. attribute:: flat
+
+        Distances in the condensed form
+
+    .. attribute:: row_items
+
+        Items corresponding to rows (and columns).
+
+    .. attribute:: axis
+
+        If axis=1 the distances are between rows, if axis=0 between columns.
+    """
+    ndim = 2
+
+    def __init__(self, flat, row_items=None, axis=1):
+        flat = np.asarray(flat, dtype=float)
+        if flat.ndim != 1:
+            raise ValueError("condensed distances must be a 1-d array")
+        n = int(round((1 + np.sqrt(1 + 8 * len(flat))) / 2))
+        if n * (n - 1) // 2 != len(flat):
+            raise ValueError("invalid length of condensed distances")
+        self.flat = flat
+        self.n = n
+        self.row_items = row_items
+        self.axis = axis
+
+    @property
+    def col_items(self):
+        return self.row_items
+
+    @property
+    def shape(self):
+        return self.n, self.n
+
+    @property
+    def dtype(self):
+        return self.flat.dtype
+
+    def __len__(self):
+        return self.n
+
+    def _index(self, i, j):
+        if i > j:
+            i, j = j, i
+        return _row_start(self.n, i) + j - i - 1
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            i, j = (operator.index(k) for k in key)
+            i, j = (k + self.n if k < 0 else k for k in (i, j))
+            if not (0 <= i < self.n and 0 <= j < self.n):
+                raise IndexError("index out of range")
+            return 0. if i == j else self.flat[self._index(i, j)]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.n)
+            if step != 1:
+                raise IndexError("only contiguous blocks of rows are supported")
+            return self.rows(start, stop)
+        i = operator.index(key)
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError("index out of range")
+        return self.row(i)
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self.row(i)
+
+    def row(self, i, columns=None):
+        """
+        Return distances of the `i`-th item to all items, or to items with
+        the given indices.
+
+        Returns:
+            np.ndarray: distances
+        """
+        n = self.n
+        if columns is None:
+            row = np.empty(n)
+            js = np.arange(i)
+            row[:i] = self.flat[_row_start(n, js) + i - js - 1]
+            row[i] = 0
+            start = _row_start(n, i)
+            row[i + 1:] = self.flat[start:start + n - i - 1]
+            return row
+        columns = np.asarray(columns, dtype=int)
+        if not len(self.flat):
+            return np.zeros(len(columns))
+        low, high = np.minimum(columns, i), np.maximum(columns, i)
+        same = low == high
+        row = self.flat[np.where(
+            same, 0, _row_start(n, low) + high - low - 1)]
+        row[same] = 0
+        return row
+
+    def rows(self, start, stop):
+        """
+        Return a block of rows from `start` to `stop`.
+
+        Returns:
+            np.ndarray: 2-d array of distances
+        """
+        block = np.empty((max(stop - start, 0), self.n))
+        for i in range(start, stop):
+            block[i - start] = self.row(i)
+        return block
+
+    def row_blocks(self, max_elements=BLOCK_ELEMENTS):
+        """
+        Iterate over blocks of rows with approximately `max_elements`
+        elements, yielding the index of the first row and the block.
+        """
+        step = max(1, max_elements // max(self.n, 1))
+        for start in range(0, self.n, step):
+            yield start, self.rows(start, min(start + step, self.n))
+
+    def full(self, indices=None):
+        """
+        Return the square matrix, or its submatrix with rows and columns
+        in the order given by `indices`. The matrix is filled row by row.
+
+        Returns:
+            DistMatrix: square matrix
+        """
+        row_items = self.row_items
+        if indices is None:
+            n = self.n
+            matrix = np.zeros((n, n))
+            for i in range(n - 1):
+                start = _row_start(n, i)
+                matrix[i, i + 1:] = matrix[i + 1:, i] = \
+                    self.flat[start:start + n - i - 1]
+        else:
+            indices = np.asarray(indices, dtype=int)
+            matrix = np.empty((len(indices), len(indices)))
+            for a, i in enumerate(indices):
+                matrix[a] = self.row(i, indices)
+            if row_items is not None:
+                row_items = row_items[indices]
+        return DistMatrix(matrix, row_items, row_items, self.axis)
+
+    def __array__(self, dtype=None):
+        matrix = np.asarray(self.full())
+        return matrix if dtype is None else matrix.astype(dtype, copy=False)
+
+    def condensed(self):
+        return self
+
+    def submatrix(self, row_items, col_items=None):
+        """
+        Return a submatrix. If only `row_items` are given, the submatrix
+        is also condensed; otherwise it is a rectangular :obj:`DistMatrix`.
+
+        Args:
+            row_items: indices of rows
+            col_items: indices of columns
+        """
+        row_indices = np.asarray(row_items, dtype=int)
+        if col_items is None or col_items is row_items:
+            k = len(row_indices)
+            flat = np.empty(k * (k - 1) // 2)
+            for a in range(k - 1):
+                start = _row_start(k, a)
+                flat[start:start + k - a - 1] = \
+                    self.row(row_indices[a], row_indices[a + 1:])
+            items = None if self.row_items is None \
+                else self.row_items[row_indices]
+            return CondensedDistMatrix(flat, items, self.axis)
+        col_indices = np.asarray(col_items, dtype=int)
+        matrix = np.empty((len(row_indices), len(col_indices)))
+        for a, i in enumerate(row_indices):
+            matrix[a] = self.row(i, col_indices)
+        items = self.row_items
+        return DistMatrix(
+            matrix,
+            None if items is None else items[row_indices],
+            None if items is None else items[col_indices],
+            self.axis)
+
+    def max(self):
+        return self.flat.max() if len(self.flat) else 0.
+
+    def min(self):
+        return min(self.flat.min(), 0.) if len(self.flat) else 0.
+
+    @classmethod
+    def from_file(cls, filename, mmap=False):
+        """
+        Load a symmetric distance matrix from a file in either format
+        described at :obj:`DistMatrix.from_file`. Binary files written from
+        condensed matrices are read without expanding them and can be
+        memory mapped.
+
+        Args:
+            filename: file name
+            mmap (bool): memory map the data of binary files
+        """
+        if _is_binary(filename):
+            data, condensed, row_labels, _, axis = \
+                _read_binary(filename, mmap)
+            if condensed:
+                return cls(data, row_labels, axis)
+            matrix = DistMatrix(data, row_labels, None, axis)
+        else:
+            matrix = DistMatrix.from_file(filename)
+        return matrix.condensed()
+
+    def save(self, filename, binary=False):
+        """
+        Save the matrix to a file; see :obj:`DistMatrix.save`. The binary
+        format stores the condensed vector.
+
+        Args:
+            filename: file name
+            binary (bool): write the binary format
+        """
+        row_labels = self.row_items if self.has_row_labels() else None
+        if binary:
+            flat = self.flat
+            blocks = (flat[start:start + BLOCK_ELEMENTS]
+                      for start in range(0, len(flat), BLOCK_ELEMENTS))
+            _write_binary(filename, blocks, self.shape, True,
+                          row_labels, None, self.axis)
+        else:
+            _write_text(filename, (self.row(i)[:i + 1] for i in range(self.n)),
+                        self.n, True, row_labels, None, self.axis)
+
+    def has_row_labels(self):
+        """See :obj:`DistMatrix.has_row_labels`."""
+        return DistMatrix._trivial_labels(self.row_items)
+
+    has_col_labels = has_row_labels
+
+    def __reduce__(self):
+        return type(self), (self.flat, self.row_items, self.axis)
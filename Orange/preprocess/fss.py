@@ -90,14 +90,11 @@ class SelectBestFeatures:
         return data.from_table(domain, data)
 
     def score_only_nice_features(self, data, method):
-        mask = np.array([isinstance(a, method.feature_type)
-                         for a in data.domain.attributes])
-        features = [f for f in data.domain.attributes
-                    if isinstance(f, method.feature_type)]
-        scores = [method(data, f) for f in features]
+        if isinstance(method, type):
+            method = method()
+        all_scores = method.score_all(data)
         bad = float('-inf') if self.decreasing else float('inf')
-        all_scores = np.array([bad] * len(data.domain.attributes))
-        all_scores[mask] = scores
+        all_scores[np.isnan(all_scores)] = bad
         return all_scores
 
 
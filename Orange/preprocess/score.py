@@ -1,8 +1,13 @@
+import warnings
 from collections import defaultdict
 from itertools import chain
+from threading import Lock
+from weakref import WeakKeyDictionary
 
 import numpy as np
+import scipy.sparse as sp
 from sklearn import feature_selection as skl_fss
+from Orange.misc.cache import identity_key
 from Orange.misc.wrapper_meta import WrapperMeta
 
 from Orange.statistics import contingency, distribution
@@ -21,6 +26,33 @@ __all__ = ["Chi2",
            "FCBF"]
 
 
+# Results of preprocessors for each table and its checksum; they are kept
+# while the table exists and is not changed
+_preprocessed = WeakKeyDictionary()
+_preprocessed_lock = Lock()
+
+
+def _apply_preprocessor(preprocessor, data):
+    """Apply the preprocessor; scorers with the same preprocessors (e.g.
+    discretization) share the results for the same data."""
+    key = identity_key(preprocessor)
+    # the checksum also detects changes of the table's arrays in place
+    checksum = data.checksum()
+    with _preprocessed_lock:
+        cached, results = _preprocessed.get(data, (None, None))
+        if cached != checksum:
+            results = {}
+            _preprocessed[data] = checksum, results
+        if key in results:
+            res = results[key]
+            return data if res is None else res
+    res = preprocessor(data)
+    with _preprocessed_lock:
+        # a value that refers to the table would keep it alive
+        results[key] = None if res is data else res
+    return res
+
+
 class Scorer:
     feature_type = None
     class_type = None
@@ -39,18 +71,13 @@ class Scorer:
             return self
 
     def __call__(self, data, feature=None):
-        if not data.domain.class_var:
-            raise ValueError("Data with class labels required.")
-        if not isinstance(data.domain.class_var, self.class_type):
-            raise ValueError("Scoring method %s requires a class variable of type %s." %
-                             (type(self).__name__, self.class_type.__name__))
+        self._check_class(data)
 
         if feature is not None:
             f = data.domain[feature]
             data = data.from_table(Domain([f], data.domain.class_vars), data)
 
-        for pp in self.preprocessors:
-            data = pp(data)
+        data = self._preprocess(data)
 
         if any(not isinstance(a, self.feature_type)
                for a in data.domain.attributes):
@@ -58,6 +85,49 @@ class Scorer:
 
         return self.score_data(data, feature)
 
+    def score_all(self, data):
+        """
+        Score all features of the data set at once.
+
+        Unlike calling the scorer, this does not fail on features of a type
+        that the scorer does not support; their scores are `nan`.
+
+        Parameters
+        ----------
+        data : Orange.data.Table
+            Data set
+
+        Returns
+        -------
+        scores : np.ndarray
+            Scores of features
+        """
+        self._check_class(data)
+        data = self._preprocess(data)
+        attributes = data.domain.attributes
+        mask = np.array([isinstance(a, self.feature_type)
+                         for a in attributes], dtype=bool)
+        scores = np.full(len(attributes), np.nan)
+        if mask.any():
+            if not mask.all():
+                domain = Domain([a for a, m in zip(attributes, mask) if m],
+                                data.domain.class_vars)
+                data = data.from_table(domain, data)
+            scores[mask] = self.score_data(data, None)
+        return scores
+
+    def _check_class(self, data):
+        if not data.domain.class_var:
+            raise ValueError("Data with class labels required.")
+        if not isinstance(data.domain.class_var, self.class_type):
+            raise ValueError("Scoring method %s requires a class variable of type %s." %
+                             (type(self).__name__, self.class_type.__name__))
+
+    def _preprocess(self, data):
+        for pp in self.preprocessors:
+            data = _apply_preprocessor(pp, data)
+        return data
+
     def score_data(self, data, feature):
         raise NotImplementedError
 
@@ -183,40 +253,165 @@ class ClassificationScorer(Scorer):
     def score_data(self, data, feature):
         instances_with_class = \
             np.sum(distribution.Discrete(data, data.domain.class_var))
-
-        def score_from_contingency(f):
-            cont = contingency.Discrete(data, f)
-            return self.from_contingency(
-                cont, 1. - np.sum(cont.unknowns)/instances_with_class)
-
-        scores = [score_from_contingency(f) for f in data.domain.attributes]
+        attributes = data.domain.attributes
+        if not attributes:
+            return []
+
+        # contingencies of all features are computed in a single pass and
+        # stacked into a (features x classes x values) array
+        conts, _ = data._compute_contingency(attributes)
+        n_values = max(cont.shape[1] for cont, _ in conts)
+        stacked = np.zeros((len(conts), len(data.domain.class_var.values),
+                            n_values))
+        for i, (cont, _) in enumerate(conts):
+            stacked[i, :, :cont.shape[1]] = cont
+        nan_adjustments = 1. - np.array(
+            [np.sum(unknowns) for _, unknowns in conts]) / instances_with_class
+        scores = list(self.from_contingencies(stacked, nan_adjustments))
 
         if feature is not None:
             return scores[0]
         return scores
 
+    def from_contingency(self, cont, nan_adjustment):
+        """
+        Compute the score from a contingency matrix (classes x values).
+
+        Scorers that implement :obj:`from_contingencies` get this method
+        for free; others must implement it.
+        """
+        if type(self).from_contingencies is \
+                ClassificationScorer.from_contingencies:
+            raise NotImplementedError
+        return self.from_contingencies(
+            np.asarray(cont, dtype=float)[np.newaxis],
+            np.array([nan_adjustment]))[0]
+
+    def from_contingencies(self, conts, nan_adjustments):
+        """
+        Compute scores from stacked contingency matrices.
+
+        The default implementation calls :obj:`from_contingency` for each
+        feature; scorers can override it with a computation on all features
+        at once.
+
+        Parameters
+        ----------
+        conts : np.ndarray
+            Contingency matrices (features x classes x values); features with
+            fewer values are padded with zeros
+        nan_adjustments : np.ndarray
+            Factors for the proportion of known values of each feature
+
+        Returns
+        -------
+        scores : np.ndarray
+            Scores of features
+        """
+        return np.array([self.from_contingency(cont, nan_adjustment)
+                         for cont, nan_adjustment in zip(conts,
+                                                         nan_adjustments)])
+
+
+def _column_probabilities(C):
+    sums = C.sum(axis=1, keepdims=True)
+    return np.divide(C, sums, out=np.zeros(C.shape), where=sums > 0), sums[:, 0]
+
+
+def _entropies(C):
+    """Entropies of class distributions (axis 1) in contingency matrices C
+    (features x classes x values), averaged over values (axis 2) weighted
+    by their frequencies"""
+    P, sums = _column_probabilities(C)
+    h = np.sum(-P * np.log2(np.clip(P, 1e-15, 1)), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sum(h * sums, axis=1) / np.sum(sums, axis=1)
+
+
+def _ginis(C):
+    """Gini indices of class distributions, averaged like in
+    :obj:`_entropies`"""
+    P, sums = _column_probabilities(C)
+    g = 1 - np.sum(np.square(P), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 0.5 * np.sum(g * sums, axis=1) / np.sum(sums, axis=1)
 
-def _entropy(D):
-    """Entropy of class-distribution matrix"""
-    P = D / np.sum(D, axis=0)
-    PC = np.clip(P, 1e-15, 1)
-    return np.sum(np.sum(- P * np.log2(PC), axis=0) * np.sum(D, axis=0) / np.sum(D))
 
+def _class_entropies(C):
+    return _entropies(np.sum(C, axis=2, keepdims=True))
 
-def _gini(D):
-    """Gini index of class-distribution matrix"""
-    P = D / np.sum(D, axis=0)
-    return sum((np.ones(1 if len(D.shape) == 1 else D.shape[1]) - np.sum(np.square(P), axis=0))
-               * 0.5 * np.sum(D, axis=0) / np.sum(D))
+
+def _value_entropies(C):
+    return _entropies(np.sum(C, axis=1)[:, :, np.newaxis])
+
+
+def _info_gains(C):
+    return _class_entropies(C) - _entropies(C)
+
+
+def _contingency_tables(X1, X2):
+    """
+    Contingency tables of pairs of columns of X1 and X2 (which are broadcast
+    against each other), computed like :obj:`_relieff.contingency_table`:
+    a missing value in one column counts for all values of the other, and
+    the tables are normalized by their column sums.
+
+    Returns
+    -------
+    tables : np.ndarray
+        Tables (pairs x values of X1 x values of X2), padded with zeros
+    valid : np.ndarray
+        Indicators of pairs in which neither column is entirely missing
+    """
+    X1, X2 = np.broadcast_arrays(X1, X2)
+    n_pairs = X1.shape[1]
+    with np.errstate(invalid="ignore"), \
+            warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        n1, n2 = np.nanmax(X1, axis=0) + 1, np.nanmax(X2, axis=0) + 1
+    valid = ~(np.isnan(n1) | np.isnan(n2))
+    n1 = np.where(valid, n1, 0).astype(int)
+    n2 = np.where(valid, n2, 0).astype(int)
+    v1 = max(n1.max() if n1.size else 0, 1)
+    v2 = max(n2.max() if n2.size else 0, 1)
+
+    nan1, nan2 = np.isnan(X1), np.isnan(X2)
+    pairs = np.broadcast_to(np.arange(n_pairs), X1.shape)
+    both = ~nan1 & ~nan2
+    tables = np.bincount(
+        (pairs[both] * v1 + X1[both].astype(int)) * v2 + X2[both].astype(int),
+        minlength=n_pairs * v1 * v2).reshape(n_pairs, v1, v2).astype(float)
+    only2 = nan1 & ~nan2
+    tables += np.bincount(
+        pairs[only2] * v2 + X2[only2].astype(int),
+        minlength=n_pairs * v2).reshape(n_pairs, 1, v2)
+    only1 = ~nan1 & nan2
+    tables += np.bincount(
+        pairs[only1] * v1 + X1[only1].astype(int),
+        minlength=n_pairs * v1).reshape(n_pairs, v1, 1)
+    tables *= (np.arange(v1) < n1[:, np.newaxis])[:, :, np.newaxis]
+    tables *= (np.arange(v2) < n2[:, np.newaxis])[:, np.newaxis, :]
+    sums = tables.sum(axis=1, keepdims=True)
+    sums[sums == 0] = np.inf  # Avoid zero-division
+    tables /= sums
+    return tables, valid
+
+
+def _symmetrical_uncertainties(X1, X2):
+    """Symmetrical uncertainties of pairs of columns of X1 and X2, Press et
+    al., 1988."""
+    X1, X2 = np.atleast_2d(np.around(X1).T).T, np.atleast_2d(np.around(X2).T).T
+    tables, valid = _contingency_tables(X1, X2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        su = 2 * _info_gains(tables) / (
+            _value_entropies(tables) + _class_entropies(tables))
+    su[~valid] = 0
+    return su
 
 
 def _symmetrical_uncertainty(X, Y):
     """Symmetrical uncertainty, Press et al., 1988."""
-    from Orange.preprocess._relieff import contingency_table
-    X, Y = np.around(X), np.around(Y)
-    cont = contingency_table(X, Y)
-    ig = InfoGain().from_contingency(cont, 1)
-    return 2 * ig / (_entropy(cont.sum(0)) + _entropy(cont.sum(1)))
+    return _symmetrical_uncertainties(X, Y)[0]
 
 
 class FCBF(ClassificationScorer):
@@ -228,27 +423,26 @@ class FCBF(ClassificationScorer):
     2003. http://www.aaai.org/Papers/ICML/2003/ICML03-111.pdf
     """
     def score_data(self, data, feature=None):
-        S = []
-        for i, a in enumerate(data.X.T):
-            S.append((_symmetrical_uncertainty(a, data.Y), i))
-        S.sort()
+        X = data.X.toarray() if sp.issparse(data.X) else data.X
+        su_class = _symmetrical_uncertainties(X, data.Y[:, np.newaxis])
+        S = sorted(zip(su_class, range(X.shape[1])))
         worst = []
 
         p = 1
-        while True:
-            try: SUpc, Fp = S[-p]
-            except IndexError: break
-            q = p + 1
-            while True:
-                try: SUqc, Fq = S[-q]
-                except IndexError: break
-                # TODO: cache
-                if _symmetrical_uncertainty(data.X.T[Fp],
-                                            data.X.T[Fq]) >= SUqc:
-                    del S[-q]
+        while p <= len(S):
+            SUpc, Fp = S[-p]
+            # uncertainties between Fp and all features less correlated with
+            # the class are computed at once
+            rest = S[:-p]
+            su = _symmetrical_uncertainties(
+                X[:, [Fp]], X[:, [Fq for _, Fq in rest]])
+            kept = []
+            for (SUqc, Fq), su_pq in zip(rest, su):
+                if su_pq >= SUqc:
                     worst.append((1e-4*SUqc, Fq))
                 else:
-                    q += 1
+                    kept.append((SUqc, Fq))
+            S = kept + S[-p:]
             p += 1
         best = S
         scores = [i[0] for i in sorted(chain(best, worst), key=lambda i: i[1])]
@@ -260,10 +454,8 @@ class InfoGain(ClassificationScorer):
     Information gain is the expected decrease of entropy. See `Wikipedia entry on information gain
     <http://en.wikipedia.org/wiki/Information_gain_ratio>`_.
     """
-    def from_contingency(self, cont, nan_adjustment):
-        h_class = _entropy(np.sum(cont, axis=1))
-        h_residual = _entropy(np.compress(np.sum(cont, axis=0), cont, axis=1))
-        return nan_adjustment * (h_class - h_residual)
+    def from_contingencies(self, conts, nan_adjustments):
+        return nan_adjustments * _info_gains(conts)
 
 
 class GainRatio(ClassificationScorer):
@@ -276,13 +468,10 @@ class GainRatio(ClassificationScorer):
 
     .. [Quinlan1986] J R Quinlan: Induction of Decision Trees, Machine Learning, 1986.
     """
-    def from_contingency(self, cont, nan_adjustment):
-        h_class = _entropy(np.sum(cont, axis=1))
-        h_residual = _entropy(np.compress(np.sum(cont, axis=0), cont, axis=1))
-        h_attribute = _entropy(np.sum(cont, axis=0))
-        if h_attribute == 0:
-            h_attribute = 1
-        return nan_adjustment * (h_class - h_residual) / h_attribute
+    def from_contingencies(self, conts, nan_adjustments):
+        h_attribute = _value_entropies(conts)
+        h_attribute[h_attribute == 0] = 1
+        return nan_adjustments * _info_gains(conts) / h_attribute
 
 
 class Gini(ClassificationScorer):
@@ -290,8 +479,9 @@ class Gini(ClassificationScorer):
     Gini index is the probability that two randomly chosen instances will have different
     classes. See `Wikipedia entry on gini index <http://en.wikipedia.org/wiki/Gini_coefficient>`_.
     """
-    def from_contingency(self, cont, nan_adjustment):
-        return (_gini(np.sum(cont, axis=1)) - _gini(cont)) * nan_adjustment
+    def from_contingencies(self, conts, nan_adjustments):
+        return (_ginis(np.sum(conts, axis=2, keepdims=True)) - _ginis(conts)) \
+            * nan_adjustments
 
 
 class ReliefF(Scorer):
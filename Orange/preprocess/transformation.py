@@ -1,12 +1,16 @@
 import numpy as np
 
 from Orange.data import Instance, Table
+from Orange.data.util import SharedComputeValue
 
 
-class Transformation:
+class Transformation(SharedComputeValue):
     """
     Base class for simple transformations of individual variables. Derived
     classes are used in continuization, imputation, discretization...
+
+    Transformations of the same variable share the column with its values,
+    which is thus extracted (or computed) only once when converting a table.
     """
     def __init__(self, variable):
         """
@@ -16,12 +20,15 @@ class Transformation:
         self.variable = variable
         self._last_domain = None
 
-    def __call__(self, data):
+    @property
+    def shared_group(self):
+        return Transformation, self.variable
+
+    def compute_shared(self, data):
         """
-        Return transformed column from the data by extracting the column view
-        from the data and passing it to the `transform` method.
+        Return the column with values of the variable, either as a view on
+        the data or computed from it.
         """
-        inst = isinstance(data, Instance)
         if self._last_domain != data.domain:
             try:
                 self.attr_index = data.domain.index(self.variable)
@@ -32,13 +39,20 @@ class Transformation:
                 self.attr_index = None
             self._last_domain = data.domain
         if self.attr_index is None:
-            data = self.variable.compute_value(data)
-        elif inst:
-            data = np.array([float(data[self.attr_index])])
+            return self.variable.compute_value(data)
+        elif isinstance(data, Instance):
+            return np.array([float(data[self.attr_index])])
         else:
-            data = data.get_column_view(self.attr_index)[0]
-        transformed = self.transform(data)
-        if inst and isinstance(transformed, np.ndarray) and transformed.shape:
+            return data.get_column_view(self.attr_index)[0]
+
+    def compute(self, data, shared_data):
+        """
+        Return transformed column by passing the column with values of the
+        variable (`shared_data`) to the `transform` method.
+        """
+        transformed = self.transform(shared_data)
+        if isinstance(data, Instance) and \
+                isinstance(transformed, np.ndarray) and transformed.shape:
             transformed = transformed[0]
         return transformed
 
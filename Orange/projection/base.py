@@ -1,12 +1,32 @@
 import inspect
+from weakref import finalize
 
 import Orange.data
 from Orange.misc.wrapper_meta import WrapperMeta
-from Orange.misc.cache import single_cache
+from Orange.misc.cache import content_key, lru_cache
 import Orange.preprocess
 
 __all__ = ["Projector", "Projection", "SklProjector"]
 
+#: The largest total size of cached results of :obj:`Projection.transform`
+#: in bytes
+TRANSFORM_CACHE_BYTES = 2 ** 27
+
+
+def _transform_key(projection, X):
+    # Projections are represented by tokens, so the cache does not keep them
+    # alive; arrays are compared by contents, so equal copies share results
+    return projection._token, content_key(X)
+
+
+@lru_cache(maxsize=None, maxbytes=TRANSFORM_CACHE_BYTES, key=_transform_key)
+def _transform(projection, X):
+    return projection.proj.transform(X)
+
+
+def _discard_transforms(token):
+    _transform.cache.discard(lambda key: key[0] is token)
+
 
 class Projector:
     #: A sequence of data preprocessors to apply on data prior to projecting
@@ -40,10 +60,28 @@ class Projection:
     def __init__(self, proj):
         self.__dict__.update(proj.__dict__)
         self.proj = proj
+        self._init_token()
+
+    def _init_token(self):
+        self._token = object()
+        finalize(self, _discard_transforms, self._token)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_token", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_token()
+
+    def _clear_transforms(self):
+        """Remove the cached results of :obj:`transform`; call after
+        changing the projection."""
+        _discard_transforms(self._token)
 
-    @single_cache
     def transform(self, X):
-        return self.proj.transform(X)
+        return _transform(self, X)
 
     def __call__(self, data):
         return data.from_table(self.domain, data)
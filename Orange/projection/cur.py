@@ -4,6 +4,7 @@ import numpy as np
 import scipy.sparse.linalg as sla
 
 import Orange.data
+from Orange.data.util import SharedComputeValue
 from Orange.projection import Projector, Projection
 
 __all__ = ["CUR"]
@@ -145,21 +146,20 @@ class CURModel(Projection):
         return transformed_data
 
 
-class Projector:
+class Projector(SharedComputeValue):
     def __init__(self, projection, feature):
         self.projection = projection
         self.feature = feature
-        self.transformed = None
 
-    def __call__(self, data):
-        if data is not self.transformed:
-            self.transformed = self.projection.transform(data.X)
-        return self.transformed[:, self.feature]
+    @property
+    def shared_group(self):
+        return self.projection
 
-    def __getstate__(self):
-        d = dict(self.__dict__)
-        d['transformed'] = None
-        return d
+    def compute_shared(self, data):
+        return self.projection.transform(data.X)
+
+    def compute(self, data, shared_data):
+        return shared_data[:, self.feature]
 
 
 if __name__ == '__main__':
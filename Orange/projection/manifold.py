@@ -1,6 +1,7 @@
 import sklearn.manifold as skl_manifold
 
 from Orange.distance import SklDistance, SpearmanDistance, PearsonDistance
+from Orange.misc import CondensedDistMatrix
 from Orange.projection import SklProjector
 
 __all__ = ["MDS", "Isomap", "LocallyLinearEmbedding"]
@@ -37,6 +38,10 @@ class MDS(SklProjector):
         return clf
 
     def fit(self, X, init=None, Y=None):
+        if isinstance(X, CondensedDistMatrix):
+            # SMACOF updates all distances in each iteration and needs
+            # the square matrix
+            X = X.full()
         proj = self.__wraps__(**self.params)
         return proj.fit(X, init=init, y=Y)
 
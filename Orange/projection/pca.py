@@ -12,6 +12,7 @@ except ImportError:
 
 import Orange.data
 from Orange.data import Variable
+from Orange.data.util import SharedComputeValue
 from Orange.misc.wrapper_meta import WrapperMeta
 from Orange.preprocess import Continuize
 from Orange.projection import SklProjector, Projection
@@ -134,19 +135,28 @@ class IncrementalPCAModel(PCAModel):
         else:
             self.proj.partial_fit(data)
         self.__dict__.update(self.proj.__dict__)
+        self._clear_transforms()
         return self
 
 
-class Projector:
+class Projector(SharedComputeValue):
+    """Compute a component of the projection; all components of the same
+    projection share the transformed data."""
     def __init__(self, projection, feature):
         self.projection = projection
         self.feature = feature
-        self.transformed = None
 
-    def __call__(self, data):
+    @property
+    def shared_group(self):
+        return self.projection
+
+    def compute_shared(self, data):
         if data.domain != self.projection.pre_domain:
             data = data.from_table(self.projection.pre_domain, data)
-        return self.projection.transform(data.X)[:, self.feature]
+        return self.projection.transform(data.X)
+
+    def compute(self, data, shared_data):
+        return shared_data[:, self.feature]
 
 
 class RemotePCA:
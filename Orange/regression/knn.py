@@ -1,10 +1,38 @@
+import numpy as np
 import sklearn.neighbors as skl_neighbors
+
 from Orange.regression import SklLearner
+from Orange.distance import Distance
+from Orange.distance.neighbors import NeighborIndex, neighbor_weights
 
 __all__ = ["KNNRegressionLearner"]
 
 
+class IndexKNeighborsRegressor:
+    """
+    Regressor with the interface of scikit-learn's estimators that finds
+    neighbours with :obj:`Orange.distance.NeighborIndex`.
+    """
+    def __init__(self, index, y, n_neighbors=5, weights="uniform"):
+        self.index = index
+        self.y = y
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+
+    def predict(self, X):
+        indices, distances = self.index.query(self.n_neighbors, X)
+        weights = neighbor_weights(distances, self.weights)
+        return np.sum(self.y[indices] * weights, axis=1) / \
+            np.sum(weights, axis=1)
+
+
 class KNNRegressionLearner(SklLearner):
+    """
+    ${skldoc}
+
+    If `metric` is an instance of :obj:`Orange.distance.Distance`, the
+    neighbours are found with :obj:`Orange.distance.NeighborIndex`.
+    """
     __wraps__ = skl_neighbors.KNeighborsRegressor
     name = 'knn regression'
 
@@ -13,3 +41,11 @@ class KNNRegressionLearner(SklLearner):
                  preprocessors=None):
         super().__init__(preprocessors=preprocessors)
         self.params = vars()
+
+    def fit(self, X, Y, W=None):
+        metric = self.params["metric"]
+        if not isinstance(metric, Distance):
+            return super().fit(X, Y, W)
+        return self.__returns__(IndexKNeighborsRegressor(
+            NeighborIndex(X, metric), Y.reshape(-1),
+            self.params["n_neighbors"], self.params["weights"]))
@@ -2,6 +2,7 @@ import numpy as np
 
 from Orange.regression import Learner
 from Orange.classification.simple_random_forest import SimpleRandomForestModel as SRFM
+from Orange.classification.simple_tree import _tree, c_double_p
 
 __all__ = ['SimpleRandomForestLearner']
 
@@ -39,18 +40,23 @@ class SimpleRandomForestLearner(Learner):
 
     seed : int, optional (default = 42)
         Random seed.
+
+    n_jobs : int, optional (default = 1)
+        The number of threads for building the trees. If -1, the number of
+        threads is set to the number of cores.
     """
 
     name = 'simple rf reg'
 
     def __init__(self, n_estimators=10, min_instances=2, max_depth=1024,
-                 max_majority=1.0, skip_prob='sqrt', seed=42):
+                 max_majority=1.0, skip_prob='sqrt', seed=42, n_jobs=1):
         self.n_estimators = n_estimators
         self.skip_prob = skip_prob
         self.max_depth = max_depth
         self.min_instances = min_instances
         self.max_majority = max_majority
         self.seed = seed
+        self.n_jobs = n_jobs
 
     def fit_storage(self, data):
         return SimpleRandomForestModel(self, data)
@@ -62,8 +68,13 @@ class SimpleRandomForestModel(SRFM):
         self.learn(learner, data)
 
     def predict_storage(self, data):
-        p = np.zeros(data.X.shape[0])
-        for tree in self.estimators_:
-            p += tree(data)
-        p /= len(self.estimators_)
+        X = np.ascontiguousarray(data.X)
+        p = np.zeros(X.shape[0])
+        _tree.predict_regression_forest(
+            X.ctypes.data_as(c_double_p),
+            X.shape[0],
+            self._tree_nodes(),
+            len(self.estimators_),
+            X.shape[1],
+            p.ctypes.data_as(c_double_p))
         return p
@@ -4,10 +4,15 @@ and once used from the bottlechest package (fork of bottleneck).
 
 It also patches bottleneck to contain these functions.
 """
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
 import numpy as np
-from scipy.sparse import issparse
+from scipy.sparse import issparse, csc_matrix
 import bottleneck as bn
 
+from Orange.data import _contingency
+
 
 def bincount(X, max_val=None, weights=None, minlength=None):
     """Return counts of values in array X.
@@ -85,7 +90,8 @@ def contingency(X, y, max_X=None, max_y=None, weights=None, mask=None):
         The maximal value in the array
     max_y : int
         The maximal value in `y`
-    weights : ...
+    weights : 1d array, optional
+        Weights of rows
     mask : sequence
         Discrete columns of X.
 
@@ -99,9 +105,6 @@ def contingency(X, y, max_X=None, max_y=None, weights=None, mask=None):
     nans : array_like
         Number of nans in each column of X for each unique value of y.
     """
-    if weights is not None and np.any(weights) and np.unique(weights)[0] != 1:
-        raise ValueError('weights not yet supported')
-
     was_1d = False
     if X.ndim == 1:
         X = X[..., np.newaxis]
@@ -119,15 +122,158 @@ def contingency(X, y, max_X=None, max_y=None, weights=None, mask=None):
         if issparse(col):
             col = np.ravel(col.todense())
         contingencies.append(
-            bincount(y + ny * col,
+            bincount(y + ny * col, weights=weights,
                      minlength=ny * nx)[0].reshape(nx, ny).T)
+        col_nans = np.isnan(col)
         nans.append(
-            bincount(y[np.isnan(col)], minlength=ny)[0])
+            bincount(y[col_nans], minlength=ny,
+                     weights=None if weights is None
+                     else weights[col_nans])[0])
     if was_1d:
         return contingencies[0], nans[0]
     return np.array(contingencies), np.array(nans)
 
 
+#: Continuous columns of dense matrices are copied into contiguous memory in
+#: blocks of this many columns before they are counted
+CONTIGUOUS_BLOCK_COLUMNS = 16
+
+
+def _map_parallel(func, n, n_jobs):
+    """Return `[func(i) for i in range(n)]`, computed in `n_jobs` threads."""
+    if n_jobs > 1 and n > 1:
+        with ThreadPoolExecutor(min(n_jobs, n)) as executor:
+            return list(executor.map(func, range(n)))
+    return [func(i) for i in range(n)]
+
+
+def _column(X, i):
+    """
+    Return the values of the `i`-th column of `X` as floats and the indices
+    of their rows; dense columns are views if possible, and their row
+    indices are `None`.
+    """
+    if issparse(X):
+        start, end = X.indptr[i], X.indptr[i + 1]
+        return (X.data[start:end].astype(float, copy=False),
+                X.indices[start:end].astype(np.intp, copy=False))
+    return np.asarray(X[:, i], dtype=float), None
+
+
+def _weighted_bincount(x, weights, minlength):
+    return np.bincount(x, weights=weights, minlength=minlength).astype(float)
+
+
+def discrete_contingencies(X, y, n_values, n_y, weights=None, n_jobs=1):
+    """
+    Compute contingency matrices of discrete columns of `X` and vector `y`.
+
+    Columns are counted one at a time by a compiled loop, which releases
+    the GIL, so they can be processed in `n_jobs` threads.
+
+    Parameters
+    ----------
+    X : 2d array or sparse matrix
+        Values of discrete columns; zeros of sparse matrices are counted as
+        the first value
+    y : 1d array
+        Defined values of the row variable
+    n_values : sequence of int
+        The number of values for each column
+    n_y : int
+        The number of values of `y`
+    weights : 1d array, optional
+        Weights of rows
+    n_jobs : int
+        The number of threads
+
+    Returns
+    -------
+    list of (2d array, 1d array)
+        A contingency matrix (n_y × n_values) and counts of nans for each
+        value of `y` for each column
+
+    Raises
+    ------
+    ValueError
+        If values of a column or of `y` are out of range
+    """
+    if issparse(X):
+        X = csc_matrix(X)
+    y = np.asarray(y).astype(np.intp)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+    if issparse(X):
+        totals = _weighted_bincount(y, weights, n_y)
+
+    def column_contingency(i):
+        col, rows = _column(X, i)
+        cont, nans = _contingency.discrete_contingency(
+            col, y, n_values[i], n_y, weights, rows)
+        if rows is not None:
+            cont[:, 0] += totals - cont.sum(axis=1) - nans
+        return cont, nans
+
+    return _map_parallel(column_contingency, X.shape[1], n_jobs)
+
+
+def continuous_contingencies(X, y, n_y, weights=None, n_jobs=1):
+    """
+    Compute contingencies of continuous columns of `X` and vector `y`.
+
+    Columns of dense matrices are copied into contiguous memory in blocks.
+    Each column is then sorted and counted by a compiled loop, which
+    releases the GIL, so blocks can be processed in `n_jobs` threads. Only
+    the stored elements of sparse matrices are counted.
+
+    Parameters
+    ----------
+    X : 2d array or sparse matrix
+        Values of continuous columns
+    y : 1d array
+        Defined values of the row variable
+    n_y : int
+        The number of values of `y`
+    weights : 1d array, optional
+        Weights of rows
+    n_jobs : int
+        The number of threads
+
+    Returns
+    -------
+    list of (1d array, 2d array, 1d array)
+        Sorted distinct values, counts (n_y × number of values) and counts
+        of nans for each value of `y` for each column
+
+    Raises
+    ------
+    ValueError
+        If values of `y` are out of range
+    """
+    if issparse(X):
+        X = csc_matrix(X)
+    y = np.asarray(y).astype(np.intp)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+
+    def block_contingencies(block):
+        start = block * CONTIGUOUS_BLOCK_COLUMNS
+        stop = min(start + CONTIGUOUS_BLOCK_COLUMNS, X.shape[1])
+        if issparse(X):
+            columns = [_column(X, i) for i in range(start, stop)]
+        else:
+            # rows of the transposed copy are contiguous columns, which are
+            # faster to read than strided views
+            columns = [(col, None) for col in np.ascontiguousarray(
+                X[:, start:stop].T, dtype=float)]
+        return [_contingency.continuous_contingency(col, y, n_y, weights, rows)
+                for col, rows in columns]
+
+    n_blocks = -(-X.shape[1] // CONTIGUOUS_BLOCK_COLUMNS)
+    return list(chain.from_iterable(
+        _map_parallel(block_contingencies, n_blocks, n_jobs)))
+
+
 def stats(X, weights=None, compute_variance=False):
     """
     Compute min, max, #nans, mean and variance.
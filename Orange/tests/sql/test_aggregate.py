@@ -0,0 +1,66 @@
+# Test methods with long descriptive names can omit docstrings
+# pylint: disable=missing-docstring
+import sqlite3
+import unittest
+
+from Orange.data.sql import aggregate
+
+
+class TestAggregate(unittest.TestCase):
+    """Run the planned queries on SQLite as a stand-in for PostgreSQL."""
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.execute("CREATE TABLE t (a REAL, b TEXT, c TEXT)")
+        self.conn.executemany(
+            "INSERT INTO t VALUES (?, ?, ?)",
+            [(1.5, "x", "p"), (1.5, "y", "p"), (2, "x", "q"),
+             (None, "y", "q"), (3, None, "p"), (2, "x", None)])
+
+    def tearDown(self):
+        self.conn.close()
+
+    @staticmethod
+    def sql_query(fields, filters=(), group_by=None):
+        sql = ["SELECT", ", ".join(fields), "FROM t"]
+        if filters:
+            sql.extend(["WHERE", " AND ".join(filters)])
+        if group_by is not None:
+            sql.extend(["GROUP BY", ", ".join(group_by)])
+        return " ".join(sql)
+
+    def execute(self, query):
+        return self.conn.execute(query).fetchall()
+
+    def test_distributions(self):
+        columns = [("a", True), ("b", False), ("c", False)]
+        for batch_size in (1, 2, 3):
+            queries = aggregate.distribution_queries(
+                self.sql_query, columns, batch_size)
+            self.assertEqual(len(queries), -(-3 // batch_size))
+            rows = aggregate.split_by_column(
+                aggregate.run_queries(self.execute, queries, n_jobs=2), 3)
+            self.assertEqual(rows[0], [(1.5, None, 2), (2, None, 2),
+                                       (3, None, 1)])
+            self.assertEqual(rows[1], [(None, "x", 3), (None, "y", 2)])
+            self.assertEqual(rows[2], [(None, "p", 3), (None, "q", 2)])
+
+    def test_contingencies(self):
+        columns = [("a", True), ("b", False)]
+        for batch_size in (1, 2):
+            queries = aggregate.contingency_queries(
+                self.sql_query, "c", columns, batch_size)
+            rows = aggregate.split_by_column(
+                aggregate.run_queries(self.execute, queries), 2)
+            self.assertEqual(rows[0], [("p", 1.5, None, 2), ("q", 2, None, 1),
+                                       ("p", 3, None, 1)])
+            self.assertEqual(rows[1], [("p", None, "x", 1), ("q", None, "x", 1),
+                                       ("p", None, "y", 1), ("q", None, "y", 1)])
+
+    def test_no_columns(self):
+        self.assertEqual(
+            aggregate.distribution_queries(self.sql_query, []), [])
+        self.assertEqual(aggregate.run_queries(self.execute, []), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+# Test methods with long descriptive names can omit docstrings
+# pylint: disable=missing-docstring
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from Orange.data import filter, ContinuousVariable, DiscreteVariable, \
+    StringVariable, Domain
+from Orange.data.sql.backend import SQLiteBackend, get_backend
+from Orange.data.sql.table import SqlTable
+from Orange.preprocess.discretize import EqualFreq
+from Orange.statistics.basic_stats import BasicStats
+from Orange.statistics.contingency import get_contingency
+from Orange.statistics.distribution import get_distribution
+
+
+class TestSQLiteTable(unittest.TestCase):
+    def setUp(self):
+        handle, self.database = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("CREATE TABLE iris (sepal REAL, petal REAL, "
+                         "size INTEGER, kind TEXT, name TEXT)")
+            conn.executemany(
+                "INSERT INTO iris VALUES (?, ?, ?, ?, ?)",
+                [(5.1, 1.4, 1, "setosa", "a"),
+                 (4.9, 1.4, 1, "setosa", "b"),
+                 (7.0, 4.7, 2, "versicolor", "c"),
+                 (6.4, None, 2, "versicolor", "d"),
+                 (6.3, 6.0, 3, "virginica", "e")])
+        # with few distinct values, name would be inferred as discrete
+        hints = Domain([], metas=[StringVariable("name")])
+        self.table = SqlTable(self.database, "iris", backend="sqlite",
+                              inspect_values=True, type_hints=hints)
+
+    def tearDown(self):
+        self.table.connection_pool.closeall()
+        os.remove(self.database)
+
+    def test_backend(self):
+        self.assertIsInstance(self.table.backend, SQLiteBackend)
+        self.assertIsInstance(get_backend(SQLiteBackend), SQLiteBackend)
+        self.assertRaises(ValueError, get_backend, "oracle")
+
+    def test_domain(self):
+        sepal, petal, size, kind = self.table.domain.attributes
+        self.assertIsInstance(sepal, ContinuousVariable)
+        self.assertIsInstance(petal, ContinuousVariable)
+        self.assertIsInstance(size, DiscreteVariable)
+        self.assertEqual(size.values, ["1", "2", "3"])
+        self.assertIsInstance(kind, DiscreteVariable)
+        self.assertEqual(kind.values, ["setosa", "versicolor", "virginica"])
+        name, = self.table.domain.metas
+        self.assertIsInstance(name, StringVariable)
+
+    def test_rows(self):
+        self.assertEqual(len(self.table), 5)
+        self.assertEqual(self.table.approx_len(), 5)
+        self.assertEqual(self.table[2]["kind"], "versicolor")
+        self.assertEqual([row["name"] for row in self.table],
+                         list("abcde"))
+        np.testing.assert_almost_equal(self.table.X[:, 0],
+                                       [5.1, 4.9, 7.0, 6.4, 6.3])
+
+    def test_download_data(self):
+        progress = []
+        self.table.download_data(callback=progress.append)
+        self.assertEqual(progress, [1])
+        np.testing.assert_equal(self.table.X[:, 2:],
+                                [[0, 0], [0, 0], [1, 1], [1, 1], [2, 2]])
+        np.testing.assert_equal(self.table.X[3, 1], np.nan)
+        self.assertEqual(list(self.table.metas[:, 0]), list("abcde"))
+        self.assertEqual(self.table.Y.shape, (5, 0))
+
+        table = self.table.copy()
+        table.download_data(3, partial=True)
+        self.assertEqual(table.X.shape, (3, 4))
+
+    def test_download_data_overestimated(self):
+        table = self.table.copy()
+        with patch.object(table.backend, "approx_len", return_value=10 ** 9), \
+                patch("Orange.data.sql.table.DOWNLOAD_BATCH", 2):
+            table.download_data()
+        np.testing.assert_almost_equal(table.X[:, 0],
+                                       [5.1, 4.9, 7.0, 6.4, 6.3])
+        self.assertEqual(list(table.metas[:, 0]), list("abcde"))
+        # capacity grows with the rows that were read, not the estimate
+        self.assertLessEqual(len(table._metas.base), 8)
+
+    def test_download_data_cancel(self):
+        def cancel(_):
+            raise KeyboardInterrupt
+
+        table = self.table.copy()
+        with patch("Orange.data.sql.table.DOWNLOAD_BATCH", 2):
+            self.assertRaises(KeyboardInterrupt, table.download_data,
+                              callback=cancel)
+        self.assertIsNone(table._X)
+
+    def test_basic_stats(self):
+        stats = BasicStats(self.table, "petal")
+        self.assertAlmostEqual(stats.min, 1.4)
+        self.assertAlmostEqual(stats.max, 6.0)
+        self.assertAlmostEqual(stats.mean, 3.375)
+        self.assertEqual(stats.nans, 1)
+        self.assertEqual(stats.non_nans, 4)
+
+    def test_distributions(self):
+        dist = get_distribution(self.table, "kind")
+        np.testing.assert_equal(dist, [2, 2, 1])
+        dist = get_distribution(self.table, "petal")
+        np.testing.assert_almost_equal(dist, [[1.4, 4.7, 6.0], [2, 1, 1]])
+
+    def test_contingency(self):
+        cont = get_contingency(self.table, "size", "kind")
+        np.testing.assert_equal(cont, [[2, 0, 0], [0, 2, 0], [0, 0, 1]])
+
+    def test_unknown_values(self):
+        # values added after the domain was created are not counted
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("INSERT INTO iris VALUES "
+                         "(5.0, 1.0, 4, 'unknown', 'f')")
+        np.testing.assert_equal(get_distribution(self.table, "kind"),
+                                [2, 2, 1])
+        np.testing.assert_equal(get_distribution(self.table, "size"),
+                                [2, 2, 1])
+        cont = get_contingency(self.table, "size", "kind")
+        np.testing.assert_equal(cont, [[2, 0, 0], [0, 2, 0], [0, 0, 1]])
+        cont = get_contingency(self.table, "sepal", "kind")
+        np.testing.assert_equal(cont.values, [4.9, 5.0, 5.1, 6.3, 6.4, 7.0])
+        np.testing.assert_equal(cont.counts, [[1, 0, 1, 0, 0, 0],
+                                              [0, 0, 0, 0, 1, 1],
+                                              [0, 0, 0, 1, 0, 0]])
+
+    def test_filters(self):
+        filtered = filter.SameValue(self.table.domain["kind"],
+                                    "versicolor")(self.table)
+        self.assertEqual(len(filtered), 2)
+        filtered = filter.Values([filter.FilterString(
+            "kind", filter.FilterString.StartsWith, "Set")])(self.table)
+        self.assertEqual(len(filtered), 0)
+        filtered = filter.Values([filter.FilterContinuous(
+            "sepal", filter.FilterContinuous.Greater, 6)])(self.table)
+        self.assertEqual(len(filtered), 3)
+
+    def test_sample(self):
+        self.assertEqual(len(self.table.sample_percentage(100)), 5)
+        self.assertLessEqual(len(self.table.sample_percentage(50)), 5)
+        sample = self.table.sample_time(1, no_cache=True)
+        self.assertEqual(len(sample), 5)
+        self.assertEqual(len(self.table.sample_time(1)), 5)
+        np.testing.assert_almost_equal(sample.X[:, 0],
+                                       [5.1, 4.9, 7.0, 6.4, 6.3])
+
+        # samples are not stored in the database file
+        with sqlite3.connect(self.database) as conn:
+            tables = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table'")
+            self.assertEqual(tables.fetchall(), [("iris", )])
+
+    def test_time_sample_query(self):
+        query = self.table._sql_query(["COUNT(*)"], use_time_sample=1000)
+        with self.table._execute_sql_query(query) as cur:
+            self.assertEqual(cur.fetchone()[0], 5)
+
+    def test_equal_freq_discretization(self):
+        var = EqualFreq(n=2)(self.table, self.table.domain["sepal"])
+        self.assertEqual(var.compute_value.points, [6.3])
+        self.assertEqual(
+            self.table.backend.quantiles(
+                self.table._execute_sql_query, "SELECT * FROM iris",
+                '"petal"', [0, 0.5, 1]),
+            [1.4, 1.4, 6.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# Test methods with long descriptive names can omit docstrings
+# pylint: disable=missing-docstring
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from Orange.data import (
+    Table, Domain, ContinuousVariable, DiscreteVariable, StringVariable)
+from Orange.data.io import BinaryReader
+
+
+class TestBinaryReader(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, "data.otb")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def save_and_read(self, data):
+        data.save(self.filename)
+        return Table(self.filename)
+
+    def test_dense(self):
+        data = Table("zoo")
+        data.W = np.arange(len(data), dtype=float)
+        loaded = self.save_and_read(data)
+
+        self.assertIsInstance(loaded.X, np.memmap)
+        self.assertIsInstance(loaded._Y, np.memmap)
+        self.assertEqual(loaded.domain, data.domain)
+        np.testing.assert_equal(loaded.X, data.X)
+        np.testing.assert_equal(loaded.Y, data.Y)
+        np.testing.assert_equal(loaded.W, data.W)
+        np.testing.assert_equal(loaded.ids, data.ids)
+        self.assertEqual(loaded.metas.tolist(), data.metas.tolist())
+
+    def test_sparse(self):
+        domain = Domain([ContinuousVariable("a{}".format(i))
+                         for i in range(30)])
+        X = sp.random(50, 30, density=0.1, format="csr", random_state=0)
+        loaded = self.save_and_read(Table.from_numpy(domain, X))
+
+        self.assertTrue(sp.isspmatrix_csr(loaded.X))
+        self.assertEqual(loaded.X.indices.dtype, np.int32)
+        for array in (loaded.X.data, loaded.X.indices, loaded.X.indptr):
+            self.assertFalse(array.flags.owndata)
+        np.testing.assert_equal(loaded.X.toarray(), X.toarray())
+
+    def test_string_metas(self):
+        domain = Domain([], metas=[StringVariable("s"),
+                                   ContinuousVariable("c")])
+        metas = np.array([["a", 1], ["", 2], ["čšž", np.nan], [None, 4]],
+                         dtype=object)
+        loaded = self.save_and_read(
+            Table.from_numpy(domain, np.empty((4, 0)), metas=metas))
+        self.assertEqual(loaded.metas[:, 0].tolist(), ["a", "", "čšž", ""])
+        np.testing.assert_equal(loaded.metas[:, 1].astype(float),
+                                [1, 2, np.nan, 4])
+
+    def test_recode_reused_variable(self):
+        DiscreteVariable._clear_cache()
+        var = DiscreteVariable("d", values=["x", "y", "z"])
+        self.save_and_read(Table.from_numpy(
+            Domain([var]), np.array([[0], [1], [2], [np.nan]])))
+
+        DiscreteVariable._clear_cache()
+        existing = DiscreteVariable("d", values=["z", "x", "y"])
+        loaded = Table(self.filename)
+        self.assertIs(loaded.domain[0], existing)
+        np.testing.assert_equal(loaded.X[:, 0], [1, 2, 0, np.nan])
+
+    def test_recode_reused_meta(self):
+        DiscreteVariable._clear_cache()
+        var = DiscreteVariable("d", values=["x", "y", "z"])
+        metas = np.array([[0, "a"], [1, "b"], [2, "c"], [np.nan, "d"]],
+                         dtype=object)
+        self.save_and_read(Table.from_numpy(
+            Domain([], metas=[var, StringVariable("s")]),
+            np.empty((4, 0)), metas=metas))
+
+        DiscreteVariable._clear_cache()
+        existing = DiscreteVariable("d", values=["z", "x", "y"])
+        loaded = Table(self.filename)
+        self.assertIs(loaded.domain.metas[0], existing)
+        np.testing.assert_equal(loaded.metas[:, 0].astype(float),
+                                [1, 2, 0, np.nan])
+        self.assertEqual(loaded.metas[:, 1].tolist(), list("abcd"))
+
+    def test_recode_reused_sparse_variable(self):
+        DiscreteVariable._clear_cache()
+        var = DiscreteVariable("d", values=["a", "b", "c"])
+        cont = ContinuousVariable("e")
+        X = sp.csr_matrix(np.array([[0, 1], [1, 0], [2, 3], [0, 0]]))
+        self.save_and_read(Table.from_numpy(Domain([var, cont]), X))
+
+        DiscreteVariable._clear_cache()
+        DiscreteVariable("d", values=["c", "b", "a"])
+        loaded = Table(self.filename)
+        self.assertTrue(sp.issparse(loaded.X))
+        np.testing.assert_equal(loaded.X.toarray(),
+                                [[2, 1], [1, 0], [0, 3], [2, 0]])
+
+    def test_overwrite_mapped_file(self):
+        data = self.save_and_read(Table("iris"))
+        data.save(self.filename)
+        np.testing.assert_equal(Table(self.filename).X, Table("iris").X)
+
+    def test_invalid_file(self):
+        with open(self.filename, "wb") as f:
+            f.write(b"not a table")
+        self.assertRaises(ValueError, BinaryReader(self.filename).read)
@@ -0,0 +1,123 @@
+# Test methods with long descriptive names can omit docstrings
+# pylint: disable=missing-docstring
+
+import unittest
+from threading import Thread
+
+import numpy as np
+import scipy.sparse as sp
+
+from Orange.data import Table
+from Orange.misc.cache import \
+    LRUCache, lru_cache, content_key, identity_key, nbytes
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache["a"] = 1
+        cache["b"] = 2
+        self.assertEqual(cache["a"], 1)
+        cache["c"] = 3
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertRaises(KeyError, cache.__getitem__, "b")
+        self.assertIsNone(cache.get("b"))
+
+    def test_evicts_by_size(self):
+        cache = LRUCache(maxsize=None, maxbytes=2000)
+        cache["a"] = np.zeros(100)
+        cache["b"] = np.zeros(100)
+        self.assertEqual(cache.currbytes, 1600)
+        cache["c"] = np.zeros(100)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.currbytes, 1600)
+
+        cache["d"] = np.zeros(1000)
+        self.assertNotIn("d", cache)
+        self.assertEqual(len(cache), 2)
+
+        cache.pop("b")
+        self.assertEqual(cache.currbytes, 800)
+
+    def test_discard(self):
+        cache = LRUCache(maxsize=None, maxbytes=2000)
+        cache[("a", 1)] = np.zeros(100)
+        cache[("a", 2)] = np.zeros(100)
+        cache[("b", 1)] = np.zeros(10)
+        cache.discard(lambda key: key[0] == "a")
+        self.assertEqual(list(cache._data), [("b", 1)])
+        self.assertEqual(cache.currbytes, 80)
+
+    def test_info(self):
+        cache = LRUCache(maxsize=10)
+        cache["a"] = 1
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 1, 1))
+        cache.clear()
+        self.assertEqual(cache.info()[:4], (0, 0, 10, 0))
+
+    def test_threads(self):
+        cache = LRUCache(maxsize=50, maxbytes=10000)
+
+        def fill(offset):
+            for i in range(1000):
+                cache[offset + i % 100] = np.zeros(i % 20)
+                cache.get(offset + i % 70)
+
+        threads = [Thread(target=fill, args=(i * 100, )) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.currbytes,
+                         sum(nbytes(cache[key]) for key in list(cache._data)))
+
+
+class TestCacheKeys(unittest.TestCase):
+    def test_identity_key(self):
+        a = np.arange(5)
+        self.assertEqual(identity_key(a, 1, x=2), identity_key(a, 1, x=2))
+        self.assertNotEqual(identity_key(a), identity_key(a.copy()))
+        self.assertNotEqual(identity_key(a, x=1), identity_key(a, x=2))
+
+    def test_content_key(self):
+        a = np.arange(6.)
+        self.assertEqual(content_key(a), content_key(a.copy()))
+        self.assertNotEqual(content_key(a), content_key(a.reshape(2, 3)))
+        self.assertNotEqual(content_key(a), content_key(a.astype(int)))
+        self.assertEqual(content_key(sp.csr_matrix(a)),
+                         content_key(sp.csc_matrix(a)))
+
+        data = Table("iris")
+        self.assertEqual(content_key(data), content_key(Table("iris")))
+        self.assertNotEqual(content_key(data), content_key(data[:100]))
+
+    def test_lru_cache(self):
+        calls = []
+
+        @lru_cache(maxsize=2, key=content_key)
+        def f(x):
+            calls.append(x)
+            return x.sum()
+
+        a, b = np.arange(5), np.arange(6)
+        for _ in range(3):
+            self.assertEqual(f(a), 10)
+            self.assertEqual(f(b), 15)
+        self.assertEqual(f(a.copy()), 10)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(f.cache_info().hits, 5)
+        f.cache_clear()
+        f(a)
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
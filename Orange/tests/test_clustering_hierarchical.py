@@ -2,6 +2,7 @@
 # pylint: disable=missing-docstring
 
 import unittest
+from concurrent.futures import CancelledError
 from itertools import chain, tee
 
 import numpy
@@ -117,6 +118,58 @@ class TestHierarchical(unittest.TestCase):
         self.assertGreater(score_unordered, score_ordered)
         self.assertEqual(score_ordered, 21.0)
 
+    def test_optimal_ordering_is_optimal(self):
+        def orderings(node):
+            if node.is_leaf:
+                yield [node.value.index]
+                return
+            for left in orderings(node.left):
+                for right in orderings(node.right):
+                    yield left + right
+                    yield right + left
+
+        def score(order):
+            return sum(matrix[i, j] for i, j in zip(order, order[1:]))
+
+        random = numpy.random.RandomState(42)
+        for _ in range(5):
+            x = random.random_sample((9, 2))
+            matrix = Orange.misc.DistMatrix(
+                numpy.sqrt(((x[:, None] - x[None, :]) ** 2).sum(axis=2)))
+            for linkage in (hierarchical.SINGLE, hierarchical.AVERAGE):
+                cluster = hierarchical.dist_matrix_clustering(matrix, linkage)
+                best = min(map(score, orderings(cluster)))
+                for m in (matrix, matrix.condensed()):
+                    ordered = hierarchical.optimal_leaf_ordering(cluster, m)
+                    order = [leaf.value.index
+                             for leaf in hierarchical.leaves(ordered)]
+                    self.assertAlmostEqual(score(order), best)
+
+    def test_optimal_ordering_cancel(self):
+        def cancel(progress):
+            if progress > 50:
+                raise CancelledError
+
+        self.assertRaises(
+            CancelledError, hierarchical.optimal_leaf_ordering,
+            self.cluster, self.matrix, progress_callback=cancel)
+
+    def test_condensed_matrix(self):
+        def indices(root):
+            return [leaf.value.index for leaf in hierarchical.leaves(root)]
+
+        condensed = self.matrix.condensed()
+        numpy.testing.assert_equal(hierarchical.condensedform(condensed),
+                                   hierarchical.condensedform(self.matrix))
+        cluster = hierarchical.dist_matrix_clustering(condensed)
+        self.assertEqual(indices(cluster), indices(self.cluster))
+        numpy.testing.assert_equal(
+            hierarchical.dist_matrix_linkage(condensed),
+            hierarchical.dist_matrix_linkage(self.matrix))
+        self.assertEqual(
+            indices(hierarchical.optimal_leaf_ordering(cluster, condensed)),
+            indices(hierarchical.optimal_leaf_ordering(cluster, self.matrix)))
+
 
 class TestTree(unittest.TestCase):
     def test_tree(self):
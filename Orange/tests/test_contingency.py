@@ -251,3 +251,18 @@ class TestDiscrete(unittest.TestCase):
         np.testing.assert_almost_equal(cont, [[3, 0, 0], [0, 2, 0],
                                               [0, 0, 2], [0, 1, 0]])
 
+
+    def test_compute_contingency_weights(self):
+        d = data.Table("zoo")
+        d.W = np.ones(len(d))
+        d.W[:10] = 2
+        d.Y[0] = np.nan
+        (cont, nans), = d._compute_contingency([0], n_jobs=2)[0]
+        expected = np.zeros(cont.shape)
+        for x, y, w in zip(d.X[:, 0], d.Y, d.W):
+            if not np.isnan(y):
+                expected[int(y), int(x)] += w
+        np.testing.assert_almost_equal(cont, expected)
+        np.testing.assert_almost_equal(nans, np.zeros(len(nans)))
+        _, unknown_rows = d._compute_contingency([0])
+        self.assertEqual(unknown_rows, 2)
@@ -2,7 +2,8 @@ import unittest
 
 import numpy as np
 
-from Orange.data.util import scale, one_hot
+from Orange.data import Table, Domain, ContinuousVariable
+from Orange.data.util import scale, one_hot, SharedComputeValue
 
 class TestDataUtil(unittest.TestCase):
     def test_scale(self):
@@ -16,3 +17,39 @@ class TestDataUtil(unittest.TestCase):
                                          [0, 1, 0],
                                          [0, 0, 1],
                                          [0, 1, 0]])
+
+    def test_shared_compute_value(self):
+        class Columns(SharedComputeValue):
+            calls = 0
+
+            def __init__(self, col):
+                self.col = col
+
+            @property
+            def shared_group(self):
+                return Columns
+
+            def compute_shared(self, data):
+                Columns.calls += 1
+                return (data.X if isinstance(data, Table) else data.x) * 2
+
+            def compute(self, data, shared_data):
+                return shared_data[..., self.col]
+
+        data = Table("iris")
+        domain = Domain([ContinuousVariable(str(i), compute_value=Columns(i))
+                         for i in range(4)],
+                        metas=[ContinuousVariable("m",
+                                                  compute_value=Columns(0))])
+        converted = Table(domain, data)
+        self.assertEqual(Columns.calls, 1)
+        np.testing.assert_equal(converted.X, data.X * 2)
+        np.testing.assert_equal(converted.metas[:, 0], data.X[:, 0] * 2)
+
+        Columns.calls = 0
+        inst = domain.convert(data[5])
+        self.assertEqual(Columns.calls, 1)
+        np.testing.assert_equal(inst[0], data.X[5] * 2)
+
+        self.assertEqual(domain[0].compute_value(data).tolist(),
+                         (data.X[:, 0] * 2).tolist())
@@ -14,7 +14,9 @@ from Orange.data import (Table, Domain, ContinuousVariable,
 from Orange.distance import (Euclidean, SpearmanR, SpearmanRAbsolute,
                              PearsonR, PearsonRAbsolute, Manhattan, Cosine,
                              Jaccard, _preprocess, Mahalanobis, MahalanobisDistance)
-from Orange.misc import DistMatrix
+from Orange.distance import NeighborIndex
+from Orange.distance.blocked import pairwise_blocks, condensed_index
+from Orange.misc import DistMatrix, CondensedDistMatrix
 from Orange.tests import named_file, test_filename
 from Orange.util import OrangeDeprecationWarning
 
@@ -51,6 +53,50 @@ class TestDistMatrix(TestCase):
         with self.assertWarns(OrangeDeprecationWarning):
             np.testing.assert_almost_equal(m.X, a9)
 
+    def test_condensed(self):
+        condensed = self.dist.condensed()
+        self.assertIsInstance(condensed, CondensedDistMatrix)
+        self.assertEqual(len(condensed), len(self.iris))
+        self.assertEqual(condensed.shape, self.dist.shape)
+        np.testing.assert_almost_equal(condensed.flat,
+                                       scipy.spatial.distance.pdist(self.iris.X))
+        np.testing.assert_almost_equal(condensed.flat, self.dist.flat)
+        self.assertIs(condensed.row_items, self.iris)
+        np.testing.assert_almost_equal(np.asarray(condensed), self.dist)
+        self.assertIs(condensed.full().row_items, self.iris)
+
+        for i, j in ((0, 0), (3, 7), (7, 3), (149, 0), (-1, 2)):
+            self.assertAlmostEqual(condensed[i, j], self.dist[i, j])
+        self.assertRaises(IndexError, condensed.__getitem__, (0, 150))
+        np.testing.assert_almost_equal(condensed[5], self.dist[5])
+        np.testing.assert_almost_equal(condensed[-1], self.dist[-1])
+        np.testing.assert_almost_equal(condensed[10:20], self.dist[10:20])
+        np.testing.assert_almost_equal(condensed.row(5, [7, 5, 0]),
+                                       self.dist[5, [7, 5, 0]])
+        blocks = list(condensed.row_blocks(max_elements=1000))
+        self.assertEqual([start for start, _ in blocks], list(range(0, 150, 6)))
+        np.testing.assert_almost_equal(np.vstack([b for _, b in blocks]),
+                                       self.dist)
+
+        indices = [4, 2, 9, 3]
+        sub = condensed.submatrix(indices)
+        self.assertIsInstance(sub, CondensedDistMatrix)
+        np.testing.assert_almost_equal(
+            np.asarray(sub), self.dist[np.ix_(indices, indices)])
+        self.assertTrue(tables_equal(sub.row_items, self.iris[indices]))
+        np.testing.assert_almost_equal(
+            condensed.full(indices), self.dist[np.ix_(indices, indices)])
+        sub = condensed.submatrix(indices, [1, 2])
+        self.assertIsInstance(sub, DistMatrix)
+        np.testing.assert_almost_equal(sub, self.dist[np.ix_(indices, [1, 2])])
+
+        unpickled = pickle.loads(pickle.dumps(condensed))
+        np.testing.assert_equal(unpickled.flat, condensed.flat)
+        self.assertEqual(len(unpickled.row_items), len(self.iris))
+
+        self.assertRaises(ValueError, CondensedDistMatrix, np.zeros(4))
+        self.assertEqual(len(CondensedDistMatrix(np.zeros(0))), 1)
+
     def test_from_file(self):
         with named_file(
             """3 axis=0 asymmetric col_labels row_labels
@@ -181,6 +227,62 @@ class TestDistMatrix(TestCase):
                              ["danny", "eve", "frank"])
             self.assertEqual(m.axis, 0)
 
+    def test_save_binary(self):
+        with named_file(
+            """3 axis=0 asymmetric col_labels row_labels
+                         ann	bert	chad
+                danny	0.12	3.45	6.78
+                  eve	9.01	2.34	5.67
+                frank	8.90	1.23	4.56""") as name:
+            m = DistMatrix.from_file(name)
+            for mmap in (False, True):
+                m.save(name, binary=True)
+                m2 = DistMatrix.from_file(name, mmap=mmap)
+                np.testing.assert_equal(m2, m)
+                self.assertEqual([e.metas[0] for e in m2.col_items],
+                                 ["ann", "bert", "chad"])
+                self.assertEqual([e.metas[0] for e in m2.row_items],
+                                 ["danny", "eve", "frank"])
+                self.assertEqual(m2.axis, 0)
+                # changes are not written to the file
+                m2[0, 0] = 42
+                del m2
+                self.assertEqual(DistMatrix.from_file(name)[0, 0], 0.12)
+
+        with named_file("") as name:
+            m = DistMatrix(np.array([[0, 1, 2], [1, 0, 3], [2, 3, 0.]]))
+            m.save(name, binary=True)
+            # symmetric matrices with zero diagonal are stored condensed
+            self.assertEqual(os.path.getsize(name) % 64, 3 * 8)
+            np.testing.assert_equal(DistMatrix.from_file(name), m)
+            c = CondensedDistMatrix.from_file(name, mmap=True)
+            np.testing.assert_equal(c.flat, [1, 2, 3])
+            self.assertIsNone(c.row_items)
+            del c
+            c = DistMatrix.from_file(name, mmap=True)
+            self.assertIsInstance(c, CondensedDistMatrix)
+            self.assertIsInstance(c.flat.base, np.memmap)
+            np.testing.assert_equal(c.full(), m)
+            del c
+
+            m = DistMatrix(np.zeros((0, 0)))
+            m.save(name, binary=True)
+            self.assertEqual(DistMatrix.from_file(name).shape, (0, 0))
+
+    def test_condensed_save(self):
+        labels = Table.from_list(Domain([], metas=[StringVariable("label")]),
+                                 [["a"], ["b"], ["c"], ["d"]])
+        c = CondensedDistMatrix(np.arange(1, 7.), labels, axis=0)
+        with named_file("") as name:
+            for binary in (False, True):
+                c.save(name, binary=binary)
+                c2 = CondensedDistMatrix.from_file(name)
+                np.testing.assert_equal(c2.flat, c.flat)
+                self.assertEqual([e.metas[0] for e in c2.row_items],
+                                 ["a", "b", "c", "d"])
+                self.assertEqual(c2.axis, 0)
+                np.testing.assert_equal(DistMatrix.from_file(name), c.full())
+
 
 class TestEuclidean(TestCase):
     @classmethod
@@ -780,6 +882,116 @@ class TestMahalanobis(TestCase):
         self.assertEqual(mah(x, x).shape, (self.n, self.n))
 
 
+class TestBlocked(TestCase):
+    def setUp(self):
+        self.x = np.random.RandomState(0).rand(23, 4)
+        self.y = np.random.RandomState(1).rand(7, 4)
+
+    def test_pairwise_blocks(self):
+        def metric(a, b=None):
+            return scipy.spatial.distance.cdist(a, a if b is None else b)
+
+        for max_memory in (1, 8 * 23 * 5, 2 ** 20):
+            for n_jobs in (1, 3):
+                np.testing.assert_almost_equal(
+                    pairwise_blocks(metric, self.x,
+                                    max_memory=max_memory, n_jobs=n_jobs),
+                    metric(self.x))
+                np.testing.assert_almost_equal(
+                    pairwise_blocks(metric, self.x, self.y,
+                                    max_memory=max_memory, n_jobs=n_jobs),
+                    metric(self.x, self.y))
+                np.testing.assert_almost_equal(
+                    pairwise_blocks(metric, self.x, condensed=True,
+                                    max_memory=max_memory, n_jobs=n_jobs),
+                    scipy.spatial.distance.pdist(self.x))
+
+    def test_condensed(self):
+        np.testing.assert_almost_equal(Euclidean(self.x, condensed=True),
+                                       scipy.spatial.distance.pdist(self.x))
+        self.assertEqual(condensed_index(23, 2), 22 + 21)
+        self.assertRaises(ValueError, Euclidean, self.x, self.y,
+                          condensed=True)
+
+    def test_out(self):
+        with named_file("") as fname:
+            out = np.memmap(fname, dtype=float, mode="w+", shape=(23, 7))
+            dist = PearsonR(self.x, self.y, out=out)
+            self.assertIsInstance(dist, DistMatrix)
+            np.testing.assert_almost_equal(out, PearsonR(self.x, self.y))
+            del dist, out
+        self.assertRaises(ValueError, PearsonR, self.x, self.y,
+                          out=np.empty((23, 23)))
+
+    def test_small_blocks(self):
+        for dist in (Euclidean, Manhattan, SpearmanR, PearsonRAbsolute):
+            expected = dist(self.x)
+            expected2 = dist(self.x, self.y)
+            dist.max_memory, dist.n_jobs = 8 * 23 * 3, 2
+            try:
+                np.testing.assert_almost_equal(dist(self.x), expected)
+                np.testing.assert_almost_equal(dist(self.x, self.y),
+                                               expected2)
+            finally:
+                del dist.max_memory, dist.n_jobs
+
+
+class TestNeighborIndex(TestCase):
+    def setUp(self):
+        self.x = np.random.RandomState(0).rand(60, 3)
+        self.y = np.random.RandomState(1).rand(7, 3)
+
+    def assert_neighbors(self, index, distance, x, y):
+        dist = distance(y, x)
+        indices, distances = index.query(4, y)
+        self.assertEqual(indices.shape, (7, 4))
+        np.testing.assert_equal(indices, np.argsort(dist, axis=1)[:, :4])
+        np.testing.assert_almost_equal(distances, np.sort(dist, axis=1)[:, :4])
+
+        indices, distances = index.query_radius(0.3, y)
+        for ind, d, row in zip(indices, distances, dist):
+            np.testing.assert_equal(ind, np.argsort(row)[:np.sum(row <= 0.3)])
+            np.testing.assert_almost_equal(d, row[ind])
+
+    def test_query(self):
+        for distance in (Euclidean, Manhattan, Cosine, PearsonR):
+            for n_jobs in (1, 2):
+                index = NeighborIndex(self.x, distance, n_jobs=n_jobs)
+                self.assertEqual(index.use_tree, distance in (Euclidean, Manhattan))
+                self.assert_neighbors(index, distance, self.x, self.y)
+
+    def test_query_self(self):
+        index = NeighborIndex(self.x, Euclidean)
+        dist = Euclidean(self.x)
+        indices, distances = index.query(3)
+        np.testing.assert_equal(indices, np.argsort(dist, axis=1)[:, 1:4])
+        np.testing.assert_almost_equal(distances, np.sort(dist, axis=1)[:, 1:4])
+        indices, _ = index.query_radius(0.2)
+        for i, ind in enumerate(indices):
+            self.assertNotIn(i, ind)
+            self.assertEqual(len(ind), np.sum(dist[i] <= 0.2) - 1)
+
+    def test_append(self):
+        index = NeighborIndex(self.x[:50], Euclidean)
+        index.append(self.x[50:55])
+        self.assertEqual(len(index), 55)
+        self.assert_neighbors(index, Euclidean, self.x[:55], self.y)
+        for i in range(55, 60):
+            index.append(self.x[i])
+        self.assertEqual(len(index), 60)
+        self.assert_neighbors(index, Euclidean, self.x, self.y)
+        index.append(self.x)
+        self.assertEqual(len(index), 120)
+        np.testing.assert_equal(index.X, np.vstack((self.x, self.x)))
+
+    def test_table(self):
+        iris = Table("iris")
+        index = NeighborIndex(iris, Euclidean)
+        indices, distances = index.query(1, iris[:5])
+        np.testing.assert_equal(indices.ravel(), np.arange(5))
+        np.testing.assert_almost_equal(distances, 0)
+
+
 class TestDistances(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -4,10 +4,13 @@
 import unittest
 
 import numpy as np
+from sklearn.metrics import silhouette_samples
 
 import Orange
+from Orange.distance import Euclidean
 from Orange.evaluation.clustering import Silhouette, \
-    AdjustedMutualInfoScore, ClusteringEvaluation, ClusteringResults
+    AdjustedMutualInfoScore, ClusteringEvaluation, ClusteringResults, \
+    distance_silhouette
 from Orange.clustering.kmeans import KMeans
 
 
@@ -31,3 +34,17 @@ class TestClusteringEvaluation(unittest.TestCase):
         expected = [0.51936073,  0.74837231,  0.59178896]
         np.testing.assert_almost_equal(AdjustedMutualInfoScore(cr),
                                        expected, decimal=2)
+
+    def test_distance_silhouette(self):
+        table = Orange.data.Table('iris')
+        labels = table.Y.copy()
+        labels[0] = 5  # a singleton cluster
+        dist = Euclidean(table)
+        expected = silhouette_samples(np.asarray(dist), labels,
+                                      metric="precomputed")
+        expected[0] = 0
+        np.testing.assert_almost_equal(
+            distance_silhouette(dist, labels, max_elements=1000), expected)
+        np.testing.assert_almost_equal(
+            distance_silhouette(dist.condensed(), labels, max_elements=1000),
+            expected)
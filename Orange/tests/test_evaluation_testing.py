@@ -76,6 +76,25 @@ class TestSampling(unittest.TestCase):
                preprocessor=preprocessor)
         self.assertEqual(data_sizes, expected_sizes)
 
+    def run_test_parallel(self, method, data, **kwargs):
+        def fails(_):
+            raise SystemError("failing learner")
+
+        learners = [NaiveBayesLearner(), fails, MajorityLearner()]
+        serial = method(data, learners, store_models=True, **kwargs)
+        progress = []
+        parallel = method(data, learners, store_models=True, n_jobs=2,
+                          callback=progress.append, **kwargs)
+        self.assertIsInstance(parallel.failed[1], SystemError)
+        for i in (0, 2):
+            self.assertFalse(parallel.failed[i])
+            np.testing.assert_equal(parallel.predicted[i], serial.predicted[i])
+            np.testing.assert_equal(parallel.probabilities[i],
+                                    serial.probabilities[i])
+        self.assertEqual(parallel.models.shape, serial.models.shape)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1)
+
     def check_folds(self, result, folds_count, rows):
         self.assertEqual(len(result.folds), folds_count)
         fold_size = rows / folds_count
@@ -193,6 +212,9 @@ class TestCrossValidation(TestSampling):
     def test_preprocessor(self):
         self.run_test_preprocessor(CrossValidation, [135] * 10)
 
+    def test_parallel(self):
+        self.run_test_parallel(CrossValidation, self.iris, k=5)
+
     def test_augmented_data_classification(self):
         data = Table("iris")
         n_classes = len(data.domain.class_var.values)
@@ -320,6 +342,9 @@ class TestLeaveOneOut(TestSampling):
     def test_preprocessor(self):
         self.run_test_preprocessor(LeaveOneOut, [149] * 150)
 
+    def test_parallel(self):
+        self.run_test_parallel(LeaveOneOut, self.iris[::5])
+
 
 class TestTestOnTrainingData(TestSampling):
     def test_results(self):
@@ -570,3 +595,6 @@ class TestShuffleSplit(TestSampling):
             strata_samples.append(np.count_nonzero(train < 2 * n) == n)
 
         self.assertTrue(not all(strata_samples))
+
+    def test_parallel(self):
+        self.run_test_parallel(ShuffleSplit, self.iris, n_resamples=4)
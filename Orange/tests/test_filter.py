@@ -9,8 +9,9 @@ import numpy as np
 
 from Orange.data import Table, Domain, ContinuousVariable
 from Orange.data.filter import \
-    FilterContinuous, FilterDiscrete, FilterString, Values, HasClass, \
-    IsDefined, SameValue
+    FilterContinuous, FilterDiscrete, FilterString, FilterStringList, \
+    FilterRegex, Values, HasClass, IsDefined, SameValue
+from Orange.data import filter_index
 
 NIMOCK = MagicMock(side_effect=NotImplementedError())
 
@@ -38,6 +39,93 @@ class TestFilterValues(unittest.TestCase):
                           (self.iris.Y == 2)).sum())
 
 
+@patch.object(filter_index, "SAMPLE_SIZE", 5)
+@patch.object(filter_index, "INDEX_MIN_ROWS", 1)
+class TestFilterIndex(unittest.TestCase):
+    def setUp(self):
+        self.zoo = Table('zoo')
+        domain = self.zoo.domain
+        legs, type_, name = domain["legs"], domain["type"], domain["name"]
+        self.filters = [
+            FilterContinuous(legs, FilterContinuous.Between, 2, 4),
+            FilterContinuous(legs, FilterContinuous.Greater, 2),
+            FilterContinuous(legs, FilterContinuous.LessEqual, 0),
+            FilterContinuous(legs, FilterContinuous.Outside, 1, 4),
+            FilterDiscrete(type_, ["mammal", "fish"]),
+            FilterDiscrete(domain["hair"], None),
+            FilterStringList(name, ["GIRL", "bear", "frog"],
+                             case_sensitive=False),
+            FilterStringList(name, ["girl", "Bear"]),
+            FilterRegex(name, "^c"),
+            FilterString(name, FilterString.StartsWith, "b")]
+
+    def assertSameSelection(self, filter_):
+        actual = filter_(self.zoo)
+        # conditions evaluated on columns, in the given order, without indices
+        with patch.object(filter_index, "INDEX_MIN_ROWS", len(self.zoo) + 1), \
+                patch.object(filter_index, "SAMPLE_SIZE", len(self.zoo)):
+            expected = filter_(self.zoo)
+        np.testing.assert_equal(actual.ids, expected.ids)
+
+    def test_conditions(self):
+        for f in self.filters:
+            self.assertSameSelection(Values([f]))
+            self.assertSameSelection(Values([f], negate=True))
+
+    def test_combinations(self):
+        for f1, f2, f3 in itertools.combinations(self.filters, 3):
+            for conjunction in (True, False):
+                self.assertSameSelection(
+                    Values([f1, f2, f3], conjunction=conjunction))
+                self.assertSameSelection(
+                    Values([Values([f1, f2], conjunction=conjunction,
+                                   negate=True), f3],
+                           conjunction=not conjunction))
+
+    def test_index_invalidated(self):
+        f = Values([self.filters[0], self.filters[4]])
+        self.assertSameSelection(f)
+        self.zoo.X[:, self.zoo.domain.index("legs")] = 4
+        self.zoo.Y[:] = self.zoo.domain.class_var.to_val("fish")
+        self.assertSameSelection(f)
+        self.assertEqual(len(f(self.zoo)), len(self.zoo))
+
+        self.zoo[0]["legs"] = 0
+        self.assertEqual(len(f(self.zoo)), len(self.zoo) - 1)
+
+    def test_index_reused(self):
+        f = Values([self.filters[0]])
+        f(self.zoo)
+        with patch.object(filter_index, "SortedIndex") as index:
+            f(self.zoo)
+            index.assert_not_called()
+            self.zoo.X[0, self.zoo.domain.index("legs")] += 1
+            f(self.zoo)
+            index.assert_called_once()
+
+    def test_index_changed_in_place(self):
+        table = Table.from_numpy(Domain([ContinuousVariable("x")]),
+                                 np.arange(20000, dtype=float)[:, None])
+        f = Values([FilterContinuous(0, FilterContinuous.Less, 10)])
+        with patch.object(filter_index, "INDEX_MIN_ROWS", 10000):
+            self.assertEqual(len(f(table)), 10)
+            table.X[:, 0] = 0
+            self.assertEqual(len(f(table)), len(table))
+
+    def test_sorted_index(self):
+        index = filter_index.SortedIndex(np.array([3, np.nan, 1, 2, 2]))
+        np.testing.assert_equal(index.range(2, 3), [0, 3, 4])
+        np.testing.assert_equal(index.range(2, 3, False, False), [])
+        np.testing.assert_equal(index.range(None, 2, True, False), [2])
+        np.testing.assert_equal(index.range(1), [0, 2, 3, 4])
+
+    def test_value_index(self):
+        index = filter_index.ValueIndex(
+            np.array(["a", "B", "b", "c"], dtype=object), lower=True)
+        np.testing.assert_equal(index.lookup(["b", "c", "d"]), [1, 2, 3])
+        np.testing.assert_equal(index.lookup(["d"]), [])
+
+
 class TestIsDefinedFilter(unittest.TestCase):
     def setUp(self):
         self.table = Table('imports-85')
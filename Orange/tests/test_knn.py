@@ -7,7 +7,9 @@ import numpy as np
 
 from Orange.data import Table, Domain, ContinuousVariable, DiscreteVariable
 from Orange.classification import KNNLearner
+from Orange.distance import Euclidean, Manhattan
 from Orange.evaluation import CA, CrossValidation
+from Orange.regression import KNNRegressionLearner
 
 
 class TestKNNLearner(unittest.TestCase):
@@ -48,3 +50,31 @@ class TestKNNLearner(unittest.TestCase):
         ca = sum(correct)/len(correct)
         self.assertGreater(ca, 0.1)
         self.assertLess(ca, 0.3)
+
+    def test_distance_metric(self):
+        rs = np.random.RandomState(0)
+        domain = Domain([ContinuousVariable(str(i)) for i in range(4)],
+                        DiscreteVariable("y", values="abc"))
+        data = Table(domain, rs.rand(100, 4), rs.randint(3, size=100))
+        test = rs.rand(20, 4)
+        for metric, skl_metric in ((Euclidean, "euclidean"),
+                                   (Manhattan, "manhattan")):
+            for weights in ("uniform", "distance"):
+                orange_model = KNNLearner(metric=metric, weights=weights)(data)
+                skl_model = KNNLearner(metric=skl_metric,
+                                       weights=weights)(data)
+                np.testing.assert_almost_equal(
+                    orange_model(test, orange_model.Probs),
+                    skl_model(test, skl_model.Probs))
+
+    def test_regression_distance_metric(self):
+        rs = np.random.RandomState(0)
+        domain = Domain([ContinuousVariable(str(i)) for i in range(4)],
+                        ContinuousVariable("y"))
+        data = Table(domain, rs.rand(100, 4), rs.rand(100))
+        for weights in ("uniform", "distance"):
+            orange_model = KNNRegressionLearner(
+                metric=Euclidean, weights=weights)(data)
+            skl_model = KNNRegressionLearner(weights=weights)(data)
+            np.testing.assert_almost_equal(orange_model(data[:20]),
+                                           skl_model(data[:20]))
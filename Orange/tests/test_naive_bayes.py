@@ -1,8 +1,12 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import pickle
 import unittest
 
+import numpy as np
+import scipy.sparse as sp
+
 from Orange.classification import NaiveBayesLearner
 from Orange.data import Table
 from Orange.evaluation import CrossValidation, CA
@@ -35,3 +39,34 @@ class TestNaiveBayesLearner(unittest.TestCase):
         X = self.table.X[::20]
         self.model(X)
         vals, probs = self.model(X, self.model.ValueProbs)
+
+    def test_predict_missing_and_sparse(self):
+        data = Table(self.model.domain, self.table)
+        data.X[::3, 0] = np.nan
+        probs = self.model(data, self.model.Probs)
+
+        # Unknown values are skipped, as if the attribute were not there
+        n_cls = len(self.model.class_freq)
+        for row, x in zip(probs, data.X):
+            log_prob = np.log(self.model.class_prob).copy()
+            for val, c in zip(x, self.model.cont):
+                if not np.isnan(val):
+                    log_prob += np.log((c[:, int(val)] + 1) /
+                                       (self.model.class_freq + c.shape[1]))
+            expected = np.exp(log_prob)
+            np.testing.assert_almost_equal(row, expected / expected.sum())
+        self.assertEqual(probs.shape, (len(data), n_cls))
+
+        sparse = Table.from_numpy(data.domain, sp.csr_matrix(data.X), data.Y)
+        np.testing.assert_almost_equal(
+            self.model(sparse, self.model.Probs), probs)
+
+    def test_unpickle_old_model(self):
+        # models pickled before log_cont_prob was added
+        state = self.model.__dict__.copy()
+        del state["log_cont_prob"]
+        model = pickle.loads(pickle.dumps(self.model))
+        model.__dict__ = {}
+        model.__setstate__(state)
+        np.testing.assert_almost_equal(model(self.table, model.Probs),
+                                       self.model(self.table, model.Probs))
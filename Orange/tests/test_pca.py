@@ -1,12 +1,14 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import gc
 import unittest
 import pickle
 import numpy as np
 
 from Orange.preprocess import Continuize, Normalize
 from Orange.projection import PCA, SparsePCA, RandomizedPCA, IncrementalPCA
+from Orange.projection import base
 from Orange.data import Table
 
 
@@ -96,6 +98,31 @@ class TestPCA(unittest.TestCase):
         np.testing.assert_almost_equal(pca_iris.X, pca_iris3.X)
         np.testing.assert_equal(pca_iris.Y, pca_iris3.Y)
 
+    def test_transform_cache(self):
+        pca = PCA(n_components=2)(self.iris)
+        X = self.iris.X
+        transformed = pca.transform(X)
+        self.assertIs(pca.transform(X), transformed)
+        self.assertIs(pca.transform(X.copy()), transformed)
+        self.assertIsNot(PCA(n_components=2)(self.iris).transform(X),
+                         transformed)
+
+        X = X.copy()
+        X[0, 0] += 1
+        self.assertIsNot(pca.transform(X), transformed)
+
+        pca2 = pickle.loads(pickle.dumps(pca))
+        np.testing.assert_almost_equal(pca2.transform(self.iris.X),
+                                       transformed)
+
+        token = pca._token
+        self.assertTrue(any(key[0] is token
+                            for key in base._transform.cache._data))
+        del pca
+        gc.collect()
+        self.assertFalse(any(key[0] is token
+                             for key in base._transform.cache._data))
+
     def test_transformed_domain_does_not_pickle_data(self):
         iris = self.iris
         pca = PCA(n_components=2)(iris)
@@ -103,7 +130,11 @@ class TestPCA(unittest.TestCase):
         pca_iris2 = Table(pca_iris.domain, iris)
 
         pca_iris2 = pickle.loads(pickle.dumps(pca_iris))
-        self.assertIsNone(pca_iris2.domain[0].compute_value.transformed)
+        compute_value = pca_iris2.domain[0].compute_value
+        for obj in (compute_value, compute_value.projection):
+            self.assertFalse(any(
+                isinstance(value, np.ndarray) and len(value) == len(iris)
+                for value in vars(obj).values()))
 
     def test_chain(self):
         zoo_c = Continuize(self.zoo)
@@ -1,14 +1,18 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import gc
 import unittest
+import weakref
+from unittest.mock import patch
 
 import numpy as np
 
 from Orange.data import Table, Domain, DiscreteVariable
 from Orange import preprocess
 from Orange.preprocess.score import InfoGain, GainRatio, Gini, Chi2, ANOVA,\
-    UnivariateLinearRegression, ReliefF, FCBF, RReliefF
+    UnivariateLinearRegression, ReliefF, FCBF, RReliefF, \
+    ClassificationScorer, _symmetrical_uncertainties
 
 
 class FeatureScoringTest(unittest.TestCase):
@@ -38,6 +42,69 @@ class FeatureScoringTest(unittest.TestCase):
         np.testing.assert_almost_equal([scorer(self.zoo, a) for a in range(5)],
                                        correct, decimal=5)
 
+    def test_score_all(self):
+        for scorer in (InfoGain(), GainRatio(), Gini()):
+            np.testing.assert_almost_equal(
+                scorer.score_all(self.zoo),
+                [scorer(self.zoo, a) for a in self.zoo.domain.attributes])
+
+        data = Table.from_table(
+            Domain(self.adult.domain.attributes[:6],
+                   self.adult.domain.class_var), self.adult)
+        scores = ANOVA().score_all(data)
+        for attr, score in zip(data.domain.attributes, scores):
+            if attr.is_continuous:
+                self.assertAlmostEqual(score, ANOVA(data, attr))
+            else:
+                self.assertTrue(np.isnan(score))
+
+    def test_discretize_once(self):
+        data = self.adult[:100]
+        discretize = InfoGain.preprocessors[-1]
+        with patch.object(type(discretize), "__call__", autospec=True,
+                          side_effect=discretize.__class__.__call__) as call:
+            InfoGain(data)
+            GainRatio(data)
+            Gini(data)
+            self.assertEqual(call.call_count, 1)
+
+            data.X[0, 0] = 1 - data.X[0, 0]
+            Gini(data)
+            self.assertEqual(call.call_count, 2)
+
+        ref = weakref.ref(data)
+        del data
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_symmetrical_uncertainties(self):
+        from Orange.preprocess._relieff import contingency_table
+        np.random.seed(42)
+        X = np.random.randint(4, size=(50, 3)).astype(float)
+        X[np.random.random(X.shape) < 0.1] = np.nan
+        y = np.random.randint(3, size=50).astype(float)
+        su = _symmetrical_uncertainties(X, y)
+        for x, score in zip(X.T, su):
+            cont = contingency_table(x, y)
+            ig = InfoGain().from_contingency(cont, 1)
+            value_entropy = InfoGain().from_contingency(
+                np.diag(cont.sum(0)), 1)
+            class_entropy = InfoGain().from_contingency(
+                np.diag(cont.sum(1)), 1)
+            self.assertAlmostEqual(score,
+                                   2 * ig / (value_entropy + class_entropy))
+
+    def test_from_contingency_only(self):
+        class Entropy(ClassificationScorer):
+            def from_contingency(self, cont, nan_adjustment):
+                return InfoGain().from_contingency(cont, nan_adjustment)
+
+        np.testing.assert_almost_equal(Entropy().score_all(self.zoo),
+                                       InfoGain().score_all(self.zoo))
+        self.assertAlmostEqual(Entropy(self.zoo, 0), InfoGain(self.zoo, 0))
+        with self.assertRaises(NotImplementedError):
+            ClassificationScorer().from_contingency(np.ones((2, 2)), 1)
+
     def test_classless(self):
         classless = Table(Domain(self.zoo.domain.attributes),
                           self.zoo[:, 0:-1])
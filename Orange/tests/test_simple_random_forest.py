@@ -26,6 +26,21 @@ class TestSimpleRandomForestLearner(unittest.TestCase):
         p = clf(data)
         self.assertEqual(p.shape, (len(data),))
 
+    def test_SimpleRandomForest_n_jobs(self):
+        data = Orange.data.Table('iris')
+        serial = SimpRandForestCls(n_estimators=8)(data)
+        parallel = SimpRandForestCls(n_estimators=8, n_jobs=3)(data)
+        self.assertEqual([t.dumps_tree(t.node) for t in serial.estimators_],
+                         [t.dumps_tree(t.node) for t in parallel.estimators_])
+        np.testing.assert_almost_equal(
+            parallel(data, parallel.Probs),
+            np.mean([t(data, t.Probs) for t in serial.estimators_], axis=0))
+
+        data = Orange.data.Table('housing')
+        reg = SimpRandForestReg(n_estimators=8, n_jobs=-1)(data)
+        np.testing.assert_almost_equal(
+            reg(data), np.mean([t(data) for t in reg.estimators_], axis=0))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,10 @@
 import unittest
+
 import numpy as np
+import scipy.sparse as sp
 
-from Orange.statistics.util import bincount, countnans, contingency, stats
+from Orange.statistics.util import bincount, countnans, contingency, stats, \
+    discrete_contingencies, continuous_contingencies
 
 
 class TestUtil(unittest.TestCase):
@@ -27,6 +30,81 @@ class TestUtil(unittest.TestCase):
                                              [0, 0, 0]])
         np.testing.assert_equal(nans, [1, 0, 0])
 
+    def test_weighted_contingency(self):
+        x = np.array([0, 1, 0, 2, np.nan])
+        y = np.array([0, 0, 1, 1, 0])
+        w = np.array([1, 2, 3, 4, 5])
+        cont_table, nans = contingency(x, y, 2, 1, w)
+        np.testing.assert_equal(cont_table, [[1, 2, 0],
+                                             [3, 0, 4]])
+        np.testing.assert_equal(nans, [5, 0])
+
+    def test_discrete_contingencies(self):
+        X = np.array([[0, 1, np.nan],
+                      [1, 1, 2],
+                      [0, np.nan, 0],
+                      [1, 0, 2],
+                      [0, 1, 1]])
+        y = np.array([0, 1, 1, 0, 1])
+        w = np.array([1, 2, 3, 4, 5])
+        for weights in (None, w):
+            expected = [contingency(X[:, i], y, n - 1, 1, weights)
+                        for i, n in enumerate((2, 2, 3))]
+            for data in (X, sp.csr_matrix(np.nan_to_num(X))):
+                if sp.issparse(data):
+                    expected = [contingency(np.nan_to_num(X[:, i]), y, n - 1,
+                                            1, weights)
+                                for i, n in enumerate((2, 2, 3))]
+                for n_jobs in (1, 2):
+                    conts = discrete_contingencies(
+                        data, y, (2, 2, 3), 2, weights, n_jobs)
+                    self.assertEqual(len(conts), 3)
+                    for (cont, nans), (exp_cont, exp_nans) in \
+                            zip(conts, expected):
+                        np.testing.assert_equal(cont, exp_cont)
+                        np.testing.assert_equal(nans, exp_nans)
+
+    def test_contingencies_out_of_range(self):
+        X = np.array([[0, 1.5], [2, 0.5]])
+        y = np.array([0, 1])
+        self.assertRaises(ValueError, discrete_contingencies,
+                          X[:, :1], y, (2, ), 2)
+        self.assertRaises(ValueError, discrete_contingencies,
+                          -X[:, :1] - 1, y, (3, ), 2)
+        self.assertRaises(ValueError, discrete_contingencies,
+                          sp.csr_matrix(X[:, :1]), y, (2, ), 2)
+        self.assertRaises(ValueError, discrete_contingencies,
+                          X[:, :1], y, (3, ), 1)
+        self.assertRaises(ValueError, continuous_contingencies,
+                          X, y - 1, 2)
+        self.assertRaises(ValueError, continuous_contingencies,
+                          sp.csr_matrix(X), y, 1)
+
+    def test_continuous_contingencies(self):
+        X = np.array([[1.5, 0],
+                      [0.5, np.nan],
+                      [1.5, 2],
+                      [np.nan, 2],
+                      [0.5, 2]])
+        y = np.array([0, 1, 1, 0, 1])
+        w = np.array([1, 2, 3, 4, 5])
+        (vals1, cont1, nans1), (vals2, cont2, nans2) = \
+            continuous_contingencies(X, y, 2, w, n_jobs=2)
+        np.testing.assert_equal(vals1, [0.5, 1.5])
+        np.testing.assert_equal(cont1, [[0, 1], [7, 3]])
+        np.testing.assert_equal(nans1, [4, 0])
+        np.testing.assert_equal(vals2, [0, 2])
+        np.testing.assert_equal(cont2, [[1, 4], [0, 8]])
+        np.testing.assert_equal(nans2, [0, 2])
+
+        # only stored values of sparse matrices are counted
+        (vals1, cont1, _), (vals2, cont2, _) = continuous_contingencies(
+            sp.csr_matrix(np.nan_to_num(X)), y, 2)
+        np.testing.assert_equal(vals1, [0.5, 1.5])
+        np.testing.assert_equal(cont1, [[0, 1], [2, 1]])
+        np.testing.assert_equal(vals2, [2])
+        np.testing.assert_equal(cont2, [[1], [2]])
+
     def test_stats(self):
         X = np.arange(4).reshape(2, 2).astype(float)
         X[1, 1] = np.nan
@@ -152,3 +152,37 @@ class TestTabReader(unittest.TestCase):
         table = Table(path.join(tempdir, "out.tab"))
         self.assertEqual(table.attributes[1], "test")
         shutil.rmtree(tempdir)
+
+    def test_read_chunks(self):
+        tempdir = tempfile.mkdtemp()
+        filename = path.join(tempdir, "chunks.tab")
+        with open(filename, "wt") as f:
+            f.write("x\tcolor\tname\n")
+            f.write("c\td\ts\n")
+            f.write("\tclass\t\n")
+            for i, color in enumerate("rgrgrbgyb"):
+                f.write("{}\t{}\tn{}\n".format(i, color, i))
+        try:
+            chunks = list(Table.from_file(filename, chunksize=2, sample_size=4))
+        finally:
+            shutil.rmtree(tempdir)
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 2, 2, 1])
+        domain = chunks[0].domain
+        self.assertTrue(all(chunk.domain is domain for chunk in chunks))
+        # values, not present in the sample, are appended
+        self.assertEqual(domain.class_var.values, ["g", "r", "b", "y"])
+        np.testing.assert_equal(np.hstack([chunk.X[:, 0] for chunk in chunks]),
+                                np.arange(9))
+        self.assertEqual(
+            "".join(domain.class_var.values[int(y)]
+                    for chunk in chunks for y in chunk.Y),
+            "rgrgrbgyb")
+        self.assertEqual(chunks[-1].metas[0, 0], "n8")
+
+    def test_read_chunks_matches_table(self):
+        table = Table("iris")
+        chunks = list(Table.from_file("iris", chunksize=40))
+        self.assertEqual([len(chunk) for chunk in chunks], [40, 40, 40, 30])
+        np.testing.assert_equal(np.vstack([chunk.X for chunk in chunks]),
+                                table.X)
@@ -2,6 +2,7 @@
 # pylint: disable=missing-docstring
 
 import os
+import pickle
 import unittest
 from itertools import chain
 from math import isnan
@@ -496,6 +497,13 @@ class TableTestCase(unittest.TestCase):
         self.assertNotEqual(crc1, crc5)
         self.assertEqual(crc1, crc6)
 
+    def test_checksum_sparse(self):
+        d = data.Table("iris")
+        d.X = csr_matrix(d.X)
+        crc1 = d.checksum()
+        d.X.data[0] += 1
+        self.assertNotEqual(d.checksum(), crc1)
+
     def test_total_weight(self):
         d = data.Table("zoo")
         self.assertEqual(d.total_weight(), len(d))
@@ -618,9 +626,14 @@ class TableTestCase(unittest.TestCase):
         for i in range(5):
             self.assertEqual(d[i], d[-5 + i])
 
+        # views of the table itself are copied before the table grows
         x = d[:5]
-        with self.assertRaises(ValueError):
-            d.extend(x)
+        d.extend(x)
+        for i in range(5):
+            self.assertEqual(d[i], d[-5 + i])
+        d.extend(d)
+        self.assertEqual(len(d), 2 * (len(x) + 155))
+        self.assertEqual(d[0], d[len(d) // 2])
 
         y = d[:2, 1]
         x.ensure_copy()
@@ -628,6 +641,76 @@ class TableTestCase(unittest.TestCase):
         np.testing.assert_almost_equal(x[-2:, 1].X, y.X)
         self.assertEqual(np.isnan(x).sum(), 8)
 
+    def test_extend_by_rows(self):
+        d = data.Table("iris")
+        x = data.Table.from_domain(d.domain)
+        x.extend(d[:1])
+        view = x[:1]
+        for i in range(1, len(d)):
+            x.extend(d[i:i + 1])
+        self.assertLess(len(x._buffers[0]), 2 * len(d))
+        np.testing.assert_equal(x.X, d.X)
+        np.testing.assert_equal(x.ids, d.ids)
+        np.testing.assert_equal(view.X, d.X[:1])
+        self.assertTrue(x.is_copy())
+        self.assertFalse(x.is_view())
+
+        x2 = pickle.loads(pickle.dumps(x))
+        self.assertIsNone(x2._buffers)
+        np.testing.assert_equal(x2.X, x.X)
+
+    def test_extend_other_domain(self):
+        d = data.Table("iris")
+        domain = data.Domain(d.domain.attributes[2:], d.domain.class_var)
+        x = data.Table.from_domain(domain)
+        x.extend(d)
+        np.testing.assert_equal(x.X, d.X[:, 2:])
+        np.testing.assert_equal(x.Y, d.Y)
+        np.testing.assert_equal(x.ids, d.ids)
+
+    def test_insert_row_of_same_table(self):
+        d = data.Table("iris")
+        for _ in range(3):
+            d.append(d[0])
+        expected = list(d[5])
+        d.insert(0, d[5])
+        self.assertEqual(list(d[0]), expected)
+        self.assertEqual(list(d[6]), expected)
+
+    def test_insert_does_not_change_shared_arrays(self):
+        d = data.Table("iris")
+        d.append(d[0])
+        head = d[:5]
+        shared = data.Table.from_table(d.domain, d)
+        expected_head, expected_shared = head.X.copy(), shared.X.copy()
+        d.insert(1, d[100])
+        np.testing.assert_equal(head.X, expected_head)
+        np.testing.assert_equal(shared.X, expected_shared)
+        np.testing.assert_equal(d.X[1], d.X[101])
+        np.testing.assert_equal(d.X[2:], expected_shared[1:])
+
+    def test_table_builder(self):
+        d = data.Table("iris")
+        builder = data.TableBuilder(d.domain, weights=True)
+        for i, inst in enumerate(d):
+            builder.append(inst, weight=i)
+        builder.append([1, 2, 3, 4, "Iris-setosa"])
+        self.assertEqual(len(builder), len(d) + 1)
+        table = builder.build()
+        self.assertEqual(len(builder), 0)
+        self.assertIsNone(table._buffers)
+        self.assertEqual(table.X.shape, (len(d) + 1, 4))
+        np.testing.assert_equal(table.X[:-1], d.X)
+        np.testing.assert_equal(table.W[:-1], np.arange(len(d)))
+        self.assertEqual(table.W[-1], 1)
+        np.testing.assert_equal(table.ids[:-1], d.ids)
+        self.assertNotIn(table.ids[-1], d.ids)
+        self.assertEqual(list(table[-1]), [1, 2, 3, 4, 0])
+        self.assertEqual(table[-1][4], "Iris-setosa")
+
+        builder = data.TableBuilder(d.domain)
+        self.assertRaises(ValueError, builder.append, d[0], weight=2)
+
     def test_extend2(self):
         d = data.Table("test3")
         d.extend([[None] * 3,
@@ -1,13 +1,19 @@
 # Test methods with long descriptive names can omit docstrings
 # pylint: disable=missing-docstring
 
+import csv
 import unittest
+from unittest.mock import patch
+from io import StringIO
 from tempfile import NamedTemporaryFile
+import locale
 import os
 import warnings
 
+import numpy as np
+
 from Orange.data import Table, ContinuousVariable, DiscreteVariable
-from Orange.data.io import CSVReader
+from Orange.data.io import CSVReader, _CsvTokens
 from Orange.tests import test_filename
 
 tab_file = """\
@@ -32,6 +38,16 @@ csv_file_nh = """\
 2.0,      42,        7
 """
 
+quoted_file = '''\
+a,b,c,d
+1.5,"x, y",?,2016-01-01
+,"say ""hi""",3,2016-01-02
+2,x,NA,
+-1e3,  "x, y"  ,.,2016-01-04
+
+7,z,1,2016-01-05
+'''
+
 noncont_marked_cont = '''\
 a,b
 d,c
@@ -85,3 +101,61 @@ class TestTabReader(unittest.TestCase):
         with self.assertRaises(ValueError) as cm:
             table = CSVReader(file.name).read()
         self.assertIn('line 5, column 2', cm.exception.args[0])
+
+    def test_native_reader_matches_csv_module(self):
+        file = NamedTemporaryFile("wt", delete=False, suffix=".csv")
+        file.write(quoted_file)
+        file.close()
+        try:
+            reader = CSVReader(file.name)
+            native = reader.read()
+            DiscreteVariable._clear_cache()
+            expected = reader._read_csv(file.name)
+        finally:
+            os.remove(file.name)
+
+        self.assertEqual([repr(var) for var in native.domain.variables +
+                          native.domain.metas],
+                         [repr(var) for var in expected.domain.variables +
+                          expected.domain.metas])
+        np.testing.assert_equal(native.X, expected.X)
+        np.testing.assert_equal(native.Y, expected.Y)
+        self.assertEqual(native.metas.tolist(), expected.metas.tolist())
+        self.assertEqual(set(native.get_column_view("b")[0]),
+                         {"x", "x, y", 'say "hi"', "z"})
+
+    def test_native_reader_ignores_locale(self):
+        old_locale = locale.setlocale(locale.LC_NUMERIC)
+        for name in ("de_DE.UTF-8", "de_DE.utf8", "fr_FR.UTF-8", "sl_SI.UTF-8"):
+            try:
+                locale.setlocale(locale.LC_NUMERIC, name)
+                break
+            except locale.Error:
+                pass
+        else:
+            self.skipTest("no locale with a decimal comma")
+        file = NamedTemporaryFile("wt", delete=False, suffix=".csv")
+        file.write("a;b\n1.5;2,5\n-0.25;3,5\n4;2,5\n")
+        file.close()
+        try:
+            self.assertEqual(locale.localeconv()["decimal_point"], ",")
+            table = CSVReader(file.name).read()
+        finally:
+            locale.setlocale(locale.LC_NUMERIC, old_locale)
+            os.remove(file.name)
+        np.testing.assert_equal(table.X[:, 0], [1.5, -0.25, 4])
+        self.assertIsInstance(table.domain["b"], DiscreteVariable)
+
+    def test_native_reader_chunks(self):
+        text = ('a,b\r\n1,"x\r\ny"\r\n"2\n,3",z\r\n'
+                '4,"\n\n\n\n\n\n"\r\n,\r\n5,""""\r\n')
+        dialect = csv.excel()
+        dialect.skipinitialspace = True
+        expected = list(csv.reader(StringIO(text, newline=''), dialect))
+        for chunk_size in (1, 2, 3, 5, 8, 1 << 22):
+            with patch.object(_CsvTokens, "CHUNK_SIZE", chunk_size):
+                tokens = _CsvTokens(text.encode(), "ascii", dialect, 3)
+            self.assertEqual(
+                [tokens.record(row) for row in range(tokens.n_records)],
+                expected)
+            np.testing.assert_equal(tokens.nonempty, [1, 1, 1, 1, 0, 1])
@@ -0,0 +1,11 @@
+
+# THIS FILE IS GENERATED FROM ORANGE SETUP.PY
+short_version = '3.3.7'
+version = '3.3.7'
+full_version = '3.3.7.dev0+032ec5c'
+git_revision = '032ec5c84cf4d1d27014c6fbe8e86da7d51f0d6f'
+release = False
+
+if not release:
+    version = full_version
+    short_version += ".dev"
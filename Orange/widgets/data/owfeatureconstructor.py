@@ -15,6 +15,7 @@ import random
 from collections import namedtuple, OrderedDict
 from itertools import chain, count
 
+import numpy as np
 from PyQt4 import QtGui
 from PyQt4.QtGui import QSizePolicy
 from PyQt4.QtCore import Qt, pyqtSignal as Signal, pyqtProperty as Property
@@ -850,6 +851,195 @@ def make_lambda(expression, args, values):
     return eval(compile(exp, "<lambda>", "eval"), GLOBALS)
 
 
+class NotVectorizable(ValueError):
+    """Raised for expressions that cannot be evaluated on whole columns."""
+
+
+#: numpy functions that replace the functions from `math` and builtins,
+#: with the allowed numbers of arguments
+_VECTORIZED_FUNCTIONS = {
+    "abs": (np.abs, (1, )), "fabs": (np.abs, (1, )),
+    "float": (np.asarray, (1, )),
+    "sin": (np.sin, (1, )), "cos": (np.cos, (1, )), "tan": (np.tan, (1, )),
+    "asin": (np.arcsin, (1, )), "acos": (np.arccos, (1, )),
+    "atan": (np.arctan, (1, )), "atan2": (np.arctan2, (2, )),
+    "sinh": (np.sinh, (1, )), "cosh": (np.cosh, (1, )),
+    "tanh": (np.tanh, (1, )), "asinh": (np.arcsinh, (1, )),
+    "acosh": (np.arccosh, (1, )), "atanh": (np.arctanh, (1, )),
+    "exp": (np.exp, (1, )), "expm1": (np.expm1, (1, )),
+    "log": (np.log, (1, )), "log10": (np.log10, (1, )),
+    "log2": (np.log2, (1, )), "log1p": (np.log1p, (1, )),
+    "sqrt": (np.sqrt, (1, )), "pow": (np.power, (2, )),
+    "floor": (np.floor, (1, )), "ceil": (np.ceil, (1, )),
+    "trunc": (np.trunc, (1, )), "round": (np.round, (1, )),
+    "degrees": (np.degrees, (1, )), "radians": (np.radians, (1, )),
+    "hypot": (np.hypot, (2, )), "copysign": (np.copysign, (2, )),
+    "isnan": (np.isnan, (1, )), "isinf": (np.isinf, (1, )),
+    "isfinite": (np.isfinite, (1, )),
+    "min": (np.minimum, None), "max": (np.maximum, None),
+}
+
+_VECTORIZED_CONSTANTS = {"pi": math.pi, "e": math.e,
+                          "inf": float("inf"), "nan": float("nan")}
+
+_VECTORIZED_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv,
+                          ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+                          ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+
+class _Vectorizer:
+    """
+    Rewrite a validated expression into an expression on numpy arrays.
+
+    Arguments remain names, values of the constructed discrete variable
+    become their indices and string constants compared to discrete
+    arguments become indices of values. Functions are replaced by their
+    numpy counterparts, comparisons and boolean operators by element-wise
+    operations and conditional expressions by `where`. Anything else raises
+    :obj:`NotVectorizable`.
+    """
+    PREFIX = "_vectorized_"
+
+    def __init__(self, args, values):
+        self.args = dict(args)
+        self.values = {value: i for i, value in enumerate(values)}
+        self.globals = {}
+
+    def call(self, name, func, *args):
+        self.globals[self.PREFIX + name] = func
+        return ast.Call(func=ast.Name(id=self.PREFIX + name, ctx=ast.Load()),
+                        args=list(args), keywords=[])
+
+    @staticmethod
+    def constant(exp):
+        """Return the value of a constant node, or `exp` itself if it is
+        not a constant."""
+        etype = type(exp)
+        if etype == ast.Num:
+            return exp.n
+        elif etype == ast.Str:
+            return exp.s
+        elif sys.version_info >= (3, 4) and etype == ast.NameConstant or \
+                sys.version_info >= (3, 8) and etype == ast.Constant:
+            return exp.value
+        return exp
+
+    def is_boolean(self, exp):
+        etype = type(exp)
+        return etype in (ast.Compare, ast.BoolOp) or \
+            etype == ast.UnaryOp and isinstance(exp.op, ast.Not) or \
+            isinstance(self.constant(exp), bool)
+
+    def compared(self, exp, other):
+        """Return `exp` rewritten for comparison with `other`."""
+        value = self.constant(exp)
+        if isinstance(value, str) and type(other) == ast.Name:
+            var = self.args.get(other.id)
+            if var is not None and var.is_discrete:
+                try:
+                    return ast.Num(n=var.values.index(value))
+                except ValueError:
+                    return ast.Num(n=float("nan"))
+        return self(exp)
+
+    def __call__(self, exp):
+        etype = type(exp)
+        if etype in [ast.Expr, ast.Expression]:
+            return self(exp.body)
+        elif isinstance(self.constant(exp), (int, float)):
+            # includes booleans; numbers become floats, so numpy functions do
+            # not fail on integers (e.g. pow(2, -1))
+            value = self.constant(exp)
+            return exp if isinstance(value, bool) else ast.Num(n=float(value))
+        elif etype == ast.Name:
+            if exp.id in self.args:
+                return exp
+            elif exp.id in self.values:
+                return ast.Num(n=self.values[exp.id])
+            elif exp.id in _VECTORIZED_CONSTANTS:
+                return ast.Num(n=_VECTORIZED_CONSTANTS[exp.id])
+        elif etype == ast.BinOp and \
+                isinstance(exp.op, _VECTORIZED_OPERATORS):
+            return ast.BinOp(left=self(exp.left), op=exp.op,
+                             right=self(exp.right))
+        elif etype == ast.UnaryOp:
+            if isinstance(exp.op, ast.Not):
+                return self.call("not", np.logical_not, self(exp.operand))
+            elif isinstance(exp.op, _VECTORIZED_OPERATORS):
+                return ast.UnaryOp(op=exp.op, operand=self(exp.operand))
+        elif etype == ast.Compare and \
+                all(isinstance(op, _VECTORIZED_OPERATORS) for op in exp.ops):
+            operands = [exp.left] + exp.comparators
+            comparisons = [
+                ast.Compare(left=self.compared(left, right), ops=[op],
+                            comparators=[self.compared(right, left)])
+                for left, op, right in zip(operands, exp.ops, operands[1:])]
+            return self.reduce("and", np.logical_and, comparisons)
+        elif etype == ast.BoolOp and all(map(self.is_boolean, exp.values)):
+            if isinstance(exp.op, ast.And):
+                func = "and", np.logical_and
+            else:
+                func = "or", np.logical_or
+            return self.reduce(*func, values=list(map(self, exp.values)))
+        elif etype == ast.IfExp:
+            return self.call("where", np.where, self(exp.test),
+                             self(exp.body), self(exp.orelse))
+        elif etype == ast.Call and type(exp.func) == ast.Name and \
+                exp.func.id not in self.args and \
+                exp.func.id in _VECTORIZED_FUNCTIONS and \
+                not exp.keywords and \
+                not any(type(arg).__name__ == "Starred" for arg in exp.args) \
+                and not getattr(exp, "starargs", None) and \
+                not getattr(exp, "kwargs", None):
+            func, n_args = _VECTORIZED_FUNCTIONS[exp.func.id]
+            args = list(map(self, exp.args))
+            if n_args is None and len(args) >= 2:
+                return self.reduce(exp.func.id, func, args)
+            elif n_args is not None and len(args) in n_args:
+                return self.call(exp.func.id, func, *args)
+        raise NotVectorizable(exp)
+
+    def reduce(self, name, func, values):
+        result = values[0]
+        for value in values[1:]:
+            result = self.call(name, func, result, value)
+        return result
+
+
+def make_vectorized_lambda(expression, args, values):
+    """
+    Return a function that evaluates the expression on columns (numpy
+    arrays) of arguments, or `None` if the expression cannot be vectorized.
+
+    Parameters
+    ----------
+    expression : ast.Expression
+        A validated expression
+    args : List[Tuple[str, Orange.data.Variable]]
+        Names of arguments and the corresponding variables
+    values : List[str]
+        Names of values of the constructed discrete variable
+    """
+    if not all(var.is_primitive() for _, var in args):
+        return None
+    vectorizer = _Vectorizer(args, values)
+    try:
+        body = vectorizer(expression)
+    except NotVectorizable:
+        return None
+    arguments = dict(
+        args=[ast.arg(arg=name, annotation=None) for name, _ in args],
+        vararg=None, kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[])
+    if sys.version_info >= (3, 8):
+        arguments["posonlyargs"] = []
+    lambda_ = ast.Lambda(args=ast.arguments(**arguments), body=body)
+    exp = ast.Expression(body=lambda_)
+    ast.fix_missing_locations(exp)
+    GLOBALS = dict(vectorizer.globals)
+    GLOBALS["__builtins__"] = {}
+    return eval(compile(exp, "<lambda>", "eval"), GLOBALS)
+
+
 __ALLOWED = [
     "Ellipsis", "False", "None", "True", "abs", "all", "any", "acsii",
     "bin", "bool", "bytearray", "bytes", "chr", "complex", "dict",
@@ -883,19 +1073,47 @@ __GLOBALS.update({
 
 
 class FeatureFunc:
+    """
+    Compute the value of a constructed feature.
+
+    Tables are processed by columns with a vectorized version of the
+    expression (see :obj:`make_vectorized_lambda`), where the result is
+    unknown for rows with unknown arguments. Expressions that cannot be
+    vectorized are evaluated for each instance separately.
+    """
     def __init__(self, expression, args, values):
         self.expression = expression
         self.args = args
         self.values = values
         self.func = make_lambda(expression, [name for name, _ in args], values)
+        self.vectorized = make_vectorized_lambda(expression, args, values)
 
     def __call__(self, instance, *_):
         if isinstance(instance, Orange.data.Table):
+            if self.vectorized is not None:
+                return self._call_vectorized(instance)
             return [self(inst) for inst in instance]
         else:
             args = [instance[var] for _, var in self.args]
             return self.func(*args)
 
+    def _call_vectorized(self, data):
+        columns = []
+        for _, var in self.args:
+            if var in data.domain:
+                column, _ = data.get_column_view(var)
+            else:
+                column = Orange.data.Table.from_table(
+                    Orange.data.Domain([var]), data).X[:, 0]
+            columns.append(np.asarray(column, dtype=float))
+        with np.errstate(all="ignore"):
+            result = self.vectorized(*columns)
+        result = np.array(np.broadcast_to(result, (len(data), )),
+                          dtype=float)
+        if columns:
+            result[np.isnan(columns).any(axis=0)] = np.nan
+        return result
+
 
 def unique(seq):
     seen = set()
@@ -336,12 +336,12 @@ class OWRank(widget.OWWidget):
                 try:
                     self.measure_scores[index] = estimator(data)
                 except ValueError:
-                    self.measure_scores[index] = []
-                    for attr in data.domain.attributes:
-                        try:
-                            self.measure_scores[index].append(estimator(data,attr))
-                        except ValueError:
-                            self.measure_scores[index].append(None)
+                    try:
+                        scores = estimator.score_all(data)
+                    except ValueError:
+                        scores = np.full(len(data.domain.attributes), np.nan)
+                    self.measure_scores[index] = [
+                        None if np.isnan(score) else score for score in scores]
             else:
                 learner = meas.score
                 if isinstance(learner, Learner) and \
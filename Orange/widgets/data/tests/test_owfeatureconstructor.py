@@ -1,6 +1,9 @@
 import unittest
 import ast
 import sys
+from unittest.mock import Mock
+
+import numpy as np
 
 from Orange.data import (Table, Domain, StringVariable,
                          ContinuousVariable, DiscreteVariable)
@@ -11,7 +14,7 @@ from Orange.widgets.data.owfeatureconstructor import (DiscreteDescriptor,
                                                       construct_variables)
 
 from Orange.widgets.data.owfeatureconstructor import (
-    freevars, make_lambda, validate_exp
+    freevars, make_lambda, validate_exp, FeatureFunc, bind_variable
 )
 
 class FeatureConstructorTest(unittest.TestCase):
@@ -69,6 +72,69 @@ class FeatureConstructorTest(unittest.TestCase):
                              str(data[i * 50, "iris"]) + "_name")
 
 
+class FeatureFuncTest(unittest.TestCase):
+    def setUp(self):
+        self.data = Table("iris")
+        self.data.X[1, 0] = np.nan
+
+    def compute(self, expression, values=()):
+        desc = DiscreteDescriptor(name="f", expression=expression,
+                                  values=values, base_value=-1,
+                                  ordered=False) if values else \
+            ContinuousDescriptor(name="f", expression=expression,
+                                 number_of_decimals=2)
+        _, func = bind_variable(desc, self.data.domain.variables)
+        return func
+
+    def test_vectorized(self):
+        for expression, values in (
+                ("sepal_length * 2 + sqrt(petal_width) - pi", ()),
+                ("max(sepal_length, petal_length, 5) ** 2", ()),
+                ("1 < sepal_width <= 3 and not petal_length > 4", ()),
+                ("a if iris == 'Iris-setosa' else b", ("a", "b")),
+                ("sepal_length if iris != 'Iris-virginica' else -1", ()),
+                ("log(sepal_length) if sepal_width > 3 else 0", ()),
+                ("pow(2, -1) * sepal_length + 7 // 2", ())):
+            func = self.compute(expression, values)
+            self.assertIsNotNone(func.vectorized, expression)
+            vectorized = func(self.data)
+            expected = [func(inst) for inst in self.data]
+            np.testing.assert_almost_equal(vectorized[2:], expected[2:])
+            # rows with unknown arguments are unknown
+            if "sepal_length" in expression:
+                self.assertTrue(np.isnan(vectorized[1]))
+
+    def test_not_vectorized(self):
+        for expression in ("str(iris) + '_name'", "sepal_length and 1",
+                           "uniform(0, sepal_length)", "log(sepal_length, 2)",
+                           "sepal_length in (1, 2)"):
+            func = self.compute(expression)
+            self.assertIsNone(func.vectorized, expression)
+            self.assertEqual(len(func(self.data)), len(self.data))
+
+    def test_vectorized_errors(self):
+        func = self.compute("sepal_length * 2")
+        func.vectorized = Mock(side_effect=ValueError)
+        self.assertRaises(ValueError, func, self.data)
+
+    def test_constant(self):
+        func = self.compute("42")
+        np.testing.assert_equal(func(self.data), [42] * len(self.data))
+
+    def test_from_table(self):
+        func = self.compute("sepal_length + petal_length")
+        var = ContinuousVariable("f", compute_value=func)
+        domain = Domain([var])
+        data = self.data[::10]
+        np.testing.assert_almost_equal(
+            Table.from_table(domain, data).X[:, 0],
+            data.X[:, 0] + data.X[:, 2])
+        domain = Domain(self.data.domain.attributes[:2])
+        np.testing.assert_almost_equal(
+            Table.from_table(Domain([var]), Table(domain, data)).X[:, 0],
+            np.nan)
+
+
 class TestTools(unittest.TestCase):
     def test_free_vars(self):
         stmt = ast.parse("foo", "", "single")
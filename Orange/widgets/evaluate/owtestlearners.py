@@ -1,6 +1,8 @@
 import sys
 import abc
+import copy
 import functools
+import threading
 
 from collections import OrderedDict, namedtuple
 
@@ -12,6 +14,7 @@ from PyQt4.QtGui import (
     QStyledItemDelegate
 )
 from PyQt4.QtCore import Qt, QSize
+from PyQt4.QtCore import pyqtSlot as Slot
 
 from Orange.data import Table
 from Orange.data.sql.table import SqlTable, AUTO_DL_LIMIT
@@ -24,6 +27,9 @@ from Orange.evaluation import scoring, Results
 from Orange.preprocess.preprocess import Preprocess
 from Orange.preprocess import RemoveNaNClasses
 from Orange.widgets import widget, gui, settings
+from Orange.widgets.utils.concurrent import (
+    ThreadExecutor, FutureWatcher, CancelledError, methodinvoke
+)
 
 
 Input = namedtuple(
@@ -57,6 +63,68 @@ regression_stats.headers, regression_stats.scores = zip(*(
 ))
 
 
+class EvaluationTask:
+    """
+    Evaluation of a single learner that runs in a worker thread.
+
+    The evaluation checks for cancellation each time it reports progress,
+    that is, after fitting a model on a fold.
+    """
+    def __init__(self, learner):
+        self.learner = learner
+        self.progress = 0.0
+        self.future = None
+        self.watcher = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancel the evaluation; if it is already running, it stops after
+        the current fold."""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def run(self, evaluate, report_progress):
+        """Evaluate the learner with `evaluate` and return the results and
+        the list of warnings."""
+        def callback(progress):
+            if self._cancelled.is_set():
+                raise CancelledError()
+            report_progress(self, progress)
+
+        warnings = []
+        results = evaluate([self.learner], callback, warnings)
+        return results, warnings
+
+
+class SharedSplits:
+    """
+    Evaluation with the data splits of a sampling method, which are
+    computed once and used for all learners.
+
+    `sampler` is a :obj:`Orange.evaluation.Results` constructed without
+    learners. The splits are stored as lists, except for leave-one-out,
+    whose splits are cheap to generate but take quadratic space.
+    """
+    def __init__(self, sampler, data):
+        sampler.setup_indices(data, data)
+        if not isinstance(sampler, Orange.evaluation.LeaveOneOut):
+            sampler.indices = list(sampler.indices)
+        self.sampler = sampler
+        self.data = data
+
+    def __call__(self, learners, callback, warnings):
+        warnings.extend(getattr(self.sampler, "warnings", ()))
+        results = copy.copy(self.sampler)
+        results.learners = learners
+        results.failed = [False] * len(learners)
+        results.callback = callback
+        # fit on the stored splits instead of computing them again
+        results.setup_indices = lambda train_data, test_data: None
+        results.fit(self.data, self.data)
+        return results
+
+
 class ItemDelegate(QStyledItemDelegate):
     def sizeHint(self, *args):
         size = super().sizeHint(*args)
@@ -177,6 +245,13 @@ class OWTestLearners(widget.OWWidget):
 
         #: An Ordered dictionary with current inputs and their testing results.
         self.learners = OrderedDict()
+        #: Evaluations that are running or waiting, by input keys
+        self._tasks = {}
+        #: The evaluation function for the current data and settings
+        self._evaluate = None
+        #: Evaluations whose progress is shown in the progress bar
+        self._progress_tasks = []
+        self._executor = ThreadExecutor(self)
 
         sbox = gui.vBox(self.controlArea, "Sampling")
         rbox = gui.radioButtons(
@@ -249,6 +324,7 @@ class OWTestLearners(widget.OWWidget):
         """
         if key in self.learners and learner is None:
             # Removed
+            self._cancel([key])
             del self.learners[key]
         else:
             self.learners[key] = Input(learner, None, None)
@@ -352,9 +428,57 @@ class OWTestLearners(widget.OWWidget):
     def _param_changed(self):
         self._invalidate()
 
+    def _evaluation_function(self):
+        """
+        Return a function that evaluates a list of learners with the current
+        settings, or `None` if the data does not allow the evaluation.
+
+        The function is called with the learners, a progress callback and a
+        list to which the warnings are appended. Data splits of resampling
+        methods are computed here, once for all learners.
+        """
+        data, test_data = self.data, self.test_data
+        rstate = 42
+        common_args = dict(store_data=True, preprocessor=self.preprocessor)
+        folds = self.NFolds[self.n_folds]
+        if self.resampling == OWTestLearners.KFold:
+            if len(data) < folds:
+                self.error(4, "Number of folds exceeds the data size")
+                return None
+            sampler = Orange.evaluation.CrossValidation(
+                data, None, k=folds, random_state=rstate, warnings=[],
+                **common_args)
+        elif self.resampling == OWTestLearners.LeaveOneOut:
+            sampler = Orange.evaluation.LeaveOneOut(data, None, **common_args)
+        elif self.resampling == OWTestLearners.ShuffleSplit:
+            sampler = Orange.evaluation.ShuffleSplit(
+                data, None, n_resamples=self.NRepeats[self.n_repeats],
+                train_size=self.SampleSizes[self.sample_size] / 100,
+                test_size=None, stratified=self.shuffle_stratified,
+                random_state=rstate, **common_args)
+        elif self.resampling == OWTestLearners.TestOnTrain:
+            return lambda learners, callback, _: \
+                Orange.evaluation.TestOnTrainingData(
+                    data, learners, callback=callback, **common_args)
+        elif self.resampling == OWTestLearners.TestOnTest:
+            return lambda learners, callback, _: \
+                Orange.evaluation.TestOnTestData(
+                    data, test_data, learners, callback=callback,
+                    **common_args)
+        else:
+            assert False
+        try:
+            return SharedSplits(sampler, data)
+        except (RuntimeError, ValueError) as e:
+            self.error(2, str(e))
+            return None
+
     def _update_results(self):
         """
-        Run/evaluate the learners.
+        Start the evaluation of learners without results.
+
+        Each learner is evaluated in a separate task in a worker thread;
+        results are shown as the tasks finish.
         """
         self.warning([1, 2])
         self.error([2, 4])
@@ -374,8 +498,7 @@ class OWTestLearners(widget.OWWidget):
 
         # items in need of an update
         items = [(key, slot) for key, slot in self.learners.items()
-                 if slot.results is None]
-        learners = [slot.learner for _, slot in items]
+                 if slot.results is None and key not in self._tasks]
         if len(items) == 0:
             return
 
@@ -384,75 +507,101 @@ class OWTestLearners(widget.OWWidget):
             self.warning(1, "Test data is present but unused. "
                             "Select 'Test on test data' to use it.")
 
-        rstate = 42
-        def update_progress(finished):
-            self.progressBarSet(100 * finished)
-        common_args = dict(
-            store_data=True,
-            preprocessor=self.preprocessor,
-            callback=update_progress)
-        self.setStatusMessage("Running")
-
-        with self.progressBar():
-            try:
-                folds = self.NFolds[self.n_folds]
-                if self.resampling == OWTestLearners.KFold:
-                    if len(self.data) < folds:
-                        self.error(4, "Number of folds exceeds the data size")
-                        return
-                    warnings = []
-                    results = Orange.evaluation.CrossValidation(
-                        self.data, learners, k=folds,
-                        random_state=rstate, warnings=warnings, **common_args)
-                    if warnings:
-                        self.warning(2, warnings[0])
-                elif self.resampling == OWTestLearners.LeaveOneOut:
-                    results = Orange.evaluation.LeaveOneOut(
-                        self.data, learners, **common_args)
-                elif self.resampling == OWTestLearners.ShuffleSplit:
-                    train_size = self.SampleSizes[self.sample_size] / 100
-                    results = Orange.evaluation.ShuffleSplit(
-                        self.data, learners,
-                        n_resamples=self.NRepeats[self.n_repeats],
-                        train_size=train_size, test_size=None,
-                        stratified=self.shuffle_stratified,
-                        random_state=rstate, **common_args)
-                elif self.resampling == OWTestLearners.TestOnTrain:
-                    results = Orange.evaluation.TestOnTrainingData(
-                        self.data, learners, **common_args)
-                elif self.resampling == OWTestLearners.TestOnTest:
-                    results = Orange.evaluation.TestOnTestData(
-                        self.data, self.test_data, learners, **common_args)
-                else:
-                    assert False
-            except (RuntimeError, ValueError) as e:
-                self.error(2, str(e))
-                self.setStatusMessage("")
+        if self._evaluate is None:
+            self._evaluate = self._evaluation_function()
+            if self._evaluate is None:
                 return
+        evaluate = self._evaluate
 
-        learner_key = {slot.learner: key for key, slot in self.learners.items()}
-        for learner, result in zip(learners, results.split_by_model()):
-            stats = None
-            if class_var.is_discrete:
-                scorers = classification_stats.scores
-            elif class_var.is_continuous:
-                scorers = regression_stats.scores
+        if not self._tasks:
+            self._progress_tasks = []
+            self.progressBarInit(processEvents=None)
+        self.setStatusMessage("Running")
+        report_progress = methodinvoke(self, "_on_task_progress",
+                                       (object, float))
+        for key, slot in items:
+            task = EvaluationTask(slot.learner)
+            task.future = self._executor.submit(
+                task.run, evaluate, report_progress)
+            task.watcher = FutureWatcher(task.future)
+            task.watcher.finished.connect(
+                functools.partial(self._on_task_finished, key, task))
+            self._tasks[key] = task
+            self._progress_tasks.append(task)
+
+    @Slot(object, float)
+    def _on_task_progress(self, task, progress):
+        task.progress = progress
+        if task in self._progress_tasks:
+            self.progressBarSet(
+                100 * sum(t.progress for t in self._progress_tasks) /
+                len(self._progress_tasks),
+                processEvents=None)
+
+    def _on_task_finished(self, key, task):
+        if self._tasks.get(key) is not task:
+            # cancelled or replaced by a new evaluation
+            return
+        del self._tasks[key]
+        task.progress = 1
+        try:
+            results, warnings = task.future.result()
+        except CancelledError:
+            return
+        except (RuntimeError, ValueError) as e:
+            self.error(2, str(e))
+        except Exception as e:  # pylint: disable=broad-except
+            self.learners[key] = self.learners[key]._replace(
+                results=Try.Fail(e), stats=None)
+        else:
+            if warnings:
+                self.warning(2, warnings[0])
+            self.learners[key] = self.learners[key]._replace(
+                **self._learner_results(results))
+        self._update_stats_model()
+        if not self._tasks:
+            self._evaluation_finished()
+            self._send_outputs()
+
+    def _learner_results(self, results):
+        # Return the results and the stats for a single learner
+        class_var = self.data.domain.class_var
+        result = next(results.split_by_model())
+        stats = None
+        if class_var.is_discrete:
+            scorers = classification_stats.scores
+        elif class_var.is_continuous:
+            scorers = regression_stats.scores
+        else:
+            scorers = None
+        if scorers:
+            ex = result.failed[0]
+            if ex:
+                stats = [Try.Fail(ex)] * len(scorers)
+                result = Try.Fail(ex)
             else:
-                scorers = None
-            if scorers:
-                ex = result.failed[0]
-                if ex:
-                    stats = [Try.Fail(ex)] * len(scorers)
-                    result = Try.Fail(ex)
-                else:
-                    stats = [Try(lambda: score(result)) for score in scorers]
-                    result = Try.Success(result)
-            key = learner_key[learner]
-            self.learners[key] = \
-                self.learners[key]._replace(results=result, stats=stats)
+                stats = [Try(lambda: score(result)) for score in scorers]
+                result = Try.Success(result)
+        return dict(results=result, stats=stats)
 
+    def _evaluation_finished(self):
+        self._progress_tasks = []
+        self.progressBarFinished(processEvents=None)
         self.setStatusMessage("")
 
+    def _cancel(self, which=None):
+        # Cancel the evaluations for `which` input keys (all if None)
+        if which is None:
+            which = list(self._tasks)
+        running = bool(self._tasks)
+        for key in which:
+            task = self._tasks.pop(key, None)
+            if task is not None:
+                task.cancel()
+                self._progress_tasks.remove(task)
+        if running and not self._tasks:
+            self._evaluation_finished()
+
     def _update_header(self):
         # Set the correct horizontal header labels on the results_model.
         headers = ["Method"]
@@ -568,6 +717,8 @@ class OWTestLearners(widget.OWWidget):
         # (if None then all learner results are invalidated)
         if which is None:
             which = self.learners.keys()
+            self._evaluate = None
+        self._cancel(which)
 
         model = self.view.model()
         statmodelkeys = [model.item(row, 0).data(Qt.UserRole)
@@ -594,6 +745,10 @@ class OWTestLearners(widget.OWWidget):
         self._update_stats_model()
         self._update_results()
         self._update_stats_model()
+        if not self._tasks:
+            self._send_outputs()
+
+    def _send_outputs(self):
         valid = [slot for slot in self.learners.values()
                  if slot.results is not None and slot.results.success]
         if valid:
@@ -610,6 +765,11 @@ class OWTestLearners(widget.OWWidget):
         self.send("Evaluation Results", combined)
         self.send("Predictions", predictions)
 
+    def onDeleteWidget(self):
+        self._cancel()
+        self._executor.shutdown(wait=False)
+        super().onDeleteWidget()
+
     def send_report(self):
         """Report on the testing schema and results"""
         if not self.data or not self.learners:
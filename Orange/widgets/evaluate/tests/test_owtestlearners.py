@@ -0,0 +1,150 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import numpy as np
+from PyQt4.QtGui import QApplication
+
+import Orange.evaluation
+from Orange.data import Table
+from Orange.classification import MajorityLearner
+from Orange.widgets.evaluate.owtestlearners import OWTestLearners
+from Orange.widgets.tests.base import GuiTest
+
+
+class BlockingLearner(MajorityLearner):
+    """Majority learner that waits for an event before fitting"""
+    name = "blocking"
+
+    def __init__(self, event):
+        super().__init__()
+        self.event = event
+
+    def fit_storage(self, dat):
+        self.event.wait(10)
+        return super().fit_storage(dat)
+
+
+class FailingLearner(MajorityLearner):
+    name = "failing"
+
+    def fit_storage(self, dat):
+        raise ValueError("failing learner")
+
+
+class TestOWTestLearners(GuiTest):
+    def setUp(self):
+        self.widget = OWTestLearners()
+        self.widget.send = Mock()
+        self.data = Table("iris")
+        self.event = threading.Event()
+
+    def tearDown(self):
+        self.event.set()
+        self.widget.onDeleteWidget()
+
+    def wait_until(self, condition, timeout=10):
+        end = time.time() + timeout
+        while not condition():
+            self.assertLess(time.time(), end, "timeout")
+            QApplication.processEvents()
+            time.sleep(0.005)
+
+    def wait_until_finished(self):
+        self.wait_until(lambda: not self.widget._tasks)
+
+    def sent(self, name):
+        values = [args[1] for args, _ in self.widget.send.call_args_list
+                  if args[0] == name]
+        return values[-1] if values else None
+
+    def test_results_arrive_one_at_a_time(self):
+        widget = self.widget
+        widget.set_train_data(self.data)
+        widget.set_learner(MajorityLearner(), 1)
+        widget.set_learner(BlockingLearner(self.event), 2)
+        self.wait_until(lambda: widget.learners[1].results is not None)
+        self.assertTrue(widget.learners[1].results.success)
+        self.assertIsNone(widget.learners[2].results)
+        self.assertIn(2, widget._tasks)
+        model = widget.view.model()
+        self.assertTrue(model.item(0, 1).text())
+        self.assertIsNone(self.sent("Evaluation Results"))
+
+        self.event.set()
+        self.wait_until_finished()
+        self.assertTrue(widget.learners[2].results.success)
+        self.assertEqual(
+            self.sent("Evaluation Results").learner_names,
+            ["majority", "blocking"])
+
+    def test_cancel_on_new_data(self):
+        widget = self.widget
+        widget.set_train_data(self.data)
+        widget.set_learner(BlockingLearner(self.event), 1)
+        task = widget._tasks[1]
+        data = self.data[::2]
+        widget.set_train_data(data)
+        self.assertTrue(task._cancelled.is_set())
+        self.assertIsNot(widget._tasks[1], task)
+
+        self.event.set()
+        self.wait_until_finished()
+        self.wait_until(task.future.done)
+        self.assertEqual(len(widget.learners[1].results.value.actual),
+                         len(data))
+
+    def test_cancel_on_settings_change(self):
+        widget = self.widget
+        widget.set_train_data(self.data)
+        widget.set_learner(BlockingLearner(self.event), 1)
+        task = widget._tasks[1]
+        widget.n_folds = 0
+        widget.kfold_changed()
+        self.assertTrue(task._cancelled.is_set())
+
+        self.event.set()
+        self.wait_until_finished()
+        results = widget.learners[1].results.value
+        self.assertEqual(len(results.folds), widget.NFolds[0])
+
+    def test_delete_while_running(self):
+        widget = self.widget
+        widget.set_train_data(self.data)
+        widget.set_learner(BlockingLearner(self.event), 1)
+        task = widget._tasks[1]
+        n_sent = widget.send.call_count
+        widget.onDeleteWidget()
+        self.assertFalse(widget._tasks)
+        self.assertTrue(task._cancelled.is_set())
+
+        self.event.set()
+        self.wait_until(task.future.done)
+        QApplication.processEvents()
+        self.assertIsNone(widget.learners[1].results)
+        self.assertEqual(widget.send.call_count, n_sent)
+
+    def test_error_in_one_learner(self):
+        widget = self.widget
+        widget.set_train_data(self.data)
+        widget.set_learner(FailingLearner(), 1)
+        widget.set_learner(MajorityLearner(), 2)
+        self.wait_until_finished()
+        self.assertFalse(widget.learners[1].results.success)
+        self.assertTrue(widget.learners[2].results.success)
+        self.assertEqual(self.sent("Evaluation Results").learner_names,
+                         ["majority"])
+
+    def test_splits_are_shared(self):
+        widget = self.widget
+        setup_indices = Orange.evaluation.CrossValidation.setup_indices
+        with patch.object(Orange.evaluation.CrossValidation, "setup_indices",
+                          autospec=True, side_effect=setup_indices) as setup:
+            widget.set_train_data(self.data)
+            widget.set_learner(MajorityLearner(), 1)
+            widget.set_learner(MajorityLearner(), 2)
+            self.wait_until_finished()
+            self.assertEqual(setup.call_count, 1)
+        results = [widget.learners[key].results.value for key in (1, 2)]
+        np.testing.assert_equal(results[0].row_indices,
+                                results[1].row_indices)
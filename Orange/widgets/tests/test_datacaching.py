@@ -0,0 +1,118 @@
+import gc
+import weakref
+from unittest import TestCase
+
+import numpy as np
+
+from Orange.data import Table
+from Orange.statistics.basic_stats import DomainBasicStats
+from Orange.widgets.utils import datacaching
+from Orange.widgets.utils.datacaching import getCached, setCached, delCached
+from Orange.widgets.utils.scaling import ScaleData
+
+
+class TestDataCaching(TestCase):
+    def setUp(self):
+        self.data = Table("iris")
+        self.calls = 0
+
+    def compute(self, data, factor=1):
+        self.calls += 1
+        return data.X.sum() * factor
+
+    def compute_array(self, n):
+        self.calls += 1
+        return np.zeros(n)
+
+    def test_cached(self):
+        data = self.data
+        res = getCached(data, self.compute, (data, ))
+        self.assertEqual(getCached(data, self.compute, (data, )), res)
+        self.assertEqual(self.calls, 1)
+
+        # different arguments
+        getCached(data, self.compute, (data, 2))
+        self.assertEqual(self.calls, 2)
+
+        # equal, but different table
+        getCached(Table(data), self.compute, (data, ))
+        self.assertEqual(self.calls, 3)
+
+    def test_invalidated_by_changes(self):
+        data = self.data
+        getCached(data, self.compute, (data, ))
+        data.X[0, 0] += 1
+        getCached(data, self.compute, (data, ))
+        self.assertEqual(self.calls, 2)
+
+        data[0][0] = 1
+        getCached(data, self.compute, (data, ))
+        self.assertEqual(self.calls, 3)
+
+    def test_changed_in_place(self):
+        data = self.data
+        stats = getCached(data, DomainBasicStats, (data, ))
+        self.assertEqual(stats[0].max, 7.9)
+        data.X[:, 0] = 100
+        stats = getCached(data, DomainBasicStats, (data, ))
+        self.assertEqual(stats[0].max, 100)
+
+    def test_set_cached(self):
+        data = self.data
+        self.assertIsNone(getCached(data, "name"))
+        setCached(data, "name", 42)
+        self.assertEqual(getCached(data, "name"), 42)
+        delCached(data, "name")
+        self.assertIsNone(getCached(data, "name"))
+        self.assertIsNone(getCached(None, "name"))
+
+    def test_does_not_keep_data(self):
+        data = Table("iris")
+        getCached(data, DomainBasicStats, (data, ))
+        ref = weakref.ref(data)
+        n_results = len(datacaching._cache)
+        del data
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(len(datacaching._cache), n_results - 1)
+
+    def test_bounded(self):
+        data = self.data
+        cache = datacaching._cache
+        maxbytes = cache.maxbytes
+        try:
+            cache.maxbytes = 1000
+            for _ in range(2):
+                getCached(data, self.compute_array, (1000, ))
+            self.assertEqual(self.calls, 2)
+            for _ in range(2):
+                getCached(data, self.compute_array, (10, ))
+            self.assertEqual(self.calls, 3)
+            self.assertLessEqual(cache.currbytes, 1000)
+        finally:
+            cache.maxbytes = maxbytes
+            cache.clear()
+
+    def test_shared_scaling(self):
+        data = self.data
+        scale1, scale2 = ScaleData(), ScaleData()
+        for scale in (scale1, scale2):
+            # settings are set on instances by widgets
+            scale.jitter_size, scale.jitter_continuous = 10, False
+            scale.set_data(data)
+        self.assertIs(scale1.domain_data_stat, scale2.domain_data_stat)
+        self.assertIs(scale1.original_data, scale2.original_data)
+        self.assertIs(scale1.scaled_data, scale2.scaled_data)
+        self.assertFalse(scale1.scaled_data.flags.writeable)
+
+        # jittering does not change the shared scaled data
+        no_jittering = scale1.no_jittering_scaled_data.copy()
+        scale2.jitter_size = 20
+        scale2.rescale_data()
+        self.assertIsNot(scale1.scaled_data, scale2.scaled_data)
+        np.testing.assert_equal(scale2.no_jittering_scaled_data, no_jittering)
+
+        scale1.flip_attribute(data.domain[0].name)
+        np.testing.assert_almost_equal(
+            scale1.no_jittering_scaled_data[0], 1 - no_jittering[0])
+        np.testing.assert_equal(scale2.no_jittering_scaled_data, no_jittering)
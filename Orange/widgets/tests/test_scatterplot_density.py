@@ -6,7 +6,8 @@ from numpy.random import random, randint, uniform
 
 from PyQt4.QtGui import QColor
 
-from Orange.widgets.utils.classdensity import compute_density, grid_sample
+from Orange.widgets.utils.classdensity import compute_density, grid_sample, \
+    aggregate_points
 
 
 class TestScatterplotDensity(TestCase):
@@ -52,3 +53,19 @@ class TestScatterplotDensity(TestCase):
         sample = grid_sample(x_data, y_data, k=30, g=10)
         self.assertIn(0, sample)
         self.assertIn(1, sample)
+
+
+    def test_aggregate_points(self):
+        x_data = [0.1, 0.2, 0.3, 3.9, 3.8, 5]
+        y_data = [0.1, 0.2, 0.3, 3.9, 0.1, 1]
+        color_ids = [0, 0, 1, 1, 1, 0]
+        rgb = [[255, 0, 0], [0, 0, 255]]
+        img = aggregate_points(0, 4, 0, 4, 4, x_data, y_data, color_ids, rgb)
+        self.assertEqual(img.shape, (4, 4, 4))
+        # the most frequent color; the point at (5, 1) is out of range
+        np.testing.assert_equal(img[0, 0], [255, 0, 0, 255])
+        np.testing.assert_equal(img[3, 3, :3], [0, 0, 255])
+        np.testing.assert_equal(img[3, 0, :3], [0, 0, 255])
+        self.assertEqual(img[3, 3, 3], img[3, 0, 3])
+        self.assertLess(img[3, 3, 3], 255)
+        self.assertEqual(np.count_nonzero(img[:, :, 3]), 3)
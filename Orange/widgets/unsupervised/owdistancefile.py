@@ -2,7 +2,7 @@ import os, sys
 
 from PyQt4 import QtGui, QtCore
 
-from Orange.misc import DistMatrix
+from Orange.misc import DistMatrix, CondensedDistMatrix
 from Orange.widgets import widget, gui
 from Orange.data import get_sample_datasets_dir
 from Orange.widgets.utils.filedialogs import RecentPathsWComboMixin
@@ -115,7 +115,11 @@ class OWDistanceFile(widget.OWWidget, RecentPathsWComboMixin):
         self.loaded_file = ""
 
         try:
-            distances = DistMatrix.from_file(fn)
+            distances = DistMatrix.from_file(fn, mmap=True)
+            if isinstance(distances, CondensedDistMatrix):
+                # the widgets on the output expect a square matrix, which is
+                # built in memory from the mapped file
+                distances = distances.full()
             self.loaded_file = fn
         except Exception as exc:
             err_value = str(exc)
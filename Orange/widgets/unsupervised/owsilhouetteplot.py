@@ -6,7 +6,6 @@ from xml.sax.saxutils import escape
 from types import SimpleNamespace as namespace
 
 import numpy
-import sklearn.metrics
 
 from PyQt4 import QtGui, QtCore
 from PyQt4.QtCore import Qt, QEvent, QRectF, QSizeF, pyqtSignal as Signal
@@ -15,6 +14,8 @@ import pyqtgraph as pg
 
 import Orange.data
 import Orange.distance
+from Orange.evaluation.clustering import distance_silhouette
+from Orange.misc import CondensedDistMatrix
 
 from Orange.widgets import widget, gui, settings
 from Orange.widgets.utils import itemmodels
@@ -216,7 +217,8 @@ class OWSilhouettePlot(widget.OWWidget):
 
         if self._matrix is None and self._effective_data is not None:
             _, metric = self.Distances[self.distance_idx]
-            self._matrix = numpy.asarray(metric(self._effective_data))
+            self._matrix = CondensedDistMatrix(
+                metric(self._effective_data, condensed=True))
 
         labelvar = self.cluster_var_model[self.cluster_var_idx]
         labels, _ = self.data.get_column_view(labelvar)
@@ -224,8 +226,7 @@ class OWSilhouettePlot(widget.OWWidget):
         _, counts = numpy.unique(labels, return_counts=True)
         if numpy.count_nonzero(counts) >= 2:
             self.error(1, "")
-            silhouette = sklearn.metrics.silhouette_samples(
-                self._matrix, labels, metric="precomputed")
+            silhouette = distance_silhouette(self._matrix, labels)
         else:
             self.error(1, "Need at least 2 clusters with non zero counts")
             labels = silhouette = None
@@ -33,6 +33,45 @@ def class_density_image(min_x, max_x, min_y, max_y, resolution, x_data, y_data,
     density_img.setZValue(-1)
     return density_img
 
+# aggregate points into a resolution*resolution raster; each pixel is painted
+# with the most frequent color of its points and is more opaque where there
+# are more points (on a logarithmic scale); points outside the range are
+# ignored
+def aggregate_points(min_x, max_x, min_y, max_y, resolution,
+                     x_data, y_data, color_ids, rgb_colors, max_alpha=255):
+    x_data = np.asarray(x_data, dtype=float)
+    y_data = np.asarray(y_data, dtype=float)
+    color_ids = np.asarray(color_ids, dtype=int)
+    rgb_colors = np.asarray(rgb_colors)
+    n_colors = len(rgb_colors)
+    inside = (x_data >= min_x) & (x_data <= max_x) & \
+        (y_data >= min_y) & (y_data <= max_y)
+    pixels = []
+    for data, low, high in ((x_data, min_x, max_x), (y_data, min_y, max_y)):
+        scaled = (data[inside] - low) * (resolution / ((high - low) or 1))
+        pixels.append(np.clip(scaled.astype(int), 0, resolution - 1))
+    cells = (pixels[0] * resolution + pixels[1]) * n_colors + \
+        color_ids[inside]
+    counts = np.bincount(cells, minlength=resolution ** 2 * n_colors)
+    counts = counts.reshape(resolution, resolution, n_colors)
+    total = counts.sum(axis=2)
+    img = np.zeros((resolution, resolution, 4), dtype=np.uint8)
+    img[:, :, :3] = rgb_colors[counts.argmax(axis=2)]
+    if total.size and total.max():
+        img[:, :, 3] = np.round(
+            max_alpha * np.log1p(total) / np.log1p(total.max()))
+    return img
+
+
+# compute the image with points aggregated into a raster
+def point_density_image(min_x, max_x, min_y, max_y, resolution,
+                        x_data, y_data, color_ids, rgb_colors, max_alpha=255):
+    img = aggregate_points(min_x, max_x, min_y, max_y, resolution,
+                           x_data, y_data, color_ids, rgb_colors, max_alpha)
+    density_img = ImageItem(img, autoLevels=False)
+    density_img.setRect(QRectF(min_x, min_y, max_x - min_x, max_y - min_y))
+    return density_img
+
 # call C++ implementation
 def compute_density(x_grid, y_grid, x_data, y_data, rgb_data):
     fun = lib.compute_density
@@ -1,35 +1,81 @@
+"""
+Results of computations on tables (statistics, scaled columns, ...) that are
+shared between widgets.
+
+Results are stored in a single cache that is bounded by memory. They are
+keyed by the identity of the table, its :obj:`~Orange.data.Table.checksum`,
+the function and its arguments, so a table that is changed, also in place,
+gets new results. The checksum is computed on each request, in time linear
+in the size of the data, which is cheap compared to the cached computations.
+The cache does not keep tables alive, and results for a table are removed
+when the table is deleted.
+"""
 from collections import defaultdict
 from operator import itemgetter
+from threading import Lock
+from weakref import WeakKeyDictionary, finalize
+
+from Orange.misc.cache import LRUCache, identity_key
+
+#: The largest total size of cached results in bytes
+MAX_CACHE_BYTES = 2 ** 28
+
+_cache = LRUCache(maxsize=None, maxbytes=MAX_CACHE_BYTES)
+_tokens = WeakKeyDictionary()
+_tokens_lock = Lock()
+
+
+def _discard_results(token):
+    _cache.discard(lambda key: key[0][0] is token)
+
+
+def _data_key(data):
+    # A token stands for the table in keys; unlike the table's id, it cannot
+    # be reused by another table while it is in the cache
+    with _tokens_lock:
+        token = _tokens.get(data)
+        if token is None:
+            token = _tokens[data] = object()
+            finalize(data, _discard_results, token)
+    return token, data.checksum()
+
+
+def _key(data, funct, params, kwparams):
+    data_key = _data_key(data)
+    params = tuple(data_key[0] if param is data else param
+                   for param in params)
+    return data_key, funct, identity_key(*params, **(kwparams or {}))
+
 
 def getCached(data, funct, params=(), kwparams=None):
+    """
+    Return the result of `funct(*params, **kwparams)` for `data`, computing
+    it if it is not cached. If `funct` is a string, return the value stored
+    by :obj:`setCached` or `None`.
+    """
     if data is None:
         return None
-    info = getattr(data, "__data_cache", None)
-    if info is not None:
-        if funct in data.info:
-            return data.info(funct)
-    else:
-        info = data.info = {}
+    key = _key(data, funct, params, kwparams)
+    res = _cache.get(key, _cache)
+    if res is not _cache:
+        return res
     if isinstance(funct, str):
         return None
     if kwparams is None:
         kwparams = {}
-    info[funct] = res = funct(*params, **kwparams)
+    _cache[key] = res = funct(*params, **kwparams)
     return res
 
 
 def setCached(data, name, value):
     if data is None:
         return
-    info = getattr(data, "__data_cache", None)
-    if info is None:
-        info = data.info = {}
-    info[name] = value
+    _cache[_key(data, name, (), None)] = value
+
 
 def delCached(data, name):
-    info = data is not None and getattr(data, "__data_cache")
-    if info and name in info:
-        del info[name]
+    if data is not None:
+        _cache.pop(_key(data, name, (), None))
 
 
 class DataHintsCache(object):
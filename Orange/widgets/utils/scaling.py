@@ -7,7 +7,7 @@ import numpy as np
 import Orange
 from Orange.statistics.basic_stats import DomainBasicStats
 from Orange.widgets.settings import Setting
-from Orange.widgets.utils.datacaching import getCached, setCached
+from Orange.widgets.utils.datacaching import getCached
 
 
 # noinspection PyBroadException
@@ -48,6 +48,79 @@ def get_variable_value_indices(variable, sort_values=True):
     return {value: i for i, value in enumerate(values)}
 
 
+def _scale_columns(data, sort_values=True):
+    """
+    Return the values of the table (with values of discrete variables
+    reordered if `sort_values` is set), the values scaled to [0, 1] and
+    indicators of defined values, with a row for each variable.
+    """
+    domain_data_stat = getCached(data, DomainBasicStats, (data,))
+    no_jittering_data = np.c_[data.X, data.Y].T
+    valid_data_array = ~np.isnan(no_jittering_data)
+    original_data = no_jittering_data.copy()
+
+    for index in range(len(data.domain)):
+        attr = data.domain[index]
+        if attr.is_discrete:
+            # see if the values for discrete attributes have to be resorted
+            variable_value_indices = get_variable_value_indices(attr,
+                                                                sort_values)
+            if 0 in [i == variable_value_indices[attr.values[i]]
+                     for i in range(len(attr.values))]:
+                # make the array a contiguous, otherwise the putmask
+                # function does not work
+                line = no_jittering_data[index].copy()
+                indices = [np.where(line == val, 1, 0)
+                           for val in range(len(attr.values))]
+                for i in range(len(attr.values)):
+                    np.putmask(line, indices[i],
+                               variable_value_indices[attr.values[i]])
+                no_jittering_data[index] = line   # save the changed array
+                original_data[index] = line     # reorder also the values in the original data
+            no_jittering_data[index] = ((no_jittering_data[index] * 2.0 + 1.0)
+                                        / float(2 * len(attr.values)))
+
+        elif attr.is_continuous:
+            diff = domain_data_stat[index].max - domain_data_stat[
+                index].min or 1     # if all values are the same then prevent division by zero
+            no_jittering_data[index] = (no_jittering_data[index] -
+                                        domain_data_stat[index].min) / diff
+
+    for arr in (original_data, no_jittering_data, valid_data_array):
+        arr.setflags(write=False)
+    return original_data, no_jittering_data, valid_data_array
+
+
+def _jitter_columns(data, sort_values, jitter_size, jitter_continuous,
+                    jitter_seed):
+    """
+    Return the scaled values from :obj:`_scale_columns` with jittering.
+    """
+    scaled_data = getCached(data, _scale_columns, (data, sort_values))[1]
+    scaled_data = scaled_data.copy()
+
+    # Random generators for jittering
+    random = np.random.RandomState(seed=jitter_seed)
+    rand_seeds = random.random_integers(0, 2 ** 30 - 1,
+                                        size=len(data.domain))
+    for index, rseed in zip(list(range(len(data.domain))), rand_seeds):
+        # Need to use a different seed for each feature
+        random = np.random.RandomState(seed=rseed)
+        attr = data.domain[index]
+        if attr.is_discrete:
+            scaled_data[index] += (jitter_size / (50.0 * max(1, len(attr.values)))) * \
+                                  (random.rand(len(data)) - 0.5)
+
+        elif attr.is_continuous and jitter_continuous:
+            scaled_data[index] += jitter_size / 50.0 * (0.5 - random.rand(len(data)))
+            scaled_data[index] = np.absolute(scaled_data[index])       # fix values below zero
+            ind = np.where(scaled_data[index] > 1.0, 1, 0)     # fix values above 1
+            np.putmask(scaled_data[index], ind, 2.0 - np.compress(ind, scaled_data[index]))
+
+    scaled_data.setflags(write=False)
+    return scaled_data
+
+
 class ScaleData:
     jitter_size = Setting(10)
     jitter_continuous = Setting(False)
@@ -107,8 +180,6 @@ class ScaleData:
         full_data = data
         self.raw_data = data
 
-        len_data = data and len(data) or 0
-
         self.attribute_names = [attr.name for attr in full_data.domain]
         self.attribute_flip_info = {}
 
@@ -140,77 +211,15 @@ class ScaleData:
         if 'no_data' in args:
             return
 
-        # the original_data, no_jittering_scaled_data and validArray are arrays
-        # that we can cache so that other visualization widgets don't need to
-        # compute it. The scaled_data on the other hand has to be computed for
-        # each widget separately because of different
-        # jitter_continuous and jitter_size values
-        if getCached(data, "visualizationData"):
-            self.original_data, self.no_jittering_scaled_data, self.valid_data_array = getCached(data,
-                                                                                                 "visualizationData")
-        else:
-            no_jittering_data = np.c_[full_data.X, full_data.Y].T
-            valid_data_array = ~np.isnan(no_jittering_data)
-            original_data = no_jittering_data.copy()
-
-            for index in range(len(data.domain)):
-                attr = data.domain[index]
-                if attr.is_discrete:
-                    # see if the values for discrete attributes have to be resorted
-                    variable_value_indices = get_variable_value_indices(data.domain[index],
-                                                                        sort_values_for_discrete_attrs)
-                    if 0 in [i == variable_value_indices[attr.values[i]]
-                             for i in range(len(attr.values))]:
-                        # make the array a contiguous, otherwise the putmask
-                        # function does not work
-                        line = no_jittering_data[index].copy()
-                        indices = [np.where(line == val, 1, 0)
-                                   for val in range(len(attr.values))]
-                        for i in range(len(attr.values)):
-                            np.putmask(line, indices[i],
-                                          variable_value_indices[attr.values[i]])
-                        no_jittering_data[index] = line   # save the changed array
-                        original_data[index] = line     # reorder also the values in the original data
-                    no_jittering_data[index] = ((no_jittering_data[index] * 2.0 + 1.0)
-                                                / float(2 * len(attr.values)))
-
-                elif attr.is_continuous:
-                    diff = self.domain_data_stat[index].max - self.domain_data_stat[
-                        index].min or 1     # if all values are the same then prevent division by zero
-                    no_jittering_data[index] = (no_jittering_data[index] -
-                                                self.domain_data_stat[index].min) / diff
-
-            self.original_data = original_data
-            self.no_jittering_scaled_data = no_jittering_data
-            self.valid_data_array = valid_data_array
-
-        if data:
-            setCached(data, "visualizationData",
-                      (self.original_data, self.no_jittering_scaled_data,
-                       self.valid_data_array))
-
-        # compute the scaled_data arrays
-        scaled_data = self.no_jittering_scaled_data
-
-        # Random generators for jittering
-        random = np.random.RandomState(seed=self.jitter_seed)
-        rand_seeds = random.random_integers(0, 2 ** 30 - 1,
-                                            size=len(data.domain))
-        for index, rseed in zip(list(range(len(data.domain))), rand_seeds):
-            # Need to use a different seed for each feature
-            random = np.random.RandomState(seed=rseed)
-            attr = data.domain[index]
-            if attr.is_discrete:
-                scaled_data[index] += (self.jitter_size / (50.0 * max(1, len(attr.values)))) * \
-                                      (random.rand(len(full_data)) - 0.5)
-
-            elif attr.is_continuous and self.jitter_continuous:
-                scaled_data[index] += self.jitter_size / 50.0 * (0.5 - random.rand(len(full_data)))
-                scaled_data[index] = np.absolute(scaled_data[index])       # fix values below zero
-                ind = np.where(scaled_data[index] > 1.0, 1, 0)     # fix values above 1
-                np.putmask(scaled_data[index], ind, 2.0 - np.compress(ind, scaled_data[index]))
-
-        self.scaled_data = scaled_data[:, :len_data]
+        # the arrays are computed once for each table and shared among
+        # widgets; they are read-only
+        self.original_data, self.no_jittering_scaled_data, \
+            self.valid_data_array = getCached(
+                data, _scale_columns, (data, sort_values_for_discrete_attrs))
+        self.scaled_data = getCached(
+            data, _jitter_columns,
+            (data, sort_values_for_discrete_attrs, self.jitter_size,
+             self.jitter_continuous, self.jitter_seed))
 
     def scale_example_value(self, instance, index):
         """
@@ -246,7 +255,10 @@ class ScaleData:
         if self.data_domain[attr_name].is_continuous:
             self.attr_values[attr_name] = [-self.attr_values[attr_name][1], -self.attr_values[attr_name][0]]
 
+        # the arrays are shared with other widgets, so they are copied
+        self.scaled_data = self.scaled_data.copy()
         self.scaled_data[index] = 1 - self.scaled_data[index]
+        self.no_jittering_scaled_data = self.no_jittering_scaled_data.copy()
         self.no_jittering_scaled_data[index] = 1 - self.no_jittering_scaled_data[index]
         return 1
 
@@ -318,18 +330,20 @@ class ScaleScatterPlotData(ScaleData):
             xdata = self.scaled_data[xattr_index]
             ydata = self.scaled_data[yattr_index]
 
+        # scaled_data is read-only, so views (copy=False) are not changed
+        # in place
         if self.data_domain[xattr_index].is_discrete:
-            xdata *= len(self.data_domain[xattr_index].values)
-            xdata -= 0.5
+            xdata = xdata * len(self.data_domain[xattr_index].values) - 0.5
         else:
-            xdata *= self.attr_values[xattr][1] - self.attr_values[xattr][0]
-            xdata += float(self.attr_values[xattr][0])
+            xdata = xdata * (self.attr_values[xattr][1] -
+                             self.attr_values[xattr][0]) + \
+                float(self.attr_values[xattr][0])
         if self.data_domain[yattr_index].is_discrete:
-            ydata *= len(self.data_domain[yattr_index].values)
-            ydata -= 0.5
+            ydata = ydata * len(self.data_domain[yattr_index].values) - 0.5
         else:
-            ydata *= self.attr_values[yattr][1] - self.attr_values[yattr][0]
-            ydata += float(self.attr_values[yattr][0])
+            ydata = ydata * (self.attr_values[yattr][1] -
+                             self.attr_values[yattr][0]) + \
+                float(self.attr_values[yattr][0])
         return xdata, ydata
 
     getXYDataPositions = get_xy_data_positions
@@ -426,8 +440,8 @@ class ScaleScatterPlotData(ScaleData):
         xarray = self.no_jittering_scaled_data[attr_indices[0]]
         yarray = self.no_jittering_scaled_data[attr_indices[1]]
         if jitter_size > 0.0:
-            xarray += (np.random.random(len(xarray))-0.5)*jitter_size
-            yarray += (np.random.random(len(yarray))-0.5)*jitter_size
+            xarray = xarray + (np.random.random(len(xarray))-0.5)*jitter_size
+            yarray = yarray + (np.random.random(len(yarray))-0.5)*jitter_size
         if class_list != None:
             data = np.compress(valid_data, np.array((xarray, yarray, class_list)), axis = 1)
         else:
@@ -459,9 +473,9 @@ class ScaleScatterPlotData(ScaleData):
         yarray = self.no_jittering_scaled_data[attr_indices[1]]
         zarray = self.no_jittering_scaled_data[attr_indices[2]]
         if jitter_size > 0.0:
-            xarray += (np.random.random(len(xarray))-0.5)*jitter_size
-            yarray += (np.random.random(len(yarray))-0.5)*jitter_size
-            zarray += (np.random.random(len(zarray))-0.5)*jitter_size
+            xarray = xarray + (np.random.random(len(xarray))-0.5)*jitter_size
+            yarray = yarray + (np.random.random(len(yarray))-0.5)*jitter_size
+            zarray = zarray + (np.random.random(len(zarray))-0.5)*jitter_size
         if class_list != None:
             data = np.compress(valid_data, np.array((xarray, yarray, zarray, class_list)), axis = 1)
         else:
@@ -11,7 +11,7 @@ from pyqtgraph.graphicsItems.LegendItem import LegendItem, ItemSample
 from pyqtgraph.graphicsItems.ScatterPlotItem import ScatterPlotItem
 from pyqtgraph.graphicsItems.TextItem import TextItem
 from pyqtgraph.Point import Point
-from PyQt4.QtCore import Qt, QObject, QEvent, QRectF, QPointF
+from PyQt4.QtCore import Qt, QObject, QEvent, QRectF, QPointF, QTimer
 from PyQt4 import QtCore
 from PyQt4.QtGui import QApplication, QColor, QPen, QBrush, QToolTip
 from PyQt4.QtGui import QStaticText, QPainterPath, QTransform, QPinchGesture, QPainter
@@ -467,6 +467,10 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
     class_density = Setting(False)
     resolution = 256
 
+    #: If more points are visible, they are aggregated into a raster;
+    #: zooming in shows the individual points again
+    max_points = 100000
+
     CurveSymbols = np.array("o x t + d s ?".split())
     MinShapeSize = 6
     DarkerValue = 120
@@ -486,6 +490,7 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         self.replot = self.plot_widget.replot
         ScaleScatterPlotData.__init__(self)
         self.density_img = None
+        self.raster_img = None
         self.scatterplot_item = None
         self.scatterplot_item_sel = None
 
@@ -496,10 +501,16 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         self.shown_x = ""
         self.shown_y = ""
         self.pen_colors = self.brush_colors = None
+        self.color_ids = self.palette_rgb = None
 
         self.valid_data = None  # np.ndarray
         self.selection = None  # np.ndarray
         self.n_points = 0
+        self.xy_data = None  # coordinates of valid points
+        self.data_indices = None  # row indices of valid points
+        # indices of valid points shown as points, or None if all are shown
+        self.shown = None
+        self._shown_range = None
 
         self.gui = OWPlotGUI(self)
         self.continuous_palette = ContinuousPaletteGenerator(
@@ -525,17 +536,28 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         self._tooltip_delegate = HelpEventDelegate(self.help_event)
         self.plot_widget.scene().installEventFilter(self._tooltip_delegate)
 
+        # points are updated after the view stops changing
+        self._lod_timer = QTimer(self.plot_widget)
+        self._lod_timer.setSingleShot(True)
+        self._lod_timer.setInterval(100)
+        self._lod_timer.timeout.connect(self.update_level_of_detail)
+        self.view_box.sigRangeChanged.connect(
+            lambda *_: self._lod_timer.start())
+
     def new_data(self, data, subset_data=None, **args):
         self.plot_widget.clear()
 
         self.density_img = None
+        self.raster_img = None
         self.scatterplot_item = None
         self.scatterplot_item_sel = None
         self.labels = []
         self.selection = None
         self.valid_data = None
+        self.shown = None
 
-        self.subset_indices = set(e.id for e in subset_data) if subset_data else None
+        self.subset_indices = np.array(subset_data.ids) if subset_data \
+            else None
 
         self.set_data(data, **args)
 
@@ -544,6 +566,14 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         if self.density_img:
             self.plot_widget.removeItem(self.density_img)
             self.density_img = None
+        self._remove_points()
+        self.set_axis_title("bottom", "")
+        self.set_axis_title("left", "")
+
+    def _remove_points(self):
+        if self.raster_img:
+            self.plot_widget.removeItem(self.raster_img)
+            self.raster_img = None
         if self.scatterplot_item:
             self.plot_widget.removeItem(self.scatterplot_item)
             self.scatterplot_item = None
@@ -553,8 +583,11 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         for label in self.labels:
             self.plot_widget.removeItem(label)
         self.labels = []
-        self.set_axis_title("bottom", "")
-        self.set_axis_title("left", "")
+
+    def _shown_data(self, data):
+        """Return the elements of `data` (with an element for each valid
+        point) that correspond to points that are shown individually."""
+        return data if self.shown is None else data[self.shown]
 
     def update_data(self, attr_x, attr_y, reset_view=True):
         self.master.warning(self.ID_MISSING_COORDS)
@@ -605,24 +638,58 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
             else:
                 self.set_labels(axis, None)
 
-        color_data, brush_data = self.compute_colors()
-        color_data_sel, brush_data_sel = self.compute_colors_sel()
-        size_data = self.compute_sizes()
-        shape_data = self.compute_symbols()
+        self.xy_data = x_data, y_data
+        self.data_indices = np.flatnonzero(self.valid_data)
+        if len(self.data_indices) != self.original_data.shape[1]:
+            self.master.information(
+                self.ID_MISSING_COORDS,
+                "Points with missing '{}' or '{}' are not displayed".
+                format(self.shown_x, self.shown_y))
 
+        self.compute_colors()
         if self.should_draw_density():
-            rgb_data = [pen.color().getRgb()[:3] for pen in color_data]
+            pen_rgb = np.array([pen.color().getRgb()[:3]
+                                for pen in self.pen_colors])
             self.density_img = classdensity.class_density_image(
                 min_x, max_x, min_y, max_y, self.resolution,
-                x_data, y_data, rgb_data)
+                x_data, y_data, pen_rgb[self.color_ids])
             self.plot_widget.addItem(self.density_img)
 
-        data_indices = np.flatnonzero(self.valid_data)
-        if len(data_indices) != self.original_data.shape[1]:
-            self.master.information(
-                self.ID_MISSING_COORDS,
-                "Points with missing '{}' or '{}' are not displayed".
-                format(self.shown_x, self.shown_y))
+        self._create_points()
+        self.make_legend()
+        self.plot_widget.replot()
+
+    def _create_points(self):
+        """
+        Add the items for points. If more than :obj:`max_points` points are
+        visible, they are aggregated into a raster of the visible range,
+        which replaces the individual points.
+        """
+        x_data, y_data = self.xy_data
+        [min_x, max_x], [min_y, max_y] = self._shown_range = \
+            self.view_box.viewRange()
+        self.shown = None
+        if self.n_points > self.max_points:
+            self.shown = np.flatnonzero(
+                (x_data >= min_x) & (x_data <= max_x) &
+                (y_data >= min_y) & (y_data <= max_y))
+            if len(self.shown) > self.max_points:
+                self.raster_img = classdensity.point_density_image(
+                    min_x, max_x, min_y, max_y, self.resolution,
+                    x_data[self.shown], y_data[self.shown],
+                    self.color_ids[self.shown], self.palette_rgb)
+                self.plot_widget.addItem(self.raster_img)
+                self.shown = self.shown[:0]
+
+        color_data, brush_data = self.compute_colors(keep_colors=True)
+        color_data_sel, brush_data_sel = self.compute_colors_sel()
+        size_data = self.compute_sizes()
+        shape_data = self.compute_symbols()
+        x_data, y_data, data_indices, color_data, brush_data, \
+            color_data_sel, brush_data_sel, size_data, shape_data = map(
+                self._shown_data,
+                (x_data, y_data, self.data_indices, color_data, brush_data,
+                 color_data_sel, brush_data_sel, size_data, shape_data))
 
         self.scatterplot_item = ScatterPlotItem(
             x=x_data, y=y_data, data=data_indices,
@@ -640,8 +707,19 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         self.scatterplot_item.sigClicked.connect(self.select_by_click)
 
         self.update_labels()
-        self.make_legend()
-        self.plot_widget.replot()
+
+    def update_points(self):
+        """Recreate the items for points, e.g. after the view changes."""
+        if self.scatterplot_item is None:
+            return
+        self._remove_points()
+        self._create_points()
+
+    def update_level_of_detail(self):
+        """Show the points or the raster for the current view range."""
+        if self.n_points > self.max_points and \
+                self.view_box.viewRange() != self._shown_range:
+            self.update_points()
 
     def can_draw_density(self):
         if self.data_domain is None:
@@ -701,6 +779,7 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
     def update_sizes(self):
         if self.scatterplot_item:
             size_data = self.compute_sizes()
+            size_data = self._shown_data(size_data)
             self.scatterplot_item.setSize(size_data)
             self.scatterplot_item_sel.setSize(size_data + SELECTION_WIDTH)
 
@@ -729,16 +808,26 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
             p.setCosmetic(True)
             return p
 
-        pens = [QPen(Qt.NoPen),
-                make_pen(QColor(255, 190, 0, 255), SELECTION_WIDTH + 1.)]
+        pens = np.array([QPen(Qt.NoPen),
+                         make_pen(QColor(255, 190, 0, 255),
+                                  SELECTION_WIDTH + 1.)], dtype=object)
         if self.selection is not None:
-            pen = [pens[a] for a in self.selection[self.valid_data]]
+            pen = pens[self.selection[self.valid_data].astype(int)]
         else:
-            pen = [pens[0]] * self.n_points
-        brush = [QBrush(QColor(255, 255, 255, 0))] * self.n_points
+            pen = pens[np.zeros(self.n_points, dtype=int)]
+        brush = np.empty(self.n_points, dtype=object)
+        brush.fill(QBrush(QColor(255, 255, 255, 0)))
         return pen, brush
 
     def compute_colors(self, keep_colors=False):
+        """
+        Return arrays of pens and brushes for valid points.
+
+        Points share pens and brushes from palettes, `pen_colors` and
+        `brush_colors` (a transparent and an opaque brush for each color);
+        `color_ids` contains the index of the color of each point and
+        `palette_rgb` the RGB values of colors.
+        """
         if not keep_colors:
             self.pen_colors = self.brush_colors = None
         color_index = self.get_color_index()
@@ -748,83 +837,70 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
             p.setCosmetic(True)
             return p
 
-        subset = None
-        if self.subset_indices:
-            subset = np.array([ex.id in self.subset_indices
-                               for ex in self.raw_data[self.valid_data]])
-
-        if color_index == -1:  # same color
-            color = self.plot_widget.palette().color(OWPalette.Data)
-            pen = [make_pen(color, 1.5)] * self.n_points
-            if subset is not None:
-                brush = [(QBrush(QColor(128, 128, 128, 0)),
-                          QBrush(QColor(128, 128, 128, self.alpha_value)))[s]
-                         for s in subset]
-            else:
-                brush = [QBrush(QColor(128, 128, 128, self.alpha_value))] \
-                        * self.n_points
-            return pen, brush
-
-        c_data = self.original_data[color_index, self.valid_data]
-        if self.data_domain[color_index].is_continuous:
-            if self.pen_colors is None:
-                self.scale = DiscretizedScale(np.nanmin(c_data), np.nanmax(c_data))
-                c_data -= self.scale.offset
-                c_data /= self.scale.width
-                c_data = np.floor(c_data) + 0.5
-                c_data /= self.scale.bins
-                c_data = np.clip(c_data, 0, 1)
-                palette = self.continuous_palette
-                self.pen_colors = palette.getRGB(c_data)
-                self.brush_colors = np.hstack(
-                    [self.pen_colors,
-                     np.full((self.n_points, 1), self.alpha_value)])
-                self.pen_colors *= 100 // self.DarkerValue
-                self.pen_colors = [make_pen(QColor(*col), 1.5)
-                                   for col in self.pen_colors.tolist()]
-            if subset is not None:
-                self.brush_colors[:, 3] = 0
-                self.brush_colors[subset, 3] = self.alpha_value
+        if self.pen_colors is None:
+            if color_index == -1:  # same color
+                color = self.plot_widget.palette().color(OWPalette.Data)
+                self.color_ids = np.zeros(self.n_points, dtype=int)
+                self.palette_rgb = np.array([[128, 128, 128]])
+                pens = [make_pen(color, 1.5)]
             else:
-                self.brush_colors[:, 3] = self.alpha_value
-            pen = self.pen_colors
-            brush = np.array([QBrush(QColor(*col))
-                              for col in self.brush_colors.tolist()])
+                c_data = self.original_data[color_index, self.valid_data]
+                nans = np.isnan(c_data)
+                if self.data_domain[color_index].is_continuous:
+                    self.scale = DiscretizedScale(np.nanmin(c_data),
+                                                  np.nanmax(c_data))
+                    bins = self.scale.bins
+                    c_data = np.floor(
+                        (c_data - self.scale.offset) / self.scale.width)
+                    c_data = np.clip(c_data, 0, bins)
+                    c_data[nans] = bins + 1
+                    self.palette_rgb = self.continuous_palette.getRGB(
+                        np.r_[np.minimum((np.arange(bins + 1) + 0.5) / bins,
+                                         1), np.nan])
+                    pens = [make_pen(QColor(*col), 1.5) for col in
+                            (self.palette_rgb * (100 // self.DarkerValue))
+                            .tolist()]
+                else:
+                    palette = self.discrete_palette
+                    n_colors = palette.number_of_colors
+                    c_data = np.where(nans, n_colors, c_data)
+                    self.palette_rgb = np.r_[
+                        palette.getRGB(np.arange(n_colors)), [[128, 128, 128]]]
+                    pens = [make_pen(QColor(*col).darker(self.DarkerValue), 1.5)
+                            for col in self.palette_rgb.tolist()]
+                self.color_ids = c_data.astype(int)
+            self.pen_colors = np.empty(len(pens), dtype=object)
+            self.pen_colors[:] = pens
+            self.brush_colors = np.empty((len(pens), 2), dtype=object)
+            for brushes, (r, g, b) in zip(self.brush_colors,
+                                          self.palette_rgb.tolist()):
+                brushes[:] = [QBrush(QColor(r, g, b, 0)),
+                              QBrush(QColor(r, g, b, self.alpha_value))]
+
+        if self.subset_indices is not None:
+            ids = self.raw_data.ids[self.valid_data]
+            opaque = np.in1d(ids, self.subset_indices).astype(int)
         else:
-            if self.pen_colors is None:
-                palette = self.discrete_palette
-                n_colors = palette.number_of_colors
-                c_data = c_data.copy()
-                c_data[np.isnan(c_data)] = n_colors
-                c_data = c_data.astype(int)
-                colors = np.r_[palette.getRGB(np.arange(n_colors)),
-                               [[128, 128, 128]]]
-                pens = np.array(
-                    [make_pen(QColor(*col).darker(self.DarkerValue), 1.5)
-                     for col in colors])
-                self.pen_colors = pens[c_data]
-                self.brush_colors = np.array([
-                    [QBrush(QColor(0, 0, 0, 0)),
-                     QBrush(QColor(col[0], col[1], col[2], self.alpha_value))]
-                    for col in colors])
-                self.brush_colors = self.brush_colors[c_data]
-            if subset is not None:
-                brush = np.where(
-                    subset,
-                    self.brush_colors[:, 1], self.brush_colors[:, 0])
-            else:
-                brush = self.brush_colors[:, 1]
-            pen = self.pen_colors
+            opaque = 1
+        pen = self.pen_colors[self.color_ids]
+        brush = self.brush_colors[self.color_ids, opaque]
         return pen, brush
 
     def update_colors(self, keep_colors=False):
         if self.scatterplot_item:
             pen_data, brush_data = self.compute_colors(keep_colors)
             pen_data_sel, brush_data_sel = self.compute_colors_sel(keep_colors)
-            self.scatterplot_item.setPen(pen_data, update=False, mask=None)
-            self.scatterplot_item.setBrush(brush_data, mask=None)
-            self.scatterplot_item_sel.setPen(pen_data_sel, update=False, mask=None)
-            self.scatterplot_item_sel.setBrush(brush_data_sel, mask=None)
+            if self.raster_img is not None and not keep_colors:
+                self.update_points()
+            else:
+                self.scatterplot_item.setPen(
+                    self._shown_data(pen_data), update=False, mask=None)
+                self.scatterplot_item.setBrush(
+                    self._shown_data(brush_data), mask=None)
+                self.scatterplot_item_sel.setPen(
+                    self._shown_data(pen_data_sel), update=False, mask=None)
+                self.scatterplot_item_sel.setBrush(
+                    self._shown_data(brush_data_sel), mask=None)
             if not keep_colors:
                 self.make_legend()
 
@@ -850,13 +926,14 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
             return
         if not self.labels:
             self.create_labels()
+        rows = self._shown_data(self.data_indices)
         label_column = self.raw_data.get_column_view(self.attr_label)[0]
         formatter = self.raw_data.domain[self.attr_label].str_val
-        label_data = map(formatter, label_column)
+        label_data = map(formatter, label_column[rows])
         black = pg.mkColor(0, 0, 0)
         if self.label_only_selected:
             for label, text, selected \
-                    in zip(self.labels, label_data, self.selection):
+                    in zip(self.labels, label_data, self.selection[rows]):
                 label.setText(text if selected else "", black)
         else:
             for label, text in zip(self.labels, label_data):
@@ -890,7 +967,7 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
 
     def update_shapes(self):
         if self.scatterplot_item:
-            shape_data = self.compute_symbols()
+            shape_data = self._shown_data(self.compute_symbols())
             self.scatterplot_item.setSymbol(shape_data)
         self.make_legend()
 
@@ -990,10 +1067,12 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
 
     def select_by_rectangle(self, value_rect):
         if self.scatterplot_item is not None:
-            points = [point
-                      for point in self.scatterplot_item.points()
-                      if value_rect.contains(QPointF(point.pos()))]
-            self.select(points)
+            # also selects points that are aggregated into a raster
+            rect = value_rect.normalized()
+            x_data, y_data = self.xy_data
+            inside = (x_data >= rect.left()) & (x_data <= rect.right()) & \
+                (y_data >= rect.top()) & (y_data <= rect.bottom())
+            self.select_indices(self.data_indices[inside])
 
     def unselect_all(self):
         self.selection = None
@@ -1003,6 +1082,9 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         self.master.selection_changed()
 
     def select(self, points):
+        self.select_indices([p.data() for p in points])
+
+    def select_indices(self, indices):
         # noinspection PyArgumentList
         if self.raw_data is None:
             return
@@ -1010,7 +1092,6 @@ class OWScatterPlotGraph(gui.OWComponent, ScaleScatterPlotData):
         if self.selection is None or not keys & (
                 Qt.ShiftModifier + Qt.ControlModifier + Qt.AltModifier):
             self.selection = np.full(len(self.raw_data), False, dtype=np.bool)
-        indices = [p.data() for p in points]
         if keys & Qt.AltModifier:
             self.selection[indices] = False
         elif keys & Qt.ControlModifier:
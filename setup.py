@@ -74,6 +74,9 @@ ENTRY_POINTS = {
     "gui_scripts": (
         "orange-canvas = Orange.canvas.__main__:main",
     ),
+    "console_scripts": (
+        "orange-run = Orange.canvas.scheme.headless:main",
+    ),
 }
 
 